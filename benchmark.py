@@ -0,0 +1,231 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import statistics
+import datetime
+import subprocess
+import tracemalloc
+import config
+import driver_banco
+import database
+import migracoes
+import cache_referencia
+import dados_sinteticos
+import rastreabilidade
+import previsao_oferta
+import rotacao
+from pool_conexoes import PoolConexoes, ConexaoPool
+from utils import registrar_erro
+
+# Importa cx_Oracle do config
+cx_Oracle = config.cx_Oracle
+
+# --- Benchmark de Carregadores e Relatórios ---
+# Uso: AGRO_BENCHMARK_DSN=localhost:1521/XEPDB1 python benchmark.py --escalas 1000,10000,100000
+# Para cada escala, o banco de benchmark é esvaziado e populado com dados_sinteticos (mesma semente e data base =
+# mesmas linhas); cada caso roda `repeticoes` vezes com os caches da aplicação vazios. Tempo = melhor execução;
+# pico de memória = uma execução extra sob tracemalloc (que deixa o Python mais lento, por isso à parte).
+# Cada resultado é anexado em JSON Lines com o commit, para comparar versões com --comparar <commit> (só contra
+# execuções com a mesma semente, data base e driver).
+
+ESCALAS_PADRAO = (1_000, 10_000, 100_000, 1_000_000)
+DATA_BASE_PADRAO = datetime.date(2025, 1, 1) # Fixa: com a data de hoje, os mesmos dados mudariam a cada dia
+ARQUIVO_RESULTADOS = os.path.join("benchmarks", "resultados.jsonl")
+PAGINAS_MERCADO = 50 # Páginas percorridas nos casos de mercado (o comprador raramente vai além)
+AMOSTRA_RASTREABILIDADE = 200
+
+# --- Casos (cada um recebe a conexão e a base e retorna as linhas processadas) ---
+
+def _caso_carregar_plantios(conexao, base):
+    return len(database.carregar_plantios_produtos(conexao))
+
+def _caso_iterar_plantios(conexao, base):
+    return sum(1 for _ in database.iterar_plantios_produtos(conexao, estrito=True))
+
+def _paginar_mercado(conexao, filtros):
+    linhas = 0; chave = None
+    for _ in range(PAGINAS_MERCADO):
+        ofertas, chave = database.pesquisar_mercado(conexao, filtros, apos=chave)
+        linhas += len(ofertas)
+        if chave is None: break
+    return linhas
+
+def _caso_mercado(conexao, base):
+    return _paginar_mercado(conexao, {})
+
+def _caso_mercado_cultura(conexao, base):
+    return _paginar_mercado(conexao, {"cultura": ["Alface", "alface"], "somente_certificados": True})
+
+def _caso_calendario(conexao, base):
+    return len(database.carregar_calendario_colheitas(conexao))
+
+def _amostra_plantios(base, quantidade):
+    rng = random.Random(f"{base.semente}:amostra")
+    talhoes = base.talhoes()
+    return [f"SL{rng.choice(talhoes)[0][2:]}{rng.randrange(base.plantios_por_talhao):03d}" for _ in range(quantidade)]
+
+def _caso_rastreabilidade_individual(conexao, base):
+    """Como a tela de relatório: um lote por vez."""
+    ids = _amostra_plantios(base, 20)
+    for id_plantio in ids:
+        for dados in rastreabilidade.coletar_dados(conexao, database.carregar_plantios_produtos(conexao, {"ids": [id_plantio]})):
+            rastreabilidade.renderizar_relatorio(dados)
+    return len(ids)
+
+def _caso_rastreabilidade_lote(conexao, base):
+    plantios = database.carregar_plantios_produtos(conexao, {"ids": set(_amostra_plantios(base, AMOSTRA_RASTREABILIDADE))})
+    return sum(1 for dados in rastreabilidade.coletar_dados(conexao, plantios) if rastreabilidade.renderizar_relatorio(dados))
+
+def _caso_analise_rotacao(conexao, base):
+    return len(rotacao.analisar_rotacao(rotacao.obter_indice(conexao)))
+
+def _caso_previsao(conexao, base):
+    previsao = previsao_oferta.calcular_previsao(conexao)
+    return int(previsao.oferta.size) if previsao is not None else 0
+
+CASOS = {
+    "carregar_plantios_produtos": _caso_carregar_plantios,
+    "iterar_plantios_produtos": _caso_iterar_plantios,
+    "mercado_paginas": _caso_mercado,
+    "mercado_filtro_cultura": _caso_mercado_cultura,
+    "calendario_colheitas": _caso_calendario,
+    "rastreabilidade_individual": _caso_rastreabilidade_individual,
+    "rastreabilidade_lote": _caso_rastreabilidade_lote,
+    "analise_rotacao": _caso_analise_rotacao,
+    "previsao_oferta": _caso_previsao,
+}
+
+# --- Execução ---
+
+def _limpar_caches():
+    cache_referencia.cache.invalidar(); rotacao.invalidar()
+
+def medir(caso, conexao, base, repeticoes=3, medir_memoria=True):
+    """Roda um caso e retorna {segundos, segundos_mediana, pico_mb, linhas, linhas_por_s}."""
+    funcao = CASOS[caso]; tempos = []; linhas = 0
+    for _ in range(repeticoes):
+        _limpar_caches()
+        inicio = time.perf_counter()
+        linhas = funcao(conexao, base)
+        tempos.append(time.perf_counter() - inicio)
+    pico_mb = None
+    if medir_memoria:
+        _limpar_caches()
+        tracemalloc.start()
+        try: funcao(conexao, base); pico_mb = tracemalloc.get_traced_memory()[1] / 2**20
+        finally: tracemalloc.stop()
+    melhor = min(tempos)
+    return {"segundos": melhor, "segundos_mediana": statistics.median(tempos), "pico_mb": pico_mb,
+            "linhas": linhas, "linhas_por_s": linhas / melhor if melhor else None}
+
+def _commit_atual():
+    """(hash curto, árvore com alterações não commitadas?) do repositório, ou ("desconhecido", None)."""
+    pasta = os.path.dirname(os.path.abspath(__file__))
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=pasta, capture_output=True, text=True, check=True).stdout.strip()
+        sujo = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=pasta,
+                                   capture_output=True, text=True, check=True).stdout.strip())
+        return commit, sujo
+    except (OSError, subprocess.CalledProcessError): return "desconhecido", None
+
+def conectar_banco_benchmark():
+    """Conexão com o banco de benchmark (AGRO_BENCHMARK_*), nunca com o de produção."""
+    if not driver_banco.disponivel(): registrar_erro("Nenhum driver de banco disponível (ver AGRO_DRIVER)."); return None
+    if not config.BENCHMARK_DSN:
+        registrar_erro("Defina AGRO_BENCHMARK_DSN com um banco local descartável: o benchmark apaga todas as tabelas."); return None
+    if config.BENCHMARK_DSN == driver_banco.dsn_aplicacao() and config.BENCHMARK_USER == config.ORACLE_USER:
+        registrar_erro("AGRO_BENCHMARK_DSN/USER apontam para o banco da aplicação; use um banco separado."); return None
+    try:
+        conexao = ConexaoPool(PoolConexoes(config.BENCHMARK_USER, config.BENCHMARK_PASSWORD, config.BENCHMARK_DSN, minimo=1, maximo=2))
+    except cx_Oracle.DatabaseError as e: registrar_erro(f"Erro ao conectar ao banco de benchmark: {e}", erro=e, operacao="benchmark"); return None
+    if not migracoes.aplicar_migracoes(conexao): conexao.close(); return None
+    return conexao
+
+def executar(conexao, escalas, casos, semente=42, data_base=DATA_BASE_PADRAO, repeticoes=3, medir_memoria=True, arquivo=ARQUIVO_RESULTADOS):
+    """Roda os casos em cada escala, imprime a tabela e anexa os resultados em `arquivo`. Retorna a lista de resultados."""
+    commit, sujo = _commit_atual()
+    comum = {"commit": commit, "alteracoes_locais": sujo, "quando": datetime.datetime.now().isoformat(timespec="seconds"),
+             "python": platform.python_version(), "driver": driver_banco.descricao(), "semente": semente}
+    resultados = []
+    for escala in escalas:
+        base = dados_sinteticos.BaseSintetica(semente=semente, data_base=data_base, **dados_sinteticos.contagens_para_escala(escala))
+        print(f"\n=== Escala: {escala} plantios ({base.produtores} produtores, data base {base.data_base:%d/%m/%Y}) ===")
+        if not dados_sinteticos.limpar_banco(conexao): return resultados
+        inicio = time.perf_counter()
+        contagem = dados_sinteticos.popular_banco(conexao, base)
+        if contagem is None: return resultados
+        carga_s = time.perf_counter() - inicio
+        print(f"Carga: {sum(contagem.values())} linhas em {carga_s:.1f} s ({contagem})")
+        print(f"{'Caso':<28} {'Melhor s':>10} {'Mediana s':>10} {'Pico MB':>9} {'Linhas':>9} {'Linhas/s':>11}")
+        for caso in casos:
+            if caso == "previsao_oferta" and previsao_oferta.np is None: continue
+            medicao = medir(caso, conexao, base, repeticoes, medir_memoria)
+            resultado = dict(comum, escala=escala, data_base=base.data_base.isoformat(), caso=caso, carga_s=carga_s, **medicao)
+            resultados.append(resultado)
+            pico = f"{medicao['pico_mb']:.1f}" if medicao["pico_mb"] is not None else "-"
+            por_s = f"{medicao['linhas_por_s']:.0f}" if medicao["linhas_por_s"] else "-"
+            print(f"{caso:<28} {medicao['segundos']:>10.3f} {medicao['segundos_mediana']:>10.3f} {pico:>9} {medicao['linhas']:>9} {por_s:>11}")
+    if arquivo:
+        os.makedirs(os.path.dirname(arquivo) or ".", exist_ok=True)
+        with open(arquivo, "a", encoding="utf-8") as f:
+            for resultado in resultados: f.write(json.dumps(resultado, ensure_ascii=False) + "\n")
+        print(f"\n{len(resultados)} resultado(s) anexado(s) em '{arquivo}'.")
+    return resultados
+
+def _chave_comparacao(resultado):
+    """Só são comparáveis execuções sobre os mesmos dados (escala, semente, data base) e o mesmo driver."""
+    return tuple(resultado.get(campo) for campo in ("escala", "caso", "semente", "data_base", "driver"))
+
+def comparar(resultados, arquivo, referencia):
+    """Imprime a variação de tempo/memória de cada caso contra a execução mais recente e comparável do commit `referencia`."""
+    anteriores = {}
+    try:
+        with open(arquivo, encoding="utf-8") as f:
+            for linha in f:
+                registro = json.loads(linha)
+                if registro["commit"].startswith(referencia): anteriores[_chave_comparacao(registro)] = registro
+    except (OSError, ValueError) as e: registrar_erro(f"Erro ao ler resultados anteriores '{arquivo}': {e}"); return
+    if not anteriores: print(f"Nenhum resultado do commit '{referencia}' em '{arquivo}'."); return
+    if not any(_chave_comparacao(atual) in anteriores for atual in resultados):
+        print(f"Nenhum resultado do commit '{referencia}' com a mesma semente, data base e driver desta execução."); return
+    print(f"\n--- Comparação com {referencia} (tempo e pico de memória; negativo = melhor) ---")
+    for atual in resultados:
+        anterior = anteriores.get(_chave_comparacao(atual))
+        if anterior is None: continue
+        tempo = 100.0 * (atual["segundos"] - anterior["segundos"]) / anterior["segundos"] if anterior["segundos"] else 0.0
+        memoria = ""
+        if atual["pico_mb"] is not None and anterior.get("pico_mb"):
+            memoria = f", memória {100.0 * (atual['pico_mb'] - anterior['pico_mb']) / anterior['pico_mb']:+.1f}%"
+        print(f"  {atual['escala']:>9} {atual['caso']:<28} tempo {tempo:+.1f}%{memoria}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark dos carregadores e relatórios com dados sintéticos.")
+    parser.add_argument("--escalas", default=",".join(map(str, ESCALAS_PADRAO)), help="Plantios por escala, separados por vírgula")
+    parser.add_argument("--casos", default=",".join(CASOS), help="Casos a medir, separados por vírgula")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--data-base", type=datetime.date.fromisoformat, default=DATA_BASE_PADRAO,
+                        help=f"AAAA-MM-DD (padrão: {DATA_BASE_PADRAO.isoformat()}, fixa para comparar execuções)")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--sem-memoria", action="store_true", help="Não mede o pico de memória (mais rápido)")
+    parser.add_argument("--saida", default=ARQUIVO_RESULTADOS)
+    parser.add_argument("--comparar", metavar="COMMIT", help="Compara com os resultados desse commit no arquivo de saída")
+    args = parser.parse_args(argv)
+    casos = [c.strip() for c in args.casos.split(",") if c.strip()]
+    desconhecidos = set(casos) - set(CASOS)
+    if desconhecidos: parser.error(f"caso(s) desconhecido(s): {', '.join(sorted(desconhecidos))}")
+
+    conexao = conectar_banco_benchmark()
+    if conexao is None: return 1
+    try:
+        resultados = executar(conexao, [int(e) for e in args.escalas.split(",")], casos, args.semente, args.data_base,
+                              args.repeticoes, not args.sem_memoria, args.saida)
+        if args.comparar: comparar(resultados, args.saida, args.comparar)
+    finally: conexao.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
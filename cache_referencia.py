@@ -0,0 +1,78 @@
+import time
+import threading
+from collections import OrderedDict
+import config
+
+# --- Cache de Dados de Referência ---
+# Guarda em memória resultados de leituras pequenas e muito repetidas (produtores/talhões, certificação).
+# Entradas expiram após um TTL e, quando o cache enche, as menos usadas saem primeiro (LRU).
+# As funções de escrita em crud_operations invalidam as entradas afetadas logo após o commit.
+
+class CacheTTL:
+    """Cache LRU com expiração por tempo, seguro para uso por várias threads."""
+
+    def __init__(self, capacidade, ttl_s):
+        self.capacidade = capacidade
+        self.ttl_s = ttl_s
+        self._entradas = OrderedDict() # chave -> (expira_em, valor)
+        self._trava = threading.Lock()
+        self._estatisticas = {"acertos": 0, "faltas": 0, "expiradas": 0, "despejadas": 0, "invalidadas": 0}
+
+    def obter(self, chave):
+        """Retorna (True, valor) se a chave está no cache e não expirou; senão (False, None)."""
+        with self._trava:
+            entrada = self._entradas.get(chave)
+            if entrada is None:
+                self._estatisticas["faltas"] += 1; return False, None
+            expira_em, valor = entrada
+            if expira_em < time.monotonic():
+                del self._entradas[chave]
+                self._estatisticas["expiradas"] += 1; self._estatisticas["faltas"] += 1
+                return False, None
+            self._entradas.move_to_end(chave)
+            self._estatisticas["acertos"] += 1
+            return True, valor
+
+    def guardar(self, chave, valor):
+        with self._trava:
+            self._entradas[chave] = (time.monotonic() + self.ttl_s, valor)
+            self._entradas.move_to_end(chave)
+            while len(self._entradas) > self.capacidade:
+                self._entradas.popitem(last=False)
+                self._estatisticas["despejadas"] += 1
+
+    def invalidar(self, predicado=None):
+        """Remove as entradas cuja chave satisfaz `predicado` (ou todas, se None)."""
+        with self._trava:
+            chaves = [c for c in self._entradas if predicado is None or predicado(c)]
+            for chave in chaves: del self._entradas[chave]
+            self._estatisticas["invalidadas"] += len(chaves)
+
+    def obter_estatisticas(self):
+        with self._trava:
+            estatisticas = dict(self._estatisticas)
+            estatisticas["entradas"] = len(self._entradas)
+        return estatisticas
+
+
+cache = CacheTTL(config.CACHE_CAPACIDADE, config.CACHE_TTL_S)
+
+def chave_filtros(grupo, filtros):
+    """Monta a chave de cache (grupo, filtros). Retorna None se algum filtro for uma coleção:
+    buscas por listas de IDs raramente se repetem e só ocupariam espaço."""
+    itens = []
+    for chave, valor in sorted((filtros or {}).items()):
+        if isinstance(valor, (list, tuple, set, frozenset, dict)): return None
+        itens.append((chave, valor))
+    return (grupo, tuple(itens))
+
+def invalidar(grupo, id_produtor=None):
+    """Invalida as entradas de um grupo. Com `id_produtor`, só as que podem conter aquele produtor
+    (consultas gerais e consultas filtradas pelo próprio produtor)."""
+    def afetada(chave):
+        if chave[0] != grupo: return False
+        if id_produtor is None: return True
+        filtros = dict(chave[1])
+        alvo = filtros.get("id_produtor", filtros.get("ids"))
+        return alvo is None or alvo == id_produtor
+    cache.invalidar(afetada)
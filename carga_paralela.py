@@ -0,0 +1,54 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_EXCEPTION
+import config
+
+# --- Carga Paralela de Tabelas Independentes ---
+# Relatórios que precisam de várias leituras independentes (ex: produtores, certificação e insumos da ficha de
+# rastreabilidade) as disparam ao mesmo tempo, cada uma numa conexão lógica derivada (outra sessão do mesmo pool),
+# de modo que a espera fica próxima da leitura mais lenta e não da soma de todas.
+# Se uma leitura falha, as que ainda não começaram são canceladas e as que estão no banco são interrompidas
+# (cancelamento da chamada na sessão); a exceção original é relançada para quem chamou. Por isso as tarefas usam os
+# carregadores no modo estrito: um carregador que registra o erro e retorna vazio faria o relatório sair incompleto.
+# Sem conexão derivável (ex: conexão direta do driver), com CARGA_PARALELA_TRABALHADORES <= 1 ou com uma transação
+# pendente na conexão de quem chamou (ex: um relatório no meio de um lote do comandos.py, cujas escritas ainda não
+# confirmadas as outras sessões não enxergam), tudo roda em sequência na própria conexão.
+
+_executor = None
+_trava = threading.Lock()
+
+class _Cancelada(Exception):
+    """Tarefa que nem começou: outra da mesma carga já tinha falhado."""
+
+def _obter_executor():
+    global _executor
+    with _trava:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=config.CARGA_PARALELA_TRABALHADORES, thread_name_prefix="carga")
+        return _executor
+
+def _executar(falhou, funcao, conexao):
+    # A thread que falha marca a carga antes de pegar a próxima tarefa da fila, então nenhuma outra começa depois
+    if falhou.is_set(): raise _Cancelada()
+    try: return funcao(conexao)
+    except BaseException: falhou.set(); raise
+
+def carregar_em_paralelo(conexao, tarefas):
+    """Executa `tarefas` ({nome: funcao(conexao)}) ao mesmo tempo e retorna {nome: resultado}.
+
+    Cada função recebe a sua própria conexão lógica e deve consumir o que lê (listas, dicts) antes de retornar.
+    """
+    if (len(tarefas) < 2 or config.CARGA_PARALELA_TRABALHADORES <= 1 or not hasattr(conexao, "derivar")
+            or getattr(conexao, "em_transacao", False)):
+        return {nome: funcao(conexao) for nome, funcao in tarefas.items()}
+    conexoes = {nome: conexao.derivar() for nome in tarefas}
+    executor = _obter_executor()
+    falhou = threading.Event()
+    futuros = {executor.submit(_executar, falhou, funcao, conexoes[nome]): nome for nome, funcao in tarefas.items()}
+    feitos, pendentes = wait(futuros, return_when=FIRST_EXCEPTION)
+    if any(f.exception() is not None for f in feitos):
+        for futuro in pendentes:
+            if not futuro.cancel(): conexoes[futuros[futuro]].cancelar() # Já está no banco: interrompe a chamada
+        wait(pendentes) # As sessões só voltam ao pool quando as leituras interrompidas terminam
+        raise next(f.exception() for f in futuros if not f.cancelled() and f.exception() is not None
+                   and not isinstance(f.exception(), _Cancelada))
+    return {nome: futuro.result() for futuro, nome in futuros.items()}
@@ -0,0 +1,107 @@
+import bisect
+import datetime
+from collections import namedtuple
+import config
+import database
+import indice_culturas
+from utils import registrar_erro
+
+# Importa cx_Oracle do config
+cx_Oracle = config.cx_Oracle
+
+# --- Casamento Demanda x Oferta ---
+# A oferta (plantios Planejados/Disponíveis) é indexada por cultura canônica (indice_culturas) e, dentro de cada
+# cultura, por data de referência da colheita (lista ordenada + bisect). Cada demanda consulta só a
+# faixa de datas da sua janela, então o custo é O((demandas + lotes) log lotes) e não demandas x lotes.
+# A cobertura é potencial: cada demanda é avaliada contra toda a oferta, sem reservar lotes entre demandas.
+
+STATUS_OFERTA = ('Disponível', 'Planejado') # Ordem de preferência no ranking
+
+Candidato = namedtuple("Candidato", "plantio data_referencia dias_diferenca quantidade_util")
+ResultadoCasamento = namedtuple("ResultadoCasamento", "demanda candidatos quantidade_coberta cobertura_pct")
+
+def _normalizar_unidade(unidade):
+    return (unidade or '').strip().lower()
+
+
+class IndiceOferta:
+    """Oferta indexada por cultura canônica; em cada cultura, lotes ordenados pela data de referência.
+    `chave_cultura` converte o nome gravado na chave de agrupamento (padrão: só normalização)."""
+
+    def __init__(self, plantios, chave_cultura=None):
+        self._chave_cultura = chave_cultura or indice_culturas.normalizar
+        self._chaves = {} # Nome gravado -> chave (cada grafia distinta é resolvida uma única vez)
+        por_cultura = {}
+        for plantio in plantios:
+            data_ref = plantio.data_colheita_real or plantio.data_prevista_colheita
+            if data_ref is None: continue
+            por_cultura.setdefault(self._chave(plantio.cultura), []).append((data_ref.toordinal(), plantio))
+        self._datas = {}; self._lotes = {}
+        for cultura, itens in por_cultura.items():
+            itens.sort(key=lambda item: item[0])
+            self._datas[cultura] = [data for data, _ in itens]
+            self._lotes[cultura] = [plantio for _, plantio in itens]
+        self.total_lotes = sum(len(lotes) for lotes in self._lotes.values())
+
+    def _chave(self, cultura):
+        chave = self._chaves.get(cultura)
+        if chave is None: chave = self._chaves[cultura] = self._chave_cultura(cultura)
+        return chave
+
+    def buscar(self, cultura, inicio, fim):
+        """Lotes da cultura com data de referência entre `inicio` e `fim` (inclusive)."""
+        chave = self._chave(cultura)
+        datas = self._datas.get(chave)
+        if not datas: return []
+        i = bisect.bisect_left(datas, inicio.toordinal())
+        j = bisect.bisect_right(datas, fim.toordinal())
+        return self._lotes[chave][i:j]
+
+
+def _avaliar_demanda(demanda, indice, janela_dias, tolerancia_dias, max_candidatos):
+    necessidade = demanda.data_necessidade
+    unidade = _normalizar_unidade(demanda.unidade_medida)
+    candidatos = []
+    for plantio in indice.buscar(demanda.cultura, necessidade - datetime.timedelta(days=janela_dias),
+                                 necessidade + datetime.timedelta(days=tolerancia_dias)):
+        data_ref = plantio.data_colheita_real or plantio.data_prevista_colheita
+        mesma_unidade = _normalizar_unidade(plantio.unidade_medida) == unidade
+        # Só lote já colhido, na mesma unidade, tem quantidade que conta para a cobertura
+        quantidade_util = plantio.quantidade_colhida if plantio.status == 'Disponível' and mesma_unidade else None
+        candidatos.append(Candidato(plantio, data_ref, (data_ref - necessidade).days, quantidade_util))
+    # Disponível antes de Planejado; unidade compatível; no prazo antes de atrasado; data mais próxima; maior quantidade
+    candidatos.sort(key=lambda c: (STATUS_OFERTA.index(c.plantio.status),
+                                   0 if c.quantidade_util is not None or not c.plantio.unidade_medida else 1,
+                                   c.dias_diferenca > 0, abs(c.dias_diferenca), -(c.quantidade_util or 0)))
+    disponivel = sum(c.quantidade_util or 0 for c in candidatos)
+    quantidade = demanda.quantidade or 0
+    coberta = min(disponivel, quantidade)
+    cobertura_pct = 100.0 * coberta / quantidade if quantidade > 0 else 100.0
+    return ResultadoCasamento(demanda, candidatos[:max_candidatos], coberta, cobertura_pct)
+
+def casar_demandas(demandas, indice, janela_dias=None, tolerancia_dias=None, max_candidatos=None):
+    """Gera um ResultadoCasamento por demanda (na ordem recebida), com os lotes candidatos ranqueados.
+
+    Um lote é candidato se a data de referência da colheita cai entre `janela_dias` antes e
+    `tolerancia_dias` depois da data de necessidade.
+    """
+    janela_dias = config.CASAMENTO_JANELA_DIAS if janela_dias is None else janela_dias
+    tolerancia_dias = config.CASAMENTO_TOLERANCIA_DIAS if tolerancia_dias is None else tolerancia_dias
+    max_candidatos = max_candidatos or config.CASAMENTO_MAX_CANDIDATOS
+    for demanda in demandas:
+        if demanda.data_necessidade is None: continue
+        yield _avaliar_demanda(demanda, indice, janela_dias, tolerancia_dias, max_candidatos)
+
+def casar_demandas_abertas(conexao, a_partir_de=None):
+    """Casa as demandas com necessidade a partir de `a_partir_de` (hoje, por padrão) com a oferta atual.
+    Retorna a lista de ResultadoCasamento ou None em caso de erro."""
+    if not conexao: registrar_erro("Conexão Oracle inválida."); return None
+    a_partir_de = a_partir_de or datetime.date.today()
+    # Lotes com colheita anterior à janela da demanda mais próxima nunca seriam candidatos
+    inicio_oferta = a_partir_de - datetime.timedelta(days=config.CASAMENTO_JANELA_DIAS)
+    try:
+        culturas = indice_culturas.carregar_indice(conexao)
+        indice = IndiceOferta(database.iterar_plantios_produtos(
+            conexao, {"status": list(STATUS_OFERTA), "data_inicio": inicio_oferta}, estrito=True), culturas.chave)
+        return list(casar_demandas(database.iterar_demandas(conexao, {"data_inicio": a_partir_de}, estrito=True), indice))
+    except cx_Oracle.DatabaseError: return None # Já registrado pelos carregadores
@@ -0,0 +1,124 @@
+# --- Catálogo de Comandos SQL ---
+# Comandos com nome, montados uma única vez na carga do módulo. O Oracle (e o cache de comandos do driver, por
+# sessão) reconhece um comando pelo texto exato: reusar o mesmo texto em todas as telas, comandos e importações
+# evita uma análise (parse) nova a cada variação de espaços ou de número de binds.
+# Regras: binds sempre posicionais/nomeados (nunca valores no texto), número de binds fixo por comando, e listas
+# IN de tamanho variável completadas até uma das poucas aridades de aridade_lista_in() (ver completar()).
+
+SELECT_PLANTIOS = """SELECT id_plantio, id_produtor, id_talhao_unico, cultura, data_plantio, data_prevista_colheita,
+                   data_colheita_real, quantidade_colhida, unidade_medida, status, observacoes, cultura_anterior
+                   FROM PLANTIOS_PRODUTOS""" # Mesma ordem dos campos de registros.Plantio
+
+ARIDADE_STATUS = 4 # Plantio tem 4 status possíveis: listas de status sempre com 4 binds
+
+SQL = {
+    # Produtores
+    "produtor.existe": "SELECT 1 FROM PRODUTORES WHERE id_produtor = :1",
+    "produtor.ler": "SELECT nome, localizacao, contato, associacao FROM PRODUTORES WHERE id_produtor = :1",
+    "produtor.inserir": "INSERT INTO PRODUTORES (id_produtor, nome, localizacao, contato, associacao) VALUES (:1, :2, :3, :4, :5)",
+    "produtor.atualizar": "UPDATE PRODUTORES SET nome = :1, localizacao = :2, contato = :3, associacao = :4 WHERE id_produtor = :5",
+    "produtor.excluir": "DELETE FROM PRODUTORES WHERE id_produtor = :1",
+    # Certificação
+    "certificacao.ler": """SELECT certificado, etapa_documentacao, etapa_inspecao, etapa_aprovacao
+                           FROM STATUS_CERTIFICACAO WHERE id_produtor = :1""",
+    "certificacao.inserir": """INSERT INTO STATUS_CERTIFICACAO (id_produtor, certificado, etapa_documentacao, etapa_inspecao, etapa_aprovacao)
+                               VALUES (:1, :2, :3, :4, :5)""",
+    "certificacao.atualizar": """UPDATE STATUS_CERTIFICACAO SET certificado = :1, etapa_documentacao = :2, etapa_inspecao = :3,
+                                 etapa_aprovacao = :4 WHERE id_produtor = :5""",
+    # Talhões
+    "talhao.do_produtor": "SELECT id_talhao_unico FROM TALHOES WHERE id_produtor = :1 AND id_talhao_produtor = :2",
+    "talhao.pertence": "SELECT 1 FROM TALHOES WHERE id_talhao_unico = :1 AND id_produtor = :2",
+    "talhao.ler": "SELECT tamanho_ha, tipo_solo FROM TALHOES WHERE id_talhao_unico = :1",
+    "talhao.inserir": "INSERT INTO TALHOES (id_talhao_unico, id_produtor, id_talhao_produtor, tamanho_ha, tipo_solo) VALUES (:1, :2, :3, :4, :5)",
+    "talhao.atualizar": "UPDATE TALHOES SET tamanho_ha = :1, tipo_solo = :2 WHERE id_talhao_unico = :3",
+    "talhao.excluir": "DELETE FROM TALHOES WHERE id_talhao_unico = :1",
+    # Plantios
+    "plantio.ler": SELECT_PLANTIOS + " WHERE id_plantio = :1",
+    # Mesma ordem do índice de rotação (sem data de plantio = mais antigo; empate pelo id)
+    "plantio.cultura_anterior": """SELECT cultura FROM PLANTIOS_PRODUTOS WHERE id_talhao_unico = :1
+                                   ORDER BY data_plantio DESC NULLS LAST, id_plantio DESC FETCH FIRST 1 ROWS ONLY""",
+    "plantio.status_e_data": "SELECT status, data_plantio FROM PLANTIOS_PRODUTOS WHERE id_plantio = :1",
+    "plantio.inserir": """INSERT INTO PLANTIOS_PRODUTOS (id_plantio, id_produtor, id_talhao_unico, cultura, data_plantio, data_prevista_colheita,
+                       data_colheita_real, quantidade_colhida, unidade_medida, status, observacoes, cultura_anterior)
+                       VALUES (:1, :2, :3, :4, :5, :6, :7, :8, :9, :10, :11, :12)""",
+    "plantio.atualizar": """UPDATE PLANTIOS_PRODUTOS SET cultura = :1, data_plantio = :2, data_prevista_colheita = :3,
+                           data_colheita_real = :4, quantidade_colhida = :5, unidade_medida = :6,
+                           observacoes = :7, cultura_anterior = :8 WHERE id_plantio = :9""",
+    "plantio.colher": """UPDATE PLANTIOS_PRODUTOS SET status = 'Disponível', data_colheita_real = :1,
+                         quantidade_colhida = :2, unidade_medida = :3 WHERE id_plantio = :4""",
+    "plantio.excluir": "DELETE FROM PLANTIOS_PRODUTOS WHERE id_plantio = :1",
+    # Insumos
+    "insumo.inserir": """INSERT INTO REGISTROS_INSUMOS (id_registro, id_produtor, id_talhao_unico, data_aplicacao, tipo_insumo, quantidade, observacoes)
+                         VALUES (:1, :2, :3, :4, :5, :6, :7)""",
+    "insumo.excluir": "DELETE FROM REGISTROS_INSUMOS WHERE id_registro = :1",
+    # Demandas
+    "demanda.inserir": """INSERT INTO DEMANDAS (id_demanda, cultura, quantidade, unidade_medida, data_necessidade, observacoes)
+                          VALUES (:1, :2, :3, :4, :5, :6)""",
+    "demanda.excluir": "DELETE FROM DEMANDAS WHERE id_demanda = :1",
+}
+# Seletores paginados (database.pagina_selecao): uma página por execução, continuando depois da chave da última linha
+# exibida (sem OFFSET). Todos recebem :busca (padrao_busca() ou NULL), :apos_1/:apos_2 (chave da página anterior
+# ou NULL na primeira) e :limite; as duas últimas colunas de cada linha são a chave da página.
+SQL.update({
+    "produtor.pagina": """SELECT localizacao, nome, id_produtor FROM PRODUTORES
+                   WHERE (:busca IS NULL OR UPPER(nome) LIKE :busca ESCAPE '\\' OR UPPER(id_produtor) LIKE :busca ESCAPE '\\')
+                     AND (:apos_1 IS NULL OR nome > :apos_1 OR (nome = :apos_1 AND id_produtor > :apos_2))
+                   ORDER BY nome, id_produtor FETCH FIRST :limite ROWS ONLY""",
+    "talhao.pagina": """SELECT tamanho_ha, tipo_solo, id_talhao_produtor, id_talhao_unico FROM TALHOES
+                   WHERE id_produtor = :id_produtor
+                     AND (:busca IS NULL OR UPPER(id_talhao_produtor) LIKE :busca ESCAPE '\\' OR UPPER(tipo_solo) LIKE :busca ESCAPE '\\')
+                     AND (:apos_1 IS NULL OR id_talhao_produtor > :apos_1 OR (id_talhao_produtor = :apos_1 AND id_talhao_unico > :apos_2))
+                   ORDER BY id_talhao_produtor, id_talhao_unico FETCH FIRST :limite ROWS ONLY""",
+    # Mais recentes primeiro; sem data de referência, no fim (:data_minima)
+    "plantio.pagina": f"""SELECT * FROM (
+                   SELECT p.cultura, t.id_talhao_produtor, p.status,
+                          CASE p.status WHEN 'Disponível' THEN p.data_colheita_real ELSE p.data_prevista_colheita END AS data_ref,
+                          NVL(CASE p.status WHEN 'Disponível' THEN p.data_colheita_real ELSE p.data_prevista_colheita END, :data_minima) AS chave_data,
+                          p.id_plantio
+                     FROM PLANTIOS_PRODUTOS p JOIN TALHOES t ON p.id_talhao_unico = t.id_talhao_unico
+                    WHERE p.id_produtor = :id_produtor AND p.status IN ({', '.join(f':status_{i}' for i in range(ARIDADE_STATUS))})
+                      AND (:busca IS NULL OR UPPER(p.cultura) LIKE :busca ESCAPE '\\' OR UPPER(p.id_plantio) LIKE :busca ESCAPE '\\'
+                           OR UPPER(t.id_talhao_produtor) LIKE :busca ESCAPE '\\')
+                   ) s
+                   WHERE :apos_1 IS NULL OR chave_data < :apos_1 OR (chave_data = :apos_1 AND id_plantio > :apos_2)
+                   ORDER BY chave_data DESC, id_plantio FETCH FIRST :limite ROWS ONLY""",
+    "insumo.pagina": """SELECT * FROM (
+                   SELECT r.data_aplicacao, r.tipo_insumo, t.id_talhao_produtor, NVL(r.data_aplicacao, :data_minima) AS chave_data, r.id_registro
+                     FROM REGISTROS_INSUMOS r JOIN TALHOES t ON r.id_talhao_unico = t.id_talhao_unico
+                    WHERE r.id_produtor = :id_produtor
+                      AND (:busca IS NULL OR UPPER(r.tipo_insumo) LIKE :busca ESCAPE '\\' OR UPPER(r.id_registro) LIKE :busca ESCAPE '\\'
+                           OR UPPER(t.id_talhao_produtor) LIKE :busca ESCAPE '\\')
+                   ) s
+                   WHERE :apos_1 IS NULL OR chave_data < :apos_1 OR (chave_data = :apos_1 AND id_registro > :apos_2)
+                   ORDER BY chave_data DESC, id_registro FETCH FIRST :limite ROWS ONLY""",
+    "demanda.pagina": """SELECT cultura, quantidade, unidade_medida, data_necessidade, id_demanda FROM DEMANDAS
+                   WHERE (:busca IS NULL OR UPPER(cultura) LIKE :busca ESCAPE '\\' OR UPPER(id_demanda) LIKE :busca ESCAPE '\\')
+                     AND (:apos_1 IS NULL OR data_necessidade > :apos_1 OR (data_necessidade = :apos_1 AND id_demanda > :apos_2))
+                   ORDER BY data_necessidade, id_demanda FETCH FIRST :limite ROWS ONLY""",
+})
+
+# Comandos montados pelos carregadores (combinações de filtros x aridades das listas IN) que também
+# devem caber no cache de comandos de cada sessão, além dos do catálogo
+FOLGA_CACHE_SQL = 64
+
+def tamanho_cache_recomendado():
+    """Tamanho do cache de comandos por sessão que comporta o catálogo inteiro e os comandos montados."""
+    return len(SQL) + FOLGA_CACHE_SQL
+
+def aridade_lista_in(quantidade, limite=1000):
+    """Número de binds para uma lista IN de `quantidade` itens: a próxima potência de 2 (até `limite`).
+    Assim, listas de 1 a 1000 itens geram no máximo 11 textos diferentes em vez de 1000."""
+    return min(1 << max(quantidade - 1, 0).bit_length(), limite)
+
+def padrao_busca(termo):
+    """Bind :busca dos seletores: o trecho digitado em qualquer posição (inclui o prefixo), sem diferenciar
+    maiúsculas e com % e _ tratados como texto. None (sem filtro) para busca vazia."""
+    termo = (termo or "").strip().upper()
+    if not termo: return None
+    return "%" + termo.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+def completar(valores, aridade):
+    """Completa `valores` com None até `aridade` binds (NULL nunca casa num IN, então o resultado não muda)."""
+    valores = list(valores)
+    if len(valores) > aridade: raise ValueError(f"{len(valores)} valores para {aridade} binds.")
+    return valores + [None] * (aridade - len(valores))
@@ -0,0 +1,398 @@
+import sys
+import json
+import time
+import logging
+import argparse
+import datetime
+import contextlib
+import config
+import database
+import crud_operations as crud
+import importacao
+import validacao
+import indice_culturas
+import rotacao
+import rastreabilidade
+import exportacao
+import casamento_demandas
+import previsao_oferta
+import log_estruturado
+from registros import Plantio
+from utils import registrar_erro
+
+# Importa cx_Oracle do config
+cx_Oracle = config.cx_Oracle
+
+# --- Comandos sem Interface (automação) ---
+# Uso:
+#   python comandos.py plantio-registrar id_produtor=P01 id_talhao_produtor=T01 cultura=Alface data_plantio=01/10/2025 data_prevista_colheita=20/11/2025
+#   python comandos.py lote operacoes.jsonl --commit-a-cada 500     (ou '-' para ler do stdin)
+# Cada operação é um dict com os campos dos arquivos de importação (datas DD/MM/AAAA); no modo lote, cada linha
+# é um objeto JSON com "comando" e os campos. Tudo roda numa única sessão do pool: cada escrita fica num SAVEPOINT
+# (a que falha é desfeita sozinha) e o commit sai a cada `commit_a_cada` escritas. Caches e índices em memória só
+# recebem as escritas do grupo depois do commit (enquanto isso, a sessão lê direto do banco e enxerga as próprias
+# escritas); as atualizações de uma operação desfeita pelo savepoint são descartadas com ela. O resultado de cada operação sai em JSON Lines no stdout (datas em ISO, AAAA-MM-DD), só depois
+# do commit do seu grupo; as mensagens das funções de apoio vão para o stderr.
+
+class ErroComando(ValueError):
+    """Operação rejeitada (dados inválidos ou registro inexistente); no lote, só ela é desfeita."""
+
+
+# --- Campos ---
+
+def _booleano(dados, campo):
+    valor = dados.get(campo)
+    if valor is None or isinstance(valor, bool): return valor
+    texto = str(valor).strip().lower()
+    if texto in ("1", "s", "sim", "true", "verdadeiro"): return True
+    if texto in ("0", "n", "nao", "não", "false", "falso", ""): return False
+    raise ErroComando(f"campo '{campo}' deve ser sim/não (1/0): {valor!r}")
+
+def _lista(dados, campo):
+    """Lista JSON ou texto separado por vírgulas (linha de comando); None se o campo não veio."""
+    valor = dados.get(campo)
+    if valor is None: return None
+    if isinstance(valor, (list, tuple)): return [str(v).strip() for v in valor if str(v).strip()]
+    return [v.strip() for v in str(valor).split(",") if v.strip()]
+
+def _cultura(conexao, nome):
+    """Nome canônico da cultura (sem perguntar: grafia desconhecida é gravada como veio, sem espaços extras)."""
+    return indice_culturas.carregar_indice(conexao).canonica(nome) or " ".join(nome.split())
+
+def _talhao(conexao, dados):
+    """(id_produtor, id_talhao_unico) a partir de id_talhao_unico ou de id_talhao_produtor, conferindo o produtor.
+    Consulta a própria sessão, então enxerga talhões cadastrados antes no mesmo grupo."""
+    id_produtor = validacao.campo_texto(dados, "id_produtor")
+    id_talhao_unico = validacao.campo_texto(dados, "id_talhao_unico", False)
+    if id_talhao_unico:
+        crud.ler_linha(conexao, "talhao.pertence", (id_talhao_unico, id_produtor),
+                       f"talhão '{id_talhao_unico}' não pertence ao produtor '{id_produtor}'")
+        return id_produtor, id_talhao_unico
+    id_talhao_produtor = validacao.campo_texto(dados, "id_talhao_produtor")
+    linha = crud.ler_linha(conexao, "talhao.do_produtor", (id_produtor, id_talhao_produtor),
+                           f"talhão '{id_talhao_produtor}' não encontrado para o produtor '{id_produtor}'")
+    return id_produtor, linha[0]
+
+def _opcionais(dados, campos):
+    """Só os campos de texto presentes em `dados` (ausente mantém o valor atual; presente e vazio limpa)."""
+    return {campo: validacao.campo_texto(dados, campo, False, tamanho) for campo, tamanho in campos if campo in dados}
+
+# --- Escritas (só leem os campos; a gravação é a mesma das telas, em crud_operations) ---
+
+def _produtor_cadastrar(conexao, dados):
+    registro, certificado = importacao.VALIDADORES["produtores"](dados)
+    return {"id_produtor": crud.gravar_produtor(conexao, *registro, certificado=certificado)}
+
+def _produtor_editar(conexao, dados):
+    id_produtor = validacao.campo_texto(dados, "id_produtor")
+    campos = _opcionais(dados, (("localizacao", 200), ("contato", 100), ("associacao", 100)))
+    if "nome" in dados: campos["nome"] = validacao.campo_texto(dados, "nome", tamanho_max=200)
+    return {"id_produtor": crud.atualizar_produtor(conexao, id_produtor, campos)}
+
+def _produtor_excluir(conexao, dados):
+    return {"id_produtor": crud.apagar_produtor(conexao, validacao.campo_texto(dados, "id_produtor"))}
+
+def _talhao_cadastrar(conexao, dados):
+    registro = importacao.VALIDADORES["talhoes"](dados)
+    return {"id_talhao_unico": crud.gravar_talhao(conexao, *registro)}
+
+def _talhao_editar(conexao, dados):
+    id_produtor, id_talhao_unico = _talhao(conexao, dados)
+    campos = _opcionais(dados, (("tipo_solo", 100),))
+    tamanho_ha = validacao.campo_numero(dados, "tamanho_ha")
+    if tamanho_ha is not None: campos["tamanho_ha"] = tamanho_ha
+    return {"id_talhao_unico": crud.atualizar_talhao(conexao, id_produtor, id_talhao_unico, campos)}
+
+def _talhao_excluir(conexao, dados):
+    id_produtor, id_talhao_unico = _talhao(conexao, dados)
+    return {"id_talhao_unico": crud.apagar_talhao(conexao, id_produtor, id_talhao_unico)}
+
+def _plantio_registrar(conexao, dados):
+    registro = importacao.VALIDADORES["plantios"](dados)
+    registro[1], registro[2] = _talhao(conexao, dados)
+    registro[3] = _cultura(conexao, registro[3])
+    plantio = crud.gravar_plantio(conexao, Plantio(*registro))
+    return {"id_plantio": plantio.id_plantio, "cultura": plantio.cultura, "cultura_anterior": plantio.cultura_anterior}
+
+def _plantio_colheita(conexao, dados):
+    id_plantio = validacao.campo_texto(dados, "id_plantio")
+    data_colheita_real = validacao.campo_data(dados, "data_colheita_real", obrigatorio=True)
+    quantidade_colhida = validacao.campo_numero(dados, "quantidade_colhida", obrigatorio=True)
+    unidade_medida = validacao.campo_texto(dados, "unidade_medida", tamanho_max=20)
+    return {"id_plantio": crud.colher_plantio(conexao, id_plantio, data_colheita_real, quantidade_colhida, unidade_medida)}
+
+def _plantio_excluir(conexao, dados):
+    return {"id_plantio": crud.apagar_plantio(conexao, validacao.campo_texto(dados, "id_plantio"))}
+
+def _insumo_registrar(conexao, dados):
+    registro = importacao.VALIDADORES["insumos"](dados)
+    registro[1], registro[2] = _talhao(conexao, dados)
+    return {"id_registro": crud.gravar_insumo(conexao, *registro)}
+
+def _insumo_excluir(conexao, dados):
+    return {"id_registro": crud.apagar_insumo(conexao, validacao.campo_texto(dados, "id_registro"))}
+
+def _certificacao_atualizar(conexao, dados):
+    """Campos opcionais: certificado, documentacao, inspecao, aprovacao (sim/não); os ausentes ficam como estão."""
+    id_produtor = validacao.campo_texto(dados, "id_produtor")
+    status = crud.atualizar_certificacao(conexao, id_produtor, {campo: _booleano(dados, campo) for campo in crud.CAMPOS_CERTIFICACAO})
+    return dict(status, id_produtor=id_produtor)
+
+def _demanda_registrar(conexao, dados):
+    registro = importacao.VALIDADORES["demandas"](dados)
+    registro[1] = _cultura(conexao, registro[1])
+    return {"id_demanda": crud.gravar_demanda(conexao, *registro), "cultura": registro[1]}
+
+def _demanda_excluir(conexao, dados):
+    return {"id_demanda": crud.apagar_demanda(conexao, validacao.campo_texto(dados, "id_demanda"))}
+
+# --- Consultas e Relatórios (só leitura; retornam o resultado em dicts/listas) ---
+
+def _mercado(conexao, dados):
+    """Campos: cultura, associacao, data_inicio, data_fim, somente_certificados, limite (ofertas; padrão uma página)."""
+    filtros = {"associacao": validacao.campo_texto(dados, "associacao", False),
+               "data_inicio": validacao.campo_data(dados, "data_inicio"), "data_fim": validacao.campo_data(dados, "data_fim"),
+               "somente_certificados": bool(_booleano(dados, "somente_certificados"))}
+    cultura = validacao.campo_texto(dados, "cultura", False)
+    if cultura:
+        indice = indice_culturas.carregar_indice(conexao)
+        canonica = indice.resolver(cultura)
+        filtros["cultura"] = indice.variantes(canonica) if canonica else cultura # Todas as grafias gravadas do produto
+    limite = int(validacao.campo_numero(dados, "limite") or config.MERCADO_TAMANHO_PAGINA)
+    ofertas = []; apos = None
+    while len(ofertas) < limite:
+        pagina, apos = database.pesquisar_mercado(conexao, filtros, apos, min(limite - len(ofertas), config.FETCH_TAMANHO_LOTE))
+        ofertas.extend(oferta._asdict() for oferta in pagina)
+        if apos is None: break
+    return {"ofertas": ofertas, "mais": apos is not None}
+
+def _calendario(conexao, dados):
+    """Campos: regiao, associacao, horizonte_meses."""
+    filtros = {campo: validacao.campo_texto(dados, campo, False) for campo in ("regiao", "associacao")}
+    horizonte = validacao.campo_numero(dados, "horizonte_meses")
+    calendario = database.carregar_calendario_colheitas(conexao, {k: v for k, v in filtros.items() if v},
+                                                         int(horizonte) if horizonte else None)
+    return {"colheitas": [linha._asdict() for linha in calendario]}
+
+def _previsao(conexao, dados):
+    """Campos: semanas, culturas (lista de nomes canônicos), somente_deficit."""
+    semanas = validacao.campo_numero(dados, "semanas")
+    previsao = previsao_oferta.calcular_previsao(conexao, semanas=int(semanas) if semanas else None,
+                                                 culturas_filtro=_lista(dados, "culturas"))
+    if previsao is None: raise ErroComando("previsão indisponível (NumPy ausente ou erro no banco; ver log)")
+    return {"inicio": previsao.inicio, "linhas": [linha._asdict() for linha in previsao.linhas(bool(_booleano(dados, "somente_deficit")))],
+            "totais": [dict(zip(("cultura", "oferta", "demanda", "saldo", "unidade"), total)) for total in previsao.totais()],
+            "lotes_sem_estimativa": previsao.lotes_sem_estimativa, "demandas_outra_unidade": previsao.demandas_outra_unidade}
+
+def _rotacao(conexao, dados):
+    """Campo opcional: pousio_minimo_dias."""
+    pousio = validacao.campo_numero(dados, "pousio_minimo_dias")
+    alertas = rotacao.analisar_rotacao(rotacao.obter_indice(conexao), None if pousio is None else int(pousio),
+                                       indice_culturas.carregar_indice(conexao).chave)
+    return {"alertas": [{"id_talhao_unico": a.id_talhao_unico, "tipo": a.tipo, "dias_pousio": a.dias_pousio,
+                         "anterior": a.anterior._asdict(), "atual": a.atual._asdict()} for a in alertas]}
+
+def _casamento(conexao, dados):
+    """Campo opcional: a_partir_de (DD/MM/AAAA)."""
+    resultados = casamento_demandas.casar_demandas_abertas(conexao, validacao.campo_data(dados, "a_partir_de"))
+    if resultados is None: raise ErroComando("não foi possível casar demandas e oferta (ver log)")
+    return {"demandas": [{"demanda": r.demanda._asdict(), "quantidade_coberta": r.quantidade_coberta, "cobertura_pct": r.cobertura_pct,
+                          "candidatos": [dict(c._asdict(), plantio=c.plantio._asdict()) for c in r.candidatos]} for r in resultados]}
+
+def _rastreabilidade(conexao, dados):
+    """Campos: ids (plantios), id_produtor, status (filtros de carregar_plantios_produtos), diretorio."""
+    filtros = {"ids": _lista(dados, "ids"), "id_produtor": _lista(dados, "id_produtor"), "status": _lista(dados, "status")}
+    filtros = {chave: valor for chave, valor in filtros.items() if valor is not None}
+    if not filtros: raise ErroComando("informe ids, id_produtor ou status (sem filtro geraria a ficha de todos os plantios)")
+    diretorio = validacao.campo_texto(dados, "diretorio", False) or config.RASTREABILIDADE_DIRETORIO
+    resultado = rastreabilidade.gerar_relatorios_em_lote(conexao, filtros, diretorio)
+    if resultado is None: raise ErroComando("falha ao gerar as fichas de rastreabilidade (ver log)")
+    return resultado
+
+def _exportar(conexao, dados):
+    """Campos: caminho, tabelas (opcional)."""
+    contagem = exportacao.exportar_snapshot(conexao, validacao.campo_texto(dados, "caminho"), _lista(dados, "tabelas"))
+    if contagem is None: raise ErroComando("falha ao exportar o snapshot (ver log)")
+    return {"tabelas": contagem}
+
+def _importar(conexao, dados):
+    """Campos: caminho, entidade (CSV sem o tipo no nome). Grava e faz commit por conta própria, em lotes."""
+    resumo = importacao.importar_arquivo(conexao, validacao.campo_texto(dados, "caminho"), validacao.campo_texto(dados, "entidade", False))
+    if resumo is None: raise ErroComando("falha ao ler o arquivo de importação (ver log)")
+    return resumo # {"entidades": {...}, "duracao_s"}
+
+# Comando -> (função, escreve?). Todas recebem (conexao, dados); as escritas não fazem commit.
+COMANDOS = {
+    "produtor-cadastrar": (_produtor_cadastrar, True), "produtor-editar": (_produtor_editar, True),
+    "produtor-excluir": (_produtor_excluir, True),
+    "talhao-cadastrar": (_talhao_cadastrar, True), "talhao-editar": (_talhao_editar, True), "talhao-excluir": (_talhao_excluir, True),
+    "plantio-registrar": (_plantio_registrar, True), "plantio-colheita": (_plantio_colheita, True),
+    "plantio-excluir": (_plantio_excluir, True),
+    "insumo-registrar": (_insumo_registrar, True), "insumo-excluir": (_insumo_excluir, True),
+    "certificacao-atualizar": (_certificacao_atualizar, True),
+    "demanda-registrar": (_demanda_registrar, True), "demanda-excluir": (_demanda_excluir, True),
+    "mercado": (_mercado, False), "calendario": (_calendario, False), "previsao": (_previsao, False),
+    "rotacao": (_rotacao, False), "casamento": (_casamento, False), "rastreabilidade": (_rastreabilidade, False),
+    "exportar": (_exportar, False), "importar": (_importar, False),
+}
+# Rodam fora do grupo de commit: importar grava e confirma por conta própria; exportar lê numa sessão própria
+# (transação só de leitura), que só enxerga o que já foi confirmado. O grupo pendente é gravado antes deles.
+COMANDOS_FORA_DO_GRUPO = {"importar", "exportar"}
+
+# --- Execução ---
+
+def _para_json(valor):
+    if isinstance(valor, (datetime.date, datetime.datetime)): return valor.isoformat()
+    return str(valor) # Ex: Decimal
+
+def executar(conexao, operacoes, commit_a_cada=None, parar_no_erro=False, saida=None):
+    """Executa `operacoes` ((número, dict com "comando") ou (número, ValueError) para linha ilegível) em sequência,
+    na mesma sessão, com um commit a cada `commit_a_cada` escritas. Grava um resultado JSON por operação em `saida`.
+
+    Com `parar_no_erro`, para na primeira operação rejeitada (as anteriores do grupo são gravadas).
+    Retorna {"operacoes", "ok", "erros", "commits", "duracao_s"}.
+    """
+    saida = saida or sys.stdout
+    commit_a_cada = max(1, commit_a_cada or config.COMANDOS_COMMIT_A_CADA)
+    resumo = {"operacoes": 0, "ok": 0, "erros": 0, "commits": 0}
+    inicio = time.perf_counter()
+    grupo = []; escritas = 0 # Resultados aguardando o commit do grupo
+    cursor = None
+
+    def encerrar_grupo():
+        nonlocal escritas
+        if escritas:
+            try: conexao.commit(); resumo["commits"] += 1
+            except cx_Oracle.DatabaseError as e: desfazer_grupo(e)
+        for resultado in grupo:
+            resultado.pop("escrita", None)
+            resumo["ok" if resultado["ok"] else "erros"] += 1
+            saida.write(json.dumps(resultado, ensure_ascii=False, default=_para_json) + "\n")
+        saida.flush(); grupo.clear(); escritas = 0
+
+    def desfazer_grupo(e):
+        """Commit ou rollback parcial falhou (ex: sessão caída): o grupo inteiro foi perdido."""
+        nonlocal cursor, escritas
+        registrar_erro(f"Erro Oracle; grupo de {escritas} escrita(s) desfeito: {e}", erro=e, operacao="comandos")
+        try: cursor.close()
+        except cx_Oracle.DatabaseError: pass
+        try: conexao.rollback() # Descarta também as atualizações de cache agendadas pelo grupo
+        except cx_Oracle.DatabaseError: pass
+        for resultado in grupo:
+            if resultado["ok"] and resultado.get("escrita"):
+                resultado.update(ok=False, erro=f"grupo desfeito: {e}"); resultado.pop("resultado", None)
+        escritas = 0; cursor = _abrir_cursor(conexao)
+
+    try:
+        cursor = _abrir_cursor(conexao)
+        for numero, dados in operacoes:
+            resumo["operacoes"] += 1
+            comando = dados.get("comando") if isinstance(dados, dict) else None
+            if comando in COMANDOS_FORA_DO_GRUPO: encerrar_grupo() # Antes de entrar no grupo: sai com o resultado dele
+            resultado = {"linha": numero, "comando": comando, "ok": False}
+            grupo.append(resultado)
+            if isinstance(dados, ValueError): resultado["erro"] = str(dados)
+            elif comando not in COMANDOS: resultado["erro"] = f"comando desconhecido: {comando!r}"
+            else:
+                funcao, escrita = COMANDOS[comando]
+                try:
+                    if escrita:
+                        marca = conexao.marcar_apos_commit() if hasattr(conexao, "marcar_apos_commit") else None
+                        cursor.execute("SAVEPOINT comando")
+                        resultado["resultado"] = funcao(conexao, dados)
+                        resultado["escrita"] = True; escritas += 1
+                    else: resultado["resultado"] = funcao(conexao, dados)
+                    resultado["ok"] = True
+                except (ValueError, cx_Oracle.DatabaseError) as e: # ErroComando/ErroValidacao são ValueError
+                    resultado["erro"] = str(e)
+                    if isinstance(e, cx_Oracle.DatabaseError):
+                        log_estruturado.registrar(logging.ERROR, f"Comando '{comando}' (linha {numero}) rejeitado pelo Oracle: {e}",
+                                                  erro=e, operacao=comando)
+                    if escrita:
+                        try:
+                            cursor.execute("ROLLBACK TO SAVEPOINT comando")
+                            if marca is not None: conexao.descartar_apos_commit(marca) # Caches não recebem a operação desfeita
+                        except cx_Oracle.DatabaseError as erro_rollback: desfazer_grupo(erro_rollback)
+            if not resultado["ok"] and parar_no_erro: break
+            if escritas >= commit_a_cada: encerrar_grupo()
+        encerrar_grupo()
+    finally:
+        if cursor: cursor.close()
+    resumo["duracao_s"] = time.perf_counter() - inicio
+    return resumo
+
+def _abrir_cursor(conexao):
+    """Cursor do lote: mantém a sessão do pool presa até o fim (nada de checkout por operação)."""
+    cursor = conexao.cursor()
+    cursor.outputtypehandler = database.tratar_tipos_saida # Datas chegam como date
+    return cursor
+
+def executar_operacao(conexao, dados):
+    """Executa uma única operação (dict com "comando") com commit próprio e retorna o resultado.
+    Erros sobem: ErroComando/ErroValidacao (dados rejeitados) ou cx_Oracle.DatabaseError (após o rollback)."""
+    if dados.get("comando") not in COMANDOS: raise ErroComando(f"comando desconhecido: {dados.get('comando')!r}")
+    funcao, escrita = COMANDOS[dados["comando"]]
+    if not escrita: return funcao(conexao, dados)
+    cursor = _abrir_cursor(conexao) # Prende a sessão do pool da primeira leitura até o commit
+    try:
+        resultado = funcao(conexao, dados)
+        conexao.commit()
+        return resultado
+    except BaseException:
+        conexao.rollback(); raise
+    finally: cursor.close()
+
+def ler_operacoes(arquivo):
+    """Gera (número da linha, dict) de um arquivo JSON Lines; linhas em branco e iniciadas por '#' são ignoradas."""
+    for numero, linha in enumerate(arquivo, start=1):
+        linha = linha.strip()
+        if not linha or linha.startswith("#"): continue
+        try: dados = json.loads(linha)
+        except ValueError as e: yield numero, ValueError(f"JSON inválido: {e}"); continue
+        yield numero, dados if isinstance(dados, dict) else ValueError("a linha deve ser um objeto JSON")
+
+def _campos_da_linha_de_comando(pares):
+    dados = {}
+    for par in pares:
+        campo, separador, valor = par.partition("=")
+        if not separador or not campo.strip(): raise ValueError(f"argumento '{par}' deve estar no formato campo=valor")
+        dados[campo.strip()] = valor
+    return dados
+
+def main(argv=None):
+    comandos = ", ".join(COMANDOS)
+    parser = argparse.ArgumentParser(description="Comandos da Agrorgânica sem interface (para scripts e integrações).",
+                                     epilog=f"Comandos: {comandos}.")
+    parser.add_argument("comando", help="'lote' ou um dos comandos abaixo")
+    parser.add_argument("argumentos", nargs="*", help="lote: arquivo JSON Lines ('-' = stdin); comando: campo=valor ...")
+    parser.add_argument("--commit-a-cada", type=int, default=config.COMANDOS_COMMIT_A_CADA, help="Escritas por commit no modo lote")
+    parser.add_argument("--parar-no-erro", action="store_true", help="Para na primeira operação rejeitada")
+    args = parser.parse_args(argv)
+
+    if args.comando == "lote":
+        if len(args.argumentos) != 1: parser.error("informe o arquivo de operações (ou '-' para o stdin)")
+        caminho = args.argumentos[0]
+        try: arquivo = sys.stdin if caminho == "-" else open(caminho, encoding="utf-8")
+        except OSError as e: parser.error(f"não foi possível abrir '{caminho}': {e}")
+        operacoes = ler_operacoes(arquivo)
+    elif args.comando in COMANDOS:
+        try: operacoes = [(1, dict(_campos_da_linha_de_comando(args.argumentos), comando=args.comando))]
+        except ValueError as e: parser.error(str(e))
+        arquivo = None
+    else: parser.error(f"comando desconhecido '{args.comando}'. Comandos: lote, {comandos}")
+
+    saida = sys.stdout
+    with contextlib.redirect_stdout(sys.stderr): # Avisos das funções de apoio não se misturam ao JSON
+        conexao = database.conectar_banco()
+        if not conexao: return 2
+        try: resumo = executar(conexao, operacoes, args.commit_a_cada, args.parar_no_erro, saida)
+        finally:
+            if arquivo not in (None, sys.stdin): arquivo.close()
+            database.desconectar_banco(conexao)
+        por_s = resumo["operacoes"] / resumo["duracao_s"] if resumo["duracao_s"] else 0.0
+        print(f"[INFO] {resumo['operacoes']} operação(ões): {resumo['ok']} ok, {resumo['erros']} com erro, "
+              f"{resumo['commits']} commit(s) em {resumo['duracao_s']:.2f} s ({por_s:.0f} op/s).")
+    return 1 if resumo["erros"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,18 +1,25 @@
 import os
 import sys
+import driver_banco
 
-# Tenta importar cx_Oracle
-try:
-    import cx_Oracle
-    print("[Config INFO] Biblioteca cx_Oracle carregada.")
-except ImportError:
-    cx_Oracle = None
-    print("[ERRO] Biblioteca cx_Oracle não encontrada. A aplicação não funcionará sem ela.")
-    print("       Instale com 'pip install cx_Oracle' e configure o Oracle Client.")
-    # sys.exit("Erro crítico: cx_Oracle não encontrado.")
+# --- Driver do Banco (driver_banco.py) ---
+# Carregado só na primeira conexão. Os módulos o usam como `cx_Oracle = config.cx_Oracle` (mesma API nos três).
+BANCO_DRIVER = os.environ.get("AGRO_DRIVER", "auto") # auto (oracledb, senão cx_Oracle), oracledb, cx_Oracle ou sqlite
+SQLITE_ARQUIVO = os.environ.get("AGRO_SQLITE_ARQUIVO", "agroorganica.sqlite3") # Banco do driver sqlite (":memory:" = só no processo)
+cx_Oracle = driver_banco.driver
 
 # --- Constantes ---
 ARQUIVO_LOG_ERROS = "erros_agrorgânica.log" # Atualiza nome do log
+LOG_NIVEL = os.environ.get("AGRO_LOG_NIVEL", "INFO") # DEBUG, INFO, WARNING, ERROR
+LOG_TAMANHO_MAX_BYTES = int(os.environ.get("AGRO_LOG_TAMANHO_MAX", str(5 * 1024 * 1024))) # Rotação por tamanho
+LOG_ROTACAO_QUANDO = os.environ.get("AGRO_LOG_ROTACAO", "") # Ex: "midnight" troca a rotação por tamanho pela diária
+LOG_ARQUIVOS_ANTIGOS = int(os.environ.get("AGRO_LOG_ARQUIVOS", "5")) # Arquivos rotacionados mantidos
+LOG_FILA_MAX = int(os.environ.get("AGRO_LOG_FILA", "10000")) # Registros pendentes antes de começar a descartar
+
+# --- Instrumentação de Consultas ---
+INSTRUMENTACAO_ATIVA = os.environ.get("AGRO_INSTRUMENTACAO", "1") != "0" # Latência/linhas por SQL (menu de diagnóstico)
+CONSULTA_LENTA_MS = float(os.environ.get("AGRO_CONSULTA_LENTA_MS", "200")) # A partir daqui vai para o log de lentas
+ARQUIVO_LOG_CONSULTAS_LENTAS = os.environ.get("AGRO_LOG_CONSULTAS_LENTAS", "consultas_lentas.log")
 
 # --- Configurações Oracle ---
 # !!! IMPORTANTE: Use variáveis de ambiente ou um método seguro para gerenciar credenciais !!!
@@ -20,8 +27,72 @@ ORACLE_USER = os.environ.get("ORACLE_USER", "RM562839")
 ORACLE_PASSWORD = os.environ.get("ORACLE_PASSWORD", "120296")
 ORACLE_DSN = os.environ.get("ORACLE_DSN", "oracle.fiap.com.br:1521/ORCL")
 
-# Assume-se que Oracle é necessário se cx_Oracle foi importado.
+# --- Banco de Benchmark (benchmark.py) ---
+# Banco local descartável: o benchmark apaga e repopula todas as tabelas da aplicação nele.
+BENCHMARK_DSN = os.environ.get("AGRO_BENCHMARK_DSN", "")
+BENCHMARK_USER = os.environ.get("AGRO_BENCHMARK_USER", ORACLE_USER)
+BENCHMARK_PASSWORD = os.environ.get("AGRO_BENCHMARK_PASSWORD", ORACLE_PASSWORD)
+
+# --- Pool de Sessões Oracle ---
+POOL_MIN = int(os.environ.get("ORACLE_POOL_MIN", "1"))
+POOL_MAX = int(os.environ.get("ORACLE_POOL_MAX", "4"))
+POOL_INCREMENTO = int(os.environ.get("ORACLE_POOL_INCREMENTO", "1"))
+POOL_PING_INTERVALO_S = int(os.environ.get("ORACLE_POOL_PING_INTERVALO", "60")) # Sessões ociosas há mais tempo são testadas no checkout
+
+# --- Cache de Comandos SQL (catalogo_sql.py) ---
+CACHE_SQL_TAMANHO = int(os.environ.get("AGRO_CACHE_SQL", "0")) # Comandos preparados guardados por sessão; 0 = catálogo + folga
+
+# --- Leitura em Lotes ---
+FETCH_TAMANHO_LOTE = int(os.environ.get("AGRO_FETCH_LOTE", "500")) # cursor.arraysize dos carregadores em streaming
+FETCH_PREFETCH_LINHAS = int(os.environ.get("AGRO_FETCH_PREFETCH", "0")) # 0 = igual ao tamanho do lote
+
+# --- Carga Paralela (carga_paralela.py) ---
+CARGA_PARALELA_TRABALHADORES = int(os.environ.get("AGRO_CARGA_PARALELA", str(min(4, POOL_MAX)))) # Leituras simultâneas; <= 1 desliga
+
+# --- Cache de Dados de Referência (produtores, talhões, certificação) ---
+CACHE_TTL_S = int(os.environ.get("AGRO_CACHE_TTL", "300"))
+CACHE_CAPACIDADE = int(os.environ.get("AGRO_CACHE_CAPACIDADE", "256")) # Número máximo de consultas guardadas
+
+# --- Importação em Lote ---
+IMPORTACAO_TAMANHO_LOTE = int(os.environ.get("AGRO_IMPORTACAO_LOTE", "5000")) # Linhas validadas/gravadas por executemany
+
+# --- Comandos sem Interface (comandos.py) ---
+COMANDOS_COMMIT_A_CADA = int(os.environ.get("AGRO_COMANDOS_COMMIT", "500")) # Escritas por commit no modo lote
+
+# --- Serviço HTTP (servico_http.py) ---
+SERVICO_HOST = os.environ.get("AGRO_SERVICO_HOST", "127.0.0.1")
+SERVICO_PORTA = int(os.environ.get("AGRO_SERVICO_PORTA", "8080"))
+SERVICO_TRABALHADORES = int(os.environ.get("AGRO_SERVICO_TRABALHADORES", str(POOL_MAX))) # Threads com chamadas ao banco (<= POOL_MAX)
+SERVICO_FILA_MAX = int(os.environ.get("AGRO_SERVICO_FILA", "256")) # Pedidos aguardando thread; acima disso, 503
+SERVICO_CACHE_TTL_S = float(os.environ.get("AGRO_SERVICO_CACHE_TTL", "10")) # Validade das páginas do mercado em cache
+
+# --- Mercado ---
+MERCADO_TAMANHO_PAGINA = int(os.environ.get("AGRO_MERCADO_PAGINA", "20")) # Ofertas por página na busca do mercado
+
+# --- Seletores ---
+SELETOR_TAMANHO_PAGINA = int(os.environ.get("AGRO_SELETOR_PAGINA", "15")) # Linhas por página ao escolher produtor, talhão, lote...
+
+# --- Rastreabilidade em Lote ---
+RASTREABILIDADE_PROCESSOS = int(os.environ.get("AGRO_RASTREABILIDADE_PROCESSOS", str(os.cpu_count() or 1)))
+RASTREABILIDADE_DIRETORIO = os.environ.get("AGRO_RASTREABILIDADE_DIR", "relatorios_rastreabilidade")
+
+# --- Rotação de Culturas ---
+POUSIO_MINIMO_DIAS = int(os.environ.get("AGRO_POUSIO_MINIMO", "15")) # Intervalo mínimo entre colheita e novo plantio no talhão
+ROTACAO_RECARGA_S = int(os.environ.get("AGRO_ROTACAO_RECARGA", "900")) # Refaz o índice de rotação do banco após esse tempo
+
+# --- Índice de Culturas ---
+CULTURA_SIMILARIDADE_MINIMA = float(os.environ.get("AGRO_CULTURA_SIMILARIDADE", "0.5")) # 0..1, para sugerir correção de nome
+
+# --- Casamento Demanda x Oferta ---
+CASAMENTO_JANELA_DIAS = int(os.environ.get("AGRO_CASAMENTO_JANELA", "30")) # Colheita até N dias antes da necessidade
+CASAMENTO_TOLERANCIA_DIAS = int(os.environ.get("AGRO_CASAMENTO_TOLERANCIA", "7")) # ... ou até N dias depois
+CASAMENTO_MAX_CANDIDATOS = int(os.environ.get("AGRO_CASAMENTO_CANDIDATOS", "5")) # Lotes exibidos por demanda
+
+# --- Calendário de Colheitas ---
+CALENDARIO_HORIZONTE_MESES = int(os.environ.get("AGRO_CALENDARIO_HORIZONTE", "12")) # Meses exibidos a partir do mês atual
+
+# --- Previsão Oferta x Demanda ---
+PREVISAO_HORIZONTE_SEMANAS = int(os.environ.get("AGRO_PREVISAO_HORIZONTE", "104")) # Semanas ISO projetadas (2 anos)
 
-print(f"[Config INFO] Configurado para usar Oracle.")
 if "SEU_" in ORACLE_USER or "SEU_" in ORACLE_PASSWORD or "SEU_" in ORACLE_DSN:
-    print("[AVISO] Placeholders de credenciais/DSN Oracle detectados em config.py.")
\ No newline at end of file
+    print("[AVISO] Placeholders de credenciais/DSN Oracle detectados em config.py.", file=sys.stderr)
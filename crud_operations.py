@@ -1,240 +1,398 @@
 import uuid
 import datetime 
+from functools import partial
 import config 
 from utils import obter_input_validado, confirmar_acao, registrar_erro, formatar_data_br 
 import database 
+import cache_referencia
+import validacao
+import indice_culturas
+import rotacao
+from registros import Plantio
+from catalogo_sql import SQL, ARIDADE_STATUS, completar
 
 # Importa cx_Oracle do config para checagem de tipo de erro
 cx_Oracle = config.cx_Oracle 
 
+# --- Gravações sem Interface ---
+# Núcleo das escritas, usado pelas telas abaixo e pelos comandos sem interface (comandos.py): recebe os dados já
+# lidos, não pergunta nem imprime nada e não faz commit (quem chama confirma ou desfaz; no lote, um grupo inteiro).
+# Dados rejeitados ou registro inexistente levantam ErroValidacao; erros do Oracle sobem como cx_Oracle.DatabaseError.
+# Caches e índices em memória só são atualizados depois do commit (ConexaoPool.apos_commit): antes disso, outra sessão
+# poderia reler as linhas antigas e devolvê-las ao cache; um rollback (ou ROLLBACK TO SAVEPOINT) descarta as atualizações.
+# Enquanto a transação está aberta, as leituras desta sessão não usam os caches (ver database._ler_cache).
+ErroValidacao = validacao.ErroValidacao
+CAMPOS_PRODUTOR = ("nome", "localizacao", "contato", "associacao") # Ordem de produtor.ler / produtor.atualizar
+CAMPOS_TALHAO = ("tamanho_ha", "tipo_solo") # Ordem de talhao.ler / talhao.atualizar
+CAMPOS_PLANTIO = ("cultura", "data_plantio", "data_prevista_colheita", "data_colheita_real", "quantidade_colhida",
+                  "unidade_medida", "observacoes", "cultura_anterior") # Ordem de plantio.atualizar
+CAMPOS_CERTIFICACAO = ("certificado", "documentacao", "inspecao", "aprovacao") # Ordem de certificacao.ler / .atualizar
+
+def ler_linha(conexao, comando, binds, nao_encontrado=None):
+    """Primeira linha de um comando do catálogo; com `nao_encontrado`, a ausência vira ErroValidacao."""
+    cursor = None
+    try:
+        cursor = conexao.cursor()
+        cursor.outputtypehandler = database.tratar_tipos_saida # Datas já chegam como date
+        cursor.execute(SQL[comando], binds)
+        linha = cursor.fetchone()
+    finally:
+        if cursor: cursor.close()
+    if linha is None and nao_encontrado: raise ErroValidacao(nao_encontrado)
+    return linha
+
+def _executar(conexao, comando, binds, nao_encontrado=None):
+    """Executa um comando do catálogo; com `nao_encontrado`, exige que alguma linha tenha sido afetada."""
+    cursor = None
+    try:
+        cursor = conexao.cursor()
+        cursor.execute(SQL[comando], binds)
+        if nao_encontrado and cursor.rowcount == 0: raise ErroValidacao(nao_encontrado)
+    finally:
+        if cursor: cursor.close()
+
+def _apos_commit(conexao, acao, *args):
+    """Agenda a atualização de um cache/índice para depois do commit (conexão direta do driver: aplica já)."""
+    if hasattr(conexao, "apos_commit"): conexao.apos_commit(partial(acao, *args))
+    else: acao(*args)
+
+def descartar_caches():
+    """Esvazia caches e índices em memória (ex: após escritas feitas fora da aplicação); a próxima leitura os refaz."""
+    cache_referencia.cache.invalidar(); rotacao.invalidar()
+
+def gravar_produtor(conexao, id_produtor, nome, localizacao=None, contato=None, associacao=None, certificado=0):
+    """Insere o produtor e o seu status de certificação (etapas desmarcadas). Retorna o id."""
+    if ler_linha(conexao, "produtor.existe", (id_produtor,)): raise ErroValidacao(f"produtor '{id_produtor}' já existe")
+    _executar(conexao, "produtor.inserir", (id_produtor, nome, localizacao, contato, associacao))
+    _executar(conexao, "certificacao.inserir", (id_produtor, 1 if certificado else 0, 0, 0, 0))
+    _apos_commit(conexao, cache_referencia.invalidar, "produtores", id_produtor)
+    _apos_commit(conexao, cache_referencia.invalidar, "certificacao", id_produtor)
+    return id_produtor
+
+def atualizar_produtor(conexao, id_produtor, campos):
+    """Altera os `campos` informados (ver CAMPOS_PRODUTOR); os ausentes ficam como estão. Retorna o id."""
+    atual = ler_linha(conexao, "produtor.ler", (id_produtor,), f"produtor '{id_produtor}' não encontrado")
+    novos = [campos.get(campo, valor) for campo, valor in zip(CAMPOS_PRODUTOR, atual)]
+    if not novos[0]: raise ErroValidacao("campo 'nome' é obrigatório")
+    _executar(conexao, "produtor.atualizar", (*novos, id_produtor))
+    _apos_commit(conexao, cache_referencia.invalidar, "produtores", id_produtor)
+    _apos_commit(conexao, cache_referencia.invalidar, "calendario")
+    return id_produtor
+
+def apagar_produtor(conexao, id_produtor):
+    """Exclui o produtor (talhões, plantios, insumos e certificação saem em cascata). Retorna o id."""
+    _executar(conexao, "produtor.excluir", (id_produtor,), f"produtor '{id_produtor}' não encontrado")
+    _apos_commit(conexao, cache_referencia.invalidar, "produtores", id_produtor)
+    _apos_commit(conexao, cache_referencia.invalidar, "certificacao", id_produtor)
+    _apos_commit(conexao, rotacao.invalidar); _apos_commit(conexao, cache_referencia.invalidar, "calendario") # Talhões saíram em cascata
+    return id_produtor
+
+def gravar_talhao(conexao, id_talhao_unico, id_produtor, id_talhao_produtor, tamanho_ha, tipo_solo=None):
+    """Insere um talhão (id_talhao_unico None = gera um). Retorna o id_talhao_unico."""
+    if tamanho_ha is None or tamanho_ha <= 0: raise ErroValidacao("campo 'tamanho_ha' deve ser positivo")
+    if ler_linha(conexao, "talhao.do_produtor", (id_produtor, id_talhao_produtor)):
+        raise ErroValidacao(f"talhão '{id_talhao_produtor}' já existe para o produtor '{id_produtor}'")
+    id_talhao_unico = id_talhao_unico or str(uuid.uuid4())
+    _executar(conexao, "talhao.inserir", (id_talhao_unico, id_produtor, id_talhao_produtor, tamanho_ha, tipo_solo))
+    _apos_commit(conexao, cache_referencia.invalidar, "produtores", id_produtor)
+    return id_talhao_unico
+
+def atualizar_talhao(conexao, id_produtor, id_talhao_unico, campos):
+    """Altera os `campos` informados (ver CAMPOS_TALHAO); os ausentes ficam como estão. Retorna o id_talhao_unico."""
+    atual = ler_linha(conexao, "talhao.ler", (id_talhao_unico,), f"talhão '{id_talhao_unico}' não encontrado")
+    tamanho_ha, tipo_solo = [campos.get(campo, valor) for campo, valor in zip(CAMPOS_TALHAO, atual)]
+    if tamanho_ha is None or tamanho_ha <= 0: raise ErroValidacao("campo 'tamanho_ha' deve ser positivo")
+    _executar(conexao, "talhao.atualizar", (tamanho_ha, tipo_solo, id_talhao_unico))
+    _apos_commit(conexao, cache_referencia.invalidar, "produtores", id_produtor)
+    _apos_commit(conexao, cache_referencia.invalidar, "calendario")
+    return id_talhao_unico
+
+def apagar_talhao(conexao, id_produtor, id_talhao_unico):
+    """Exclui o talhão (plantios e insumos saem em cascata). Retorna o id_talhao_unico."""
+    _executar(conexao, "talhao.excluir", (id_talhao_unico,), f"talhão '{id_talhao_unico}' não encontrado")
+    _apos_commit(conexao, cache_referencia.invalidar, "produtores", id_produtor)
+    _apos_commit(conexao, rotacao.remover_talhoes, [id_talhao_unico]); _apos_commit(conexao, cache_referencia.invalidar, "calendario")
+    return id_talhao_unico
+
+def gravar_plantio(conexao, plantio):
+    """Insere um plantio (registros.Plantio). Sem id, gera um; sem cultura_anterior, usa a última cultura do talhão.
+    Retorna o registro gravado."""
+    validacao.validar_datas_plantio(plantio.data_plantio, plantio.data_prevista_colheita, plantio.data_colheita_real)
+    if plantio.status not in validacao.STATUS_VALIDOS: raise ErroValidacao(f"status inválido: {plantio.status!r}")
+    if not plantio.id_plantio: plantio = plantio._replace(id_plantio=str(uuid.uuid4()))
+    if plantio.cultura_anterior is None:
+        plantio = plantio._replace(cultura_anterior=rotacao.cultura_anterior(conexao, plantio.id_talhao_unico))
+    _executar(conexao, "plantio.inserir", tuple(plantio))
+    _apos_commit(conexao, indice_culturas.registrar_uso, plantio.cultura); _apos_commit(conexao, cache_referencia.invalidar, "calendario")
+    _apos_commit(conexao, rotacao.registrar_plantio, plantio)
+    return plantio
+
+def atualizar_plantio(conexao, id_plantio, campos):
+    """Altera os `campos` informados (ver CAMPOS_PLANTIO); os ausentes ficam como estão. Retorna o id."""
+    atual = Plantio(*ler_linha(conexao, "plantio.ler", (id_plantio,), f"plantio '{id_plantio}' não encontrado"))
+    novos = {campo: campos.get(campo, atual.get(campo)) for campo in CAMPOS_PLANTIO}
+    if not novos["cultura"]: raise ErroValidacao("campo 'cultura' é obrigatório")
+    validacao.validar_datas_plantio(novos["data_plantio"], novos["data_prevista_colheita"], novos["data_colheita_real"])
+    _executar(conexao, "plantio.atualizar", (*novos.values(), id_plantio))
+    _apos_commit(conexao, indice_culturas.registrar_uso, novos["cultura"]); _apos_commit(conexao, cache_referencia.invalidar, "calendario")
+    _apos_commit(conexao, rotacao.recarregar_plantio, conexao, id_plantio) # Relê a linha já confirmada
+    return id_plantio
+
+def colher_plantio(conexao, id_plantio, data_colheita_real, quantidade_colhida, unidade_medida):
+    """Confirma a colheita de um plantio 'Planejado' (passa a 'Disponível'). Retorna o id."""
+    if not data_colheita_real or quantidade_colhida is None or not unidade_medida:
+        raise ErroValidacao("data, quantidade e unidade da colheita são obrigatórias")
+    status, data_plantio = ler_linha(conexao, "plantio.status_e_data", (id_plantio,), f"plantio '{id_plantio}' não encontrado")
+    if status != 'Planejado': raise ErroValidacao(f"plantio '{id_plantio}' está '{status}' (só plantios 'Planejado' são colhidos)")
+    validacao.validar_datas_plantio(data_plantio, data_real=data_colheita_real)
+    _executar(conexao, "plantio.colher", (data_colheita_real, quantidade_colhida, unidade_medida, id_plantio))
+    _apos_commit(conexao, rotacao.recarregar_plantio, conexao, id_plantio); _apos_commit(conexao, cache_referencia.invalidar, "calendario")
+    return id_plantio
+
+def apagar_plantio(conexao, id_plantio):
+    _executar(conexao, "plantio.excluir", (id_plantio,), f"plantio '{id_plantio}' não encontrado")
+    _apos_commit(conexao, rotacao.remover_plantio, id_plantio); _apos_commit(conexao, cache_referencia.invalidar, "calendario")
+    return id_plantio
+
+def gravar_insumo(conexao, id_registro, id_produtor, id_talhao_unico, data_aplicacao, tipo_insumo, quantidade=None, observacoes=None):
+    """Registra a aplicação de um insumo (id_registro None = gera um). Retorna o id_registro."""
+    if not data_aplicacao or not tipo_insumo: raise ErroValidacao("data e tipo de insumo são obrigatórios")
+    id_registro = id_registro or str(uuid.uuid4())
+    _executar(conexao, "insumo.inserir", (id_registro, id_produtor, id_talhao_unico, data_aplicacao, tipo_insumo, quantidade, observacoes))
+    return id_registro
+
+def apagar_insumo(conexao, id_registro):
+    _executar(conexao, "insumo.excluir", (id_registro,), f"registro de insumo '{id_registro}' não encontrado")
+    return id_registro
+
+def atualizar_certificacao(conexao, id_produtor, campos):
+    """Altera os `campos` informados (ver CAMPOS_CERTIFICACAO, valores sim/não); os ausentes ficam como estão.
+    Retorna {campo: bool} com o status resultante."""
+    atual = ler_linha(conexao, "certificacao.ler", (id_produtor,), f"status de certificação não encontrado para o produtor '{id_produtor}'")
+    novos = [int(bool(campos[campo])) if campos.get(campo) is not None else valor for campo, valor in zip(CAMPOS_CERTIFICACAO, atual)]
+    _executar(conexao, "certificacao.atualizar", (*novos, id_produtor))
+    _apos_commit(conexao, cache_referencia.invalidar, "certificacao", id_produtor)
+    return dict(zip(CAMPOS_CERTIFICACAO, map(bool, novos)))
+
+def gravar_demanda(conexao, id_demanda, cultura, quantidade, unidade_medida, data_necessidade, observacoes=None):
+    """Registra uma demanda (id_demanda None = gera um). Retorna o id_demanda."""
+    if not cultura or quantidade is None or not unidade_medida or not data_necessidade:
+        raise ErroValidacao("cultura, quantidade, unidade e data de necessidade são obrigatórias")
+    if quantidade <= 0: raise ErroValidacao("campo 'quantidade' deve ser positivo")
+    id_demanda = id_demanda or str(uuid.uuid4())
+    _executar(conexao, "demanda.inserir", (id_demanda, cultura, quantidade, unidade_medida, data_necessidade, observacoes))
+    _apos_commit(conexao, indice_culturas.registrar_uso, cultura)
+    return id_demanda
+
+def apagar_demanda(conexao, id_demanda):
+    _executar(conexao, "demanda.excluir", (id_demanda,), f"demanda '{id_demanda}' não encontrada")
+    return id_demanda
+
+def _gravar(conexao, operacao, descricao, gravacao, *args):
+    """Tela: executa uma gravação do núcleo e faz commit. Em erro, desfaz, avisa e retorna None."""
+    try:
+        resultado = gravacao(conexao, *args)
+        conexao.commit()
+        return resultado
+    except ErroValidacao as e: print(f"Erro: {e}."); conexao.rollback()
+    except cx_Oracle.DatabaseError as e:
+        registrar_erro(f"Erro Oracle {descricao}: {e}", erro=e, operacao=operacao)
+        try: conexao.rollback()
+        except cx_Oracle.DatabaseError: pass
+    return None
+
+# --- Seletores Paginados ---
+# Os seletores mostram uma página por vez (database.pagina_selecao, paginação por chave) em vez de carregar e
+# imprimir a tabela inteira. Na mesma pergunta o usuário escolhe o número da linha, digita um ID exato, ou
+# digita um trecho (nome, ID, cultura...) para buscar; Enter avança e '-' volta uma página.
+def _buscar_um(conexao, comando, binds, operacao):
+    """Primeira linha de um comando do catálogo (ou None)."""
+    try: return ler_linha(conexao, comando, binds)
+    except cx_Oracle.DatabaseError as e: registrar_erro(f"Erro Oracle ao buscar ({comando}): {e}", erro=e, operacao=operacao); return None
+
+def _escolher_em_paginas(conexao, comando, binds, descrever, valor, vazio, por_id=None):
+    """Seletor paginado sobre o comando "<entidade>.pagina" do catálogo.
+
+    `descrever(linha)` monta o texto de cada linha, `valor(linha)` é o que a escolha retorna e `por_id(texto)`
+    (opcional) resolve um ID digitado por inteiro, mesmo fora da página. Retorna None se cancelado.
+    """
+    busca = None; chaves = [None] # Chave de início de cada página já vista (para voltar)
+    while True:
+        linhas, proxima = database.pagina_selecao(conexao, comando, binds, busca, chaves[-1])
+        if not linhas:
+            if len(chaves) > 1: chaves.pop(); continue # Linhas removidas desde a última página
+            if busca is None: print(vazio); return None
+            print(f"Nada encontrado para '{busca}'."); busca = None; continue
+        print(f"\nPágina {len(chaves)}" + (f" (busca: '{busca}')" if busca else "") + ":")
+        for i, linha in enumerate(linhas): print(f"{i+1}. {descrever(linha)}")
+        dicas = ["0 cancela"] + (["Enter = próxima"] if proxima else []) + (["- = anterior"] if len(chaves) > 1 else [])
+        while True:
+            entrada = input(f"Número, ID ou trecho para buscar ({', '.join(dicas)}): ").strip()
+            if entrada == '0': return None
+            if not entrada:
+                if proxima is None: print("Esta é a última página."); continue
+                chaves.append(proxima); break
+            if entrada == '-':
+                if len(chaves) == 1: print("Esta é a primeira página."); continue
+                chaves.pop(); break
+            if entrada.isdigit() and 1 <= int(entrada) <= len(linhas): return valor(linhas[int(entrada)-1])
+            if por_id:
+                escolhido = por_id(entrada)
+                if escolhido is not None: return escolhido
+            busca = entrada; chaves = [None]; break
+
 # --- Produtor ---
 def cadastrar_produtor(conexao):
     """Cadastra um novo produtor no Oracle."""
-    if not conexao or cx_Oracle is None: registrar_erro("Conexão Oracle inválida."); return False
+    if not conexao: registrar_erro("Conexão Oracle inválida."); return False
     print("\n--- Cadastro de Novo Produtor ---")
     while True:
         id_produtor = obter_input_validado("ID único para o produtor (ex: CPF/CNPJ ou código)")
         if not id_produtor: continue
-        cursor = None; existe = False
-        try:
-            cursor = conexao.cursor()
-            cursor.execute("SELECT 1 FROM PRODUTORES WHERE id_produtor = :1", (id_produtor,))
-            if cursor.fetchone(): existe = True
-        except cx_Oracle.DatabaseError as e: registrar_erro(f"Erro Oracle ao verificar ID produtor: {e}")
-        except Exception as e: registrar_erro(f"Erro inesperado ao verificar ID: {e}")
-        finally:
-            if cursor: cursor.close()
-        if existe: print("Erro: ID de produtor já existe no Oracle. Tente novamente.")
+        if _buscar_um(conexao, "produtor.existe", (id_produtor,), "cadastrar_produtor"): print("Erro: ID de produtor já existe no Oracle. Tente novamente.")
         else: break
     nome = obter_input_validado("Nome do Produtor/Propriedade: ")
     localizacao = obter_input_validado("Localização (Município/Estado): ")
     contato = obter_input_validado("Contato (Telefone/Email): ", obrigatorio=False)
     associacao = obter_input_validado("Associação (se houver): ", obrigatorio=False)
-    certificacao_inicial = {"certificado": False, "etapas": {"Documentação": False, "Inspeção": False, "Aprovação": False}}
-    cursor = None; sucesso = False
-    try:
-        cursor = conexao.cursor()
-        sql_produtor = "INSERT INTO PRODUTORES (id_produtor, nome, localizacao, contato, associacao) VALUES (:1, :2, :3, :4, :5)"
-        cursor.execute(sql_produtor, (id_produtor, nome, localizacao, contato, associacao))
-        sql_cert = "INSERT INTO STATUS_CERTIFICACAO (id_produtor, certificado, etapa_documentacao, etapa_inspecao, etapa_aprovacao) VALUES (:1, :2, :3, :4, :5)"
-        etapas = certificacao_inicial["etapas"]
-        cursor.execute(sql_cert, (id_produtor, 0, 0, 0, 0))
-        conexao.commit()
-        print(f"Produtor '{nome}' cadastrado com sucesso no Oracle com ID '{id_produtor}'.")
-        sucesso = True
-    except cx_Oracle.IntegrityError as e: registrar_erro(f"Erro de Integridade Oracle (ID duplicado?): {e}"); conexao.rollback()
-    except cx_Oracle.DatabaseError as e: registrar_erro(f"Erro Oracle ao cadastrar produtor: {e}"); conexao.rollback()
-    except Exception as e: registrar_erro(f"Erro inesperado ao cadastrar produtor Oracle: {e}"); conexao.rollback()
-    finally:
-        if cursor: cursor.close()
-    return sucesso
+    if _gravar(conexao, "cadastrar_produtor", "ao cadastrar produtor", gravar_produtor, id_produtor, nome, localizacao, contato, associacao) is None: return False
+    print(f"Produtor '{nome}' cadastrado com sucesso no Oracle com ID '{id_produtor}'.")
+    return True
 
 def selecionar_produtor(conexao):
-    """Lista produtores do Oracle e permite selecionar um pelo ID."""
-    produtores_para_listar = database.carregar_produtores_talhoes(conexao)
-    if not produtores_para_listar: print("Nenhum produtor cadastrado."); return None
+    """Lista produtores do Oracle (por nome, uma página por vez) e permite selecionar um."""
+    if not conexao: registrar_erro("Conexão Oracle inválida."); return None
     print("\n--- Produtores Cadastrados ---")
-    lista_ordenada = sorted(produtores_para_listar.items(), key=lambda item: item[1].get('nome', ''))
-    for id_p, dados_p in lista_ordenada: print(f"ID: {id_p} - Nome: {dados_p.get('nome', 'N/A')}")
-    while True:
-        id_selecionado = input("Digite o ID do produtor desejado (ou 0 para cancelar): ").strip()
-        if id_selecionado == '0': return None
-        if id_selecionado in produtores_para_listar: return id_selecionado
-        else: print("ID inválido. Tente novamente.")
+    return _escolher_em_paginas(
+        conexao, "produtor.pagina", None,
+        descrever=lambda l: f"ID: {l[2]} - Nome: {l[1]}" + (f" ({l[0]})" if l[0] else ""),
+        valor=lambda l: l[2], vazio="Nenhum produtor cadastrado.",
+        por_id=lambda texto: texto if _buscar_um(conexao, "produtor.existe", (texto,), "selecionar_produtor") else None)
 
 def editar_produtor(conexao):
     """Edita os dados de um produtor existente no Oracle."""
-    if not conexao or cx_Oracle is None: registrar_erro("Conexão Oracle inválida."); return False
+    if not conexao: registrar_erro("Conexão Oracle inválida."); return False
     print("\n--- Editar Produtor ---")
     id_produtor = selecionar_produtor(conexao)
     if not id_produtor: return False
 
-    cursor = None; sucesso = False
-    try:
-        cursor = conexao.cursor()
-        cursor.execute("SELECT nome, localizacao, contato, associacao FROM PRODUTORES WHERE id_produtor = :1", (id_produtor,))
-        row = cursor.fetchone()
-        if not row: print("Erro: Produtor não encontrado no Oracle."); return False
-        dados_atuais = {"nome": row[0], "localizacao": row[1], "contato": row[2], "associacao": row[3]}
-        print("Digite os novos dados (ou pressione Enter para manter o atual):")
-        nome = obter_input_validado("Nome", valor_padrao=dados_atuais["nome"])
-        localizacao = obter_input_validado("Localização", valor_padrao=dados_atuais["localizacao"])
-        contato = obter_input_validado("Contato", valor_padrao=dados_atuais["contato"], obrigatorio=False)
-        associacao = obter_input_validado("Associação", valor_padrao=dados_atuais["associacao"], obrigatorio=False)
-        sql_update = "UPDATE PRODUTORES SET nome = :1, localizacao = :2, contato = :3, associacao = :4 WHERE id_produtor = :5"
-        cursor.execute(sql_update, (nome, localizacao, contato, associacao, id_produtor))
-        conexao.commit(); print("Dados do produtor atualizados (Oracle)."); sucesso = True
-    except cx_Oracle.DatabaseError as e: registrar_erro(f"Erro Oracle ao editar produtor: {e}"); conexao.rollback()
-    except Exception as e: registrar_erro(f"Erro inesperado Oracle: {e}"); conexao.rollback()
-    finally:
-        if cursor: cursor.close()
-    return sucesso
+    row = _buscar_um(conexao, "produtor.ler", (id_produtor,), "editar_produtor")
+    if not row: print("Erro: Produtor não encontrado no Oracle."); return False
+    dados_atuais = dict(zip(CAMPOS_PRODUTOR, row))
+    print("Digite os novos dados (ou pressione Enter para manter o atual):")
+    novos = {"nome": obter_input_validado("Nome", valor_padrao=dados_atuais["nome"]),
+             "localizacao": obter_input_validado("Localização", valor_padrao=dados_atuais["localizacao"]),
+             "contato": obter_input_validado("Contato", valor_padrao=dados_atuais["contato"], obrigatorio=False),
+             "associacao": obter_input_validado("Associação", valor_padrao=dados_atuais["associacao"], obrigatorio=False)}
+    if _gravar(conexao, "editar_produtor", "ao editar produtor", atualizar_produtor, id_produtor, novos) is None: return False
+    print("Dados do produtor atualizados (Oracle).")
+    return True
 
 def excluir_produtor(conexao):
     """Exclui um produtor do Oracle (ON DELETE CASCADE cuidará das dependências)."""
-    if not conexao or cx_Oracle is None: registrar_erro("Conexão Oracle inválida."); return False
+    if not conexao: registrar_erro("Conexão Oracle inválida."); return False
     print("\n--- Excluir Produtor ---")
     id_produtor = selecionar_produtor(conexao)
     if not id_produtor: return False
 
     print(f"[AVISO] Excluir o produtor '{id_produtor}' também excluirá seus talhões, plantios e insumos associados devido ao ON DELETE CASCADE.")
     if confirmar_acao(f"Excluir produtor '{id_produtor}' e TODOS os seus dados? (Irreversível)"):
-        cursor = None; sucesso = False
-        try:
-            cursor = conexao.cursor()
-            cursor.execute("DELETE FROM PRODUTORES WHERE id_produtor = :1", (id_produtor,))
-            if cursor.rowcount > 0: conexao.commit(); print(f"Produtor '{id_produtor}' e dados associados excluídos (Oracle)."); sucesso = True
-            else: print("Produtor não encontrado (Oracle)."); conexao.rollback()
-        except cx_Oracle.DatabaseError as e: registrar_erro(f"Erro Oracle ao excluir produtor: {e}"); conexao.rollback()
-        finally:
-            if cursor: cursor.close()
-        return sucesso
+        if _gravar(conexao, "excluir_produtor", "ao excluir produtor", apagar_produtor, id_produtor) is None: return False
+        print(f"Produtor '{id_produtor}' e dados associados excluídos (Oracle).")
+        return True
     return False
 
 # --- Talhão ---
 def cadastrar_talhao(conexao, id_produtor):
     """Cadastra um novo talhão para um produtor específico no Oracle."""
-    if not conexao or cx_Oracle is None: registrar_erro("Conexão Oracle inválida."); return False
+    if not conexao: registrar_erro("Conexão Oracle inválida."); return False
     print(f"\n--- Cadastro de Novo Talhão para Produtor ID: {id_produtor} ---")
     while True:
         id_talhao_produtor = obter_input_validado("ID do talhão para o produtor (ex: T01, AreaNorte): ")
         if not id_talhao_produtor: continue
-        cursor = None; existe = False
-        try:
-            cursor = conexao.cursor()
-            sql = "SELECT 1 FROM TALHOES WHERE id_produtor = :1 AND id_talhao_produtor = :2"
-            cursor.execute(sql, (id_produtor, id_talhao_produtor))
-            if cursor.fetchone(): existe = True
-        except cx_Oracle.DatabaseError as e: registrar_erro(f"Erro Oracle ao verificar talhão: {e}")
-        finally:
-            if cursor: cursor.close()
-        if existe: print("Erro: ID de talhão já existe para este produtor. Tente novamente.")
+        if _buscar_um(conexao, "talhao.do_produtor", (id_produtor, id_talhao_produtor), "cadastrar_talhao"):
+            print("Erro: ID de talhão já existe para este produtor. Tente novamente.")
         else: break
     tamanho_ha = obter_input_validado("Tamanho do talhão (hectares): ", float)
     tipo_solo = obter_input_validado("Tipo de solo (opcional): ", obrigatorio=False)
-    id_talhao_unico = str(uuid.uuid4())
-    cursor = None; sucesso = False
-    try:
-        cursor = conexao.cursor()
-        sql = "INSERT INTO TALHOES (id_talhao_unico, id_produtor, id_talhao_produtor, tamanho_ha, tipo_solo) VALUES (:1, :2, :3, :4, :5)"
-        cursor.execute(sql, (id_talhao_unico, id_produtor, id_talhao_produtor, tamanho_ha, tipo_solo))
-        conexao.commit(); print(f"Talhão '{id_talhao_produtor}' cadastrado (Oracle)."); sucesso = True
-    except cx_Oracle.DatabaseError as e: registrar_erro(f"Erro Oracle ao cadastrar talhão: {e}"); conexao.rollback()
-    finally:
-        if cursor: cursor.close()
-    return sucesso
+    if _gravar(conexao, "cadastrar_talhao", "ao cadastrar talhão", gravar_talhao, None, id_produtor, id_talhao_produtor, tamanho_ha, tipo_solo) is None: return False
+    print(f"Talhão '{id_talhao_produtor}' cadastrado (Oracle).")
+    return True
 
 def selecionar_talhao(conexao, id_produtor):
-    """Lista talhões de um produtor do Oracle e permite selecionar um."""
-    produtores = database.carregar_produtores_talhoes(conexao)
-    if id_produtor not in produtores or not produtores[id_produtor].get("talhoes"):
-        print("Nenhum talhão cadastrado para este produtor.")
-        return None, None
-    talhoes_produtor = produtores[id_produtor]["talhoes"]
+    """Lista talhões de um produtor do Oracle (uma página por vez) e permite selecionar um."""
+    if not conexao: registrar_erro("Conexão Oracle inválida."); return None, None
     print(f"\n--- Talhões do Produtor ID: {id_produtor} ---")
-    lista_ordenada = sorted(talhoes_produtor.items())
-    for id_t_prod, dados_t in lista_ordenada: print(f"ID: {id_t_prod} - Tamanho: {dados_t.get('tamanho_ha', 'N/A')} ha")
-    while True:
-        id_selecionado_produtor = input("Digite o ID do talhão desejado (ou 0 para cancelar): ").strip()
-        if id_selecionado_produtor == '0': return None, None
-        if id_selecionado_produtor in talhoes_produtor:
-            id_talhao_unico = talhoes_produtor[id_selecionado_produtor].get("id_talhao_unico")
-            return id_selecionado_produtor, id_talhao_unico
-        else: print("ID inválido.")
+    def por_id(texto):
+        row = _buscar_um(conexao, "talhao.do_produtor", (id_produtor, texto), "selecionar_talhao")
+        return (texto, row[0]) if row else None
+    escolha = _escolher_em_paginas(
+        conexao, "talhao.pagina", {"id_produtor": id_produtor},
+        descrever=lambda l: f"ID: {l[2]} - Tamanho: {l[0] if l[0] is not None else 'N/A'} ha" + (f" - Solo: {l[1]}" if l[1] else ""),
+        valor=lambda l: (l[2], l[3]), vazio="Nenhum talhão cadastrado para este produtor.", por_id=por_id)
+    return escolha or (None, None)
 
 def editar_talhao(conexao, id_produtor):
     """Edita os dados de um talhão existente no Oracle."""
-    if not conexao or cx_Oracle is None: registrar_erro("Conexão Oracle inválida."); return False
+    if not conexao: registrar_erro("Conexão Oracle inválida."); return False
     print("\n--- Editar Talhão ---")
     id_talhao_produtor, id_talhao_unico = selecionar_talhao(conexao, id_produtor)
     if not id_talhao_unico: return False
 
-    produtores_db = database.carregar_produtores_talhoes(conexao)
+    produtores_db = database.carregar_produtores_talhoes(conexao, {"id_produtor": id_produtor, "id_talhao_unico": id_talhao_unico})
     dados_atuais = produtores_db.get(id_produtor, {}).get("talhoes", {}).get(id_talhao_produtor)
     if not dados_atuais: print("Erro: Dados do talhão não encontrados."); return False
 
     print("Digite os novos dados (ou pressione Enter para manter o atual):")
-    tamanho_ha = obter_input_validado("Tamanho (ha)", float, valor_padrao=dados_atuais.get("tamanho_ha"))
-    tipo_solo = obter_input_validado("Tipo de solo", str, valor_padrao=dados_atuais.get("tipo_solo"), obrigatorio=False)
-
-    cursor = None; sucesso = False
-    try:
-        cursor = conexao.cursor()
-        sql_update = "UPDATE TALHOES SET tamanho_ha = :1, tipo_solo = :2 WHERE id_talhao_unico = :3"
-        cursor.execute(sql_update, (tamanho_ha, tipo_solo, id_talhao_unico))
-        conexao.commit(); print(f"Dados do talhão '{id_talhao_produtor}' atualizados (Oracle)."); sucesso = True
-    except cx_Oracle.DatabaseError as e: registrar_erro(f"Erro Oracle ao editar talhão: {e}"); conexao.rollback()
-    finally:
-        if cursor: cursor.close()
-    return sucesso
+    novos = {"tamanho_ha": obter_input_validado("Tamanho (ha)", float, valor_padrao=dados_atuais.get("tamanho_ha")),
+             "tipo_solo": obter_input_validado("Tipo de solo", str, valor_padrao=dados_atuais.get("tipo_solo"), obrigatorio=False)}
+    if _gravar(conexao, "editar_talhao", "ao editar talhão", atualizar_talhao, id_produtor, id_talhao_unico, novos) is None: return False
+    print(f"Dados do talhão '{id_talhao_produtor}' atualizados (Oracle).")
+    return True
 
 def excluir_talhao(conexao, id_produtor):
     """Exclui um talhão do Oracle (ON DELETE CASCADE cuidará das dependências)."""
-    if not conexao or cx_Oracle is None: registrar_erro("Conexão Oracle inválida."); return False
+    if not conexao: registrar_erro("Conexão Oracle inválida."); return False
     print("\n--- Excluir Talhão ---")
     id_talhao_produtor, id_talhao_unico = selecionar_talhao(conexao, id_produtor)
     if not id_talhao_unico: return False
 
     print(f"[AVISO] Excluir o talhão '{id_talhao_produtor}' também excluirá seus plantios e insumos (ON DELETE CASCADE).")
     if confirmar_acao(f"Excluir talhão '{id_talhao_produtor}' e dados associados?"):
-        cursor = None; sucesso = False
-        try:
-            cursor = conexao.cursor()
-            cursor.execute("DELETE FROM TALHOES WHERE id_talhao_unico = :1", (id_talhao_unico,))
-            if cursor.rowcount > 0: conexao.commit(); print(f"Talhão '{id_talhao_produtor}' excluído (Oracle)."); sucesso = True
-            else: print("Talhão não encontrado (Oracle)."); conexao.rollback()
-        except cx_Oracle.DatabaseError as e: registrar_erro(f"Erro Oracle ao excluir talhão: {e}"); conexao.rollback()
-        finally:
-            if cursor: cursor.close()
-        return sucesso
+        if _gravar(conexao, "excluir_talhao", "ao excluir talhão", apagar_talhao, id_produtor, id_talhao_unico) is None: return False
+        print(f"Talhão '{id_talhao_produtor}' excluído (Oracle).")
+        return True
     return False
 
 # --- Plantio/Produto ---
+def obter_cultura(conexao, prompt, valor_padrao=None):
+    """Lê o nome de uma cultura e o troca pelo nome canônico (ex: 'mandióca' -> 'Mandioca'), sugerindo correções."""
+    cultura = obter_input_validado(prompt, str, valor_padrao=valor_padrao)
+    if not cultura or cultura == valor_padrao: return cultura
+    indice = indice_culturas.carregar_indice(conexao)
+    canonica = indice.canonica(cultura)
+    if canonica: return canonica
+    sugestao = indice.resolver(cultura)
+    if sugestao and confirmar_acao(f"Cultura '{cultura}' não encontrada. Você quis dizer '{sugestao}'?"): return sugestao
+    return " ".join(cultura.split())
+
 def obter_cultura_anterior(conexao, id_talhao_unico):
-    """Busca a última cultura plantada para um talhão no Oracle."""
-    if not conexao or cx_Oracle is None: return "Erro de conexão"
-    cursor = None; cultura = "Nenhuma registrada"
-    try:
-        cursor = conexao.cursor()
-        sql = """SELECT cultura FROM PLANTIOS_PRODUTOS WHERE id_talhao_unico = :1 ORDER BY data_plantio DESC FETCH FIRST 1 ROW ONLY"""
-        cursor.execute(sql, (id_talhao_unico,))
-        row = cursor.fetchone()
-        if row: cultura = row[0]
-    except cx_Oracle.DatabaseError as e: registrar_erro(f"Erro Oracle ao buscar cultura anterior: {e}")
-    finally:
-        if cursor: cursor.close()
-    return cultura
+    """Busca a última cultura plantada para um talhão (índice de rotação ou consulta do talhão); None se não houver
+    ou se a consulta falhar (o valor é gravado no plantio, então nada de texto de aviso no lugar da cultura)."""
+    if not conexao: return None
+    try: return rotacao.cultura_anterior(conexao, id_talhao_unico)
+    except cx_Oracle.DatabaseError as e: registrar_erro(f"Erro Oracle ao buscar cultura anterior: {e}", erro=e, operacao="obter_cultura_anterior"); return None
 
 def registrar_plantio(conexao, id_produtor, id_talhao_produtor, id_talhao_unico):
     """Registra um novo plantio no Oracle."""
-    if not conexao or cx_Oracle is None: registrar_erro("Conexão Oracle inválida."); return False
+    if not conexao: registrar_erro("Conexão Oracle inválida."); return False
     print(f"\n--- Registrar Novo Plantio (Produtor: {id_produtor}, Talhão: {id_talhao_produtor}) ---")
     cultura_anterior = obter_cultura_anterior(conexao, id_talhao_unico)
-    print(f"Última cultura registrada neste talhão: {cultura_anterior}")
-    cultura_atual = obter_input_validado("Cultura a ser plantada")
+    print(f"Última cultura registrada neste talhão: {cultura_anterior or 'Nenhuma registrada'}")
+    cultura_atual = obter_cultura(conexao, "Cultura a ser plantada")
     if not cultura_atual: return False
 
-    if cultura_atual.lower() == cultura_anterior.lower() and cultura_anterior != "Nenhuma registrada":
+    if indice_culturas.mesma_cultura(conexao, cultura_atual, cultura_anterior):
         print(f"[AVISO] Plantando '{cultura_atual}' novamente em sequência.")
         if not confirmar_acao("Continuar?"): return False
 
@@ -256,154 +414,78 @@ def registrar_plantio(conexao, id_produtor, id_talhao_produtor, id_talhao_unico)
     if not data_prevista_colheita: print("Erro: Data prevista é obrigatória."); return False
     if data_prevista_colheita <= data_plantio: print("Erro: Data prevista inválida."); return False
 
-    id_plantio = str(uuid.uuid4())
-    cursor = None; sucesso = False
-    try:
-        cursor = conexao.cursor()
-        sql = """INSERT INTO PLANTIOS_PRODUTOS (id_plantio, id_produtor, id_talhao_unico, cultura, data_plantio,
-                   data_prevista_colheita, status, observacoes, cultura_anterior)
-                   VALUES (:1, :2, :3, :4, :5, :6, :7, :8, :9)"""
-        cursor.execute(sql, (id_plantio, id_produtor, id_talhao_unico, cultura_atual, data_plantio,
-                   data_prevista_colheita, "Planejado", observacoes, cultura_anterior))
-        conexao.commit()
-        print(f"Plantio de '{cultura_atual}' registrado (Oracle). Prev: {formatar_data_br(data_prevista_colheita)}")
-        sucesso = True
-    except cx_Oracle.DatabaseError as e: registrar_erro(f"Erro Oracle ao registrar plantio: {e}"); conexao.rollback()
-    except Exception as e: registrar_erro(f"Erro inesperado Oracle: {e}"); conexao.rollback()
-    finally:
-        if cursor: cursor.close()
-    return sucesso
+    plantio = Plantio(None, id_produtor, id_talhao_unico, cultura_atual, data_plantio, data_prevista_colheita,
+                      None, None, None, "Planejado", observacoes, cultura_anterior)
+    if _gravar(conexao, "registrar_plantio", "ao registrar plantio", gravar_plantio, plantio) is None: return False
+    print(f"Plantio de '{cultura_atual}' registrado (Oracle). Prev: {formatar_data_br(data_prevista_colheita)}")
+    return True
 
 def selecionar_plantio(conexao, id_produtor, status_permitidos=None):
-    """Lista plantios/produtos de um produtor do Oracle e permite selecionar um."""
-    if not conexao or cx_Oracle is None: registrar_erro("Conexão Oracle inválida."); return None
+    """Lista plantios/produtos de um produtor do Oracle (mais recentes primeiro, uma página por vez) e permite selecionar um."""
+    if not conexao: registrar_erro("Conexão Oracle inválida."); return None
     if status_permitidos is None: status_permitidos = ['Planejado', 'Disponível']
     print(f"\n--- Selecionar Plantio/Produto (Produtor: {id_produtor}) ---")
-    plantios_produtor = []
-    cursor = None
-    try:
-        cursor = conexao.cursor()
-        status_placeholders = ','.join([f':{i+2}' for i in range(len(status_permitidos))])
-        sql = f"""SELECT p.id_plantio, p.cultura, t.id_talhao_produtor, p.status,
-                   CASE p.status WHEN 'Disponível' THEN p.data_colheita_real ELSE p.data_prevista_colheita END AS data_ref
-                   FROM PLANTIOS_PRODUTOS p JOIN TALHOES t ON p.id_talhao_unico = t.id_talhao_unico
-                   WHERE p.id_produtor = :1 AND p.status IN ({status_placeholders}) ORDER BY data_ref DESC NULLS LAST"""
-        params = [id_produtor] + status_permitidos
-        cursor.execute(sql, params)
-        for row in cursor.fetchall():
-             data_ref_obj = row[4] if isinstance(row[4], datetime.date) else (row[4].date() if isinstance(row[4], datetime.datetime) else datetime.date.min)
-             plantios_produtor.append({
-                 "id_plantio": row[0], "cultura": row[1], "id_talhao_produtor": row[2],
-                 "status": row[3], "data_ref_obj": data_ref_obj,
-                 "data_ref_str": formatar_data_br(data_ref_obj) })
-    except cx_Oracle.DatabaseError as e: registrar_erro(f"Erro Oracle ao listar plantios: {e}")
-    finally:
-        if cursor: cursor.close()
-
-    if not plantios_produtor: print(f"Nenhum registro encontrado com status: {', '.join(status_permitidos)}"); return None
-
-    print("Registros encontrados:")
-    for i, p in enumerate(plantios_produtor):
-        # Mostra o ID completo
-        print(f"{i+1}. ID: {p['id_plantio']} - Cultura: {p['cultura']} ({p['status']}) - Talhão: {p['id_talhao_produtor']} - Data Ref: {p['data_ref_str']}")
-
-    while True:
-        try:
-            escolha_str = input(f"Digite o número (1-{len(plantios_produtor)}) ou 0 para cancelar: ").strip()
-            if not escolha_str: continue
-            escolha = int(escolha_str)
-            if escolha == 0: return None
-            if 1 <= escolha <= len(plantios_produtor): return plantios_produtor[escolha-1]['id_plantio']
-            else: print("Número inválido.")
-        except ValueError: print("Entrada inválida.")
+    # Sempre os mesmos 4 binds de status (os que sobram vão como NULL): um único texto de comando
+    binds = {"id_produtor": id_produtor}
+    binds.update({f"status_{i}": status for i, status in enumerate(completar(status_permitidos, ARIDADE_STATUS))})
+    # Mostra o ID completo
+    return _escolher_em_paginas(
+        conexao, "plantio.pagina", binds,
+        descrever=lambda l: f"ID: {l[5]} - Cultura: {l[0]} ({l[2]}) - Talhão: {l[1]} - Data Ref: {formatar_data_br(l[3])}",
+        valor=lambda l: l[5], vazio=f"Nenhum registro encontrado com status: {', '.join(status_permitidos)}")
 
 def editar_plantio(conexao, id_produtor):
     """Edita dados de um plantio/produto existente no Oracle."""
-    if not conexao or cx_Oracle is None: registrar_erro("Conexão Oracle inválida."); return False
+    if not conexao: registrar_erro("Conexão Oracle inválida."); return False
     print("\n--- Editar Plantio/Produto ---")
     id_plantio = selecionar_plantio(conexao, id_produtor, status_permitidos=['Planejado', 'Disponível'])
     if not id_plantio: return False
 
-    cursor = None; sucesso = False
-    try:
-        cursor = conexao.cursor()
-        sql_select = """SELECT cultura, data_plantio, data_prevista_colheita, data_colheita_real, quantidade_colhida,
-                           unidade_medida, status, observacoes, cultura_anterior
-                           FROM PLANTIOS_PRODUTOS WHERE id_plantio = :1"""
-        cursor.execute(sql_select, (id_plantio,))
-        row = cursor.fetchone()
-        if not row: print("Erro: Plantio não encontrado no Oracle."); return False
-        cols = [desc[0].lower() for desc in cursor.description]
-        dados_atuais = dict(zip(cols, row))
-        for key in ['data_plantio', 'data_prevista_colheita', 'data_colheita_real']:
-             if isinstance(dados_atuais.get(key), datetime.datetime): dados_atuais[key] = dados_atuais[key].date()
-
-        print("Digite os novos dados (ou pressione Enter para manter o atual):")
-        cultura = obter_input_validado("Cultura", str, valor_padrao=dados_atuais.get("cultura"))
-        # Validação da data de plantio na edição também
-        while True:
-            data_plantio = obter_input_validado("Data Plantio", datetime.date, valor_padrao=dados_atuais.get("data_plantio"))
-            if not data_plantio: break # Permite manter a data atual
-            data_minima = datetime.date.today() - datetime.timedelta(days=2)
-            if data_plantio < data_minima: print(f"Erro: Data de plantio não pode ser anterior a {formatar_data_br(data_minima)}.")
-            elif data_plantio > datetime.date.today(): print(f"Erro: Data de plantio não pode ser futura.")
-            else: break
-
-        data_prevista_colheita = obter_input_validado("Data Prev. Colheita", datetime.date, valor_padrao=dados_atuais.get("data_prevista_colheita"))
-        cultura_anterior = obter_input_validado("Cultura Anterior", str, valor_padrao=dados_atuais.get("cultura_anterior"), obrigatorio=False)
-        observacoes = obter_input_validado("Observações", str, valor_padrao=dados_atuais.get("observacoes"), obrigatorio=False)
-
-        data_colheita_real = dados_atuais.get("data_colheita_real")
-        quantidade_colhida = dados_atuais.get("quantidade_colhida")
-        unidade_medida = dados_atuais.get("unidade_medida")
-        if dados_atuais.get("status") == 'Disponível':
-            print("--- Editar Dados da Colheita ---")
-            data_colheita_real = obter_input_validado("Data Real Colheita", datetime.date, valor_padrao=data_colheita_real)
-            quantidade_colhida = obter_input_validado("Quantidade Colhida", float, valor_padrao=quantidade_colhida)
-            unidade_medida = obter_input_validado("Unidade Medida", str, valor_padrao=unidade_medida)
-
-        # Verifica consistência das datas
-        if data_prevista_colheita and data_plantio and data_prevista_colheita <= data_plantio:
-             print("Erro: Data prevista da colheita deve ser posterior à data de plantio."); return False
-        if data_colheita_real and data_plantio and data_colheita_real < data_plantio:
-             print("Erro: Data real da colheita não pode ser anterior à data de plantio."); return False
-
-
-        sql_update = """UPDATE PLANTIOS_PRODUTOS SET cultura = :1, data_plantio = :2, data_prevista_colheita = :3,
-                           data_colheita_real = :4, quantidade_colhida = :5, unidade_medida = :6,
-                           observacoes = :7, cultura_anterior = :8 WHERE id_plantio = :9"""
-        cursor.execute(sql_update, (cultura, data_plantio, data_prevista_colheita, data_colheita_real, quantidade_colhida,
-                                     unidade_medida, observacoes, cultura_anterior, id_plantio))
-        conexao.commit(); print("Dados atualizados (Oracle)."); sucesso = True
-    except cx_Oracle.DatabaseError as e: registrar_erro(f"Erro Oracle ao editar plantio: {e}"); conexao.rollback()
-    except Exception as e: registrar_erro(f"Erro inesperado Oracle: {e}"); conexao.rollback()
-    finally:
-        if cursor: cursor.close()
-    return sucesso
+    row = _buscar_um(conexao, "plantio.ler", (id_plantio,), "editar_plantio")
+    if not row: print("Erro: Plantio não encontrado no Oracle."); return False
+    dados_atuais = Plantio(*row)
+
+    print("Digite os novos dados (ou pressione Enter para manter o atual):")
+    novos = {"cultura": obter_cultura(conexao, "Cultura", valor_padrao=dados_atuais.get("cultura"))}
+    # Validação da data de plantio na edição também
+    while True:
+        data_plantio = obter_input_validado("Data Plantio", datetime.date, valor_padrao=dados_atuais.get("data_plantio"))
+        if not data_plantio: break # Permite manter a data atual
+        data_minima = datetime.date.today() - datetime.timedelta(days=2)
+        if data_plantio < data_minima: print(f"Erro: Data de plantio não pode ser anterior a {formatar_data_br(data_minima)}.")
+        elif data_plantio > datetime.date.today(): print(f"Erro: Data de plantio não pode ser futura.")
+        else: break
+    novos["data_plantio"] = data_plantio
+    novos["data_prevista_colheita"] = obter_input_validado("Data Prev. Colheita", datetime.date, valor_padrao=dados_atuais.get("data_prevista_colheita"))
+    novos["cultura_anterior"] = obter_input_validado("Cultura Anterior", str, valor_padrao=dados_atuais.get("cultura_anterior"), obrigatorio=False)
+    novos["observacoes"] = obter_input_validado("Observações", str, valor_padrao=dados_atuais.get("observacoes"), obrigatorio=False)
+    if dados_atuais.get("status") == 'Disponível':
+        print("--- Editar Dados da Colheita ---")
+        novos["data_colheita_real"] = obter_input_validado("Data Real Colheita", datetime.date, valor_padrao=dados_atuais.get("data_colheita_real"))
+        novos["quantidade_colhida"] = obter_input_validado("Quantidade Colhida", float, valor_padrao=dados_atuais.get("quantidade_colhida"))
+        novos["unidade_medida"] = obter_input_validado("Unidade Medida", str, valor_padrao=dados_atuais.get("unidade_medida"))
+
+    # As datas são conferidas na gravação (prevista após o plantio, colheita real não anterior a ele)
+    if _gravar(conexao, "editar_plantio", "ao editar plantio", atualizar_plantio, id_plantio, novos) is None: return False
+    print("Dados atualizados (Oracle).")
+    return True
 
 def excluir_plantio(conexao, id_produtor):
     """Exclui um registro de plantio/produto do Oracle."""
-    if not conexao or cx_Oracle is None: registrar_erro("Conexão Oracle inválida."); return False
+    if not conexao: registrar_erro("Conexão Oracle inválida."); return False
     print("\n--- Excluir Plantio/Produto ---")
     id_plantio = selecionar_plantio(conexao, id_produtor, status_permitidos=['Planejado', 'Disponível', 'Cancelado'])
     if not id_plantio: return False
 
     if confirmar_acao(f"Excluir registro ID {id_plantio}?"): # Mostra ID completo na confirmação
-        cursor = None; sucesso = False
-        try:
-            cursor = conexao.cursor()
-            cursor.execute("DELETE FROM PLANTIOS_PRODUTOS WHERE id_plantio = :1", (id_plantio,))
-            if cursor.rowcount > 0: conexao.commit(); print("Registro excluído (Oracle)."); sucesso = True
-            else: print("Registro não encontrado (Oracle)."); conexao.rollback()
-        except cx_Oracle.DatabaseError as e: registrar_erro(f"Erro Oracle ao excluir plantio: {e}"); conexao.rollback()
-        finally:
-            if cursor: cursor.close()
-        return sucesso
+        if _gravar(conexao, "excluir_plantio", "ao excluir plantio", apagar_plantio, id_plantio) is None: return False
+        print("Registro excluído (Oracle).")
+        return True
     return False
 
 def confirmar_colheita(conexao, id_produtor):
     """Permite ao produtor confirmar a colheita de um plantio planejado no Oracle."""
-    if not conexao or cx_Oracle is None: registrar_erro("Conexão Oracle inválida."); return False
+    if not conexao: registrar_erro("Conexão Oracle inválida."); return False
     print("\n--- Confirmar Colheita ---")
     id_plantio = selecionar_plantio(conexao, id_produtor, status_permitidos=['Planejado'])
     if not id_plantio: print("Nenhum plantio planejado selecionado."); return False
@@ -411,129 +493,56 @@ def confirmar_colheita(conexao, id_produtor):
     data_colheita_real = obter_input_validado("Data REAL da Colheita", tipo_dado=datetime.date)
     quantidade_colhida = obter_input_validado("Quantidade Colhida (número)", tipo_dado=float)
     unidade_medida = obter_input_validado("Unidade de Medida (kg, ton, caixa, etc.)")
-    if not data_colheita_real or quantidade_colhida is None or not unidade_medida:
-        print("Erro: Todos os dados da colheita são obrigatórios."); return False
-
-    # Validação extra: data da colheita não pode ser anterior ao plantio
-    cursor = None
-    try:
-        cursor = conexao.cursor()
-        cursor.execute("SELECT data_plantio FROM PLANTIOS_PRODUTOS WHERE id_plantio = :1", (id_plantio,))
-        row = cursor.fetchone()
-        if row and row[0] and isinstance(row[0], datetime.datetime) and data_colheita_real < row[0].date():
-             print(f"Erro: Data da colheita ({formatar_data_br(data_colheita_real)}) não pode ser anterior à data de plantio ({formatar_data_br(row[0].date())}).")
-             return False
-    except cx_Oracle.DatabaseError as e:
-        registrar_erro(f"Erro Oracle ao buscar data de plantio para validação: {e}")
-        # Decide se continua ou não, por segurança vamos impedir
-        return False
-    finally:
-        if cursor: cursor.close()
-
-
-    cursor = None; sucesso = False
-    try:
-        cursor = conexao.cursor()
-        sql = """UPDATE PLANTIOS_PRODUTOS SET status = 'Disponível', data_colheita_real = :1,
-                   quantidade_colhida = :2, unidade_medida = :3 WHERE id_plantio = :4"""
-        cursor.execute(sql, (data_colheita_real, quantidade_colhida, unidade_medida, id_plantio))
-        if cursor.rowcount > 0: conexao.commit(); print(f"\nColheita confirmada (Oracle)."); sucesso = True
-        else: print(f"Erro: Plantio {id_plantio} não encontrado (Oracle)."); conexao.rollback()
-    except cx_Oracle.DatabaseError as e: registrar_erro(f"Erro Oracle: {e}"); conexao.rollback()
-    finally:
-        if cursor: cursor.close()
-    return sucesso
+    # A gravação confere o status e que a colheita não é anterior ao plantio
+    if _gravar(conexao, "confirmar_colheita", "ao confirmar colheita", colher_plantio, id_plantio,
+               data_colheita_real, quantidade_colhida, unidade_medida) is None: return False
+    print(f"\nColheita confirmada (Oracle).")
+    return True
 
 # --- Insumo ---
 def registrar_insumo(conexao, id_produtor, id_talhao_produtor, id_talhao_unico):
     """Registra a aplicação de um insumo orgânico no Oracle."""
-    if not conexao or cx_Oracle is None: registrar_erro("Conexão Oracle inválida."); return False
+    if not conexao: registrar_erro("Conexão Oracle inválida."); return False
     print(f"\n--- Registrar Aplicação de Insumo (Produtor: {id_produtor}, Talhão: {id_talhao_produtor}) ---")
     data_aplicacao = obter_input_validado("Data da Aplicação", tipo_dado=datetime.date)
     tipo_insumo = obter_input_validado("Tipo de Insumo (Composto, Adubo Verde, etc.)")
     quantidade = obter_input_validado("Quantidade Aplicada (ex: kg, L, m³)", obrigatorio=False)
     observacoes = obter_input_validado("Observações (opcional)", obrigatorio=False)
-    if not data_aplicacao or not tipo_insumo: print("Erro: Data e Tipo de Insumo são obrigatórios."); return False
-    id_registro = str(uuid.uuid4())
-
-    cursor = None; sucesso = False
-    try:
-        cursor = conexao.cursor()
-        sql = """INSERT INTO REGISTROS_INSUMOS (id_registro, id_produtor, id_talhao_unico, data_aplicacao, tipo_insumo, quantidade, observacoes)
-                   VALUES (:1, :2, :3, :4, :5, :6, :7)"""
-        cursor.execute(sql, (id_registro, id_produtor, id_talhao_unico, data_aplicacao, tipo_insumo, quantidade, observacoes))
-        conexao.commit(); print(f"Registro de '{tipo_insumo}' salvo (Oracle)."); sucesso = True
-    except cx_Oracle.DatabaseError as e: registrar_erro(f"Erro Oracle: {e}"); conexao.rollback()
-    finally:
-        if cursor: cursor.close()
-    return sucesso
+    if _gravar(conexao, "registrar_insumo", "ao registrar insumo", gravar_insumo, None, id_produtor, id_talhao_unico,
+               data_aplicacao, tipo_insumo, quantidade, observacoes) is None: return False
+    print(f"Registro de '{tipo_insumo}' salvo (Oracle).")
+    return True
 
 def selecionar_insumo(conexao, id_produtor):
-    """Lista registros de insumo de um produtor do Oracle e permite selecionar um."""
-    if not conexao or cx_Oracle is None: registrar_erro("Conexão Oracle inválida."); return None
+    """Lista registros de insumo de um produtor do Oracle (mais recentes primeiro, uma página por vez) e permite selecionar um."""
+    if not conexao: registrar_erro("Conexão Oracle inválida."); return None
     print(f"\n--- Selecionar Registro de Insumo (Produtor: {id_produtor}) ---")
-    registros_produtor = []
-    cursor = None
-    try:
-        cursor = conexao.cursor()
-        sql = """SELECT r.id_registro, r.data_aplicacao, r.tipo_insumo, t.id_talhao_produtor
-                   FROM REGISTROS_INSUMOS r JOIN TALHOES t ON r.id_talhao_unico = t.id_talhao_unico
-                   WHERE r.id_produtor = :1 ORDER BY r.data_aplicacao DESC"""
-        cursor.execute(sql, (id_produtor,))
-        for row in cursor.fetchall():
-             data_app_obj = row[1].date() if isinstance(row[1], datetime.datetime) else row[1]
-             registros_produtor.append({
-                 "id_registro": row[0], "data_aplicacao_obj": data_app_obj,
-                 "data_aplicacao_br": formatar_data_br(data_app_obj), # Usa formatar_data_br
-                 "tipo_insumo": row[2], "id_talhao_produtor": row[3] })
-    except cx_Oracle.DatabaseError as e: registrar_erro(f"Erro Oracle ao listar insumos: {e}")
-    finally:
-        if cursor: cursor.close()
-
-    if not registros_produtor: print("Nenhum registro de insumo encontrado."); return None
-
-    print("Registros encontrados:")
-    for i, r in enumerate(registros_produtor):
-        # Mostra ID completo para facilitar a exclusão
-        print(f"{i+1}. ID: {r['id_registro']} - Data: {r['data_aplicacao_br']} - Tipo: {r['tipo_insumo']} - Talhão: {r['id_talhao_produtor']}")
-
-    while True:
-        try:
-            escolha_str = input(f"Digite o número (1-{len(registros_produtor)}) ou 0 para cancelar: ").strip()
-            if not escolha_str: continue
-            escolha = int(escolha_str)
-            if escolha == 0: return None
-            if 1 <= escolha <= len(registros_produtor): return registros_produtor[escolha-1]['id_registro']
-            else: print("Número inválido.")
-        except ValueError: print("Entrada inválida.");
+    # Mostra ID completo para facilitar a exclusão
+    return _escolher_em_paginas(
+        conexao, "insumo.pagina", {"id_produtor": id_produtor},
+        descrever=lambda l: f"ID: {l[4]} - Data: {formatar_data_br(l[0])} - Tipo: {l[1]} - Talhão: {l[2]}",
+        valor=lambda l: l[4], vazio="Nenhum registro de insumo encontrado.")
 
 def excluir_insumo(conexao, id_produtor):
     """Exclui um registro de aplicação de insumo do Oracle."""
-    if not conexao or cx_Oracle is None: registrar_erro("Conexão Oracle inválida."); return False
+    if not conexao: registrar_erro("Conexão Oracle inválida."); return False
     print("\n--- Excluir Registro de Insumo ---")
     id_registro = selecionar_insumo(conexao, id_produtor) # Chama a função corrigida
     if not id_registro: return False
 
     if confirmar_acao(f"Excluir registro de insumo ID {id_registro[:8]}...?"): # Mostra ID truncado na confirmação
-        cursor = None; sucesso = False
-        try:
-            cursor = conexao.cursor()
-            cursor.execute("DELETE FROM REGISTROS_INSUMOS WHERE id_registro = :1", (id_registro,))
-            if cursor.rowcount > 0: conexao.commit(); print("Registro excluído (Oracle)."); sucesso = True
-            else: print("Registro não encontrado (Oracle)."); conexao.rollback()
-        except cx_Oracle.DatabaseError as e: registrar_erro(f"Erro Oracle ao excluir insumo: {e}"); conexao.rollback()
-        finally:
-            if cursor: cursor.close()
-        return sucesso
+        if _gravar(conexao, "excluir_insumo", "ao excluir insumo", apagar_insumo, id_registro) is None: return False
+        print("Registro excluído (Oracle).")
+        return True
     return False
 
 # --- Certificação ---
 def gerenciar_certificacao(conexao, id_produtor):
     """Permite visualizar e atualizar o status da certificação orgânica no Oracle."""
-    if not conexao or cx_Oracle is None: registrar_erro("Conexão Oracle inválida."); return
+    if not conexao: registrar_erro("Conexão Oracle inválida."); return
     print(f"\n--- Status da Certificação Orgânica (Produtor: {id_produtor}) ---")
-    etapas_map = {"etapa_documentacao": "Documentação", "etapa_inspecao": "Inspeção", "etapa_aprovacao": "Aprovação"}
-    dados_produtor = database.carregar_status_certificacao(conexao).get(id_produtor) # Carrega do Oracle
+    etapas_map = {"documentacao": "Documentação", "inspecao": "Inspeção", "aprovacao": "Aprovação"}
+    dados_produtor = database.carregar_status_certificacao(conexao, {"id_produtor": id_produtor}).get(id_produtor) # Carrega do Oracle
 
     if not dados_produtor:
         print(f"Status não encontrado para produtor {id_produtor}. Verifique cadastro."); return
@@ -552,16 +561,9 @@ def gerenciar_certificacao(conexao, id_produtor):
         if opcao == 'V': break
         elif opcao == 'C':
             novo_status_bool = confirmar_acao("Marcar como CERTIFICADO?")
-            cursor = None
-            try:
-                cursor = conexao.cursor()
-                sql = "UPDATE STATUS_CERTIFICACAO SET certificado = :1 WHERE id_produtor = :2"
-                cursor.execute(sql, (1 if novo_status_bool else 0, id_produtor)); conexao.commit()
+            if _gravar(conexao, "gerenciar_certificacao", "ao alterar a certificação", atualizar_certificacao, id_produtor,
+                       {"certificado": novo_status_bool}) is not None:
                 print(f"Status geral alterado (Oracle).")
-                dados_produtor['certificado'] = novo_status_bool # Atualiza memória
-            except cx_Oracle.DatabaseError as e: registrar_erro(f"Erro Oracle: {e}"); conexao.rollback()
-            finally:
-                if cursor: cursor.close()
             break
         elif opcao == 'M':
             while True:
@@ -569,18 +571,11 @@ def gerenciar_certificacao(conexao, id_produtor):
                     num_etapa = int(input(f"Número da etapa (1-{len(etapas_nomes)}): "))
                     if 1 <= num_etapa <= len(etapas_nomes):
                         nome_etapa = etapas_nomes[num_etapa-1]
-                        db_key = list(etapas_map.keys())[num_etapa-1]
-                        novo_status_etapa = not dados_produtor['etapas'][nome_etapa]
-                        cursor = None
-                        try:
-                            cursor = conexao.cursor()
-                            sql = f"UPDATE STATUS_CERTIFICACAO SET {db_key} = :1 WHERE id_produtor = :2"
-                            cursor.execute(sql, (1 if novo_status_etapa else 0, id_produtor)); conexao.commit()
+                        campo = list(etapas_map.keys())[num_etapa-1]
+                        novo_status_etapa = not etapas_atuais.get(nome_etapa, False)
+                        if _gravar(conexao, "gerenciar_certificacao", "ao alterar a certificação", atualizar_certificacao, id_produtor,
+                                   {campo: novo_status_etapa}) is not None:
                             print(f"Status '{nome_etapa}' alterado (Oracle).")
-                            dados_produtor['etapas'][nome_etapa] = novo_status_etapa # Atualiza memória
-                        except cx_Oracle.DatabaseError as e: registrar_erro(f"Erro Oracle: {e}"); conexao.rollback()
-                        finally:
-                            if cursor: cursor.close()
                         break # Sai do loop de marcar etapa
                     else: print("Número inválido.")
                 except ValueError: print("Entrada inválida.")
@@ -590,10 +585,10 @@ def gerenciar_certificacao(conexao, id_produtor):
 # --- Demanda ---
 def registrar_demanda(conexao):
     """Registra uma nova demanda de produto."""
-    if not conexao or cx_Oracle is None: registrar_erro("Conexão Oracle inválida."); return False
+    if not conexao: registrar_erro("Conexão Oracle inválida."); return False
     print("\n--- Registrar Nova Demanda ---")
 
-    cultura = obter_input_validado("Cultura desejada")
+    cultura = obter_cultura(conexao, "Cultura desejada")
     quantidade = obter_input_validado("Quantidade necessária", float)
     unidade_medida = obter_input_validado("Unidade de Medida (kg, ton, caixa, etc.)")
     while True: # Loop para validar data da demanda
@@ -605,63 +600,30 @@ def registrar_demanda(conexao):
             break # Data válida
     observacoes = obter_input_validado("Observações (opcional)", obrigatorio=False)
 
-    if not cultura or quantidade is None or not unidade_medida:
-         print("Erro: Cultura, Quantidade e Unidade são obrigatórios.")
-         return False
-
-    id_demanda = str(uuid.uuid4())
-    cursor = None; sucesso = False
-    try:
-        cursor = conexao.cursor()
-        sql = """INSERT INTO DEMANDAS (id_demanda, cultura, quantidade, unidade_medida, data_necessidade, observacoes)
-                   VALUES (:1, :2, :3, :4, :5, :6)"""
-        cursor.execute(sql, (id_demanda, cultura, quantidade, unidade_medida, data_necessidade, observacoes))
-        conexao.commit()
-        print(f"Demanda por '{cultura}' registrada com sucesso (ID: {id_demanda[:8]}...).")
-        sucesso = True
-    except cx_Oracle.DatabaseError as e: registrar_erro(f"Erro Oracle ao registrar demanda: {e}"); conexao.rollback()
-    except Exception as e: registrar_erro(f"Erro inesperado Oracle: {e}"); conexao.rollback()
-    finally:
-        if cursor: cursor.close()
-    return sucesso
+    id_demanda = _gravar(conexao, "registrar_demanda", "ao registrar demanda", gravar_demanda, None, cultura, quantidade,
+                         unidade_medida, data_necessidade, observacoes)
+    if id_demanda is None: return False
+    print(f"Demanda por '{cultura}' registrada com sucesso (ID: {id_demanda[:8]}...).")
+    return True
 
 def selecionar_demanda(conexao):
-    """Lista demandas registradas e permite selecionar uma."""
-    if not conexao or cx_Oracle is None: registrar_erro("Conexão Oracle inválida."); return None
+    """Lista demandas registradas (por data de necessidade, uma página por vez) e permite selecionar uma."""
+    if not conexao: registrar_erro("Conexão Oracle inválida."); return None
     print("\n--- Selecionar Demanda Registrada ---")
-    demandas = database.carregar_demandas(conexao) # Carrega do Oracle
-    if not demandas: print("Nenhuma demanda registrada."); return None
-
-    print("Demandas Registradas:")
-    for i, d in enumerate(demandas):
-        print(f"{i+1}. ID: {d['id_demanda'][:8]}... - Cultura: {d['cultura']} - Qtd: {d['quantidade']} {d['unidade_medida']} - Precisa em: {formatar_data_br(d.get('data_necessidade'))}")
-
-    while True:
-        try:
-            escolha_str = input(f"Digite o número (1-{len(demandas)}) ou 0 para cancelar: ").strip()
-            if not escolha_str: continue
-            escolha = int(escolha_str)
-            if escolha == 0: return None
-            if 1 <= escolha <= len(demandas): return demandas[escolha-1]['id_demanda']
-            else: print("Número inválido.")
-        except ValueError: print("Entrada inválida.")
+    return _escolher_em_paginas(
+        conexao, "demanda.pagina", None,
+        descrever=lambda l: f"ID: {l[4][:8]}... - Cultura: {l[0]} - Qtd: {l[1]} {l[2]} - Precisa em: {formatar_data_br(l[3])}",
+        valor=lambda l: l[4], vazio="Nenhuma demanda registrada.")
 
 def excluir_demanda(conexao):
     """Exclui um registro de demanda do Oracle."""
-    if not conexao or cx_Oracle is None: registrar_erro("Conexão Oracle inválida."); return False
+    if not conexao: registrar_erro("Conexão Oracle inválida."); return False
     print("\n--- Excluir Demanda ---")
     id_demanda = selecionar_demanda(conexao)
     if not id_demanda: return False
 
     if confirmar_acao(f"Excluir registro de demanda ID {id_demanda[:8]}...?"):
-        cursor = None; sucesso = False
-        try:
-            cursor = conexao.cursor()
-            cursor.execute("DELETE FROM DEMANDAS WHERE id_demanda = :1", (id_demanda,))
-            if cursor.rowcount > 0: conexao.commit(); print("Registro de demanda excluído (Oracle)."); sucesso = True
-            else: print("Registro de demanda não encontrado (Oracle)."); conexao.rollback()
-        except cx_Oracle.DatabaseError as e: registrar_erro(f"Erro Oracle ao excluir demanda: {e}"); conexao.rollback()
-        finally:
-            if cursor: cursor.close()
-        return sucesso
-    return False
\ No newline at end of file
+        if _gravar(conexao, "excluir_demanda", "ao excluir demanda", apagar_demanda, id_demanda) is None: return False
+        print("Registro de demanda excluído (Oracle).")
+        return True
+    return False
@@ -0,0 +1,162 @@
+import random
+import datetime
+import config
+import cache_referencia
+import importacao
+import indice_culturas
+import rotacao
+from utils import registrar_erro
+
+# Importa cx_Oracle do config
+cx_Oracle = config.cx_Oracle
+
+# --- Dados Sintéticos ---
+# Gera uma base completa (produtores, certificação, talhões, plantios, insumos e demandas) a partir de uma
+# semente: a mesma semente, as mesmas contagens e a mesma `data_base` produzem exatamente as mesmas linhas,
+# o que permite comparar benchmarks entre commits. Plantios e insumos são gerados em fluxo (só os talhões
+# ficam em memória), então a escala de 1 milhão de plantios não exige a base inteira na RAM.
+# Cada talhão tem uma sequência de ciclos: os já colhidos ficam Disponível/Vendido (alguns Cancelados) e os
+# que terminam depois de `data_base` ficam Planejado, alimentando mercado, calendário e previsão.
+
+CULTURAS = tuple(indice_culturas.CULTURAS_CANONICAS)
+LOCALIZACOES = ("Cascavel - PR", "Toledo - PR", "Chapecó - SC", "Pelotas - RS", "Ibiúna - SP", "Mogi das Cruzes - SP",
+                "Teresópolis - RJ", "Barbacena - MG", "Petrolina - PE", "Juazeiro - BA")
+ASSOCIACOES = ("Coopernatural", "Rede Ecovida", "Assoc. Orgânicos do Vale", "Cooperfamiliar", None, None)
+TIPOS_SOLO = ("Argiloso", "Arenoso", "Misto", "Latossolo", "Humoso")
+TIPOS_INSUMO = ("Composto orgânico", "Biofertilizante", "Calda bordalesa", "Húmus de minhoca", "Adubação verde")
+CICLO_DIAS = (60, 150) # Duração plantio -> colheita
+POUSIO_DIAS = (0, 40)
+
+TABELAS_EM_ORDEM_DE_EXCLUSAO = ("DEMANDAS", "REGISTROS_INSUMOS", "PLANTIOS_PRODUTOS", "TALHOES", "STATUS_CERTIFICACAO", "PRODUTORES")
+
+def contagens_para_escala(total_plantios, talhoes_por_produtor=4, plantios_por_talhao=10, insumos_por_talhao=5,
+                          demandas_por_mil_plantios=50):
+    """Parâmetros de BaseSintetica para chegar a ~`total_plantios` plantios com as proporções padrão."""
+    produtores = max(1, round(total_plantios / (talhoes_por_produtor * plantios_por_talhao)))
+    return {"produtores": produtores, "talhoes_por_produtor": talhoes_por_produtor,
+            "plantios_por_talhao": plantios_por_talhao, "insumos_por_talhao": insumos_por_talhao,
+            "demandas": max(1, total_plantios * demandas_por_mil_plantios // 1000)}
+
+
+class BaseSintetica:
+    """Geradores de linhas (na ordem das colunas de importacao.SQL_INSERT) para uma base determinística."""
+
+    def __init__(self, produtores, talhoes_por_produtor=4, plantios_por_talhao=10, insumos_por_talhao=5, demandas=0,
+                 semente=42, data_base=None):
+        self.produtores = produtores; self.talhoes_por_produtor = talhoes_por_produtor
+        self.plantios_por_talhao = plantios_por_talhao; self.insumos_por_talhao = insumos_por_talhao
+        self.demandas = demandas; self.semente = semente
+        self.data_base = data_base or datetime.date.today()
+        # Início do histórico: ~80% dos ciclos de cada talhão terminam antes de data_base
+        ciclo_medio = sum(CICLO_DIAS) // 2 + sum(POUSIO_DIAS) // 2
+        self._inicio = self.data_base - datetime.timedelta(days=int(ciclo_medio * plantios_por_talhao * 0.8))
+        self._talhoes = None
+
+    def _rng(self, entidade):
+        return random.Random(f"{self.semente}:{entidade}") # Um gerador por entidade: a ordem de consumo não importa
+
+    def gerar_produtores(self):
+        rng = self._rng("produtores")
+        for n in range(1, self.produtores + 1):
+            yield (f"SP{n:07d}", f"Produtor Sintético {n}", rng.choice(LOCALIZACOES),
+                   f"(41) 9{rng.randrange(10**7, 10**8)}", rng.choice(ASSOCIACOES))
+
+    def gerar_certificacoes(self):
+        rng = self._rng("certificacao")
+        for n in range(1, self.produtores + 1):
+            etapas = sorted(rng.random() < 0.5 for _ in range(3))[::-1] # Etapas concluídas em ordem
+            yield (f"SP{n:07d}", int(all(etapas) and rng.random() < 0.8), *map(int, etapas))
+
+    def talhoes(self):
+        """Lista (em memória) de talhões; plantios e insumos são gerados a partir dela."""
+        if self._talhoes is None:
+            rng = self._rng("talhoes")
+            self._talhoes = [(f"ST{n:07d}{t:03d}", f"SP{n:07d}", f"T{t:02d}", round(rng.uniform(0.5, 20.0), 2), rng.choice(TIPOS_SOLO))
+                             for n in range(1, self.produtores + 1) for t in range(1, self.talhoes_por_produtor + 1)]
+        return self._talhoes
+
+    def gerar_plantios(self):
+        rng = self._rng("plantios")
+        for id_talhao, id_produtor, _, tamanho_ha, _ in self.talhoes():
+            data = self._inicio + datetime.timedelta(days=rng.randrange(0, 60)); anterior = None
+            for k in range(self.plantios_por_talhao):
+                cultura = rng.choice(CULTURAS)
+                colheita = data + datetime.timedelta(days=rng.randrange(*CICLO_DIAS))
+                gravada = cultura.lower() if rng.random() < 0.1 else cultura # Algumas grafias variantes
+                if colheita > self.data_base:
+                    yield (f"SL{id_talhao[2:]}{k:03d}", id_produtor, id_talhao, gravada, data, colheita,
+                           None, None, None, 'Planejado', None, anterior)
+                else:
+                    sorteio = rng.random()
+                    status = 'Cancelado' if sorteio < 0.05 else 'Vendido' if sorteio < 0.3 else 'Disponível'
+                    quantidade = None if status == 'Cancelado' else round(tamanho_ha * rng.uniform(800, 4000), 1)
+                    yield (f"SL{id_talhao[2:]}{k:03d}", id_produtor, id_talhao, gravada, data, colheita,
+                           None if status == 'Cancelado' else colheita, quantidade, None if quantidade is None else 'kg',
+                           status, "Lote sintético" if rng.random() < 0.2 else None, anterior)
+                anterior = cultura
+                data = colheita + datetime.timedelta(days=rng.randrange(*POUSIO_DIAS))
+
+    def gerar_insumos(self):
+        rng = self._rng("insumos")
+        periodo = (self.data_base - self._inicio).days
+        for id_talhao, id_produtor, _, _, _ in self.talhoes():
+            for k in range(self.insumos_por_talhao):
+                yield (f"SI{id_talhao[2:]}{k:03d}", id_produtor, id_talhao,
+                       self._inicio + datetime.timedelta(days=rng.randrange(periodo)), rng.choice(TIPOS_INSUMO),
+                       f"{rng.randrange(1, 50) * 10} kg", None)
+
+    def gerar_demandas(self):
+        rng = self._rng("demandas")
+        for n in range(1, self.demandas + 1):
+            yield (f"SD{n:08d}", rng.choice(CULTURAS), round(rng.uniform(100, 20000), 0), 'kg',
+                   self.data_base + datetime.timedelta(days=rng.randrange(-30, 400)), None)
+
+    def lotes(self):
+        """(entidade, SQL, gerador) na ordem que respeita as chaves estrangeiras."""
+        return (("produtores", importacao.SQL_INSERT["produtores"], self.gerar_produtores()),
+                ("certificacao", importacao.SQL_INSERT["certificacao"], self.gerar_certificacoes()),
+                ("talhoes", importacao.SQL_INSERT["talhoes"], iter(self.talhoes())),
+                ("plantios", importacao.SQL_INSERT["plantios"], self.gerar_plantios()),
+                ("insumos", importacao.SQL_INSERT["insumos"], self.gerar_insumos()),
+                ("demandas", importacao.SQL_INSERT["demandas"], self.gerar_demandas()))
+
+
+def _invalidar_caches():
+    cache_referencia.cache.invalidar(); rotacao.invalidar()
+
+def popular_banco(conexao, base, tamanho_lote=None):
+    """Grava a BaseSintetica com executemany em lotes (commit por lote). Retorna {entidade: linhas} ou None."""
+    if not conexao: registrar_erro("Conexão Oracle inválida."); return None
+    tamanho_lote = tamanho_lote or config.IMPORTACAO_TAMANHO_LOTE
+    contagem = {}; cursor = None
+    try:
+        cursor = conexao.cursor()
+        for entidade, sql, linhas in base.lotes():
+            total = 0; lote = []
+            for linha in linhas:
+                lote.append(linha)
+                if len(lote) >= tamanho_lote: cursor.executemany(sql, lote); conexao.commit(); total += len(lote); lote = []
+            if lote: cursor.executemany(sql, lote); conexao.commit(); total += len(lote)
+            contagem[entidade] = total
+        return contagem
+    except cx_Oracle.DatabaseError as e:
+        registrar_erro(f"Erro Oracle ao gravar dados sintéticos: {e}", erro=e, operacao="popular_banco")
+        conexao.rollback(); return None
+    finally:
+        if cursor: cursor.close()
+        _invalidar_caches()
+
+def limpar_banco(conexao):
+    """Apaga todas as linhas das tabelas da aplicação (só para bancos de teste/benchmark). Retorna True/False."""
+    if not conexao: registrar_erro("Conexão Oracle inválida."); return False
+    cursor = None
+    try:
+        cursor = conexao.cursor()
+        for tabela in TABELAS_EM_ORDEM_DE_EXCLUSAO: cursor.execute(f"DELETE FROM {tabela}") # Nomes fixos do código
+        conexao.commit(); return True
+    except cx_Oracle.DatabaseError as e:
+        registrar_erro(f"Erro Oracle ao limpar o banco de benchmark: {e}", erro=e, operacao="limpar_banco")
+        conexao.rollback(); return False
+    finally:
+        if cursor: cursor.close()
+        _invalidar_caches()
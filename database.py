@@ -1,91 +1,24 @@
 import datetime 
+from types import MappingProxyType
 import config 
+import driver_banco
 from utils import registrar_erro 
+from pool_conexoes import PoolConexoes, ConexaoPool
+from registros import Produtor, Talhao, Plantio, RegistroInsumo, Demanda, OfertaMercado, ColheitaPrevista
+import cache_referencia
+import migracoes
+import catalogo_sql
 
 # Importa cx_Oracle do config 
 cx_Oracle = config.cx_Oracle # Já definido globalmente
 
 # --- Funções de Banco de Dados Oracle ---
 
-def criar_tabelas_se_nao_existir(conexao):
-    """Cria as tabelas necessárias no banco de dados Oracle se elas não existirem."""
-    if not conexao or cx_Oracle is None:
-        registrar_erro("Tentativa de criar tabelas sem conexão Oracle válida.")
-        return
-
-    cursor = None
-    try:
-        cursor = conexao.cursor()
-        tabelas_necessarias = {
-            "PRODUTORES": """
-                CREATE TABLE PRODUTORES (
-                    id_produtor VARCHAR2(50) PRIMARY KEY, nome VARCHAR2(200) NOT NULL,
-                    localizacao VARCHAR2(200), contato VARCHAR2(100), associacao VARCHAR2(100) )
-            """,
-            "TALHOES": """
-                CREATE TABLE TALHOES (
-                    id_talhao_unico VARCHAR2(40) PRIMARY KEY,
-                    id_produtor VARCHAR2(50) NOT NULL REFERENCES PRODUTORES(id_produtor) ON DELETE CASCADE,
-                    id_talhao_produtor VARCHAR2(50) NOT NULL, tamanho_ha NUMBER, tipo_solo VARCHAR2(100),
-                    CONSTRAINT uk_produtor_talhao UNIQUE (id_produtor, id_talhao_produtor) )
-            """,
-            "PLANTIOS_PRODUTOS": """
-                CREATE TABLE PLANTIOS_PRODUTOS (
-                    id_plantio VARCHAR2(40) PRIMARY KEY,
-                    id_produtor VARCHAR2(50) NOT NULL REFERENCES PRODUTORES(id_produtor) ON DELETE CASCADE,
-                    id_talhao_unico VARCHAR2(40) NOT NULL REFERENCES TALHOES(id_talhao_unico) ON DELETE CASCADE,
-                    cultura VARCHAR2(100) NOT NULL, data_plantio DATE, data_prevista_colheita DATE, data_colheita_real DATE,
-                    quantidade_colhida NUMBER, unidade_medida VARCHAR2(20),
-                    status VARCHAR2(20) CHECK (status IN ('Planejado', 'Disponível', 'Vendido', 'Cancelado')),
-                    observacoes CLOB, cultura_anterior VARCHAR2(100) )
-            """,
-             "REGISTROS_INSUMOS": """
-                CREATE TABLE REGISTROS_INSUMOS (
-                    id_registro VARCHAR2(40) PRIMARY KEY,
-                    id_produtor VARCHAR2(50) NOT NULL REFERENCES PRODUTORES(id_produtor) ON DELETE CASCADE,
-                    id_talhao_unico VARCHAR2(40) NOT NULL REFERENCES TALHOES(id_talhao_unico) ON DELETE CASCADE,
-                    data_aplicacao DATE, tipo_insumo VARCHAR2(100), quantidade VARCHAR2(50), observacoes CLOB )
-            """,
-            "STATUS_CERTIFICACAO": """
-                CREATE TABLE STATUS_CERTIFICACAO (
-                    id_produtor VARCHAR2(50) PRIMARY KEY REFERENCES PRODUTORES(id_produtor) ON DELETE CASCADE,
-                    certificado NUMBER(1) DEFAULT 0 NOT NULL CHECK (certificado IN (0, 1)),
-                    etapa_documentacao NUMBER(1) DEFAULT 0 NOT NULL CHECK (etapa_documentacao IN (0, 1)),
-                    etapa_inspecao NUMBER(1) DEFAULT 0 NOT NULL CHECK (etapa_inspecao IN (0, 1)),
-                    etapa_aprovacao NUMBER(1) DEFAULT 0 NOT NULL CHECK (etapa_aprovacao IN (0, 1)) )
-            """,
-           
-            "DEMANDAS": """
-                CREATE TABLE DEMANDAS (
-                    id_demanda VARCHAR2(40) PRIMARY KEY,
-                    cultura VARCHAR2(100) NOT NULL,
-                    quantidade NUMBER NOT NULL,
-                    unidade_medida VARCHAR2(20) NOT NULL,
-                    data_necessidade DATE NOT NULL,
-                    observacoes CLOB,
-                    registrado_em DATE DEFAULT SYSDATE
-                )
-            """
-        }
-        cursor.execute("SELECT table_name FROM user_tables")
-        tabelas_existentes = {row[0] for row in cursor.fetchall()}
-        print(f"[DB INFO] Tabelas existentes: {tabelas_existentes}")
-        for nome_tabela, sql_create in tabelas_necessarias.items():
-            if nome_tabela.upper() not in tabelas_existentes:
-                print(f"[DB INFO] Criando tabela {nome_tabela.upper()}...")
-                cursor.execute(sql_create)
-                print(f"[DB INFO] Tabela {nome_tabela.upper()} criada.")
-            else: print(f"[DB INFO] Tabela {nome_tabela.upper()} já existe.")
-        conexao.commit(); print("[DB INFO] Verificação/Criação de tabelas concluída.")
-    except cx_Oracle.DatabaseError as e: registrar_erro(f"Erro Oracle ao verificar/criar tabelas: {e}"); conexao.rollback()
-    except Exception as e: registrar_erro(f"Erro inesperado ao criar tabelas: {e}"); conexao.rollback()
-    finally:
-        if cursor: cursor.close()
-
 def conectar_banco():
-    """Conecta ao banco de dados Oracle."""
-    if cx_Oracle is None:
-        registrar_erro("Biblioteca cx_Oracle não está disponível. Impossível conectar ao Oracle.")
+    """Cria o pool de sessões Oracle e retorna uma conexão lógica apoiada nele."""
+    try: dsn = driver_banco.dsn_aplicacao() # Importa o driver (primeiro uso)
+    except driver_banco.DriverIndisponivel as e:
+        registrar_erro(f"{e} Impossível conectar ao banco.")
         return None
 
     if "SEU_" in config.ORACLE_USER or "SEU_" in config.ORACLE_PASSWORD or "SEU_" in config.ORACLE_DSN:
@@ -94,134 +27,452 @@ def conectar_banco():
          print("!!!          Verifique as constantes em config.py ou variáveis de ambiente. !!!")
          print("!"*68 + "\n")
 
-    print(f"[INFO] Tentando conectar ao Oracle DSN: {config.ORACLE_DSN} com usuário: {config.ORACLE_USER}...")
+    print(f"[INFO] Tentando conectar ao Oracle DSN: {dsn} com usuário: {config.ORACLE_USER}...")
     try:
-        conexao = cx_Oracle.connect(user=config.ORACLE_USER, password=config.ORACLE_PASSWORD, dsn=config.ORACLE_DSN)
-        print("[INFO] Conexão Oracle estabelecida com sucesso.")
-        criar_tabelas_se_nao_existir(conexao)
+        pool = PoolConexoes(config.ORACLE_USER, config.ORACLE_PASSWORD, dsn)
+        conexao = ConexaoPool(pool)
+        print(f"[INFO] Pool de conexões Oracle criado (min={config.POOL_MIN}, max={config.POOL_MAX}).")
+        if not migracoes.aplicar_migracoes(conexao): # Só lê SCHEMA_VERSAO se o esquema já está atualizado
+            print("!!! FALHA AO ATUALIZAR O ESQUEMA. Verifique o log."); conexao.close(); return None
         return conexao
     except cx_Oracle.DatabaseError as e:
-        registrar_erro(f"Erro ao conectar ao Oracle: {e}")
+        registrar_erro(f"Erro ao conectar ao Oracle: {e}", erro=e, operacao="conectar")
         print("!!! FALHA NA CONEXÃO ORACLE. Verifique DSN, usuário, senha e Oracle Client.")
         return None
     except Exception as e:
         registrar_erro(f"Erro inesperado ao conectar ao Oracle: {e}")
         return None
 
+def obter_metricas_pool(conexao):
+    """Retorna as métricas do pool (checkouts, espera, sessões descartadas, leituras repetidas)."""
+    if not hasattr(conexao, 'obter_metricas'): return {}
+    return conexao.obter_metricas()
+
 def desconectar_banco(conexao):
-    """Fecha a conexão com o banco de dados Oracle."""
-    if conexao and hasattr(conexao, 'close') and cx_Oracle:
+    """Fecha a conexão lógica e o pool de sessões Oracle."""
+    if conexao and hasattr(conexao, 'close'):
         print("[INFO] Desconectando do Banco de Dados Oracle...")
-        try: conexao.close(); print("[INFO] Conexão Oracle fechada.")
+        metricas = obter_metricas_pool(conexao)
+        if metricas:
+            print(f"[INFO] Pool: {metricas['checkouts']} checkouts, espera média {metricas['espera_media_s']*1000:.1f} ms "
+                  f"(máx {metricas['espera_max_s']*1000:.1f} ms), {metricas['sessoes_descartadas']} sessões descartadas, "
+                  f"{metricas['leituras_repetidas']} leituras repetidas, cache de comandos SQL (estimativa): "
+                  f"{metricas['cache_sql_acertos_estimados']} acertos / {metricas['cache_sql_faltas_estimadas']} faltas.")
+        try: conexao.close(); print("[INFO] Pool de conexões Oracle fechado.")
         except cx_Oracle.DatabaseError as e: registrar_erro(f"Erro ao fechar conexão Oracle: {e}")
 
 
+# --- Filtros dos Carregadores ---
+# Especificação de filtro aceita pelos carregadores (todas as chaves são opcionais):
+#   "ids": lista de chaves primárias | "id_produtor" / "id_talhao_unico": valor ou lista
+#   "status": valor ou conjunto de status | "cultura": nome (sem diferenciar maiúsculas) ou lista de grafias exatas
+#   "data_inicio" / "data_fim": limites (inclusivos) aplicados à coluna de data da tabela
+LIMITE_ITENS_IN = 1000 # Oracle não aceita mais que 1000 itens numa lista IN (ORA-01795)
+
+def _como_lista(valor):
+    """Normaliza um valor de filtro (escalar ou coleção) para lista."""
+    if valor is None: return []
+    if isinstance(valor, (list, tuple, set, frozenset)): return list(valor)
+    return [valor]
+
+def _montar_filtros(filtros, colunas):
+    """Converte uma especificação de filtro em cláusula WHERE com binds nomeados.
+
+    `colunas` mapeia cada chave de filtro suportada para a coluna/expressão SQL correspondente;
+    a chave "data" indica a coluna usada por data_inicio/data_fim. Retorna (sql_where, binds).
+    """
+    if not filtros: return "", {}
+    condicoes = []; binds = {}
+    for chave, valor in filtros.items():
+        if valor is None: continue
+        if chave in ('data_inicio', 'data_fim'):
+            if 'data' not in colunas: raise ValueError(f"Filtro '{chave}' não suportado para esta tabela.")
+            operador = '>=' if chave == 'data_inicio' else '<='
+            condicoes.append(f"{colunas['data']} {operador} :f_{chave}"); binds[f"f_{chave}"] = valor
+            continue
+        if chave not in colunas: raise ValueError(f"Filtro '{chave}' não suportado para esta tabela.")
+        coluna = colunas[chave]
+        if chave == 'cultura' and not isinstance(valor, (list, tuple, set, frozenset)): # Coleção: grafias exatas, no IN abaixo
+            if not isinstance(valor, str): raise ValueError(f"Filtro 'cultura' deve ser um nome ou uma lista de nomes, não {type(valor).__name__}.")
+            condicoes.append(f"UPPER({coluna}) = UPPER(:f_cultura)"); binds["f_cultura"] = valor.strip()
+            continue
+        valores = _como_lista(valor)
+        if not valores: condicoes.append("1 = 0"); continue # Lista vazia não casa com nada
+        grupos = []
+        for inicio in range(0, len(valores), LIMITE_ITENS_IN):
+            nomes = []
+            grupo = valores[inicio:inicio + LIMITE_ITENS_IN]
+            grupo = catalogo_sql.completar(grupo, catalogo_sql.aridade_lista_in(len(grupo), LIMITE_ITENS_IN)) # Poucos textos distintos
+            for i, v in enumerate(grupo, start=inicio):
+                nomes.append(f":f_{chave}_{i}"); binds[f"f_{chave}_{i}"] = v
+            grupos.append(f"{coluna} IN ({', '.join(nomes)})")
+        condicoes.append(grupos[0] if len(grupos) == 1 else "(" + " OR ".join(grupos) + ")")
+    if not condicoes: return "", {}
+    return " WHERE " + " AND ".join(condicoes), binds
+
+COLUNAS_FILTRO_PRODUTORES = {"ids": "id_produtor", "id_produtor": "id_produtor"}
+COLUNAS_FILTRO_TALHOES = {"ids": "id_produtor", "id_produtor": "id_produtor", "id_talhao_unico": "id_talhao_unico"}
+COLUNAS_FILTRO_PLANTIOS = {"ids": "id_plantio", "id_produtor": "id_produtor", "id_talhao_unico": "id_talhao_unico",
+                           "cultura": "cultura", "status": "status",
+                           "data": "NVL(data_colheita_real, data_prevista_colheita)"} # Data de referência da colheita
+COLUNAS_FILTRO_INSUMOS = {"ids": "id_registro", "id_produtor": "id_produtor", "id_talhao_unico": "id_talhao_unico",
+                          "data": "data_aplicacao"}
+COLUNAS_FILTRO_CERTIFICACAO = {"ids": "id_produtor", "id_produtor": "id_produtor"}
+COLUNAS_FILTRO_DEMANDAS = {"ids": "id_demanda", "cultura": "cultura", "data": "data_necessidade"}
+
+# --- Conversão de Tipos na Leitura ---
+
+def _para_date(valor):
+    return valor.date()
+
+def tratar_tipos_saida(cursor, nome, tipo_padrao, tamanho, precisao, escala):
+    """outputtypehandler: DATE chega como date e CLOB como str, já no fetch (sem laço Python por linha)."""
+    if tipo_padrao == cx_Oracle.DB_TYPE_DATE:
+        return cursor.var(cx_Oracle.DB_TYPE_DATE, arraysize=cursor.arraysize, outconverter=_para_date)
+    if tipo_padrao == cx_Oracle.DB_TYPE_CLOB:
+        return cursor.var(cx_Oracle.DB_TYPE_LONG, arraysize=cursor.arraysize)
+
+SQL_SELECT_PLANTIOS = catalogo_sql.SELECT_PLANTIOS
+
+def _novo_produtor(*linha):
+    return Produtor(*linha, {}) # Talhões são preenchidos na segunda consulta
+
 # --- Funções de Carregamento de Dados ---
 
-def carregar_produtores_talhoes(conexao):
-    """Carrega dados de produtores e talhões do Oracle."""
-    if not conexao or cx_Oracle is None: return {}
+# Os valores guardados são imutáveis (namedtuples e MappingProxyType): o mesmo objeto é entregue a todos os
+# leitores, sem cópia, e nenhum deles consegue alterar o que está no cache.
+# Uma conexão com escrita não confirmada não usa o cache: ela precisa enxergar as próprias escritas (o cache só é
+# invalidado depois do commit) e o que ela lê não pode ir para o cache, onde outras sessões o veriam.
+
+def _usa_cache(conexao, chave):
+    return chave is not None and not getattr(conexao, "em_transacao", False)
+
+def _ler_cache(conexao, chave):
+    """Busca no cache de referência; retorna o valor guardado (ou None se não houver)."""
+    if not _usa_cache(conexao, chave): return None
+    achou, valor = cache_referencia.cache.obter(chave)
+    return valor if achou else None
+
+def _guardar_cache(conexao, chave, valor):
+    if _usa_cache(conexao, chave): cache_referencia.cache.guardar(chave, valor)
+
+def carregar_produtores_talhoes(conexao, filtros=None, estrito=False):
+    """Carrega dados de produtores e talhões do Oracle (opcionalmente filtrados), usando o cache de referência.
+    Retorna {id_produtor: Produtor} somente leitura (talhões num MappingProxyType).
+    Em caso de erro retorna {} (ou, com `estrito`, relança o erro depois de registrá-lo)."""
+    if not conexao: return {}
+    chave = cache_referencia.chave_filtros("produtores", filtros)
+    em_cache = _ler_cache(conexao, chave)
+    if em_cache is not None: return em_cache
     produtores = {}
     cursor = None
     try:
         cursor = conexao.cursor()
-        cursor.execute("SELECT id_produtor, nome, localizacao, contato, associacao FROM PRODUTORES")
-        prod_rows = cursor.fetchall()
-        cols_prod = [desc[0].lower() for desc in cursor.description]
-        for row in prod_rows: produtores[row[0]] = dict(zip(cols_prod, row)); produtores[row[0]]['talhoes'] = {}
-        cursor.execute("SELECT id_talhao_unico, id_produtor, id_talhao_produtor, tamanho_ha, tipo_solo FROM TALHOES")
-        tal_rows = cursor.fetchall()
-        cols_tal = [desc[0].lower() for desc in cursor.description]
-        for row in tal_rows:
-             id_prod = row[1]
-             if id_prod in produtores:
-                 id_talhao_prod = row[2]
-                 talhao_data = dict(zip(cols_tal, row))
-                 del talhao_data['id_produtor']
-                 produtores[id_prod]["talhoes"][id_talhao_prod] = talhao_data
+        filtros_produtor = {k: v for k, v in (filtros or {}).items() if k in COLUNAS_FILTRO_PRODUTORES}
+        where, binds = _montar_filtros(filtros_produtor, COLUNAS_FILTRO_PRODUTORES)
+        cursor.execute("SELECT id_produtor, nome, localizacao, contato, associacao FROM PRODUTORES" + where, binds)
+        cursor.rowfactory = _novo_produtor
+        for produtor in cursor.fetchall(): produtores[produtor.id_produtor] = produtor
+        where, binds = _montar_filtros(filtros, COLUNAS_FILTRO_TALHOES)
+        cursor.execute("SELECT id_talhao_unico, id_produtor, id_talhao_produtor, tamanho_ha, tipo_solo FROM TALHOES" + where, binds)
+        cursor.rowfactory = Talhao
+        for talhao in cursor.fetchall():
+             if talhao.id_produtor in produtores:
+                 produtores[talhao.id_produtor].talhoes[talhao.id_talhao_produtor] = talhao
+        produtores = MappingProxyType({id_produtor: produtor._replace(talhoes=MappingProxyType(produtor.talhoes))
+                                       for id_produtor, produtor in produtores.items()})
+        _guardar_cache(conexao, chave, produtores)
         return produtores
-    except cx_Oracle.DatabaseError as e: registrar_erro(f"Erro Oracle ao carregar produtores/talhões: {e}"); return {}
+    except cx_Oracle.DatabaseError as e:
+        registrar_erro(f"Erro Oracle ao carregar produtores/talhões: {e}", erro=e, operacao="carregar", tabela="PRODUTORES")
+        if estrito: raise
+        return {}
     finally:
         if cursor: cursor.close()
 
-def carregar_plantios_produtos(conexao):
-    """Carrega dados de plantios e produtos do Oracle."""
-    if not conexao or cx_Oracle is None: return []
-    plantios = []
+def _abrir_cursor_streaming(conexao, tamanho_lote=None):
+    """Abre um cursor ajustado para leitura em lotes (arraysize/prefetchrows configuráveis)."""
+    cursor = conexao.cursor()
+    cursor.arraysize = tamanho_lote or config.FETCH_TAMANHO_LOTE
+    cursor.outputtypehandler = tratar_tipos_saida
+    if hasattr(cursor, 'prefetchrows'): cursor.prefetchrows = config.FETCH_PREFETCH_LINHAS or cursor.arraysize
+    return cursor
+
+def _iterar_linhas(cursor):
+    """Percorre o resultado com fetchmany, sem nunca materializar a tabela inteira."""
+    while True:
+        linhas = cursor.fetchmany()
+        if not linhas: return
+        yield from linhas
+
+def _ordem(ordenar_por, ordenacoes):
+    """Traduz uma chave de ordenação conhecida para ORDER BY (nunca interpola texto do usuário)."""
+    if not ordenar_por: return ""
+    if ordenar_por not in ordenacoes: raise ValueError(f"Ordenação '{ordenar_por}' não suportada.")
+    return " ORDER BY " + ordenacoes[ordenar_por]
+
+ORDENACOES_PLANTIOS = {
+    "data_plantio_desc": "data_plantio DESC NULLS LAST, id_plantio",
+    "data_prevista_colheita": "data_prevista_colheita, id_plantio",
+    "talhao_data_plantio": "id_talhao_unico, data_plantio NULLS FIRST, id_plantio"}
+ORDENACOES_INSUMOS = {"data_aplicacao_desc": "data_aplicacao DESC NULLS LAST, id_registro"}
+
+def iterar_plantios_produtos(conexao, filtros=None, ordenar_por=None, tamanho_lote=None, estrito=False):
+    """Gera plantios do Oracle sob demanda (fetchmany em lotes), aplicando `filtros` no próprio SQL."""
+    if not conexao: return
     cursor = None
     try:
-        cursor = conexao.cursor()
-        sql = """SELECT id_plantio, id_produtor, id_talhao_unico, cultura, data_plantio, data_prevista_colheita,
-                   data_colheita_real, quantidade_colhida, unidade_medida, status, observacoes, cultura_anterior
-                   FROM PLANTIOS_PRODUTOS"""
-        cursor.execute(sql)
-        cols = [desc[0].lower() for desc in cursor.description]
-        for row in cursor.fetchall():
-            row_dict = dict(zip(cols, row))
-            for key in ['data_plantio', 'data_prevista_colheita', 'data_colheita_real']:
-                if isinstance(row_dict.get(key), datetime.datetime): row_dict[key] = row_dict[key].date()
-            plantios.append(row_dict)
-        return plantios
-    except cx_Oracle.DatabaseError as e: registrar_erro(f"Erro Oracle ao carregar plantios: {e}"); return []
+        cursor = _abrir_cursor_streaming(conexao, tamanho_lote)
+        where, binds = _montar_filtros(filtros, COLUNAS_FILTRO_PLANTIOS)
+        cursor.execute(SQL_SELECT_PLANTIOS + where + _ordem(ordenar_por, ORDENACOES_PLANTIOS), binds)
+        cursor.rowfactory = Plantio
+        yield from _iterar_linhas(cursor)
+    except cx_Oracle.DatabaseError as e:
+        registrar_erro(f"Erro Oracle ao carregar plantios: {e}", erro=e, operacao="carregar", tabela="PLANTIOS_PRODUTOS")
+        if estrito: raise
     finally:
         if cursor: cursor.close()
 
-def carregar_registros_insumos(conexao):
-    """Carrega registros de insumos do Oracle."""
-    if not conexao or cx_Oracle is None: return []
-    insumos = []
+def carregar_plantios_produtos(conexao, filtros=None, ordenar_por=None):
+    """Carrega dados de plantios e produtos do Oracle, aplicando `filtros` no próprio SQL."""
+    try: return list(iterar_plantios_produtos(conexao, filtros, ordenar_por, estrito=True))
+    except cx_Oracle.DatabaseError: return []
+
+def iterar_registros_insumos(conexao, filtros=None, ordenar_por=None, tamanho_lote=None, estrito=False):
+    """Gera registros de insumos do Oracle sob demanda (fetchmany em lotes)."""
+    if not conexao: return
     cursor = None
     try:
-        cursor = conexao.cursor()
+        cursor = _abrir_cursor_streaming(conexao, tamanho_lote)
         sql = """SELECT id_registro, id_produtor, id_talhao_unico, data_aplicacao, tipo_insumo, quantidade, observacoes
                    FROM REGISTROS_INSUMOS"""
-        cursor.execute(sql)
-        cols = [desc[0].lower() for desc in cursor.description]
-        for row in cursor.fetchall():
-             row_dict = dict(zip(cols, row))
-             if isinstance(row_dict.get('data_aplicacao'), datetime.datetime): row_dict['data_aplicacao'] = row_dict['data_aplicacao'].date()
-             insumos.append(row_dict)
-        return insumos
-    except cx_Oracle.DatabaseError as e: registrar_erro(f"Erro Oracle ao carregar insumos: {e}"); return []
+        where, binds = _montar_filtros(filtros, COLUNAS_FILTRO_INSUMOS)
+        cursor.execute(sql + where + _ordem(ordenar_por, ORDENACOES_INSUMOS), binds)
+        cursor.rowfactory = RegistroInsumo
+        yield from _iterar_linhas(cursor)
+    except cx_Oracle.DatabaseError as e:
+        registrar_erro(f"Erro Oracle ao carregar insumos: {e}", erro=e, operacao="carregar", tabela="REGISTROS_INSUMOS")
+        if estrito: raise
     finally:
         if cursor: cursor.close()
 
-def carregar_status_certificacao(conexao):
-    """Carrega status de certificação do Oracle."""
-    if not conexao or cx_Oracle is None: return {}
+def carregar_registros_insumos(conexao, filtros=None, ordenar_por=None):
+    """Carrega registros de insumos do Oracle, aplicando `filtros` no próprio SQL."""
+    try: return list(iterar_registros_insumos(conexao, filtros, ordenar_por, estrito=True))
+    except cx_Oracle.DatabaseError: return []
+
+def carregar_status_certificacao(conexao, filtros=None, estrito=False):
+    """Carrega status de certificação do Oracle (opcionalmente só de alguns produtores), usando o cache de referência.
+    Retorna {id_produtor: {"certificado", "etapas"}} somente leitura (MappingProxyType). Em caso de erro retorna {} (ou, com `estrito`, relança o erro depois de registrá-lo)."""
+    if not conexao: return {}
+    chave = cache_referencia.chave_filtros("certificacao", filtros)
+    em_cache = _ler_cache(conexao, chave)
+    if em_cache is not None: return em_cache
     status = {}
     cursor = None
     try:
         cursor = conexao.cursor()
         sql = "SELECT id_produtor, certificado, etapa_documentacao, etapa_inspecao, etapa_aprovacao FROM STATUS_CERTIFICACAO"
-        cursor.execute(sql)
+        where, binds = _montar_filtros(filtros, COLUNAS_FILTRO_CERTIFICACAO)
+        cursor.execute(sql + where, binds)
         for row in cursor.fetchall():
-            status[row[0]] = {"certificado": bool(row[1]), "etapas": {"Documentação": bool(row[2]), "Inspeção": bool(row[3]), "Aprovação": bool(row[4])}}
+            status[row[0]] = MappingProxyType({"certificado": bool(row[1]), "etapas": MappingProxyType(
+                {"Documentação": bool(row[2]), "Inspeção": bool(row[3]), "Aprovação": bool(row[4])})})
+        status = MappingProxyType(status)
+        _guardar_cache(conexao, chave, status)
         return status
-    except cx_Oracle.DatabaseError as e: registrar_erro(f"Erro Oracle ao carregar certificação: {e}"); return {}
+    except cx_Oracle.DatabaseError as e:
+        registrar_erro(f"Erro Oracle ao carregar certificação: {e}", erro=e, operacao="carregar", tabela="STATUS_CERTIFICACAO")
+        if estrito: raise
+        return {}
     finally:
         if cursor: cursor.close()
 
-def carregar_demandas(conexao):
-    """Carrega dados de demandas do Oracle."""
-    if not conexao or cx_Oracle is None: return []
-    demandas = []
+def iterar_demandas(conexao, filtros=None, tamanho_lote=None, estrito=False):
+    """Gera demandas do Oracle (ordenadas por data de necessidade) sob demanda."""
+    if not conexao: return
     cursor = None
     try:
-        cursor = conexao.cursor()
+        cursor = _abrir_cursor_streaming(conexao, tamanho_lote)
         sql = """SELECT id_demanda, cultura, quantidade, unidade_medida, data_necessidade, observacoes, registrado_em
-                   FROM DEMANDAS ORDER BY data_necessidade"""
-        cursor.execute(sql)
-        cols = [desc[0].lower() for desc in cursor.description]
-        for row in cursor.fetchall():
-            row_dict = dict(zip(cols, row))
-            
-            # Converte datas Oracle para date objects
-            for key in ['data_necessidade', 'registrado_em']:
-                if isinstance(row_dict.get(key), datetime.datetime):
-                    row_dict[key] = row_dict[key].date()
-            demandas.append(row_dict)
-        return demandas
-    except cx_Oracle.DatabaseError as e: registrar_erro(f"Erro Oracle ao carregar demandas: {e}"); return []
+                   FROM DEMANDAS"""
+        where, binds = _montar_filtros(filtros, COLUNAS_FILTRO_DEMANDAS)
+        cursor.execute(sql + where + " ORDER BY data_necessidade", binds)
+        cursor.rowfactory = Demanda
+        yield from _iterar_linhas(cursor)
+    except cx_Oracle.DatabaseError as e:
+        registrar_erro(f"Erro Oracle ao carregar demandas: {e}", erro=e, operacao="carregar", tabela="DEMANDAS")
+        if estrito: raise
+    finally:
+        if cursor: cursor.close()
+
+def carregar_demandas(conexao, filtros=None):
+    """Carrega dados de demandas do Oracle, aplicando `filtros` no próprio SQL."""
+    try: return list(iterar_demandas(conexao, filtros, estrito=True))
+    except cx_Oracle.DatabaseError: return []
+
+def iterar_lotes_tabela(conexao, tabela, colunas, tamanho_lote=None, estrito=False):
+    """Gera a tabela inteira em lotes de tuplas (um fetchmany por vez), para exportações.
+    `tabela` e `colunas` vêm sempre de constantes do código, nunca do usuário."""
+    if not conexao: return
+    cursor = None
+    try:
+        cursor = _abrir_cursor_streaming(conexao, tamanho_lote)
+        cursor.execute(f"SELECT {', '.join(colunas)} FROM {tabela}")
+        while True:
+            linhas = cursor.fetchmany()
+            if not linhas: return
+            yield linhas
+    except cx_Oracle.DatabaseError as e:
+        registrar_erro(f"Erro Oracle ao ler a tabela {tabela}: {e}", erro=e, operacao="exportar", tabela=tabela)
+        if estrito: raise
+    finally:
+        if cursor: cursor.close()
+
+# --- Busca no Mercado (uma consulta, paginação por chave) ---
+# A página seguinte continua depois da última chave (data de referência, id_plantio) já exibida,
+# então o custo de cada página não cresce com o número de páginas já vistas (sem OFFSET).
+DATA_MINIMA = datetime.date(1, 1, 1) # Plantios sem data de referência vêm primeiro na ordenação
+
+SQL_MERCADO = """SELECT * FROM (
+    SELECT p.id_plantio, p.cultura, p.status,
+           CASE p.status WHEN 'Disponível' THEN p.data_colheita_real ELSE p.data_prevista_colheita END AS data_referencia,
+           p.quantidade_colhida, p.unidade_medida, pr.id_produtor, pr.nome, pr.associacao, NVL(c.certificado, 0) AS certificado,
+           NVL(CASE p.status WHEN 'Disponível' THEN p.data_colheita_real ELSE p.data_prevista_colheita END, :f_data_minima) AS chave_data
+      FROM PLANTIOS_PRODUTOS p
+      JOIN PRODUTORES pr ON pr.id_produtor = p.id_produtor
+      LEFT JOIN STATUS_CERTIFICACAO c ON c.id_produtor = p.id_produtor
+     WHERE p.status IN ('Disponível', 'Planejado'){filtros_internos}
+) m{filtros_externos}
+ ORDER BY chave_data, id_plantio
+ FETCH FIRST :f_limite ROWS ONLY"""
+
+def pesquisar_mercado(conexao, filtros=None, apos=None, limite=None):
+    """Uma página da oferta (Disponível/Planejado) já com produtor e certificação, ordenada pela data de referência.
+
+    `filtros` (opcionais): "cultura" (nome ou lista de grafias), "somente_certificados", "associacao", "data_inicio"/"data_fim" (data de referência).
+    `apos` é a chave devolvida pela página anterior. Retorna (ofertas, chave_proxima); chave_proxima é None na
+    última página. Em caso de erro retorna ([], None).
+    """
+    if not conexao: registrar_erro("Conexão Oracle inválida."); return [], None
+    filtros = filtros or {}
+    limite = limite or config.MERCADO_TAMANHO_PAGINA
+    binds = {"f_data_minima": DATA_MINIMA, "f_limite": limite + 1} # Uma linha a mais indica se há próxima página
+    internos = []; externos = []
+    cultura = filtros.get("cultura")
+    if isinstance(cultura, (list, tuple, set)): # Grafias exatas (ex: variantes de um nome canônico do índice de culturas)
+        cultura = catalogo_sql.completar(cultura, catalogo_sql.aridade_lista_in(len(cultura))) if cultura else []
+        nomes = [f":f_cultura_{i}" for i in range(len(cultura))]
+        internos.append(f"p.cultura IN ({', '.join(nomes)})" if nomes else "1 = 0")
+        binds.update({nome[1:]: valor for nome, valor in zip(nomes, cultura)})
+    elif cultura: internos.append("UPPER(p.cultura) = UPPER(:f_cultura)"); binds["f_cultura"] = cultura.strip()
+    if filtros.get("somente_certificados"): internos.append("NVL(c.certificado, 0) = 1")
+    if filtros.get("associacao"): internos.append("UPPER(pr.associacao) = UPPER(:f_associacao)"); binds["f_associacao"] = filtros["associacao"].strip()
+    if filtros.get("data_inicio"): externos.append("data_referencia >= :f_data_inicio"); binds["f_data_inicio"] = filtros["data_inicio"]
+    if filtros.get("data_fim"): externos.append("data_referencia <= :f_data_fim"); binds["f_data_fim"] = filtros["data_fim"]
+    if apos:
+        externos.append("chave_data >= :f_apos_data AND (chave_data > :f_apos_data OR id_plantio > :f_apos_id)")
+        binds["f_apos_data"], binds["f_apos_id"] = apos
+    sql = SQL_MERCADO.format(filtros_internos="".join(" AND " + c for c in internos),
+                             filtros_externos=(" WHERE " + " AND ".join(externos)) if externos else "")
+    cursor = None
+    try:
+        cursor = conexao.cursor()
+        cursor.outputtypehandler = tratar_tipos_saida
+        cursor.arraysize = limite + 1
+        cursor.execute(sql, binds)
+        linhas = cursor.fetchall()
+    except cx_Oracle.DatabaseError as e: registrar_erro(f"Erro Oracle na busca do mercado: {e}", erro=e, operacao="pesquisar_mercado", tabela="PLANTIOS_PRODUTOS"); return [], None
     finally:
-        if cursor: cursor.close()
\ No newline at end of file
+        if cursor: cursor.close()
+    chave_proxima = None
+    if len(linhas) > limite:
+        linhas = linhas[:limite]
+        chave_proxima = (linhas[-1][-1], linhas[-1][0])
+    return [OfertaMercado(*linha[:-1]) for linha in linhas], chave_proxima
+
+# --- Seletores (produtor, talhão, lote, insumo, demanda) ---
+def pagina_selecao(conexao, comando, binds=None, busca=None, apos=None, limite=None):
+    """Uma página de um seletor: executa o comando "<entidade>.pagina" do catálogo e lê só `limite` linhas.
+
+    `busca` é o trecho digitado (nome, ID, cultura...); `apos` é a chave devolvida pela página anterior.
+    Retorna (linhas, chave_proxima); chave_proxima é None na última página. Em caso de erro retorna ([], None).
+    """
+    if not conexao: registrar_erro("Conexão Oracle inválida."); return [], None
+    limite = limite or config.SELETOR_TAMANHO_PAGINA
+    sql = catalogo_sql.SQL[comando]
+    binds = dict(binds or {}, busca=catalogo_sql.padrao_busca(busca), limite=limite + 1) # Uma linha a mais indica se há próxima página
+    binds["apos_1"], binds["apos_2"] = apos or (None, None)
+    if ":data_minima" in sql: binds["data_minima"] = DATA_MINIMA
+    cursor = None
+    try:
+        cursor = conexao.cursor()
+        cursor.outputtypehandler = tratar_tipos_saida
+        cursor.arraysize = limite + 1
+        cursor.execute(sql, binds)
+        linhas = cursor.fetchall()
+    except cx_Oracle.DatabaseError as e: registrar_erro(f"Erro Oracle ao listar ({comando}): {e}", erro=e, operacao="pagina_selecao"); return [], None
+    finally:
+        if cursor: cursor.close()
+    chave_proxima = None
+    if len(linhas) > limite:
+        linhas = linhas[:limite]
+        chave_proxima = tuple(linhas[-1][-2:])
+    return linhas, chave_proxima
+
+# --- Calendário de Colheitas (agregado no Oracle) ---
+# Quantidade prevista = área do talhão x produtividade histórica da cultura (colhido / área dos plantios
+# 'Disponível'), como na previsão de oferta: cada cultura usa a unidade com mais área colhida. Aqui a cultura é
+# comparada por LOWER(TRIM()), sem o índice de culturas; lotes sem área ou sem histórico ficam fora da soma.
+SQL_CALENDARIO = """WITH produtividade AS (
+           SELECT LOWER(TRIM(p.cultura)) AS cultura, LOWER(TRIM(p.unidade_medida)) AS unidade,
+                  SUM(p.quantidade_colhida) / SUM(t.tamanho_ha) AS por_ha,
+                  ROW_NUMBER() OVER (PARTITION BY LOWER(TRIM(p.cultura)) ORDER BY SUM(t.tamanho_ha) DESC, LOWER(TRIM(p.unidade_medida))) AS ordem
+             FROM PLANTIOS_PRODUTOS p JOIN TALHOES t ON t.id_talhao_unico = p.id_talhao_unico
+            WHERE p.status = 'Disponível' AND p.quantidade_colhida > 0 AND t.tamanho_ha > 0
+            GROUP BY LOWER(TRIM(p.cultura)), LOWER(TRIM(p.unidade_medida)))
+    SELECT TRUNC(p.data_prevista_colheita, 'MM') AS mes, p.cultura, pr.id_produtor, pr.nome,
+           COUNT(*) AS lotes, SUM(t.tamanho_ha) AS area_ha, MIN(p.data_prevista_colheita) AS primeira_colheita,
+           SUM(t.tamanho_ha * r.por_ha) AS quantidade_prevista, MAX(r.unidade) AS unidade_medida
+      FROM PLANTIOS_PRODUTOS p
+      JOIN PRODUTORES pr ON pr.id_produtor = p.id_produtor
+      LEFT JOIN TALHOES t ON t.id_talhao_unico = p.id_talhao_unico
+      LEFT JOIN produtividade r ON r.cultura = LOWER(TRIM(p.cultura)) AND r.ordem = 1
+     WHERE p.status = 'Planejado' AND p.data_prevista_colheita >= :f_inicio AND p.data_prevista_colheita < :f_fim{filtros}
+     GROUP BY TRUNC(p.data_prevista_colheita, 'MM'), p.cultura, pr.id_produtor, pr.nome
+     ORDER BY mes, primeira_colheita, p.cultura, pr.nome"""
+
+def _somar_meses(data, meses):
+    indice = data.year * 12 + data.month - 1 + meses
+    return datetime.date(indice // 12, indice % 12 + 1, 1)
+
+def carregar_calendario_colheitas(conexao, filtros=None, horizonte_meses=None):
+    """Colheitas planejadas agrupadas por mês, cultura e produtor, do mês atual até `horizonte_meses` à frente, com a
+    quantidade prevista (None se a cultura não tiver histórico de colheita).
+
+    `filtros` (opcionais): "regiao" (trecho da localização do produtor) e "associacao". O resultado fica no cache
+    de referência até uma escrita em plantios o invalidar. Retorna lista de ColheitaPrevista ou [] em caso de erro.
+    """
+    if not conexao: registrar_erro("Conexão Oracle inválida."); return []
+    horizonte_meses = horizonte_meses or config.CALENDARIO_HORIZONTE_MESES
+    inicio = datetime.date.today().replace(day=1)
+    filtros = {chave: valor.strip() for chave, valor in (filtros or {}).items() if valor and valor.strip()}
+    chave = cache_referencia.chave_filtros("calendario", dict(filtros, inicio=inicio, horizonte=horizonte_meses))
+    em_cache = _ler_cache(conexao, chave)
+    if em_cache is not None: return list(em_cache)
+
+    binds = {"f_inicio": inicio, "f_fim": _somar_meses(inicio, horizonte_meses)}; condicoes = []
+    if "regiao" in filtros: condicoes.append("UPPER(pr.localizacao) LIKE UPPER(:f_regiao)"); binds["f_regiao"] = f"%{filtros['regiao']}%"
+    if "associacao" in filtros: condicoes.append("UPPER(pr.associacao) = UPPER(:f_associacao)"); binds["f_associacao"] = filtros["associacao"]
+    cursor = None
+    try:
+        cursor = conexao.cursor()
+        cursor.outputtypehandler = tratar_tipos_saida
+        cursor.execute(SQL_CALENDARIO.format(filtros="".join(" AND " + c for c in condicoes)), binds)
+        cursor.rowfactory = ColheitaPrevista
+        calendario = cursor.fetchall()
+    except cx_Oracle.DatabaseError as e: registrar_erro(f"Erro Oracle ao carregar calendário de colheitas: {e}", erro=e, operacao="calendario", tabela="PLANTIOS_PRODUTOS"); return []
+    finally:
+        if cursor: cursor.close()
+    _guardar_cache(conexao, chave, tuple(calendario))
+    return calendario
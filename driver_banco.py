@@ -0,0 +1,87 @@
+import sys
+import importlib
+import threading
+
+# --- Driver do Banco ---
+# O driver é escolhido por config.BANCO_DRIVER e só é importado na primeira vez que algo o usa (em geral,
+# ao criar o pool), então abrir o programa ou rodar um comando curto não paga o custo de carregar o Oracle Client.
+#   oracledb  -> python-oracledb em modo thin (sem bibliotecas cliente)
+#   cx_Oracle -> cx_Oracle (modo thick, exige o Oracle Instant Client)
+#   sqlite    -> substituto embutido (driver_sqlite.py), com o mesmo esquema, para rodar sem Oracle
+#   auto      -> oracledb se estiver instalado, senão cx_Oracle
+# Os módulos continuam recebendo o driver como `cx_Oracle = config.cx_Oracle`: os três têm a mesma API
+# (DatabaseError, cursor, executemany com batcherrors, outputtypehandler...).
+
+MODULOS = {"oracledb": "oracledb", "cx_Oracle": "cx_Oracle", "sqlite": "driver_sqlite"}
+ORDEM_AUTO = ("oracledb", "cx_Oracle")
+
+class DriverIndisponivel(ImportError):
+    """Nenhum driver utilizável para config.BANCO_DRIVER."""
+
+_estado = {"nome": None, "modulo": None}
+_trava = threading.Lock()
+
+def carregar():
+    """Importa (uma única vez) o driver configurado e o retorna. Levanta DriverIndisponivel se não houver."""
+    if _estado["modulo"] is not None: return _estado["modulo"]
+    import config # Import tardio: config importa este módulo
+    with _trava:
+        if _estado["modulo"] is not None: return _estado["modulo"]
+        escolhido = config.BANCO_DRIVER
+        if escolhido != "auto" and escolhido not in MODULOS:
+            raise DriverIndisponivel(f"AGRO_DRIVER inválido: '{escolhido}' (use auto, {', '.join(MODULOS)}).")
+        for nome in (ORDEM_AUTO if escolhido == "auto" else (escolhido,)):
+            try: modulo = importlib.import_module(MODULOS[nome])
+            except ImportError: continue
+            _estado.update(nome=nome, modulo=modulo)
+            print(f"[Config INFO] Driver do banco: {descricao()}.", file=sys.stderr)
+            return modulo
+        raise DriverIndisponivel("Nenhum driver Oracle encontrado. Instale com 'pip install oracledb' (modo thin, sem "
+                                 "Oracle Client) ou use AGRO_DRIVER=sqlite para o banco local." if escolhido == "auto" else
+                                 f"Driver '{escolhido}' não encontrado. Instale com 'pip install {MODULOS[escolhido]}'.")
+
+def disponivel():
+    try: carregar(); return True
+    except DriverIndisponivel: return False
+
+def nome():
+    """Nome do driver carregado (oracledb, cx_Oracle ou sqlite)."""
+    carregar(); return _estado["nome"]
+
+def descricao():
+    """Ex: "oracledb 2.4.1 (thin)" — vai para os resultados do benchmark."""
+    modulo = _estado["modulo"]
+    if modulo is None: return "não carregado"
+    versao = getattr(modulo, "__version__", None) or getattr(modulo, "version", "?")
+    modo = {"oracledb": "thin", "cx_Oracle": "thick", "sqlite": "local"}[_estado["nome"]]
+    if _estado["nome"] == "oracledb" and hasattr(modulo, "is_thin_mode") and not modulo.is_thin_mode(): modo = "thick"
+    return f"{_estado['nome']} {versao} ({modo})"
+
+def dsn_aplicacao():
+    """DSN do banco da aplicação: o Oracle de config.ORACLE_DSN ou, com o driver sqlite, o arquivo local."""
+    import config
+    return config.SQLITE_ARQUIVO if nome() == "sqlite" else config.ORACLE_DSN
+
+def criar_pool(usuario, senha, dsn, minimo, maximo, incremento, tamanho_cache_sql):
+    """Pool de sessões do driver carregado (acquire/release/drop/close, opened/busy).
+    `tamanho_cache_sql`: comandos preparados que cada sessão guarda (stmtcachesize)."""
+    modulo = carregar()
+    if _estado["nome"] == "cx_Oracle":
+        pool = modulo.SessionPool(user=usuario, password=senha, dsn=dsn, min=minimo, max=maximo, increment=incremento,
+                                  getmode=modulo.SPOOL_ATTRVAL_WAIT, threaded=True, encoding="UTF-8")
+        pool.stmtcachesize = tamanho_cache_sql
+        return pool
+    return modulo.create_pool(user=usuario, password=senha, dsn=dsn, min=minimo, max=maximo, increment=incremento,
+                              getmode=modulo.POOL_GETMODE_WAIT, stmtcachesize=tamanho_cache_sql)
+
+
+class _DriverPreguicoso:
+    """Fica no lugar do módulo do driver; o import real acontece no primeiro acesso a um atributo."""
+
+    def __getattr__(self, atributo):
+        return getattr(carregar(), atributo)
+
+    def __repr__(self):
+        return f"<driver do banco: {descricao()}>"
+
+driver = _DriverPreguicoso()
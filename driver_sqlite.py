@@ -0,0 +1,330 @@
+import re
+import sqlite3
+import datetime
+import threading
+import itertools
+from functools import lru_cache
+
+# --- Substituto SQLite do Driver Oracle ---
+# Implementa a parte da API do python-oracledb/cx_Oracle que a aplicação usa (pool, cursor com binds :nome e :1,
+# executemany com batcherrors, outputtypehandler, rowfactory, erros com código ORA) sobre um banco SQLite,
+# para rodar o programa, os comandos e o benchmark sem Oracle (AGRO_DRIVER=sqlite).
+# O esquema é o mesmo: as migrações rodam aqui como no Oracle. O SQL da aplicação é traduzido por _traduzir();
+# só as construções Oracle que o código usa são cobertas (NVL, SYSDATE, TRUNC de data, FETCH FIRST,
+# SET TRANSACTION READ ONLY, dicionário de dados user_*). Datas são gravadas como texto ISO ('AAAA-MM-DD HH:MM:SS')
+# e as colunas DATE voltam como datetime.
+
+version = sqlite3.sqlite_version
+paramstyle = "named"
+
+DB_TYPE_DATE = "DB_TYPE_DATE"
+DB_TYPE_CLOB = "DB_TYPE_CLOB"
+DB_TYPE_LONG = "DB_TYPE_LONG"
+POOL_GETMODE_WAIT = 1
+
+TAMANHO_CACHE_SQL = 128 # Comandos preparados guardados por sessão (cached_statements do sqlite3), se o pool não disser
+ESPERA_BLOQUEIO_MS = 5000 # Outra sessão gravando: espera até isso antes de falhar
+
+
+class Error(Exception):
+    pass
+
+class DatabaseError(Error):
+    pass
+
+class IntegrityError(DatabaseError):
+    pass
+
+class _Erro:
+    """Detalhe do erro (erro.args[0]), com `code` e `message` como no driver Oracle."""
+
+    def __init__(self, codigo, mensagem):
+        self.code = codigo
+        self.message = f"ORA-{codigo:05d}: {mensagem}"
+        self.full_code = f"ORA-{codigo:05d}"
+
+    def __str__(self):
+        return self.message
+
+# Mensagem do SQLite -> código ORA equivalente (o código da aplicação decide por ele, ex: migrações idempotentes)
+CODIGOS_ERRO = (("no such table", 942), ("already exists", 955), ("no such column", 904), ("interrupted", 1013),
+                ("UNIQUE constraint", 1), ("FOREIGN KEY constraint", 2291), ("NOT NULL constraint", 1400),
+                ("CHECK constraint", 2290), ("database is locked", 54))
+
+def _converter_erro(erro):
+    mensagem = str(erro)
+    codigo = next((c for trecho, c in CODIGOS_ERRO if trecho in mensagem), 900 if isinstance(erro, sqlite3.OperationalError) else 0)
+    classe = IntegrityError if isinstance(erro, sqlite3.IntegrityError) else DatabaseError
+    return classe(_Erro(codigo, mensagem))
+
+
+# --- Tradução do SQL ---
+_TRADUCOES = [
+    (re.compile(r":(\d+)\b"), r"?\1"), # Binds posicionais :1, :2...
+    (re.compile(r"\bFETCH FIRST (\S+) ROWS? ONLY", re.I), r"LIMIT \1"),
+    (re.compile(r"\bNVL\(", re.I), "IFNULL("),
+    (re.compile(r"\bSYSDATE\b", re.I), "(datetime('now', 'localtime'))"),
+    (re.compile(r"\bTRUNC\(([\w.]+), 'MM'\)", re.I), r"date(\1, 'start of month')"),
+    (re.compile(r"\bTRUNC\(([\w.]+)\) - (:\w+)", re.I), r"CAST(julianday(date(\1)) - julianday(date(\2)) AS INTEGER)"), # Dias entre datas
+    # Transação só de leitura: no SQLite, a primeira leitura depois do BEGIN fixa o instante visto até o fim dela
+    (re.compile(r"^\s*SET TRANSACTION READ ONLY\s*$", re.I), "BEGIN"),
+]
+_SEM_EQUIVALENTE = re.compile(r"\s*ALTER\s+INDEX\b", re.I) # MONITORING USAGE etc.: nada a fazer no SQLite
+
+@lru_cache(maxsize=512)
+def _traduzir(sql):
+    """SQL Oracle da aplicação -> SQL SQLite (None para comandos sem equivalente, que viram no-op)."""
+    if _SEM_EQUIVALENTE.match(sql): return None
+    for padrao, troca in _TRADUCOES: sql = padrao.sub(troca, sql)
+    return sql
+
+# Dicionário de dados lido por migracoes.py e indices.py
+VISOES_DICIONARIO = (
+    "CREATE TEMP VIEW IF NOT EXISTS user_tables AS SELECT upper(name) AS table_name FROM sqlite_master WHERE type = 'table'",
+    """CREATE TEMP VIEW IF NOT EXISTS user_ind_columns AS
+       SELECT upper(i.name) AS index_name, upper(t.name) AS table_name, upper(c.name) AS column_name, c.seqno + 1 AS column_position
+         FROM sqlite_master t JOIN pragma_index_list(t.name) i JOIN pragma_index_info(i.name) c WHERE t.type = 'table'""",
+    # O SQLite não registra uso de índices: nenhum aparece como "nunca usado"
+    "CREATE TEMP VIEW IF NOT EXISTS user_object_usage AS SELECT NULL AS index_name, NULL AS monitoring, NULL AS used WHERE 0",
+)
+
+
+# --- Conversão de Valores ---
+# Colunas declaradas DATE voltam como datetime pelo conversor registrado abaixo (detect_types=PARSE_DECLTYPES);
+# texto nunca é convertido, mesmo que pareça uma data. Expressões não têm tipo declarado no SQLite, então as
+# colunas calculadas que são datas no Oracle são reconhecidas pelo nome que a aplicação lhes dá.
+_FORMATO_DATA = re.compile(r"\d{4}-\d{2}-\d{2}(?: \d{2}:\d{2}:\d{2})?$")
+COLUNAS_DATA_CALCULADAS = frozenset({"DATA_REF", "DATA_REFERENCIA", "CHAVE_DATA", "MES", "PRIMEIRA_COLHEITA"})
+
+def _converter_data(valor):
+    return datetime.datetime.fromisoformat(valor.decode())
+
+sqlite3.register_converter("DATE", _converter_data)
+
+def _valor_bind(valor):
+    if isinstance(valor, datetime.datetime): return valor.isoformat(" ", "seconds")
+    if isinstance(valor, datetime.date): return f"{valor.isoformat()} 00:00:00"
+    return valor
+
+def _binds(parametros):
+    if parametros is None: return ()
+    if isinstance(parametros, dict): return {nome: _valor_bind(v) for nome, v in parametros.items()}
+    return tuple(_valor_bind(v) for v in parametros)
+
+
+class Variavel:
+    """Resultado de cursor.var(): só o conversor de saída importa aqui."""
+
+    def __init__(self, tipo, outconverter=None):
+        self.type = tipo
+        self.outconverter = outconverter
+
+
+class Cursor:
+    def __init__(self, conexao):
+        self.connection = conexao
+        self._cursor = conexao._bd.cursor()
+        self.arraysize = 100
+        self.prefetchrows = 2
+        self.rowfactory = None
+        self.outputtypehandler = None
+        self._conversores = {}
+        self._datas_calculadas = ()
+        self._erros_lote = []
+
+    @property
+    def description(self):
+        descricao = self._cursor.description
+        if descricao is None: return None
+        return [(coluna[0].upper(), None, None, None, None, None, True) for coluna in descricao]
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def var(self, tipo, arraysize=None, outconverter=None, **_):
+        return Variavel(tipo, outconverter)
+
+    def setinputsizes(self, *args, **kwargs):
+        pass
+
+    def _executar(self, sql, parametros):
+        traduzido = _traduzir(sql)
+        if traduzido is None: return False
+        if not self.connection._bd.in_transaction and sql.lstrip()[:9].upper() == "SAVEPOINT":
+            self.connection._bd.execute("BEGIN") # Savepoint aninhado numa transação, como no Oracle
+        try: self._cursor.execute(traduzido, _binds(parametros))
+        except sqlite3.Error as e: raise _converter_erro(e) from e
+        return True
+
+    def execute(self, sql, parametros=None, **binds):
+        self.rowfactory = None; self._conversores = {} # Como no driver Oracle: valem para uma execução
+        if not self._executar(sql, parametros if parametros is not None else binds or None): return None
+        descricao = self._cursor.description
+        if descricao is None: return None
+        self._datas_calculadas = [posicao for posicao, coluna in enumerate(descricao) if coluna[0].upper() in COLUNAS_DATA_CALCULADAS]
+        return self
+
+    def executemany(self, sql, linhas, batcherrors=False, **_):
+        self._erros_lote = []
+        traduzido = _traduzir(sql)
+        if traduzido is None: return
+        linhas = [_binds(linha) for linha in linhas]
+        bd = self.connection._bd
+        if not batcherrors:
+            try: self._cursor.executemany(traduzido, linhas)
+            except sqlite3.Error as e: raise _converter_erro(e) from e
+            return
+        # batcherrors: grava as linhas válidas e guarda as rejeitadas. Tenta o lote inteiro primeiro;
+        # se alguma falhar, desfaz só o lote (savepoint) e refaz linha a linha.
+        if not bd.in_transaction: bd.execute("BEGIN")
+        bd.execute("SAVEPOINT lote_driver")
+        try: self._cursor.executemany(traduzido, linhas); bd.execute("RELEASE SAVEPOINT lote_driver"); return
+        except sqlite3.Error: bd.execute("ROLLBACK TO SAVEPOINT lote_driver"); bd.execute("RELEASE SAVEPOINT lote_driver")
+        for posicao, linha in enumerate(linhas):
+            try: self._cursor.execute(traduzido, linha)
+            except sqlite3.Error as e: self._erros_lote.append(ErroLote(posicao, _converter_erro(e).args[0]))
+
+    def getbatcherrors(self):
+        return list(self._erros_lote)
+
+    def _conversor_data(self, posicao):
+        """outconverter que o outputtypehandler escolhe para uma coluna de data (calculado uma vez por execução)."""
+        if posicao not in self._conversores:
+            tratador = self.outputtypehandler or self.connection.outputtypehandler
+            variavel = tratador(self, self._cursor.description[posicao][0].upper(), DB_TYPE_DATE, 0, 0, 0) if tratador else None
+            self._conversores[posicao] = getattr(variavel, "outconverter", None)
+        return self._conversores[posicao]
+
+    def _linha(self, linha):
+        if linha is None: return None
+        valores = list(linha)
+        for posicao in self._datas_calculadas:
+            valor = valores[posicao]
+            if isinstance(valor, str) and _FORMATO_DATA.match(valor): valores[posicao] = datetime.datetime.fromisoformat(valor)
+        for posicao, valor in enumerate(valores):
+            if isinstance(valor, datetime.datetime):
+                conversor = self._conversor_data(posicao)
+                if conversor: valores[posicao] = conversor(valor)
+        return self.rowfactory(*valores) if self.rowfactory else tuple(valores)
+
+    def fetchone(self):
+        return self._linha(self._cursor.fetchone())
+
+    def fetchmany(self, tamanho=None):
+        return [self._linha(linha) for linha in self._cursor.fetchmany(tamanho or self.arraysize)]
+
+    def fetchall(self):
+        return [self._linha(linha) for linha in self._cursor.fetchall()]
+
+    def __iter__(self):
+        for linha in self._cursor: yield self._linha(linha)
+
+    def close(self):
+        self._cursor.close()
+
+
+class ErroLote:
+    """Linha rejeitada num executemany(batcherrors=True)."""
+
+    def __init__(self, offset, erro):
+        self.offset = offset
+        self.code = erro.code
+        self.message = erro.message
+
+
+class Connection:
+    def __init__(self, bd, tamanho_cache_sql):
+        self._bd = bd
+        self.outputtypehandler = None
+        self.stmtcachesize = tamanho_cache_sql
+
+    def cursor(self):
+        return Cursor(self)
+
+    def commit(self):
+        try: self._bd.commit()
+        except sqlite3.Error as e: raise _converter_erro(e) from e
+
+    def rollback(self):
+        try: self._bd.rollback()
+        except sqlite3.Error as e: raise _converter_erro(e) from e
+
+    def cancel(self):
+        self._bd.interrupt()
+
+    def ping(self):
+        self._bd.execute("SELECT 1")
+
+    def close(self):
+        self._bd.close()
+
+
+_bancos_em_memoria = itertools.count(1)
+
+def _abrir(caminho, uri=False, tamanho_cache_sql=TAMANHO_CACHE_SQL):
+    bd = sqlite3.connect(caminho, uri=uri, timeout=ESPERA_BLOQUEIO_MS / 1000, check_same_thread=False,
+                         cached_statements=tamanho_cache_sql, detect_types=sqlite3.PARSE_DECLTYPES)
+    # UPPER do SQLite só conhece ASCII; o do Oracle (e o das buscas dos seletores) também trata acentos
+    bd.create_function("UPPER", 1, lambda texto: texto.upper() if isinstance(texto, str) else texto, deterministic=True)
+    bd.execute("PRAGMA foreign_keys = ON")
+    if not uri: bd.execute("PRAGMA journal_mode = WAL") # Leitores não esperam quem está gravando
+    for visao in VISOES_DICIONARIO: bd.execute(visao)
+    return Connection(bd, tamanho_cache_sql)
+
+def connect(user=None, password=None, dsn=None, stmtcachesize=TAMANHO_CACHE_SQL, **_):
+    """Conexão avulsa; `dsn` é o caminho do arquivo SQLite."""
+    return _abrir(dsn, tamanho_cache_sql=stmtcachesize)
+
+
+class Pool:
+    """Pool de sessões com a interface do SessionPool (acquire/release/drop/close, opened/busy).
+
+    `dsn` é o caminho do arquivo; ":memory:" cria um banco compartilhado pelas sessões deste pool, que some
+    quando o pool é fechado.
+    """
+
+    def __init__(self, dsn, minimo=1, maximo=4, tamanho_cache_sql=TAMANHO_CACHE_SQL):
+        self.max = maximo
+        self.stmtcachesize = tamanho_cache_sql
+        self.opened = 0
+        self.busy = 0
+        self.ping_interval = 60
+        self._livres = []
+        self._condicao = threading.Condition()
+        if dsn == ":memory:": self._caminho, self._uri = f"file:agro_memoria_{next(_bancos_em_memoria)}?mode=memory&cache=shared", True
+        else: self._caminho, self._uri = dsn, False
+        self._ancora = _abrir(self._caminho, self._uri) if self._uri else None # Mantém o banco em memória vivo
+        for _ in range(minimo): self._livres.append(self._abrir()); self.opened += 1
+
+    def _abrir(self):
+        return _abrir(self._caminho, self._uri, self.stmtcachesize)
+
+    def acquire(self):
+        with self._condicao:
+            while not self._livres and self.opened >= self.max: self._condicao.wait() # getmode WAIT
+            if self._livres: sessao = self._livres.pop()
+            else: sessao = self._abrir(); self.opened += 1
+            self.busy += 1
+            return sessao
+
+    def release(self, sessao):
+        sessao.rollback() # Como no Oracle: o que não foi confirmado não passa para o próximo usuário
+        with self._condicao:
+            self.busy -= 1; self._livres.append(sessao); self._condicao.notify()
+
+    def drop(self, sessao):
+        try: sessao.close()
+        except sqlite3.Error: pass
+        with self._condicao:
+            self.busy -= 1; self.opened -= 1; self._condicao.notify()
+
+    def close(self, force=False):
+        with self._condicao:
+            for sessao in self._livres: sessao.close()
+            self._livres = []; self.opened = self.busy
+        if self._ancora is not None: self._ancora.close(); self._ancora = None
+
+def create_pool(user=None, password=None, dsn=None, min=1, max=4, increment=1, getmode=POOL_GETMODE_WAIT,
+                stmtcachesize=TAMANHO_CACHE_SQL, **_):
+    return Pool(dsn, minimo=min, maximo=max, tamanho_cache_sql=stmtcachesize)
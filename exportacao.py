@@ -0,0 +1,248 @@
+import os
+import sys
+import json
+import mmap
+import math
+import array
+import struct
+import datetime
+from collections import Counter
+import config
+import database
+from utils import registrar_erro
+
+# Importa cx_Oracle do config
+cx_Oracle = config.cx_Oracle
+
+# --- Snapshot Colunar ---
+# Exporta as tabelas para um único arquivo em formato colunar, lido depois via mmap sem cópia.
+# Layout (little-endian, segmentos alinhados em 8 bytes):
+#   MAGICO | segmentos das colunas... | rodapé JSON | tamanho do rodapé (uint64) | MAGICO
+# O rodapé descreve tabelas, colunas, tipos e a posição (offset, bytes) de cada segmento; por ficar no
+# fim do arquivo, cada tabela é gravada assim que termina de ser lida do Oracle.
+# Tipos de coluna e seus segmentos:
+#   "texto"      -> "offsets" (int64, linhas+1), "dados" (UTF-8 concatenado), "validos" (uint8, 0 = nulo)
+#   "dicionario" -> "codigos" (int32, -1 = nulo); os valores distintos ficam no rodapé
+#   "data"       -> "valores" (int32, date.toordinal(), 0 = nulo)
+#   "real"       -> "valores" (float64, NaN = nulo)
+#   "flag"       -> "valores" (int8, -1 = nulo)
+
+MAGICO = b"AGROSNP1"
+VERSAO_FORMATO = 1
+ALINHAMENTO = 8
+EXTENSAO_SNAPSHOT = ".agrosnp"
+
+ESQUEMA_SNAPSHOT = {
+    "PRODUTORES": [("id_produtor", "texto"), ("nome", "texto"), ("localizacao", "texto"), ("contato", "texto"),
+                   ("associacao", "dicionario")],
+    "TALHOES": [("id_talhao_unico", "texto"), ("id_produtor", "texto"), ("id_talhao_produtor", "texto"),
+                ("tamanho_ha", "real"), ("tipo_solo", "dicionario")],
+    "PLANTIOS_PRODUTOS": [("id_plantio", "texto"), ("id_produtor", "texto"), ("id_talhao_unico", "texto"),
+                          ("cultura", "dicionario"), ("data_plantio", "data"), ("data_prevista_colheita", "data"),
+                          ("data_colheita_real", "data"), ("quantidade_colhida", "real"), ("unidade_medida", "dicionario"),
+                          ("status", "dicionario"), ("observacoes", "texto"), ("cultura_anterior", "dicionario")],
+    "REGISTROS_INSUMOS": [("id_registro", "texto"), ("id_produtor", "texto"), ("id_talhao_unico", "texto"),
+                          ("data_aplicacao", "data"), ("tipo_insumo", "dicionario"), ("quantidade", "texto"),
+                          ("observacoes", "texto")],
+    "STATUS_CERTIFICACAO": [("id_produtor", "texto"), ("certificado", "flag"), ("etapa_documentacao", "flag"),
+                            ("etapa_inspecao", "flag"), ("etapa_aprovacao", "flag")],
+    "DEMANDAS": [("id_demanda", "texto"), ("cultura", "dicionario"), ("quantidade", "real"), ("unidade_medida", "dicionario"),
+                 ("data_necessidade", "data"), ("observacoes", "texto"), ("registrado_em", "data")],
+}
+
+CODIGOS_ARRAY = {"data": 'i', "real": 'd', "flag": 'b'} # Tipos de coluna numérica -> typecode de array/memoryview
+
+# --- Gravação ---
+
+class _ColunaEmConstrucao:
+    """Acumula os valores de uma coluna em arrays compactos enquanto os lotes chegam do Oracle."""
+
+    def __init__(self, nome, tipo):
+        self.nome = nome; self.tipo = tipo
+        if tipo == "texto": self.offsets = array.array('q', [0]); self.dados = bytearray(); self.validos = bytearray()
+        elif tipo == "dicionario": self.codigos = array.array('i'); self.dicionario = {}
+        else: self.valores = array.array(CODIGOS_ARRAY[tipo])
+
+    def estender(self, valores):
+        if self.tipo == "texto":
+            offsets, dados, validos = self.offsets, self.dados, self.validos
+            for valor in valores:
+                if valor is None: validos.append(0)
+                else: dados += str(valor).encode('utf-8'); validos.append(1)
+                offsets.append(len(dados))
+        elif self.tipo == "dicionario":
+            dicionario = self.dicionario
+            self.codigos.extend(-1 if v is None else dicionario.setdefault(v, len(dicionario)) for v in valores)
+        elif self.tipo == "data": self.valores.extend(0 if v is None else v.toordinal() for v in valores)
+        elif self.tipo == "real": self.valores.extend(math.nan if v is None else float(v) for v in valores)
+        else: self.valores.extend(-1 if v is None else int(v) for v in valores)
+
+    def segmentos(self):
+        if self.tipo == "texto": return {"offsets": self.offsets, "dados": self.dados, "validos": self.validos}
+        if self.tipo == "dicionario": return {"codigos": self.codigos}
+        return {"valores": self.valores}
+
+
+def _gravar_segmento(arquivo, dados):
+    """Grava um segmento alinhado e retorna [offset, bytes]."""
+    posicao = arquivo.tell()
+    if posicao % ALINHAMENTO: arquivo.write(b"\0" * (ALINHAMENTO - posicao % ALINHAMENTO)); posicao = arquivo.tell()
+    if isinstance(dados, array.array) and sys.byteorder != 'little':
+        dados = array.array(dados.typecode, dados); dados.byteswap()
+    arquivo.write(dados)
+    return [posicao, arquivo.tell() - posicao]
+
+def _exportar_tabela(conexao, arquivo, tabela, tamanho_lote):
+    esquema = ESQUEMA_SNAPSHOT[tabela]
+    colunas = [_ColunaEmConstrucao(nome, tipo) for nome, tipo in esquema]
+    linhas = 0
+    for lote in database.iterar_lotes_tabela(conexao, tabela, [nome for nome, _ in esquema], tamanho_lote, estrito=True):
+        for coluna, valores in zip(colunas, zip(*lote)): coluna.estender(valores)
+        linhas += len(lote)
+    descricao = []
+    for coluna in colunas:
+        meta = {"nome": coluna.nome, "tipo": coluna.tipo,
+                "segmentos": {nome: _gravar_segmento(arquivo, dados) for nome, dados in coluna.segmentos().items()}}
+        if coluna.tipo == "dicionario": meta["dicionario"] = list(coluna.dicionario)
+        descricao.append(meta)
+    return {"linhas": linhas, "colunas": descricao}
+
+def _iniciar_transacao_leitura(conexao):
+    """SET TRANSACTION READ ONLY: até o fim da transação, todas as consultas veem o banco no mesmo instante."""
+    cursor = conexao.cursor()
+    try: cursor.execute("SET TRANSACTION READ ONLY")
+    finally: cursor.close()
+
+def exportar_snapshot(conexao, caminho, tabelas=None, tamanho_lote=None):
+    """Exporta as tabelas (todas, por padrão) para `caminho`. Retorna {tabela: linhas} ou None em caso de erro.
+
+    Todas as tabelas são lidas numa única sessão, dentro de uma transação só de leitura: o arquivo é um retrato
+    coerente do banco (nenhum talhão sem produtor, nenhum plantio sem talhão), mesmo com gravações em andamento.
+    Com o pool, a sessão é uma conexão derivada (a transação só de leitura precisa ser a primeira da sessão),
+    então escritas ainda não confirmadas em `conexao` não entram no snapshot.
+    """
+    if not conexao: registrar_erro("Conexão Oracle inválida."); return None
+    tabelas = tabelas or list(ESQUEMA_SNAPSHOT)
+    temporario = caminho + ".tmp" # Só substitui o snapshot anterior depois de gravado por completo
+    leitura = conexao.derivar() if hasattr(conexao, "derivar") else conexao
+    em_transacao = False
+    try:
+        _iniciar_transacao_leitura(leitura); em_transacao = True
+        with open(temporario, 'wb') as arquivo:
+            arquivo.write(MAGICO)
+            rodape = {"formato": VERSAO_FORMATO, "criado_em": datetime.datetime.now().isoformat(timespec='seconds'),
+                      "tabelas": {tabela: _exportar_tabela(leitura, arquivo, tabela, tamanho_lote) for tabela in tabelas}}
+            dados_rodape = json.dumps(rodape, ensure_ascii=False).encode('utf-8')
+            arquivo.write(dados_rodape); arquivo.write(struct.pack('<Q', len(dados_rodape))); arquivo.write(MAGICO)
+        os.replace(temporario, caminho)
+        return {tabela: dados["linhas"] for tabela, dados in rodape["tabelas"].items()}
+    except (cx_Oracle.DatabaseError, OSError) as e:
+        registrar_erro(f"Erro ao exportar snapshot para '{caminho}': {e}")
+        if os.path.exists(temporario): os.remove(temporario)
+        return None
+    finally:
+        if em_transacao: # Encerra a transação só de leitura (e devolve a sessão ao pool)
+            try: leitura.rollback()
+            except cx_Oracle.DatabaseError: pass
+
+# --- Leitura ---
+
+class ColunaSnapshot:
+    """Coluna de um snapshot. `valores`/`codigos` são memoryviews tipadas sobre o arquivo mapeado."""
+
+    def __init__(self, buffer, meta, linhas):
+        self.nome = meta["nome"]; self.tipo = meta["tipo"]; self.linhas = linhas
+        self.dicionario = meta.get("dicionario")
+        segmentos = {nome: buffer[inicio:inicio + tamanho] for nome, (inicio, tamanho) in meta["segmentos"].items()}
+        if self.tipo == "texto":
+            self.offsets = _como_numeros(segmentos["offsets"], 'q'); self.dados = segmentos["dados"]; self.validos = segmentos["validos"]
+        elif self.tipo == "dicionario": self.codigos = _como_numeros(segmentos["codigos"], 'i')
+        else: self.valores = _como_numeros(segmentos["valores"], CODIGOS_ARRAY[self.tipo])
+
+    def __len__(self):
+        return self.linhas
+
+    def __getitem__(self, i):
+        if not -self.linhas <= i < self.linhas: raise IndexError(i)
+        i %= self.linhas
+        if self.tipo == "texto":
+            return str(self.dados[self.offsets[i]:self.offsets[i + 1]], 'utf-8') if self.validos[i] else None
+        if self.tipo == "dicionario":
+            return self.dicionario[self.codigos[i]] if self.codigos[i] >= 0 else None
+        valor = self.valores[i]
+        if self.tipo == "data": return datetime.date.fromordinal(valor) if valor else None
+        if self.tipo == "real": return None if math.isnan(valor) else valor
+        return None if valor < 0 else valor
+
+    def __iter__(self):
+        return (self[i] for i in range(self.linhas))
+
+    def contar_valores(self):
+        """Contagem por valor de uma coluna "dicionario", feita direto sobre os códigos."""
+        if self.tipo != "dicionario": raise TypeError(f"Coluna '{self.nome}' não é dicionarizada.")
+        return {(self.dicionario[codigo] if codigo >= 0 else None): n for codigo, n in Counter(self.codigos).items()}
+
+
+def _como_numeros(segmento, codigo):
+    """View tipada sem cópia; em máquinas big-endian faz uma cópia invertida (o arquivo é little-endian)."""
+    if sys.byteorder == 'little': return segmento.cast(codigo)
+    numeros = array.array(codigo, bytes(segmento)); numeros.byteswap()
+    return memoryview(numeros)
+
+
+class Snapshot:
+    """Snapshot aberto via mmap. Uso: with Snapshot(caminho) as s: s.coluna("PLANTIOS_PRODUTOS", "cultura")."""
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._arquivo = open(caminho, 'rb')
+        try:
+            tamanho = os.fstat(self._arquivo.fileno()).st_size
+            if tamanho < 2 * len(MAGICO) + 8: raise ValueError("arquivo pequeno demais para ser um snapshot")
+            self._mapa = mmap.mmap(self._arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+            if self._mapa[:len(MAGICO)] != MAGICO or self._mapa[-len(MAGICO):] != MAGICO:
+                raise ValueError("assinatura de snapshot não encontrada (arquivo incompleto ou de outro formato)")
+            fim_rodape = tamanho - len(MAGICO) - 8
+            tamanho_rodape = struct.unpack_from('<Q', self._mapa, fim_rodape)[0]
+            self.metadados = json.loads(self._mapa[fim_rodape - tamanho_rodape:fim_rodape].decode('utf-8'))
+            if self.metadados.get("formato") != VERSAO_FORMATO:
+                raise ValueError(f"versão de formato não suportada: {self.metadados.get('formato')}")
+        except Exception:
+            self.close(); raise
+        self._buffer = memoryview(self._mapa)
+
+    def tabelas(self):
+        return list(self.metadados["tabelas"])
+
+    def linhas(self, tabela):
+        return self.metadados["tabelas"][tabela]["linhas"]
+
+    def colunas(self, tabela):
+        return [meta["nome"] for meta in self.metadados["tabelas"][tabela]["colunas"]]
+
+    def coluna(self, tabela, nome):
+        dados = self.metadados["tabelas"][tabela]
+        for meta in dados["colunas"]:
+            if meta["nome"] == nome: return ColunaSnapshot(self._buffer, meta, dados["linhas"])
+        raise KeyError(f"{tabela}.{nome}")
+
+    def iterar(self, tabela, colunas=None):
+        """Gera as linhas de `tabela` como tuplas (só das colunas pedidas, na ordem pedida)."""
+        selecionadas = [self.coluna(tabela, nome) for nome in (colunas or self.colunas(tabela))]
+        return zip(*selecionadas) if selecionadas else iter(())
+
+    def close(self):
+        # Views ainda em uso por quem leu colunas impedem fechar o mmap; nesse caso o GC o fecha depois
+        buffer = getattr(self, '_buffer', None)
+        mapa = getattr(self, '_mapa', None)
+        try:
+            if buffer is not None: buffer.release()
+            if mapa is not None: mapa.close()
+        except BufferError: pass
+        self._arquivo.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,247 @@
+import csv
+import json
+import os
+import time
+import uuid
+from itertools import islice
+import config
+import database
+import cache_referencia
+import rotacao
+from catalogo_sql import SQL
+from utils import registrar_erro
+from validacao import ErroValidacao, STATUS_VALIDOS, campo_texto, campo_numero, campo_data, validar_datas_plantio
+
+# Importa cx_Oracle do config
+cx_Oracle = config.cx_Oracle
+
+# --- Importação em Lote (JSON/CSV) ---
+# Formatos aceitos:
+#   * JSON com as seções "produtores", "talhoes", "plantios" e/ou "insumos" (listas de objetos);
+#   * JSON no formato antigo de produtores_talhoes.json ({id_produtor: {nome, ..., talhoes: {id: {...}}}});
+#   * CSV de uma única entidade (o tipo vem do nome do arquivo, ex: plantios_2025.csv, ou é informado).
+# As linhas são validadas em lotes (mesmas regras de data DD/MM/AAAA da interface), as chaves de
+# produtor/talhão são resolvidas com uma consulta por lote e a gravação usa executemany com batcherrors.
+
+ENTIDADES = ("produtores", "talhoes", "plantios", "insumos") # Ordem de gravação (respeita as chaves estrangeiras)
+
+SQL_INSERT = {entidade: SQL[nome] for entidade, nome in (
+    ("produtores", "produtor.inserir"), ("certificacao", "certificacao.inserir"), ("talhoes", "talhao.inserir"),
+    ("plantios", "plantio.inserir"), ("insumos", "insumo.inserir"), ("demandas", "demanda.inserir"))} # Mesmos textos das telas
+
+# --- Leitura dos Arquivos ---
+
+def entidade_pelo_nome(caminho):
+    nome = os.path.basename(caminho).lower()
+    for entidade in ENTIDADES:
+        if nome.startswith(entidade) or nome.startswith(entidade.rstrip('s')): return entidade
+    return None
+
+def _ler_csv(caminho):
+    """Gera dicts de um CSV (separador ',' ou ';', detectado), sem carregar o arquivo todo."""
+    with open(caminho, newline='', encoding='utf-8-sig') as f:
+        amostra = f.read(4096); f.seek(0)
+        try: dialeto = csv.Sniffer().sniff(amostra, delimiters=",;")
+        except csv.Error: dialeto = csv.excel
+        for linha in csv.DictReader(f, dialect=dialeto):
+            yield {chave.strip().lower(): valor for chave, valor in linha.items() if chave}
+
+def _converter_json_antigo(dados):
+    """Converte o formato de produtores_talhoes.json para as seções produtores/talhoes."""
+    produtores = []; talhoes = []
+    for id_produtor, dados_p in dados.items():
+        produtores.append({"id_produtor": id_produtor, **{k: v for k, v in dados_p.items() if k != "talhoes"}})
+        for id_talhao_produtor, dados_t in (dados_p.get("talhoes") or {}).items():
+            talhoes.append({"id_produtor": id_produtor, "id_talhao_produtor": id_talhao_produtor, **dados_t})
+    return {"produtores": produtores, "talhoes": talhoes}
+
+def ler_arquivo(caminho, entidade=None):
+    """Lê um arquivo de importação e retorna {entidade: iterável de dicts}."""
+    extensao = os.path.splitext(caminho)[1].lower()
+    if extensao == '.json':
+        with open(caminho, encoding='utf-8') as f: dados = json.load(f)
+        if not isinstance(dados, dict): raise ValueError("O JSON deve ser um objeto (seções ou formato produtores_talhoes).")
+        if dados and not set(dados) & set(ENTIDADES): return _converter_json_antigo(dados)
+        return {e: dados.get(e) or [] for e in ENTIDADES}
+    if extensao == '.csv':
+        entidade = entidade or entidade_pelo_nome(caminho)
+        if entidade not in ENTIDADES: raise ValueError(f"Tipo do CSV não identificado; informe um de: {', '.join(ENTIDADES)}.")
+        return {entidade: _ler_csv(caminho)}
+    raise ValueError("Formato não suportado (use .json ou .csv).")
+
+# --- Validação das Linhas (campos: ver validacao.py) ---
+
+def _validar_produtor(linha):
+    certificado = campo_numero(linha, "certificado") or 0
+    return (campo_texto(linha, "id_produtor", tamanho_max=50), campo_texto(linha, "nome", tamanho_max=200),
+            campo_texto(linha, "localizacao", False, 200), campo_texto(linha, "contato", False, 100),
+            campo_texto(linha, "associacao", False, 100)), 1 if certificado else 0
+
+def _validar_talhao(linha):
+    tamanho_ha = campo_numero(linha, "tamanho_ha", obrigatorio=True)
+    if tamanho_ha <= 0: raise ErroValidacao("campo 'tamanho_ha' deve ser positivo")
+    return [campo_texto(linha, "id_talhao_unico", False, 40) or str(uuid.uuid4()), campo_texto(linha, "id_produtor", tamanho_max=50),
+            campo_texto(linha, "id_talhao_produtor", tamanho_max=50), tamanho_ha, campo_texto(linha, "tipo_solo", False, 100)]
+
+def _validar_plantio(linha):
+    data_plantio = campo_data(linha, "data_plantio", obrigatorio=True)
+    data_prevista = campo_data(linha, "data_prevista_colheita", obrigatorio=True)
+    data_real = campo_data(linha, "data_colheita_real")
+    validar_datas_plantio(data_plantio, data_prevista, data_real)
+    status = campo_texto(linha, "status", False) or ('Disponível' if data_real else 'Planejado')
+    if status not in STATUS_VALIDOS: raise ErroValidacao(f"status inválido: {status!r}")
+    return [campo_texto(linha, "id_plantio", False, 40) or str(uuid.uuid4()), campo_texto(linha, "id_produtor", tamanho_max=50), None,
+            campo_texto(linha, "cultura", tamanho_max=100), data_plantio, data_prevista, data_real,
+            campo_numero(linha, "quantidade_colhida"), campo_texto(linha, "unidade_medida", False, 20), status,
+            campo_texto(linha, "observacoes", False), campo_texto(linha, "cultura_anterior", False, 100)]
+
+def _validar_insumo(linha):
+    return [campo_texto(linha, "id_registro", False, 40) or str(uuid.uuid4()), campo_texto(linha, "id_produtor", tamanho_max=50), None,
+            campo_data(linha, "data_aplicacao", obrigatorio=True), campo_texto(linha, "tipo_insumo", tamanho_max=100),
+            campo_texto(linha, "quantidade", False, 50), campo_texto(linha, "observacoes", False)]
+
+def _validar_demanda(linha):
+    quantidade = campo_numero(linha, "quantidade", obrigatorio=True)
+    if quantidade <= 0: raise ErroValidacao("campo 'quantidade' deve ser positivo")
+    return [campo_texto(linha, "id_demanda", False, 40) or str(uuid.uuid4()), campo_texto(linha, "cultura", tamanho_max=100),
+            quantidade, campo_texto(linha, "unidade_medida", tamanho_max=20), campo_data(linha, "data_necessidade", obrigatorio=True),
+            campo_texto(linha, "observacoes", False)]
+
+# Linha (dict) -> registro na ordem de SQL_INSERT; talhão de plantios/insumos fica None até ser resolvido
+VALIDADORES = {"produtores": _validar_produtor, "talhoes": _validar_talhao, "plantios": _validar_plantio,
+               "insumos": _validar_insumo, "demandas": _validar_demanda}
+
+# --- Gravação ---
+
+class _Resumo:
+    """Contadores e erros por entidade (número da linha = posição no arquivo/seção, a partir de 1)."""
+    def __init__(self):
+        self.por_entidade = {e: {"lidas": 0, "inseridas": 0, "ignoradas": 0, "erros": []} for e in ENTIDADES}
+    def erro(self, entidade, numero, mensagem):
+        self.por_entidade[entidade]["erros"].append((numero, mensagem))
+
+def _em_lotes_numerados(linhas, tamanho):
+    iterador = enumerate(linhas, start=1)
+    while True:
+        lote = list(islice(iterador, tamanho))
+        if not lote: return
+        yield lote
+
+def _gravar(conexao, entidade, registros, resumo, extras=None):
+    """executemany com batcherrors; linhas rejeitadas pelo Oracle vão para o resumo. Retorna os números gravados."""
+    if not registros: return []
+    cursor = None
+    try:
+        cursor = conexao.cursor()
+        cursor.executemany(SQL_INSERT[entidade], [r for _, r in registros], batcherrors=True)
+        rejeitadas = {}
+        for erro in cursor.getbatcherrors(): rejeitadas[erro.offset] = erro.message
+        for offset, mensagem in rejeitadas.items(): resumo.erro(entidade, registros[offset][0], f"Oracle: {mensagem}")
+        gravadas = [registros[i] for i in range(len(registros)) if i not in rejeitadas]
+        if extras and gravadas: # Ex: certificação inicial dos produtores gravados, na mesma transação
+            sql_extra, montar = extras
+            cursor.executemany(sql_extra, [montar(r) for r in gravadas])
+        conexao.commit()
+        resumo.por_entidade[entidade]["inseridas"] += len(gravadas)
+        return [numero for numero, _ in gravadas]
+    except cx_Oracle.DatabaseError as e:
+        registrar_erro(f"Erro Oracle ao gravar lote de {entidade}: {e}"); conexao.rollback()
+        for numero, _ in registros: resumo.erro(entidade, numero, f"lote desfeito: {e}")
+        return []
+    finally:
+        if cursor: cursor.close()
+
+def _importar_produtores(conexao, linhas, resumo, tamanho_lote):
+    vistos = set()
+    for lote in _em_lotes_numerados(linhas, tamanho_lote):
+        validos = []
+        for numero, linha in lote:
+            try: validos.append((numero, _validar_produtor(linha)))
+            except ErroValidacao as e: resumo.erro("produtores", numero, str(e))
+        resumo.por_entidade["produtores"]["lidas"] += len(lote)
+        existentes = database.carregar_produtores_talhoes(conexao, {"ids": {r[0][0] for _, r in validos}})
+        registros = []; certificado = {}
+        for numero, (registro, cert) in validos:
+            if registro[0] in existentes or registro[0] in vistos:
+                resumo.por_entidade["produtores"]["ignoradas"] += 1; continue # Produtor já cadastrado
+            vistos.add(registro[0]); certificado[registro[0]] = cert
+            registros.append((numero, registro))
+        _gravar(conexao, "produtores", registros, resumo,
+                extras=(SQL_INSERT["certificacao"], lambda r: (r[1][0], certificado[r[1][0]], 0, 0, 0)))
+
+def _importar_talhoes(conexao, linhas, resumo, tamanho_lote):
+    vistos = set()
+    for lote in _em_lotes_numerados(linhas, tamanho_lote):
+        validos = []
+        for numero, linha in lote:
+            try: validos.append((numero, _validar_talhao(linha)))
+            except ErroValidacao as e: resumo.erro("talhoes", numero, str(e))
+        resumo.por_entidade["talhoes"]["lidas"] += len(lote)
+        produtores = database.carregar_produtores_talhoes(conexao, {"ids": {r[1] for _, r in validos}})
+        registros = []
+        for numero, registro in validos:
+            id_produtor, id_talhao_produtor = registro[1], registro[2]
+            if id_produtor not in produtores: resumo.erro("talhoes", numero, f"produtor '{id_produtor}' não cadastrado"); continue
+            if id_talhao_produtor in produtores[id_produtor].talhoes or (id_produtor, id_talhao_produtor) in vistos:
+                resumo.por_entidade["talhoes"]["ignoradas"] += 1; continue
+            vistos.add((id_produtor, id_talhao_produtor))
+            registros.append((numero, registro))
+        _gravar(conexao, "talhoes", registros, resumo)
+
+def _importar_com_talhao(conexao, entidade, validar, linhas, resumo, tamanho_lote):
+    """Plantios e insumos: resolve o talhão (id_talhao_unico ou id_talhao_produtor do produtor) e grava.
+    Plantio sem cultura_anterior recebe a cultura do último plantio do talhão, como nas telas: a do índice de
+    rotação ou, se o talhão aparece antes no arquivo, a da linha anterior."""
+    ultimas = {} # id_talhao_unico -> cultura do último plantio (índice de rotação, depois as linhas já lidas)
+    def cultura_anterior(id_talhao_unico):
+        if id_talhao_unico not in ultimas:
+            try: ultimas[id_talhao_unico] = rotacao.obter_indice(conexao).cultura_anterior(id_talhao_unico)
+            except cx_Oracle.DatabaseError: ultimas[id_talhao_unico] = None # Erro já registrado; fica sem cultura anterior
+        return ultimas[id_talhao_unico]
+    for lote in _em_lotes_numerados(linhas, tamanho_lote):
+        validos = []
+        for numero, linha in lote:
+            try: validos.append((numero, validar(linha), linha))
+            except ErroValidacao as e: resumo.erro(entidade, numero, str(e))
+        resumo.por_entidade[entidade]["lidas"] += len(lote)
+        produtores = database.carregar_produtores_talhoes(conexao, {"ids": {r[1] for _, r, _ in validos}})
+        registros = []
+        for numero, registro, linha in validos:
+            produtor = produtores.get(registro[1])
+            if produtor is None: resumo.erro(entidade, numero, f"produtor '{registro[1]}' não cadastrado"); continue
+            id_talhao_unico = str(linha.get("id_talhao_unico") or '').strip()
+            if id_talhao_unico:
+                if not any(t.id_talhao_unico == id_talhao_unico for t in produtor.talhoes.values()):
+                    resumo.erro(entidade, numero, f"talhão '{id_talhao_unico}' não pertence ao produtor"); continue
+            else:
+                talhao = produtor.talhoes.get(str(linha.get("id_talhao_produtor") or '').strip())
+                if talhao is None: resumo.erro(entidade, numero, "talhão não encontrado (informe id_talhao_produtor ou id_talhao_unico)"); continue
+                id_talhao_unico = talhao.id_talhao_unico
+            registro[2] = id_talhao_unico
+            if entidade == "plantios":
+                if registro[11] is None: registro[11] = cultura_anterior(id_talhao_unico)
+                ultimas[id_talhao_unico] = registro[3]
+            registros.append((numero, registro))
+        _gravar(conexao, entidade, registros, resumo)
+
+def importar_arquivo(conexao, caminho, entidade=None, tamanho_lote=None):
+    """Importa um arquivo JSON/CSV. Retorna {"entidades": {entidade: {lidas, inseridas, ignoradas, erros}}, "duracao_s"}
+    ou None."""
+    if not conexao: registrar_erro("Conexão Oracle inválida."); return None
+    tamanho_lote = tamanho_lote or config.IMPORTACAO_TAMANHO_LOTE
+    try: secoes = ler_arquivo(caminho, entidade)
+    except (OSError, ValueError) as e: registrar_erro(f"Erro ao ler arquivo de importação '{caminho}': {e}"); return None
+
+    resumo = _Resumo(); inicio = time.perf_counter()
+    try:
+        if "produtores" in secoes: _importar_produtores(conexao, secoes["produtores"], resumo, tamanho_lote)
+        if "talhoes" in secoes: _importar_talhoes(conexao, secoes["talhoes"], resumo, tamanho_lote)
+        if "plantios" in secoes: _importar_com_talhao(conexao, "plantios", _validar_plantio, secoes["plantios"], resumo, tamanho_lote)
+        if "insumos" in secoes: _importar_com_talhao(conexao, "insumos", _validar_insumo, secoes["insumos"], resumo, tamanho_lote)
+    except (OSError, csv.Error, UnicodeDecodeError) as e:
+        registrar_erro(f"Erro ao ler arquivo de importação '{caminho}': {e}")
+    finally:
+        cache_referencia.invalidar("produtores"); cache_referencia.invalidar("certificacao")
+        cache_referencia.invalidar("culturas"); cache_referencia.invalidar("calendario"); rotacao.invalidar()
+    for dados in resumo.por_entidade.values(): dados["erros"].sort()
+    return {"entidades": resumo.por_entidade, "duracao_s": time.perf_counter() - inicio}
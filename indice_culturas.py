@@ -0,0 +1,150 @@
+import threading
+import unicodedata
+from collections import Counter
+import config
+import cache_referencia
+from utils import registrar_erro
+
+# Importa cx_Oracle do config
+cx_Oracle = config.cx_Oracle
+
+# --- Índice de Culturas ---
+# Cultura é texto livre em plantios e demandas, então "Mandioca", "mandioca " e "Mandióca" precisam
+# virar o mesmo produto. O índice guarda, em memória:
+#   * chave normalizada (sem acento, sem maiúsculas, espaços/hífens unificados) -> nome canônico;
+#   * apelidos regionais da tabela abaixo (ex: aipim -> Mandioca);
+#   * trigramas de cada chave, para sugerir o nome certo quando o usuário digita com erro.
+# Agrupamentos usam só a equivalência exata/apelido; a busca aproximada fica para o que o usuário digita.
+# Um nome novo só vira canônico se não for parecido com nenhum conhecido: "Tomatte" fica sem nome canônico,
+# para que resolver() continue sugerindo "Tomate" em vez de aceitar o erro de digitação para sempre. Cultura nova de verdade com nome parecido (ex: Pimenta x Pimentão) entra em CULTURAS_CANONICAS.
+
+CULTURAS_CANONICAS = {
+    "Mandioca": ("aipim", "macaxeira"), "Abóbora": ("jerimum",), "Milho": (), "Feijão": (), "Soja": (),
+    "Arroz": (), "Trigo": (), "Café": (), "Alface": (), "Rúcula": (), "Couve": (), "Repolho": (),
+    "Tomate": (), "Cenoura": (), "Beterraba": (), "Batata": ("batata inglesa",), "Batata-doce": (),
+    "Cebola": (), "Alho": (), "Pimentão": (), "Abobrinha": (), "Pepino": (), "Brócolis": ("brocolis ninja",),
+    "Banana": (), "Laranja": (), "Morango": (), "Mamão": ("papaia",), "Maracujá": (), "Inhame": ("cara",),
+}
+
+def normalizar(nome):
+    """Chave de comparação: 'Batata-Doce ' e 'batata doce' dão 'batata doce'."""
+    sem_acento = unicodedata.normalize('NFKD', nome or '').encode('ascii', 'ignore').decode('ascii')
+    return " ".join(sem_acento.casefold().replace('-', ' ').replace('_', ' ').split())
+
+def _trigramas(chave):
+    texto = f"  {chave} "
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+class IndiceCulturas:
+    """Resolve nomes de cultura digitados para o nome canônico. Compartilhado pelas threads (servidor HTTP, cargas
+    em paralelo) pelo cache: inclusões e leituras dos conjuntos internos passam pela mesma trava."""
+
+    def __init__(self, nomes_observados=()):
+        self._trava = threading.Lock()
+        self._canonica = {} # chave normalizada (nome ou apelido) -> nome canônico
+        self._variantes = {} # nome canônico -> grafias encontradas no banco
+        self._trigramas = {} # trigrama -> chaves normalizadas que o contêm
+        self._tamanho = {} # chave normalizada -> quantidade de trigramas
+        for canonica, apelidos in CULTURAS_CANONICAS.items():
+            self._adicionar_chave(normalizar(canonica), canonica)
+            for apelido in apelidos: self._adicionar_chave(normalizar(apelido), canonica)
+        for nome in nomes_observados: self.registrar(nome)
+
+    def _adicionar_chave(self, chave, canonica):
+        if chave in self._canonica: return
+        self._canonica[chave] = canonica
+        trigramas = _trigramas(chave)
+        self._tamanho[chave] = len(trigramas)
+        for trigrama in trigramas: self._trigramas.setdefault(trigrama, set()).add(chave)
+
+    def registrar(self, nome):
+        """Inclui uma grafia vista no banco e retorna o nome canônico. Nomes novos viram canônicos, exceto os
+        parecidos com um já conhecido (similaridade >= config.CULTURA_SIMILARIDADE_MINIMA): esses retornam None."""
+        chave = normalizar(nome)
+        if not chave: return None
+        with self._trava:
+            canonica = self._canonica.get(chave)
+            if canonica is None:
+                notas = self._notas(_trigramas(chave))
+                if notas and max(notas.values()) >= config.CULTURA_SIMILARIDADE_MINIMA: return None
+                canonica = " ".join(nome.split())
+                self._adicionar_chave(chave, canonica)
+            self._variantes.setdefault(canonica, set()).add(nome)
+        return canonica
+
+    def canonica(self, nome):
+        """Nome canônico por equivalência exata (acento/maiúsculas/apelido) ou None."""
+        return self._canonica.get(normalizar(nome))
+
+    def chave(self, nome):
+        """Chave de agrupamento: a do nome canônico, ou a do próprio nome se desconhecido."""
+        canonica = self.canonica(nome)
+        return normalizar(canonica if canonica else nome)
+
+    def sugerir(self, nome, limite=5):
+        """Culturas mais parecidas com `nome` (similaridade de Dice sobre trigramas): [(canônica, 0..1)]."""
+        chave = normalizar(nome)
+        if not chave: return []
+        with self._trava: melhores = self._notas(_trigramas(chave))
+        return sorted(melhores.items(), key=lambda item: (-item[1], item[0]))[:limite]
+
+    def _notas(self, trigramas):
+        """Maior similaridade de cada nome canônico com os trigramas dados (chamar com a trava)."""
+        comuns = Counter(); melhores = {}
+        for trigrama in trigramas:
+            for candidata in self._trigramas.get(trigrama, ()): comuns[candidata] += 1
+        for candidata, n in comuns.items():
+            nota = 2.0 * n / (len(trigramas) + self._tamanho[candidata])
+            canonica = self._canonica[candidata]
+            if nota > melhores.get(canonica, 0): melhores[canonica] = nota
+        return melhores
+
+    def resolver(self, nome, similaridade_minima=None):
+        """Nome canônico de `nome`: exato/apelido primeiro, depois o mais parecido acima do limiar. None se nada servir."""
+        canonica = self.canonica(nome)
+        if canonica: return canonica
+        similaridade_minima = config.CULTURA_SIMILARIDADE_MINIMA if similaridade_minima is None else similaridade_minima
+        sugestoes = self.sugerir(nome, limite=1)
+        return sugestoes[0][0] if sugestoes and sugestoes[0][1] >= similaridade_minima else None
+
+    def variantes(self, canonica):
+        """Grafias gravadas no banco que correspondem ao nome canônico (inclui o próprio nome)."""
+        with self._trava: return sorted(self._variantes.get(canonica, set()) | {canonica})
+
+
+CHAVE_CACHE = ("culturas", ())
+
+def carregar_indice(conexao, estrito=False):
+    """Índice com as culturas já usadas em plantios e demandas (guardado no cache de referência).
+    Sem conexão ou com erro no banco, retorna só as culturas canônicas e não guarda nada; com `estrito`, o erro
+    do banco é relançado (cargas paralelas: a falha cancela as outras leituras)."""
+    achou, indice = cache_referencia.cache.obter(CHAVE_CACHE)
+    if achou: return indice
+    if not conexao: return IndiceCulturas() # Só as canônicas, sem guardar: a próxima chamada com conexão carrega
+    cursor = None
+    try:
+        cursor = conexao.cursor()
+        cursor.execute("""SELECT cultura FROM PLANTIOS_PRODUTOS UNION SELECT cultura_anterior FROM PLANTIOS_PRODUTOS
+                          WHERE cultura_anterior IS NOT NULL UNION SELECT cultura FROM DEMANDAS""")
+        nomes = [row[0] for row in cursor.fetchall()]
+    except cx_Oracle.DatabaseError as e:
+        registrar_erro(f"Erro Oracle ao carregar culturas: {e}", erro=e, operacao="carregar_indice")
+        if estrito: raise
+        return IndiceCulturas() # Idem: um erro passageiro não fixa o índice incompleto até o fim do TTL
+    finally:
+        if cursor: cursor.close()
+    indice = IndiceCulturas(nomes)
+    if not getattr(conexao, "em_transacao", False): cache_referencia.cache.guardar(CHAVE_CACHE, indice) # Só o que já foi confirmado
+    return indice
+
+def registrar_uso(nome):
+    """Inclui no índice em cache uma cultura recém-gravada (sem recarregar tudo do banco)."""
+    achou, indice = cache_referencia.cache.obter(CHAVE_CACHE)
+    if achou: indice.registrar(nome)
+
+def mesma_cultura(conexao, nome_a, nome_b):
+    """Compara duas culturas pela forma canônica (usado no aviso de rotação)."""
+    if not nome_a or not nome_b: return False
+    indice = carregar_indice(conexao)
+    return indice.chave(nome_a) == indice.chave(nome_b)
@@ -0,0 +1,96 @@
+import config
+from utils import registrar_erro
+import migracoes
+
+# Importa cx_Oracle do config
+cx_Oracle = config.cx_Oracle
+
+# --- Índices Gerenciados ---
+# Conjunto de índices que a aplicação espera encontrar, com a consulta que justifica cada um.
+# A criação inicial é feita pela migração 2 (migracoes.py); aqui ficam a verificação e o reparo.
+# Chaves estrangeiras sem índice próprio: TALHOES.id_produtor já é coberta por uk_produtor_talhao
+# (coluna líder) e STATUS_CERTIFICACAO.id_produtor é a própria chave primária.
+INDICES_GERENCIADOS = [
+    ("IX_PLANTIOS_PRODUTOR_STATUS", "PLANTIOS_PRODUTOS", ("ID_PRODUTOR", "STATUS"),
+     "selecionar_plantio (produtor + status); FK id_produtor no ON DELETE CASCADE"),
+    ("IX_PLANTIOS_TALHAO_DATA", "PLANTIOS_PRODUTOS", ("ID_TALHAO_UNICO", "DATA_PLANTIO"),
+     "obter_cultura_anterior / histórico de rotação (ORDER BY data_plantio DESC); FK id_talhao_unico"),
+    ("IX_PLANTIOS_STATUS_COLHEITA", "PLANTIOS_PRODUTOS", ("STATUS", "DATA_PREVISTA_COLHEITA"),
+     "mercado e calendário de colheitas (filtro por status)"),
+    ("IX_INSUMOS_TALHAO_DATA", "REGISTROS_INSUMOS", ("ID_TALHAO_UNICO", "DATA_APLICACAO"),
+     "rastreabilidade (insumos do talhão até a colheita); FK id_talhao_unico"),
+    ("IX_INSUMOS_PRODUTOR_DATA", "REGISTROS_INSUMOS", ("ID_PRODUTOR", "DATA_APLICACAO"),
+     "selecionar_insumo (ORDER BY data_aplicacao DESC); FK id_produtor"),
+    ("IX_DEMANDAS_NECESSIDADE", "DEMANDAS", ("DATA_NECESSIDADE",),
+     "listagem de demandas e selecionar_demanda (ORDER BY data_necessidade)"),
+    ("IX_PRODUTORES_NOME", "PRODUTORES", ("NOME", "ID_PRODUTOR"),
+     "selecionar_produtor (páginas por nome)"),
+]
+
+def _ler_indices_existentes(cursor):
+    """Lê do dicionário de dados os índices das tabelas gerenciadas: {nome: (tabela, (colunas...))}."""
+    tabelas = sorted({tabela for _, tabela, _, _ in INDICES_GERENCIADOS})
+    binds = {f"t{i}": t for i, t in enumerate(tabelas)}
+    cursor.execute(f"""SELECT index_name, table_name, column_name FROM user_ind_columns
+                       WHERE table_name IN ({', '.join(':' + b for b in binds)})
+                       ORDER BY index_name, column_position""", binds)
+    existentes = {}
+    for nome, tabela, coluna in cursor.fetchall():
+        tabela_atual, colunas = existentes.get(nome, (tabela, ()))
+        existentes[nome] = (tabela_atual, colunas + (coluna,))
+    return existentes
+
+def _ler_indices_nao_usados(cursor):
+    """Índices monitorados (MONITORING USAGE) que o Oracle ainda não viu serem usados."""
+    cursor.execute("SELECT index_name FROM user_object_usage WHERE monitoring = 'YES' AND used = 'NO'")
+    return {row[0] for row in cursor.fetchall()}
+
+def verificar_indices(conexao):
+    """Compara os índices gerenciados com os do banco.
+
+    Retorna um dict com as listas: "ok", "faltando", "divergentes" (mesmo nome, outras colunas),
+    "cobertos" (faltam com esse nome, mas outro índice tem as mesmas colunas) e "nao_usados".
+    Retorna None em caso de erro.
+    """
+    if not conexao: registrar_erro("Conexão Oracle inválida."); return None
+    resultado = {"ok": [], "faltando": [], "divergentes": [], "cobertos": [], "nao_usados": []}
+    cursor = None
+    try:
+        cursor = conexao.cursor()
+        existentes = _ler_indices_existentes(cursor)
+        por_colunas = {(tabela, colunas): nome for nome, (tabela, colunas) in existentes.items()}
+        for nome, tabela, colunas, motivo in INDICES_GERENCIADOS:
+            if nome in existentes:
+                if existentes[nome] == (tabela, colunas): resultado["ok"].append(nome)
+                else: resultado["divergentes"].append((nome, existentes[nome][1], colunas))
+            elif (tabela, colunas) in por_colunas:
+                resultado["cobertos"].append((nome, por_colunas[(tabela, colunas)]))
+            else:
+                resultado["faltando"].append((nome, tabela, colunas, motivo))
+        try:
+            nao_usados = _ler_indices_nao_usados(cursor)
+            resultado["nao_usados"] = [nome for nome, _, _, _ in INDICES_GERENCIADOS if nome in nao_usados]
+        except cx_Oracle.DatabaseError as e:
+            registrar_erro(f"Não foi possível consultar o uso dos índices (USER_OBJECT_USAGE): {e}")
+        return resultado
+    except cx_Oracle.DatabaseError as e: registrar_erro(f"Erro Oracle ao verificar índices: {e}", erro=e, operacao="verificar_indices"); return None
+    finally:
+        if cursor: cursor.close()
+
+def criar_indices_faltando(conexao, nomes):
+    """Cria (com monitoramento de uso) os índices gerenciados indicados. Retorna quantos foram criados."""
+    if not conexao: registrar_erro("Conexão Oracle inválida."); return 0
+    criados = 0
+    cursor = None
+    try:
+        cursor = conexao.cursor()
+        for nome, tabela, colunas, _ in INDICES_GERENCIADOS:
+            if nome not in nomes: continue
+            if migracoes.executar_ddl_idempotente(cursor, f"CREATE INDEX {nome} ON {tabela} ({', '.join(colunas)})"):
+                cursor.execute(f"ALTER INDEX {nome} MONITORING USAGE")
+                criados += 1
+        conexao.commit() # DDL já é confirmado pelo Oracle; o commit só encerra a operação na sessão
+        return criados
+    except cx_Oracle.DatabaseError as e: registrar_erro(f"Erro Oracle ao criar índices: {e}", erro=e, operacao="criar_indices_faltando"); conexao.rollback(); return criados
+    finally:
+        if cursor: cursor.close()
@@ -0,0 +1,110 @@
+import re
+import time
+import logging
+import threading
+from collections import deque
+from functools import lru_cache
+import config
+import log_estruturado
+
+# --- Instrumentação de Consultas ---
+# O CursorPool (pool_conexoes) mede cada execute/executemany e conta as linhas lidas, agrupando por
+# "impressão digital" do SQL: espaços normalizados, literais trocados por '?' e listas IN de binds gerados
+# (ex: :f_ids_0, :f_ids_1, ...) reduzidas a um só marcador, para que a mesma consulta com filtros de
+# tamanhos diferentes caia na mesma linha. Latência = tempo do execute; o tempo gasto em fetch é somado à parte.
+# Consultas acima de CONSULTA_LENTA_MS vão para o log de consultas lentas com o formato dos binds (nunca os valores).
+
+AMOSTRAS_POR_CONSULTA = 1024 # Janela de latências usada nos percentis (as mais recentes)
+LENTAS_EM_MEMORIA = 50 # Últimas consultas lentas mostradas no menu de diagnóstico
+
+_RE_LITERAL_TEXTO = re.compile(r"'(?:[^']|'')*'")
+_RE_LITERAL_NUMERO = re.compile(r"(?<![\w:])\d+(?:\.\d+)?\b")
+_RE_LISTA_BINDS = re.compile(r":([A-Za-z]\w*?)_\d+(?:\s*,\s*:\1_\d+)*")
+_RE_ESPACOS = re.compile(r"\s+")
+
+@lru_cache(maxsize=1024)
+def impressao_digital(sql):
+    """Forma normalizada do SQL, usada como chave das estatísticas."""
+    texto = _RE_LITERAL_TEXTO.sub("?", sql)
+    texto = _RE_LITERAL_NUMERO.sub("?", texto)
+    texto = _RE_LISTA_BINDS.sub(r":\1_*", texto)
+    return _RE_ESPACOS.sub(" ", texto).strip()
+
+def formato_binds(parametros):
+    """Descreve os binds só pelos nomes/posições e tipos: {'f_status': 'str'} ou ['int', 'date']."""
+    if parametros is None: return None
+    if isinstance(parametros, dict): return {nome: type(valor).__name__ for nome, valor in parametros.items()}
+    if isinstance(parametros, (list, tuple)): return [type(valor).__name__ for valor in parametros]
+    return type(parametros).__name__
+
+
+class EstatisticaConsulta:
+    """Contadores de uma impressão digital de SQL."""
+    __slots__ = ("sql", "execucoes", "erros", "linhas", "tempo_total_s", "tempo_fetch_s", "lentas", "amostras")
+
+    def __init__(self, sql):
+        self.sql = sql
+        self.execucoes = 0; self.erros = 0; self.linhas = 0; self.lentas = 0
+        self.tempo_total_s = 0.0; self.tempo_fetch_s = 0.0
+        self.amostras = deque(maxlen=AMOSTRAS_POR_CONSULTA)
+
+    def percentis(self, *ps):
+        """Latências (ms) nos percentis pedidos, sobre as amostras mais recentes."""
+        ordenadas = sorted(self.amostras)
+        if not ordenadas: return tuple(0.0 for _ in ps)
+        return tuple(ordenadas[min(len(ordenadas) - 1, int(p / 100.0 * len(ordenadas)))] * 1000 for p in ps)
+
+    def resumo(self):
+        p50, p95, p99 = self.percentis(50, 95, 99)
+        return {"sql": self.sql, "execucoes": self.execucoes, "erros": self.erros, "linhas": self.linhas,
+                "tempo_total_ms": self.tempo_total_s * 1000, "tempo_fetch_ms": self.tempo_fetch_s * 1000,
+                "p50_ms": p50, "p95_ms": p95, "p99_ms": p99, "lentas": self.lentas}
+
+
+_trava = threading.Lock()
+_estatisticas = {} # impressão digital -> EstatisticaConsulta
+_lentas = deque(maxlen=LENTAS_EM_MEMORIA)
+
+def _estatistica(chave):
+    estatistica = _estatisticas.get(chave)
+    if estatistica is None: estatistica = _estatisticas.setdefault(chave, EstatisticaConsulta(chave))
+    return estatistica
+
+def registrar_execucao(sql, duracao_s, parametros=None, erro=None, lote=None):
+    """Conta uma execução de `sql` (chamado pelo CursorPool). Em executemany, `parametros` é a primeira linha e `lote`
+    a quantidade de linhas. Retorna a impressão digital, para associar as linhas lidas depois."""
+    chave = impressao_digital(sql)
+    with _trava:
+        estatistica = _estatistica(chave)
+        estatistica.execucoes += 1; estatistica.tempo_total_s += duracao_s; estatistica.amostras.append(duracao_s)
+        if erro is not None: estatistica.erros += 1
+        lenta = duracao_s * 1000 >= config.CONSULTA_LENTA_MS
+        if lenta: estatistica.lentas += 1
+    if lenta:
+        binds = formato_binds(parametros)
+        if lote: binds = {"linhas": lote, "formato": binds}
+        registro = {"sql": chave, "duracao_ms": round(duracao_s * 1000, 1), "binds": binds, "em": time.strftime("%H:%M:%S")}
+        with _trava: _lentas.append(registro)
+        log_estruturado.registrar(logging.WARNING, "Consulta lenta", erro=erro, operacao="consulta_lenta",
+                                  duracao_ms=registro["duracao_ms"], sql=chave, binds=binds, destino=log_estruturado.LOG_CONSULTAS)
+    return chave
+
+def registrar_leitura(chave, linhas, duracao_s):
+    """Soma linhas lidas (fetch) e o tempo gasto lendo à consulta `chave`."""
+    if chave is None: return
+    with _trava:
+        estatistica = _estatistica(chave)
+        estatistica.linhas += linhas; estatistica.tempo_fetch_s += duracao_s
+
+def resumo(ordenar_por="tempo_total_ms", limite=None):
+    """Estatísticas por consulta, da mais custosa para a menos custosa."""
+    with _trava: linhas = [estatistica.resumo() for estatistica in _estatisticas.values()]
+    linhas.sort(key=lambda linha: linha[ordenar_por], reverse=True)
+    return linhas[:limite] if limite else linhas
+
+def consultas_lentas():
+    """Últimas consultas lentas (mais recente primeiro)."""
+    with _trava: return list(reversed(_lentas))
+
+def zerar():
+    with _trava: _estatisticas.clear(); _lentas.clear()
@@ -0,0 +1,108 @@
+import os
+import json
+import queue
+import atexit
+import logging
+import datetime
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, TimedRotatingFileHandler
+import config
+
+# --- Log Estruturado ---
+# Quem registra só coloca o registro numa fila em memória; uma thread em segundo plano (QueueListener) é a
+# única que formata em JSON (uma linha por registro) e escreve no arquivo, com rotação por tamanho ou por
+# tempo. Assim uma rajada de erros (ex: queda da conexão) não vira uma rajada de open/close no caminho da operação.
+# Registros com destino LOG_CONSULTAS (consultas lentas, ver instrumentacao) vão para um arquivo próprio.
+
+CAMPOS_CONTEXTO = ("operacao", "tabela", "duracao_ms", "codigo_oracle", "sql", "binds")
+NOME_LOGGER = "agrorganica"
+LOG_CONSULTAS = "consultas"
+
+
+class FormatadorJson(logging.Formatter):
+    """Uma linha JSON por registro: horário, nível, mensagem, processo/thread e os campos de contexto presentes."""
+
+    def format(self, record):
+        dados = {"ts": datetime.datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+                 "nivel": record.levelname, "mensagem": record.getMessage(),
+                 "processo": record.process, "thread": record.threadName}
+        for campo in CAMPOS_CONTEXTO:
+            valor = getattr(record, campo, None)
+            if valor is not None: dados[campo] = valor
+        if record.exc_info: dados["excecao"] = self.formatException(record.exc_info)
+        return json.dumps(dados, ensure_ascii=False, default=str)
+
+
+class _HandlerFila(QueueHandler):
+    """Enfileira sem bloquear; com a fila cheia, descarta e conta (o log nunca trava a operação)."""
+
+    def __init__(self, fila):
+        super().__init__(fila)
+        self.descartados = 0
+
+    def enqueue(self, record):
+        try: self.queue.put_nowait(record)
+        except queue.Full: self.descartados += 1
+
+
+def _criar_handler_arquivo(arquivo, filtro):
+    if config.LOG_ROTACAO_QUANDO:
+        handler = TimedRotatingFileHandler(arquivo, when=config.LOG_ROTACAO_QUANDO,
+                                           backupCount=config.LOG_ARQUIVOS_ANTIGOS, encoding="utf-8", delay=True)
+    else:
+        handler = RotatingFileHandler(arquivo, maxBytes=config.LOG_TAMANHO_MAX_BYTES,
+                                      backupCount=config.LOG_ARQUIVOS_ANTIGOS, encoding="utf-8", delay=True)
+    handler.setFormatter(FormatadorJson())
+    handler.addFilter(filtro)
+    return handler
+
+_trava = threading.Lock()
+_estado = {"pid": None, "handler": None, "ouvinte": None}
+
+def _configurar():
+    """Monta fila + thread escritora uma vez por processo (processos filhos criados com fork montam a sua)."""
+    with _trava:
+        if _estado["pid"] == os.getpid(): return
+        logger = logging.getLogger(NOME_LOGGER)
+        logger.setLevel(getattr(logging, config.LOG_NIVEL.upper(), logging.INFO))
+        logger.propagate = False
+        if _estado["handler"] is not None: logger.removeHandler(_estado["handler"]) # Herdado do processo pai
+        fila = queue.Queue(maxsize=config.LOG_FILA_MAX)
+        handler = _HandlerFila(fila)
+        nome_consultas = f"{NOME_LOGGER}.{LOG_CONSULTAS}"
+        ouvinte = QueueListener(fila, _criar_handler_arquivo(config.ARQUIVO_LOG_ERROS, lambda r: r.name != nome_consultas),
+                                _criar_handler_arquivo(config.ARQUIVO_LOG_CONSULTAS_LENTAS, lambda r: r.name == nome_consultas))
+        ouvinte.start()
+        logger.addHandler(handler)
+        _estado.update(pid=os.getpid(), handler=handler, ouvinte=ouvinte)
+
+def encerrar():
+    """Esvazia a fila no arquivo e para a thread escritora (chamado também na saída do programa)."""
+    with _trava:
+        ouvinte = _estado["ouvinte"]
+        if ouvinte is None or _estado["pid"] != os.getpid(): return
+        ouvinte.stop()
+        for handler in ouvinte.handlers: handler.close()
+        logging.getLogger(NOME_LOGGER).removeHandler(_estado["handler"])
+        _estado.update(pid=None, handler=None, ouvinte=None)
+
+atexit.register(encerrar)
+
+def codigo_oracle(erro):
+    """Código numérico de um cx_Oracle.DatabaseError (ex: 942 para ORA-00942), ou None."""
+    detalhe = erro.args[0] if erro is not None and getattr(erro, "args", None) else None
+    return getattr(detalhe, "code", None) or None
+
+def registrar(nivel, mensagem, erro=None, destino=None, **contexto):
+    """Enfileira um registro; `contexto` aceita os CAMPOS_CONTEXTO, e `erro` preenche codigo_oracle.
+    `destino` (ex: LOG_CONSULTAS) separa o registro num arquivo próprio."""
+    if _estado["pid"] != os.getpid(): _configurar()
+    logger = logging.getLogger(f"{NOME_LOGGER}.{destino}" if destino else NOME_LOGGER)
+    if not logger.isEnabledFor(nivel): return
+    if erro is not None and "codigo_oracle" not in contexto: contexto["codigo_oracle"] = codigo_oracle(erro)
+    logger.log(nivel, mensagem, extra={campo: contexto.get(campo) for campo in CAMPOS_CONTEXTO})
+
+def descartados():
+    """Registros perdidos por fila cheia desde o início do processo."""
+    handler = _estado["handler"]
+    return handler.descartados if handler is not None else 0
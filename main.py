@@ -1,5 +1,6 @@
 import sys 
 import config 
+import driver_banco
 import database 
 import ui 
 import reports 
@@ -7,8 +8,8 @@ from utils import registrar_erro
 
 def main_loop():
     """Função principal que executa o loop do menu."""
-    if config.cx_Oracle is None:
-        print("\nERRO CRÍTICO: Biblioteca cx_Oracle não encontrada."); sys.exit(1)
+    if not driver_banco.disponivel():
+        print(f"\nERRO CRÍTICO: nenhum driver de banco disponível (AGRO_DRIVER={config.BANCO_DRIVER})."); sys.exit(1)
 
     conexao_bd = database.conectar_banco()
     if not conexao_bd:
@@ -25,6 +26,8 @@ def main_loop():
             elif opcao == '5': ui.menu_gestao_demandas(conexao_bd) 
             elif opcao == '6': reports.buscar_produtos_mercado(conexao_bd) 
             elif opcao == '7': ui.menu_consultas_relatorios(conexao_bd) 
+            elif opcao == '8': ui.menu_importacao_exportacao(conexao_bd)
+            elif opcao == '9': ui.menu_diagnostico(conexao_bd)
             elif opcao == '0': print("Saindo..."); break
             else:
                 print("Opção inválida.")
@@ -41,4 +44,4 @@ def main_loop():
 if __name__ == "__main__":
     print("Iniciando Agrorgânica Soluções Sustentáveis...") 
     main_loop()
-    print("Aplicação encerrada.")
\ No newline at end of file
+    print("Aplicação encerrada.")
@@ -0,0 +1,171 @@
+import config
+from utils import registrar_erro
+
+# Importa cx_Oracle do config
+cx_Oracle = config.cx_Oracle
+
+# --- Migrações de Esquema Versionadas ---
+# A tabela SCHEMA_VERSAO guarda uma linha por migração aplicada. Na conexão só se lê MAX(versao);
+# se não houver migração nova, nada mais é executado. Para evoluir o esquema, acrescente uma entrada
+# ao final de MIGRACOES com o próximo número (nunca altere uma migração já publicada).
+# Como DDL no Oracle faz commit implícito, cada passo deve tolerar ser reexecutado após uma falha.
+
+DDL_SCHEMA_VERSAO = """
+    CREATE TABLE SCHEMA_VERSAO (
+        versao NUMBER(6) PRIMARY KEY,
+        descricao VARCHAR2(200) NOT NULL,
+        aplicada_em DATE DEFAULT SYSDATE )
+"""
+
+# Erros de DDL que significam "já foi feito": ORA-00955 (nome já usado), ORA-01408 (colunas já indexadas),
+# ORA-01430 (coluna já existe), ORA-02260/02261/02275 (chave/constraint já existe)
+CODIGOS_DDL_JA_APLICADO = {955, 1408, 1430, 2260, 2261, 2275}
+CODIGO_TABELA_INEXISTENTE = 942
+
+def _codigo_erro(erro):
+    detalhe = erro.args[0] if erro.args else None
+    return getattr(detalhe, 'code', None)
+
+def executar_ddl_idempotente(cursor, ddl):
+    """Executa um DDL ignorando o erro de 'objeto já existe'. Retorna True se algo foi criado."""
+    try:
+        cursor.execute(ddl); return True
+    except cx_Oracle.DatabaseError as e:
+        if _codigo_erro(e) in CODIGOS_DDL_JA_APLICADO: return False
+        raise
+
+TABELAS_BASE = {
+    "PRODUTORES": """
+        CREATE TABLE PRODUTORES (
+            id_produtor VARCHAR2(50) PRIMARY KEY, nome VARCHAR2(200) NOT NULL,
+            localizacao VARCHAR2(200), contato VARCHAR2(100), associacao VARCHAR2(100) )
+    """,
+    "TALHOES": """
+        CREATE TABLE TALHOES (
+            id_talhao_unico VARCHAR2(40) PRIMARY KEY,
+            id_produtor VARCHAR2(50) NOT NULL REFERENCES PRODUTORES(id_produtor) ON DELETE CASCADE,
+            id_talhao_produtor VARCHAR2(50) NOT NULL, tamanho_ha NUMBER, tipo_solo VARCHAR2(100),
+            CONSTRAINT uk_produtor_talhao UNIQUE (id_produtor, id_talhao_produtor) )
+    """,
+    "PLANTIOS_PRODUTOS": """
+        CREATE TABLE PLANTIOS_PRODUTOS (
+            id_plantio VARCHAR2(40) PRIMARY KEY,
+            id_produtor VARCHAR2(50) NOT NULL REFERENCES PRODUTORES(id_produtor) ON DELETE CASCADE,
+            id_talhao_unico VARCHAR2(40) NOT NULL REFERENCES TALHOES(id_talhao_unico) ON DELETE CASCADE,
+            cultura VARCHAR2(100) NOT NULL, data_plantio DATE, data_prevista_colheita DATE, data_colheita_real DATE,
+            quantidade_colhida NUMBER, unidade_medida VARCHAR2(20),
+            status VARCHAR2(20) CHECK (status IN ('Planejado', 'Disponível', 'Vendido', 'Cancelado')),
+            observacoes CLOB, cultura_anterior VARCHAR2(100) )
+    """,
+    "REGISTROS_INSUMOS": """
+        CREATE TABLE REGISTROS_INSUMOS (
+            id_registro VARCHAR2(40) PRIMARY KEY,
+            id_produtor VARCHAR2(50) NOT NULL REFERENCES PRODUTORES(id_produtor) ON DELETE CASCADE,
+            id_talhao_unico VARCHAR2(40) NOT NULL REFERENCES TALHOES(id_talhao_unico) ON DELETE CASCADE,
+            data_aplicacao DATE, tipo_insumo VARCHAR2(100), quantidade VARCHAR2(50), observacoes CLOB )
+    """,
+    "STATUS_CERTIFICACAO": """
+        CREATE TABLE STATUS_CERTIFICACAO (
+            id_produtor VARCHAR2(50) PRIMARY KEY REFERENCES PRODUTORES(id_produtor) ON DELETE CASCADE,
+            certificado NUMBER(1) DEFAULT 0 NOT NULL CHECK (certificado IN (0, 1)),
+            etapa_documentacao NUMBER(1) DEFAULT 0 NOT NULL CHECK (etapa_documentacao IN (0, 1)),
+            etapa_inspecao NUMBER(1) DEFAULT 0 NOT NULL CHECK (etapa_inspecao IN (0, 1)),
+            etapa_aprovacao NUMBER(1) DEFAULT 0 NOT NULL CHECK (etapa_aprovacao IN (0, 1)) )
+    """,
+    "DEMANDAS": """
+        CREATE TABLE DEMANDAS (
+            id_demanda VARCHAR2(40) PRIMARY KEY,
+            cultura VARCHAR2(100) NOT NULL,
+            quantidade NUMBER NOT NULL,
+            unidade_medida VARCHAR2(20) NOT NULL,
+            data_necessidade DATE NOT NULL,
+            observacoes CLOB,
+            registrado_em DATE DEFAULT SYSDATE
+        )
+    """
+}
+
+def _migracao_001_tabelas_base(cursor):
+    """Cria as tabelas originais da aplicação que ainda não existirem (bancos antigos já têm todas)."""
+    cursor.execute("SELECT table_name FROM user_tables")
+    tabelas_existentes = {row[0] for row in cursor.fetchall()}
+    for nome_tabela, sql_create in TABELAS_BASE.items():
+        if nome_tabela not in tabelas_existentes:
+            print(f"[DB INFO] Criando tabela {nome_tabela}...")
+            cursor.execute(sql_create)
+
+# Índices para os padrões de acesso reais (ver indices.INDICES_GERENCIADOS). MONITORING USAGE permite
+# que a verificação de índices aponte os que nunca foram usados.
+_MIGRACAO_002_INDICES = [
+    "CREATE INDEX IX_PLANTIOS_PRODUTOR_STATUS ON PLANTIOS_PRODUTOS (id_produtor, status)",
+    "CREATE INDEX IX_PLANTIOS_TALHAO_DATA ON PLANTIOS_PRODUTOS (id_talhao_unico, data_plantio)",
+    "CREATE INDEX IX_PLANTIOS_STATUS_COLHEITA ON PLANTIOS_PRODUTOS (status, data_prevista_colheita)",
+    "CREATE INDEX IX_INSUMOS_TALHAO_DATA ON REGISTROS_INSUMOS (id_talhao_unico, data_aplicacao)",
+    "CREATE INDEX IX_INSUMOS_PRODUTOR_DATA ON REGISTROS_INSUMOS (id_produtor, data_aplicacao)",
+    "CREATE INDEX IX_DEMANDAS_NECESSIDADE ON DEMANDAS (data_necessidade)",
+    "ALTER INDEX IX_PLANTIOS_PRODUTOR_STATUS MONITORING USAGE",
+    "ALTER INDEX IX_PLANTIOS_TALHAO_DATA MONITORING USAGE",
+    "ALTER INDEX IX_PLANTIOS_STATUS_COLHEITA MONITORING USAGE",
+    "ALTER INDEX IX_INSUMOS_TALHAO_DATA MONITORING USAGE",
+    "ALTER INDEX IX_INSUMOS_PRODUTOR_DATA MONITORING USAGE",
+    "ALTER INDEX IX_DEMANDAS_NECESSIDADE MONITORING USAGE",
+]
+
+# Seletor de produtores: páginas por nome (ORDER BY nome, id_produtor) sem ler a tabela inteira
+_MIGRACAO_003_INDICE_PRODUTORES_NOME = [
+    "CREATE INDEX IX_PRODUTORES_NOME ON PRODUTORES (nome, id_produtor)",
+    "ALTER INDEX IX_PRODUTORES_NOME MONITORING USAGE",
+]
+
+# Versões antigas da tela de plantio gravavam o aviso exibido no lugar da cultura anterior
+_MIGRACAO_004_CULTURA_ANTERIOR = [
+    "UPDATE PLANTIOS_PRODUTOS SET cultura_anterior = NULL WHERE cultura_anterior IN ('Nenhuma registrada', 'Erro de conexão')",
+]
+
+# (versão, descrição, passo) — o passo é uma função que recebe o cursor ou uma lista de comandos SQL
+MIGRACOES = [
+    (1, "Tabelas base (produtores, talhões, plantios, insumos, certificação, demandas)", _migracao_001_tabelas_base),
+    (2, "Índices de acesso (plantios, insumos, demandas) e chaves estrangeiras", _MIGRACAO_002_INDICES),
+    (3, "Índice de produtores por nome (seletor paginado)", _MIGRACAO_003_INDICE_PRODUTORES_NOME),
+    (4, "Cultura anterior: avisos gravados no lugar da cultura viram NULL", _MIGRACAO_004_CULTURA_ANTERIOR),
+]
+
+def obter_versao_atual(cursor):
+    """Lê a versão do esquema; cria SCHEMA_VERSAO (versão 0) se o banco ainda não a tiver."""
+    try:
+        cursor.execute("SELECT MAX(versao) FROM SCHEMA_VERSAO")
+        row = cursor.fetchone()
+        return (row[0] or 0) if row else 0
+    except cx_Oracle.DatabaseError as e:
+        if _codigo_erro(e) != CODIGO_TABELA_INEXISTENTE: raise
+        print("[DB INFO] Tabela SCHEMA_VERSAO não encontrada; iniciando controle de versão do esquema.")
+        executar_ddl_idempotente(cursor, DDL_SCHEMA_VERSAO)
+        return 0
+
+def aplicar_migracoes(conexao):
+    """Aplica, em ordem, as migrações com versão acima da atual. Retorna True se o esquema ficou atualizado."""
+    if not conexao:
+        registrar_erro("Tentativa de migrar o esquema sem conexão Oracle válida.")
+        return False
+
+    cursor = None; versao = None
+    try:
+        cursor = conexao.cursor()
+        versao = obter_versao_atual(cursor)
+        pendentes = [m for m in MIGRACOES if m[0] > versao]
+        if not pendentes: return True
+        for numero, descricao, passo in pendentes:
+            print(f"[DB INFO] Aplicando migração {numero}: {descricao}...")
+            if callable(passo): passo(cursor)
+            else:
+                for comando in passo: executar_ddl_idempotente(cursor, comando)
+            cursor.execute("INSERT INTO SCHEMA_VERSAO (versao, descricao) VALUES (:1, :2)", (numero, descricao))
+            conexao.commit(); versao = numero
+        print(f"[DB INFO] Esquema atualizado para a versão {versao}.")
+        return True
+    except cx_Oracle.DatabaseError as e:
+        registrar_erro(f"Erro Oracle ao aplicar migrações (versão atual: {versao}): {e}"); conexao.rollback(); return False
+    except Exception as e:
+        registrar_erro(f"Erro inesperado ao aplicar migrações: {e}"); conexao.rollback(); return False
+    finally:
+        if cursor: cursor.close()
@@ -0,0 +1,297 @@
+import time
+import threading
+from collections import OrderedDict
+import config
+import driver_banco
+import catalogo_sql
+import instrumentacao
+from utils import registrar_erro
+
+# Importa cx_Oracle do config
+cx_Oracle = config.cx_Oracle
+
+# --- Pool de Sessões Oracle ---
+# A aplicação continua recebendo um objeto "conexao" com cursor()/commit()/rollback()/close(),
+# mas cada operação empresta uma sessão do SessionPool e a devolve assim que fica ociosa.
+
+# Erros que indicam que a sessão foi derrubada pelo servidor/rede (ex: DPI-1080 ... ORA-3135)
+CODIGOS_SESSAO_PERDIDA = {28, 1012, 2396, 3113, 3114, 3135}
+MENSAGENS_SESSAO_PERDIDA = ("DPI-1080", "DPI-1010", "ORA-03113", "ORA-03114", "ORA-03135", "ORA-3135")
+
+def sessao_perdida(erro):
+    """Indica se um DatabaseError corresponde a uma sessão derrubada (e não a um erro de SQL)."""
+    detalhe = erro.args[0] if erro.args else None
+    if getattr(detalhe, 'code', None) in CODIGOS_SESSAO_PERDIDA: return True
+    texto = str(detalhe if detalhe is not None else erro)
+    return any(marca in texto for marca in MENSAGENS_SESSAO_PERDIDA)
+
+def _eh_leitura(sql):
+    """Só consultas (SELECT/WITH) são repetidas automaticamente após queda da sessão."""
+    partes = sql.lstrip().split(None, 1)
+    return bool(partes) and partes[0].upper() in ("SELECT", "WITH")
+
+class PoolConexoes:
+    """Envolve o pool de sessões do driver (ver driver_banco.criar_pool) e mantém métricas de checkout/espera."""
+
+    def __init__(self, usuario, senha, dsn, minimo=None, maximo=None, incremento=None):
+        self.tamanho_cache_sql = config.CACHE_SQL_TAMANHO or catalogo_sql.tamanho_cache_recomendado()
+        self._pool = driver_banco.criar_pool(
+            usuario, senha, dsn,
+            minimo if minimo is not None else config.POOL_MIN,
+            maximo if maximo is not None else config.POOL_MAX,
+            incremento if incremento is not None else config.POOL_INCREMENTO,
+            self.tamanho_cache_sql)
+        # Ping no checkout: o driver testa a sessão antes de entregá-la se ficou ociosa por mais que o intervalo
+        if hasattr(self._pool, 'ping_interval'): self._pool.ping_interval = config.POOL_PING_INTERVALO_S
+        self._trava = threading.Lock()
+        self._metricas = {"checkouts": 0, "espera_total_s": 0.0, "espera_max_s": 0.0,
+                          "sessoes_descartadas": 0, "leituras_repetidas": 0, "cache_sql_acertos_estimados": 0, "cache_sql_faltas_estimadas": 0}
+        # O driver não expõe os acertos do cache de comandos: são ESTIMATIVAS, de uma imitação do LRU de cada sessão
+        # (só os textos). Não enxergam o que o driver faz de fato (ex: cursores que ele não devolve ao cache).
+        self._comandos_por_sessao = {}
+
+    def adquirir(self):
+        """Empresta uma sessão do pool, registrando o tempo de espera."""
+        inicio = time.perf_counter()
+        sessao = self._pool.acquire()
+        espera = time.perf_counter() - inicio
+        with self._trava:
+            self._metricas["checkouts"] += 1
+            self._metricas["espera_total_s"] += espera
+            self._metricas["espera_max_s"] = max(self._metricas["espera_max_s"], espera)
+        return sessao
+
+    def liberar(self, sessao):
+        """Devolve uma sessão saudável ao pool."""
+        try: self._pool.release(sessao)
+        except cx_Oracle.DatabaseError as e:
+            if not sessao_perdida(e): raise
+            self.descartar(sessao)
+
+    def descartar(self, sessao):
+        """Remove do pool uma sessão derrubada, para que não seja entregue de novo."""
+        try: self._pool.drop(sessao)
+        except cx_Oracle.DatabaseError: pass # A sessão já está morta; nada mais a fazer
+        with self._trava:
+            self._metricas["sessoes_descartadas"] += 1
+            self._comandos_por_sessao.pop(id(sessao), None)
+
+    def contar_comando(self, sessao, sql):
+        """Acerto estimado se `sql` ainda estaria no cache de comandos da sessão (mesmo texto, LRU de tamanho_cache_sql)."""
+        with self._trava:
+            comandos = self._comandos_por_sessao.setdefault(id(sessao), OrderedDict())
+            if sql in comandos: comandos.move_to_end(sql); self._metricas["cache_sql_acertos_estimados"] += 1; return
+            self._metricas["cache_sql_faltas_estimadas"] += 1
+            comandos[sql] = None
+            if len(comandos) > self.tamanho_cache_sql: comandos.popitem(last=False)
+
+    def contar_leitura_repetida(self):
+        with self._trava: self._metricas["leituras_repetidas"] += 1
+
+    def obter_metricas(self):
+        """Retorna uma cópia das métricas, incluindo ocupação atual do pool (cache_sql_*: estimativas, ver __init__)."""
+        with self._trava: metricas = dict(self._metricas)
+        metricas["espera_media_s"] = metricas["espera_total_s"] / metricas["checkouts"] if metricas["checkouts"] else 0.0
+        metricas["cache_sql_tamanho"] = self.tamanho_cache_sql
+        metricas["sessoes_abertas"] = self._pool.opened
+        metricas["sessoes_ocupadas"] = self._pool.busy
+        return metricas
+
+    def fechar(self):
+        self._pool.close(force=True)
+
+
+class ConexaoPool:
+    """Conexão lógica: pega uma sessão do pool sob demanda e a devolve quando não há cursor nem transação aberta.
+
+    Não é thread-safe; cada thread/worker deve usar sua própria instância (ver derivar()).
+    """
+
+    def __init__(self, pool):
+        self.pool = pool
+        self._sessao = None
+        self._cursores_abertos = 0
+        self._transacao_pendente = False
+        self._apos_commit = [] # Ações (ex: invalidar caches) que só valem se a transação for confirmada
+
+    def _obter_sessao(self):
+        if self._sessao is None: self._sessao = self.pool.adquirir()
+        return self._sessao
+
+    def _devolver_se_ociosa(self):
+        if self._sessao is not None and self._cursores_abertos == 0 and not self._transacao_pendente:
+            sessao, self._sessao = self._sessao, None
+            self.pool.liberar(sessao)
+
+    def _descartar_sessao(self):
+        if self._sessao is not None:
+            sessao, self._sessao = self._sessao, None
+            self.pool.descartar(sessao)
+        self._transacao_pendente = False; self._apos_commit.clear() # A transação foi perdida com a sessão
+
+    def cursor(self):
+        cursor = self._obter_sessao().cursor()
+        self._cursores_abertos += 1
+        return CursorPool(self, cursor)
+
+    def commit(self):
+        if self._sessao is None: return
+        try: self._sessao.commit()
+        except cx_Oracle.DatabaseError as e:
+            if sessao_perdida(e): self._descartar_sessao()
+            raise
+        self._transacao_pendente = False
+        self._devolver_se_ociosa()
+        acoes, self._apos_commit = self._apos_commit, []
+        for acao in acoes: acao()
+
+    def rollback(self):
+        self._apos_commit.clear()
+        if self._sessao is None: return
+        try: self._sessao.rollback()
+        except cx_Oracle.DatabaseError as e:
+            # Sessão caída: o servidor já desfez a transação, basta descartá-la
+            if not sessao_perdida(e): raise
+            self._descartar_sessao(); return
+        self._transacao_pendente = False
+        self._devolver_se_ociosa()
+
+    @property
+    def em_transacao(self):
+        """Há escrita ainda não confirmada nesta conexão (só a própria sessão a enxerga)."""
+        return self._transacao_pendente
+
+    def apos_commit(self, acao):
+        """Agenda `acao()` para logo depois do próximo commit bem-sucedido; um rollback a descarta."""
+        self._apos_commit.append(acao)
+
+    def marcar_apos_commit(self):
+        """Marca para descartar_apos_commit (ex: antes de um SAVEPOINT)."""
+        return len(self._apos_commit)
+
+    def descartar_apos_commit(self, marca):
+        """Descarta as ações agendadas depois de `marca` (ex: após ROLLBACK TO SAVEPOINT)."""
+        del self._apos_commit[marca:]
+
+    def derivar(self):
+        """Nova conexão lógica sobre o mesmo pool (para outra thread/worker)."""
+        return ConexaoPool(self.pool)
+
+    def cancelar(self):
+        """Interrompe a chamada em andamento na sessão (ORA-01013 para quem a fez). Pode ser chamado de outra thread."""
+        sessao = self._sessao
+        if sessao is not None: sessao.cancel()
+
+    def obter_metricas(self):
+        return self.pool.obter_metricas()
+
+    def close(self):
+        """Devolve a sessão em uso (desfazendo trabalho pendente) e fecha o pool."""
+        self._apos_commit.clear()
+        if self._sessao is not None:
+            try: self._sessao.rollback()
+            except cx_Oracle.DatabaseError: pass
+            self._transacao_pendente = False; self._cursores_abertos = 0
+            self._devolver_se_ociosa()
+        self.pool.fechar()
+
+
+class CursorPool:
+    """Cursor da ConexaoPool: repete consultas uma vez em nova sessão se a sessão atual caiu.
+    Com INSTRUMENTACAO_ATIVA, mede cada execute e conta as linhas lidas (ver instrumentacao)."""
+
+    def __init__(self, conexao, cursor):
+        self._conexao = conexao
+        self._cursor = cursor
+        self._atributos = {} # arraysize, outputtypehandler etc., reaplicados se o cursor for recriado
+        self._fechado = False
+        self._consulta = None # Impressão digital do último execute, para atribuir as linhas lidas
+
+    def __getattr__(self, nome):
+        return getattr(self._cursor, nome)
+
+    def __setattr__(self, nome, valor):
+        if nome.startswith('_'): object.__setattr__(self, nome, valor); return
+        setattr(self._cursor, nome, valor); self._atributos[nome] = valor
+
+    def __iter__(self):
+        if not config.INSTRUMENTACAO_ATIVA: return iter(self._cursor)
+        return self._iterar_medindo()
+
+    def _iterar_medindo(self):
+        linhas = 0
+        try:
+            for linha in self._cursor:
+                linhas += 1
+                yield linha
+        finally: instrumentacao.registrar_leitura(self._consulta, linhas, 0.0)
+
+    def _medir_leitura(self, metodo, *args):
+        if not config.INSTRUMENTACAO_ATIVA: return metodo(*args)
+        inicio = time.perf_counter()
+        resultado = metodo(*args)
+        linhas = len(resultado) if isinstance(resultado, list) else int(resultado is not None)
+        instrumentacao.registrar_leitura(self._consulta, linhas, time.perf_counter() - inicio)
+        return resultado
+
+    def fetchone(self):
+        return self._medir_leitura(self._cursor.fetchone)
+
+    def fetchmany(self, *args):
+        return self._medir_leitura(self._cursor.fetchmany, *args)
+
+    def fetchall(self):
+        return self._medir_leitura(self._cursor.fetchall)
+
+    def _recriar_em_nova_sessao(self):
+        """Descarta a sessão morta e refaz o cursor numa sessão nova do pool."""
+        self._conexao._descartar_sessao()
+        self._cursor = self._conexao._obter_sessao().cursor()
+        for nome, valor in self._atributos.items(): setattr(self._cursor, nome, valor)
+        self._conexao.pool.contar_leitura_repetida()
+
+    def execute(self, sql, parametros=None, **kwargs):
+        if not config.INSTRUMENTACAO_ATIVA: return self._executar(sql, parametros, **kwargs)
+        inicio = time.perf_counter()
+        try: resultado = self._executar(sql, parametros, **kwargs)
+        except cx_Oracle.DatabaseError as e:
+            instrumentacao.registrar_execucao(sql, time.perf_counter() - inicio, parametros or kwargs or None, erro=e); raise
+        self._consulta = instrumentacao.registrar_execucao(sql, time.perf_counter() - inicio, parametros or kwargs or None)
+        return resultado
+
+    def _executar(self, sql, parametros=None, **kwargs):
+        leitura = _eh_leitura(sql)
+        if not leitura: self._conexao._transacao_pendente = True
+        args = (sql,) if parametros is None else (sql, parametros)
+        try:
+            resultado = self._cursor.execute(*args, **kwargs)
+        except cx_Oracle.DatabaseError as e:
+            # Só é seguro repetir leituras sem transação pendente e sem outros cursores na mesma sessão
+            if not (leitura and sessao_perdida(e) and not self._conexao._transacao_pendente
+                    and self._conexao._cursores_abertos == 1): raise
+            registrar_erro(f"Sessão Oracle perdida ({e}); repetindo consulta em nova sessão do pool.", erro=e, operacao="repetir_leitura")
+            self._recriar_em_nova_sessao()
+            resultado = self._cursor.execute(*args, **kwargs)
+        self._conexao.pool.contar_comando(self._conexao._sessao, sql)
+        return self if resultado is not None else None
+
+    def executemany(self, sql, parametros, **kwargs):
+        self._conexao._transacao_pendente = True
+        self._conexao.pool.contar_comando(self._conexao._sessao, sql)
+        if not config.INSTRUMENTACAO_ATIVA: return self._cursor.executemany(sql, parametros, **kwargs)
+        if not isinstance(parametros, (list, tuple)): parametros = list(parametros)
+        amostra = parametros[0] if parametros else None
+        inicio = time.perf_counter()
+        try: resultado = self._cursor.executemany(sql, parametros, **kwargs)
+        except cx_Oracle.DatabaseError as e:
+            instrumentacao.registrar_execucao(sql, time.perf_counter() - inicio, amostra, erro=e, lote=len(parametros)); raise
+        self._consulta = instrumentacao.registrar_execucao(sql, time.perf_counter() - inicio, amostra, lote=len(parametros))
+        return resultado
+
+    def close(self):
+        if self._fechado: return
+        self._fechado = True
+        try: self._cursor.close()
+        except cx_Oracle.DatabaseError: pass # Sessão já caída; o cursor morre com ela
+        self._conexao._cursores_abertos -= 1
+        self._conexao._devolver_se_ociosa()
@@ -0,0 +1,159 @@
+import datetime
+from functools import partial
+from collections import namedtuple
+import config
+import carga_paralela
+import indice_culturas
+from utils import registrar_erro
+
+# NumPy é opcional: só a previsão depende dele
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Importa cx_Oracle do config
+cx_Oracle = config.cx_Oracle
+
+# --- Previsão Oferta x Demanda ---
+# Oferta projetada = área do talhão (TALHOES.tamanho_ha) x produtividade histórica da cultura, para os plantios
+# 'Planejado' na semana ISO da colheita prevista; demanda = DEMANDAS.quantidade na semana da necessidade.
+# O Oracle devolve só colunas estreitas (cultura, dias desde o início, número); cultura vira código inteiro com
+# np.unique e cada série é somada na grade cultura x semana com um único np.bincount.
+# Produtividade é por unidade: cada cultura usa a unidade com mais área colhida, e demandas em outra unidade
+# ficam de fora (contadas em `demandas_outra_unidade`).
+
+LinhaPrevisao = namedtuple("LinhaPrevisao", "cultura semana oferta demanda saldo unidade")
+
+SQL_PRODUTIVIDADE = """SELECT p.cultura, LOWER(TRIM(p.unidade_medida)), SUM(p.quantidade_colhida), SUM(t.tamanho_ha)
+      FROM PLANTIOS_PRODUTOS p JOIN TALHOES t ON t.id_talhao_unico = p.id_talhao_unico
+     WHERE p.status = 'Disponível' AND p.quantidade_colhida > 0 AND t.tamanho_ha > 0
+     GROUP BY p.cultura, LOWER(TRIM(p.unidade_medida))"""
+SQL_PLANEJADOS = """SELECT p.cultura, TRUNC(p.data_prevista_colheita) - :f_inicio, t.tamanho_ha
+      FROM PLANTIOS_PRODUTOS p LEFT JOIN TALHOES t ON t.id_talhao_unico = p.id_talhao_unico
+     WHERE p.status = 'Planejado' AND p.data_prevista_colheita >= :f_inicio AND p.data_prevista_colheita < :f_fim"""
+SQL_DEMANDAS = """SELECT cultura, TRUNC(data_necessidade) - :f_inicio, quantidade, LOWER(TRIM(unidade_medida))
+      FROM DEMANDAS WHERE data_necessidade >= :f_inicio AND data_necessidade < :f_fim"""
+
+def inicio_semana(data):
+    """Segunda-feira da semana ISO de `data`."""
+    return data - datetime.timedelta(days=data.weekday())
+
+
+class PrevisaoOferta:
+    """Grade cultura x semana: `oferta`, `demanda` e `saldo` são arrays (culturas, semanas)."""
+
+    def __init__(self, inicio, culturas, unidades, oferta, demanda, lotes_sem_estimativa=0, demandas_outra_unidade=0):
+        self.inicio = inicio # Segunda-feira da primeira semana
+        self.culturas = culturas; self.unidades = unidades
+        self.oferta = oferta; self.demanda = demanda; self.saldo = oferta - demanda
+        self.lotes_sem_estimativa = lotes_sem_estimativa # Planejados sem área ou sem histórico de produtividade
+        self.demandas_outra_unidade = demandas_outra_unidade
+
+    def semana(self, indice):
+        """Rótulo ISO ('2025-W07') da semana `indice`."""
+        ano, numero, _ = (self.inicio + datetime.timedelta(weeks=int(indice))).isocalendar()
+        return f"{ano}-W{numero:02d}"
+
+    def linhas(self, somente_deficit=False):
+        """Células com oferta ou demanda, por cultura e semana; `somente_deficit` deixa só saldo negativo."""
+        mascara = (self.saldo < 0) if somente_deficit else (self.oferta != 0) | (self.demanda != 0)
+        for i, j in zip(*np.nonzero(mascara)):
+            yield LinhaPrevisao(self.culturas[i], self.semana(j), float(self.oferta[i, j]), float(self.demanda[i, j]),
+                                float(self.saldo[i, j]), self.unidades[i])
+
+    def totais(self):
+        """[(cultura, oferta, demanda, saldo, unidade)] somando o horizonte inteiro, do maior déficit ao maior excedente."""
+        oferta = self.oferta.sum(axis=1); demanda = self.demanda.sum(axis=1)
+        ordem = np.argsort(oferta - demanda, kind="stable")
+        return [(self.culturas[i], float(oferta[i]), float(demanda[i]), float(oferta[i] - demanda[i]), self.unidades[i])
+                for i in ordem]
+
+
+def _ler_colunas(conexao, sql, binds=None):
+    """Executa `sql` e devolve uma lista por coluna, lendo em lotes de FETCH_TAMANHO_LOTE."""
+    cursor = None
+    try:
+        cursor = conexao.cursor()
+        cursor.arraysize = config.FETCH_TAMANHO_LOTE
+        cursor.execute(sql, binds or {})
+        colunas = [[] for _ in cursor.description]
+        while True:
+            linhas = cursor.fetchmany()
+            if not linhas: return colunas
+            for coluna, valores in zip(colunas, zip(*linhas)): coluna.extend(valores)
+    finally:
+        if cursor: cursor.close()
+
+def _codificar(nomes, indice, codigos, culturas):
+    """Código inteiro da cultura canônica de cada nome (cada grafia distinta é resolvida uma vez)."""
+    distintos, inverso = np.unique(np.array([n or '' for n in nomes], dtype=object), return_inverse=True)
+    mapa = np.empty(len(distintos), dtype=np.intp)
+    for k, nome in enumerate(distintos):
+        chave = indice.chave(nome)
+        if chave not in codigos: codigos[chave] = len(culturas); culturas.append(indice.canonica(nome) or " ".join(nome.split()))
+        mapa[k] = codigos[chave]
+    return mapa[inverso.reshape(-1)]
+
+def calcular_previsao(conexao, inicio=None, semanas=None, culturas_filtro=None):
+    """Monta a PrevisaoOferta de `semanas` semanas ISO a partir da semana de `inicio` (hoje, por padrão).
+
+    `culturas_filtro` (opcional): nomes canônicos a manter na grade. Retorna None em caso de erro ou sem NumPy.
+    """
+    if np is None: registrar_erro("NumPy não encontrado; instale com 'pip install numpy' para usar a previsão."); return None
+    if not conexao: registrar_erro("Conexão Oracle inválida."); return None
+    inicio = inicio_semana(inicio or datetime.date.today())
+    semanas = semanas or config.PREVISAO_HORIZONTE_SEMANAS
+    binds = {"f_inicio": inicio, "f_fim": inicio + datetime.timedelta(weeks=semanas)}
+    try:
+        carga = carga_paralela.carregar_em_paralelo(conexao, { # Leituras independentes, ao mesmo tempo
+            "indice": partial(indice_culturas.carregar_indice, estrito=True),
+            "produtividade": lambda c: _ler_colunas(c, SQL_PRODUTIVIDADE),
+            "planejados": lambda c: _ler_colunas(c, SQL_PLANEJADOS, binds),
+            "demandas": lambda c: _ler_colunas(c, SQL_DEMANDAS, binds),
+        })
+        indice, produtividade, planejados, demandas = carga["indice"], carga["produtividade"], carga["planejados"], carga["demandas"]
+    except cx_Oracle.DatabaseError as e: registrar_erro(f"Erro Oracle ao carregar dados da previsão: {e}"); return None
+
+    codigos = {}; culturas = []
+    cod_prod = _codificar(produtividade[0], indice, codigos, culturas)
+    cod_plan = _codificar(planejados[0], indice, codigos, culturas)
+    cod_dem = _codificar(demandas[0], indice, codigos, culturas)
+    n = len(culturas)
+
+    # Unidade de referência por cultura: a com mais área colhida; sem histórico, a primeira pedida na demanda
+    unidades = [None] * n; area_unidade = {}
+    for codigo, unidade, area in zip(cod_prod, produtividade[1], produtividade[3]):
+        area_unidade[(codigo, unidade)] = area_unidade.get((codigo, unidade), 0) + float(area)
+    for (codigo, unidade), area in sorted(area_unidade.items(), key=lambda item: item[1]): unidades[codigo] = unidade
+    for codigo, unidade in zip(cod_dem, demandas[3]):
+        if unidades[codigo] is None: unidades[codigo] = unidade
+
+    # Produtividade (quantidade por ha) de cada cultura, na unidade de referência
+    na_referencia = np.array([unidades[c] == u for c, u in zip(cod_prod, produtividade[1])], dtype=bool)
+    colhido = np.bincount(cod_prod[na_referencia], weights=np.asarray(produtividade[2], dtype=float)[na_referencia], minlength=n)
+    area_colhida = np.bincount(cod_prod[na_referencia], weights=np.asarray(produtividade[3], dtype=float)[na_referencia], minlength=n)
+    with np.errstate(divide="ignore", invalid="ignore"): rendimento = np.where(area_colhida > 0, colhido / area_colhida, np.nan)
+
+    celulas = n * semanas
+    area_plan = np.asarray(planejados[2], dtype=float)
+    oferta_lote = area_plan * rendimento[cod_plan]
+    estimados = ~np.isnan(oferta_lote)
+    semana_plan = np.floor_divide(np.asarray(planejados[1], dtype=float), 7).astype(np.intp)
+    oferta = np.bincount(cod_plan[estimados] * semanas + semana_plan[estimados], weights=oferta_lote[estimados], minlength=celulas)
+
+    unidade_ref = np.array([unidades[c] for c in cod_dem], dtype=object)
+    validas = (unidade_ref == np.array(demandas[3], dtype=object)).astype(bool)
+    quantidade = np.nan_to_num(np.asarray(demandas[2], dtype=float))
+    semana_dem = np.floor_divide(np.asarray(demandas[1], dtype=float), 7).astype(np.intp)
+    demanda = np.bincount(cod_dem[validas] * semanas + semana_dem[validas], weights=quantidade[validas], minlength=celulas)
+
+    # Só culturas com plantio planejado ou demanda no horizonte (e, se pedido, só as filtradas)
+    presentes = np.zeros(n, dtype=bool); presentes[cod_plan] = True; presentes[cod_dem] = True
+    if culturas_filtro is not None:
+        filtradas = set(culturas_filtro)
+        presentes &= np.array([c in filtradas for c in culturas], dtype=bool)
+    manter = np.flatnonzero(presentes)
+    return PrevisaoOferta(inicio, [culturas[i] for i in manter], [unidades[i] for i in manter],
+                          oferta.reshape(n, semanas)[manter], demanda.reshape(n, semanas)[manter],
+                          int((~estimados).sum()), int((~validas).sum()))
@@ -0,0 +1,128 @@
+import os
+import time
+import bisect
+import datetime
+import multiprocessing
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import config
+import database
+import carga_paralela
+from utils import registrar_erro, formatar_data_br
+
+# Importa cx_Oracle do config
+cx_Oracle = config.cx_Oracle
+
+# --- Relatórios de Rastreabilidade ---
+# Coleta (no processo principal, com poucas consultas para o lote inteiro) e renderização (função pura,
+# executável em processos separados) ficam separadas para permitir gerar centenas de fichas de uma vez.
+
+MAX_INSUMOS_RELATORIO = 5 # Aplicações mais recentes (até a colheita) listadas por lote
+MINIMO_LOTES_PARALELO = 20 # Abaixo disso, abrir processos custa mais que renderizar em sequência
+# Processos novos, nunca "fork": o processo principal tem threads (pool de sessões, carga paralela, serviço HTTP)
+# e sessões Oracle abertas, que um fork copiaria no meio do uso para dentro dos filhos
+CONTEXTO_PROCESSOS = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+def _agrupar_insumos_por_talhao(insumos):
+    """{id_talhao_unico: (ordinais negativos, insumos)}, do mais recente ao mais antigo, para busca com bisect."""
+    grupos = {}
+    for insumo in insumos:
+        if not isinstance(insumo.data_aplicacao, datetime.date): continue
+        chaves, lista = grupos.setdefault(insumo.id_talhao_unico, ([], []))
+        chaves.append(-insumo.data_aplicacao.toordinal()); lista.append(insumo)
+    return grupos
+
+def coletar_dados(conexao, plantios):
+    """Monta os dados de cada ficha com uma consulta por tabela para todos os `plantios` (lista de Plantio)."""
+    if not plantios: return []
+    ids_produtores = {p.id_produtor for p in plantios}
+    limites = {p.id_plantio: p.data_colheita_real or datetime.date.today() for p in plantios}
+    filtros_insumos = {"id_talhao_unico": {p.id_talhao_unico for p in plantios}, "data_fim": max(limites.values())}
+    # As três leituras são independentes: vão ao banco ao mesmo tempo, cada uma na sua sessão
+    carga = carga_paralela.carregar_em_paralelo(conexao, {
+        "produtores": lambda c: database.carregar_produtores_talhoes(c, {"ids": ids_produtores}, estrito=True),
+        "certificacoes": lambda c: database.carregar_status_certificacao(c, {"ids": ids_produtores}, estrito=True),
+        "insumos": lambda c: _agrupar_insumos_por_talhao(database.iterar_registros_insumos(
+            c, filtros_insumos, ordenar_por="data_aplicacao_desc", estrito=True)),
+    })
+    produtores, certificacoes, insumos = carga["produtores"], carga["certificacoes"], carga["insumos"]
+    talhoes = {talhao.id_talhao_unico: (id_talhao_produtor, talhao)
+               for produtor in produtores.values() for id_talhao_produtor, talhao in produtor.talhoes.items()}
+
+    dados = []
+    for plantio in plantios:
+        produtor = produtores.get(plantio.id_produtor)
+        id_talhao_produtor, talhao = talhoes.get(plantio.id_talhao_unico, ('N/A', None))
+        chaves, lista = insumos.get(plantio.id_talhao_unico, ([], []))
+        inicio = bisect.bisect_left(chaves, -limites[plantio.id_plantio].toordinal()) # Primeiro insumo até a data limite
+        dados.append({
+            "plantio": plantio,
+            "produtor": produtor._replace(talhoes={}) if produtor else None, # Sem os talhões: menos dados para os processos
+            "certificado": certificacoes.get(plantio.id_produtor, {}).get('certificado', False),
+            "id_talhao_produtor": id_talhao_produtor, "talhao": talhao,
+            "insumos": lista[inicio:inicio + MAX_INSUMOS_RELATORIO],
+        })
+    return dados
+
+def renderizar_relatorio(dados):
+    """Texto da ficha de rastreabilidade de um lote."""
+    plantio = dados["plantio"]; produtor = dados["produtor"] or {}; talhao = dados["talhao"] or {}
+    linhas = ["--- Relatório de Rastreabilidade Simplificado ---\n",
+              f"ID Lote/Plantio: {plantio.id_plantio}",
+              f"Cultura: {plantio.cultura or 'N/A'}",
+              f"Status Atual: {plantio.status or 'N/A'}"]
+    if plantio.status == 'Disponível':
+        linhas.append(f"Data da Colheita: {formatar_data_br(plantio.data_colheita_real)}")
+        linhas.append(f"Quantidade Colhida: {plantio.quantidade_colhida if plantio.quantidade_colhida is not None else 'N/A'} {plantio.unidade_medida or ''}")
+    else: linhas.append(f"Data Prev. Colheita: {formatar_data_br(plantio.data_prevista_colheita)}")
+    linhas.append(f"Data do Plantio: {formatar_data_br(plantio.data_plantio)}")
+    linhas += ["-" * 30, "Dados do Produtor:",
+               f"  ID: {plantio.id_produtor}", f"  Nome: {produtor.get('nome', 'N/A')}",
+               f"  Localização: {produtor.get('localizacao', 'N/A')}", f"  Associação: {produtor.get('associacao', 'Nenhuma')}",
+               f"  Certificado Orgânico: {'Sim' if dados['certificado'] else 'Não'}",
+               "-" * 30, "Dados do Talhão de Origem:",
+               f"  ID Talhão (Produtor): {dados['id_talhao_produtor']}", f"  ID Único (Sistema): {plantio.id_talhao_unico}",
+               f"  Tamanho: {talhao.get('tamanho_ha', 'N/A')} ha", f"  Tipo de Solo: {talhao.get('tipo_solo', 'N/A')}",
+               "-" * 30, "Histórico Recente de Insumos Orgânicos (Neste Talhão):"]
+    if dados["insumos"]:
+        for insumo in dados["insumos"]:
+            linhas.append(f"  - {formatar_data_br(insumo.data_aplicacao)}: {insumo.tipo_insumo} ({insumo.quantidade or 'N/A'})")
+    else: linhas.append("  Nenhum registro de insumo encontrado.")
+    linhas += ["-" * 30, f"Observações do Plantio: {plantio.observacoes or 'Nenhuma'}\n",
+               f"Relatório gerado em: {datetime.datetime.now().strftime('%d/%m/%Y %H:%M:%S')}\n"]
+    return "\n".join(linhas)
+
+def gravar_relatorio(dados, diretorio="."):
+    """Grava a ficha em `diretorio`/rastreabilidade_<id>.txt e retorna o caminho (executa também nos processos).
+    O id vai inteiro no nome: no lote, ids com o mesmo prefixo (ex: SL0000003004...) não podem sobrescrever fichas."""
+    caminho = os.path.join(diretorio, f"rastreabilidade_{dados['plantio'].id_plantio}.txt")
+    with open(caminho, 'w', encoding='utf-8') as f: f.write(renderizar_relatorio(dados))
+    return caminho
+
+def gerar_relatorios_em_lote(conexao, filtros, diretorio, processos=None):
+    """Gera as fichas de todos os plantios que atendem `filtros` (mesmas chaves de carregar_plantios_produtos).
+
+    Retorna {"lotes", "arquivos", "duracao_s", "lotes_por_s"} ou None em caso de erro.
+    """
+    if not conexao: registrar_erro("Conexão Oracle inválida."); return None
+    inicio = time.perf_counter()
+    try:
+        plantios = list(database.iterar_plantios_produtos(conexao, filtros, estrito=True))
+        dados = coletar_dados(conexao, plantios)
+    except cx_Oracle.DatabaseError: return None # Já registrado pelos carregadores
+    processos = processos or config.RASTREABILIDADE_PROCESSOS
+    try:
+        os.makedirs(diretorio, exist_ok=True)
+        gravar = partial(gravar_relatorio, diretorio=diretorio)
+        arquivos = None
+        if processos > 1 and len(dados) >= MINIMO_LOTES_PARALELO:
+            try:
+                with ProcessPoolExecutor(max_workers=processos, mp_context=multiprocessing.get_context(CONTEXTO_PROCESSOS)) as executor:
+                    arquivos = list(executor.map(gravar, dados, chunksize=max(1, len(dados) // (processos * 4))))
+            except BrokenProcessPool as e: registrar_erro(f"Falha no pool de processos ({e}); gerando relatórios em sequência.")
+        if arquivos is None: arquivos = [gravar(d) for d in dados]
+    except OSError as e: registrar_erro(f"Erro ao gravar relatórios de rastreabilidade em '{diretorio}': {e}"); return None
+    duracao = time.perf_counter() - inicio
+    return {"lotes": len(dados), "arquivos": arquivos, "duracao_s": duracao,
+            "lotes_por_s": len(dados) / duracao if duracao else 0.0}
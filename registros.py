@@ -0,0 +1,57 @@
+from collections import namedtuple
+
+# --- Registros Tipados ---
+# Cada linha carregada do Oracle vira uma tupla nomeada (sem __dict__ por instância), criada direto
+# pelo cursor via rowfactory. A ordem dos campos é a mesma das colunas nos SELECTs de database.py.
+
+class RegistroCompativel:
+    """Permite usar os registros como os antigos dicts: r.get('campo'), r['campo'], r.keys(), r.copy()."""
+    __slots__ = ()
+
+    def get(self, chave, padrao=None):
+        return getattr(self, chave) if chave in self._fields else padrao
+
+    def __getitem__(self, chave):
+        if isinstance(chave, str):
+            if chave not in self._fields: raise KeyError(chave)
+            return getattr(self, chave)
+        return super().__getitem__(chave)
+
+    def keys(self):
+        return self._fields
+
+    def items(self):
+        return zip(self._fields, self)
+
+    def copy(self):
+        """Cópia mutável (dict), para quem precisa acrescentar campos derivados."""
+        return self._asdict()
+
+
+class Produtor(RegistroCompativel, namedtuple("_ProdutorBase", "id_produtor nome localizacao contato associacao talhoes")):
+    __slots__ = ()
+
+class Talhao(RegistroCompativel, namedtuple("_TalhaoBase", "id_talhao_unico id_produtor id_talhao_produtor tamanho_ha tipo_solo")):
+    __slots__ = ()
+
+class Plantio(RegistroCompativel, namedtuple("_PlantioBase",
+        "id_plantio id_produtor id_talhao_unico cultura data_plantio data_prevista_colheita "
+        "data_colheita_real quantidade_colhida unidade_medida status observacoes cultura_anterior")):
+    __slots__ = ()
+
+class RegistroInsumo(RegistroCompativel, namedtuple("_RegistroInsumoBase",
+        "id_registro id_produtor id_talhao_unico data_aplicacao tipo_insumo quantidade observacoes")):
+    __slots__ = ()
+
+class Demanda(RegistroCompativel, namedtuple("_DemandaBase",
+        "id_demanda cultura quantidade unidade_medida data_necessidade observacoes registrado_em")):
+    __slots__ = ()
+
+class OfertaMercado(RegistroCompativel, namedtuple("_OfertaMercadoBase",
+        "id_plantio cultura status data_referencia quantidade_colhida unidade_medida "
+        "id_produtor nome_produtor associacao certificado")):
+    __slots__ = ()
+
+class ColheitaPrevista(RegistroCompativel, namedtuple("_ColheitaPrevistaBase",
+        "mes cultura id_produtor nome_produtor lotes area_ha primeira_colheita quantidade_prevista unidade_medida")):
+    __slots__ = ()
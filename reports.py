@@ -1,8 +1,18 @@
+import os
 import datetime 
-from collections import defaultdict
+from functools import partial
 import config 
 import database 
-from utils import registrar_erro, formatar_data_br 
+import carga_paralela
+import indices
+import exportacao
+import casamento_demandas
+import indice_culturas
+import rastreabilidade
+import rotacao
+import previsao_oferta
+import instrumentacao
+from utils import registrar_erro, formatar_data_br, confirmar_acao, obter_input_validado
 from crud_operations import selecionar_plantio 
 
 
@@ -11,14 +21,13 @@ cx_Oracle = config.cx_Oracle
 def visualizar_historico_rotacao(conexao, id_produtor):
     """Mostra o histórico de culturas plantadas em um talhão (lendo do Oracle)."""
     from crud_operations import selecionar_talhao # Import local para evitar ciclo
-    if not conexao or cx_Oracle is None: registrar_erro("Conexão Oracle inválida."); return
+    if not conexao: registrar_erro("Conexão Oracle inválida."); return
     print("\n--- Histórico de Rotação de Culturas ---")
     id_talhao_produtor, id_talhao_unico = selecionar_talhao(conexao, id_produtor)
     if not id_talhao_unico: return
 
-    plantios = database.carregar_plantios_produtos(conexao) # Carrega do Oracle
-    historico = [p for p in plantios if p.get("id_talhao_unico") == id_talhao_unico and p.get("data_plantio")]
-    historico.sort(key=lambda x: x.get("data_plantio", datetime.date.min), reverse=True)
+    try: historico = [p for p in rotacao.obter_indice(conexao).historico(id_talhao_unico) if p.data_plantio] # Mais recente primeiro
+    except cx_Oracle.DatabaseError: print("Erro ao carregar o histórico. Consulte o log."); return
 
     if not historico: print(f"Nenhum histórico encontrado para o talhão '{id_talhao_produtor}'."); return
 
@@ -27,92 +36,138 @@ def visualizar_historico_rotacao(conexao, id_produtor):
     print(f"{'Data Plantio':<15} {'Cultura Plantada':<20} {'Cultura Anterior':<20} {'Status'}")
     print("-" * 65)
     for item in historico:
-        print(f"{formatar_data_br(item.get('data_plantio')):<15} {item.get('cultura','N/A'):<20} {item.get('cultura_anterior', 'N/A'):<20} {item.get('status','N/A')}")
+        print(f"{formatar_data_br(item.get('data_plantio')):<15} {item.get('cultura') or 'N/A':<20} {item.get('cultura_anterior') or 'N/A':<20} {item.get('status') or 'N/A'}")
     print("-" * 65)
 
+def visualizar_analise_rotacao(conexao):
+    """Aponta, em todos os talhões, culturas repetidas em sequência e pousios mais curtos que o mínimo."""
+    if not conexao: registrar_erro("Conexão Oracle inválida."); return
+    print("\n--- Análise de Rotação (Todos os Talhões) ---")
+    try: # Plantios, culturas e produtores são lidos ao mesmo tempo (produtores vêm do cache na maioria das vezes)
+        carga = carga_paralela.carregar_em_paralelo(conexao, {"rotacao": rotacao.obter_indice,
+                                                              "culturas": partial(indice_culturas.carregar_indice, estrito=True),
+                                                              "produtores": partial(database.carregar_produtores_talhoes, estrito=True)})
+    except cx_Oracle.DatabaseError: print("Erro ao carregar os plantios. Consulte o log."); return
+    alertas = rotacao.analisar_rotacao(carga["rotacao"], chave_cultura=carga["culturas"].chave)
+    if not alertas: print(f"Nenhum problema encontrado (pousio mínimo: {config.POUSIO_MINIMO_DIAS} dias)."); return
+
+    talhoes = {t.id_talhao_unico: (p.nome, id_t) for p in carga["produtores"].values() for id_t, t in p.talhoes.items()}
+    print(f"{len(alertas)} alerta(s) (pousio mínimo: {config.POUSIO_MINIMO_DIAS} dias):")
+    print("-" * 100)
+    print(f"{'Produtor':<20} {'Talhão':<10} {'Alerta':<17} {'Anterior':<25} {'Atual':<25}")
+    print("-" * 100)
+    for a in alertas:
+        nome, id_talhao_produtor = talhoes.get(a.id_talhao_unico, ('Desconhecido', 'N/A'))
+        anterior = f"{a.anterior.cultura} ({formatar_data_br(a.anterior.data_plantio)})"
+        atual = f"{a.atual.cultura} ({formatar_data_br(a.atual.data_plantio)})"
+        detalhe = f" - pousio de {a.dias_pousio} dia(s)" if a.tipo == "Pousio curto" else ""
+        print(f"{(nome or 'N/A')[:20]:<20} {id_talhao_produtor[:10]:<10} {a.tipo:<17} {anterior[:25]:<25} {atual[:25]:<25}{detalhe}")
+    print("-" * 100)
+
 def visualizar_calendario_colheitas(conexao):
-    """Mostra um calendário simples de colheitas previstas (lendo do Oracle)."""
-    if not conexao or cx_Oracle is None: registrar_erro("Conexão Oracle inválida."); return
+    """Mostra as colheitas previstas agrupadas por mês, cultura e produtor (agregadas no Oracle)."""
+    if not conexao: registrar_erro("Conexão Oracle inválida."); return
     print("\n--- Calendário de Colheitas Previstas ---")
-    plantios = database.carregar_plantios_produtos(conexao) # Carrega do Oracle
-    produtores = database.carregar_produtores_talhoes(conexao)
-    plantios_planejados = []
-    for p in plantios:
-        if p.get("status") == 'Planejado' and isinstance(p.get("data_prevista_colheita"), datetime.date):
-             id_prod = p.get("id_produtor")
-             nome_prod = produtores.get(id_prod, {}).get("nome", "Desconhecido")
-             plantios_planejados.append({
-                 "data": p["data_prevista_colheita"],
-                 "cultura": p.get("cultura"),
-                 "produtor": nome_prod })
-    plantios_planejados.sort(key=lambda x: x["data"]) # Ordena por data
-
-    if not plantios_planejados: print("Nenhuma colheita prevista encontrada."); return
-
-    colheitas_por_mes = defaultdict(list)
-    for p in plantios_planejados: colheitas_por_mes[p["data"].strftime("%Y-%m")].append(p)
-
-    print("\nColheitas Planejadas por Mês:")
-    for mes_ano in sorted(colheitas_por_mes.keys()):
-        try: nome_mes_ano = datetime.datetime.strptime(mes_ano, "%Y-%m").strftime("%B/%Y") # Tenta formatar mês
-        except ValueError: nome_mes_ano = mes_ano # Fallback
-        print(f"\n--- {nome_mes_ano.capitalize()} ---")
-        colheitas_por_mes[mes_ano].sort(key=lambda x: x["data"]) # Ordena dentro do mês
-        for item in colheitas_por_mes[mes_ano]:
-            print(f"  - {item['data'].strftime('%d/%m')}: {item['cultura']} (Produtor: {item['produtor']})")
+    filtros = {"regiao": obter_input_validado("Região/localização (Enter = todas)", obrigatorio=False),
+               "associacao": obter_input_validado("Associação (Enter = todas)", obrigatorio=False)}
+    horizonte = obter_input_validado(f"Meses à frente (Enter = {config.CALENDARIO_HORIZONTE_MESES})", tipo_dado=int, obrigatorio=False)
+    calendario = database.carregar_calendario_colheitas(conexao, filtros, horizonte if horizonte and horizonte > 0 else None)
+    if not calendario: print("Nenhuma colheita prevista encontrada."); return
+
+    print("\nColheitas Planejadas por Mês (quantidade prevista = área x produtividade histórica da cultura):")
+    mes_atual = None
+    for linha in calendario:
+        if linha.mes != mes_atual:
+            mes_atual = linha.mes
+            print(f"\n--- {mes_atual.strftime('%B/%Y').capitalize()} ---")
+        area = f"{linha.area_ha:.2f} ha" if linha.area_ha is not None else "área N/A"
+        quantidade = (f"~{linha.quantidade_prevista:,.0f} {linha.unidade_medida}" if linha.quantidade_prevista is not None
+                      else "quantidade N/A (sem histórico)")
+        print(f"  - A partir de {linha.primeira_colheita.strftime('%d/%m')}: {linha.cultura} "
+              f"(Produtor: {linha.nome_produtor or 'Desconhecido'}) - {linha.lotes} lote(s), {area}, {quantidade}")
     print("\n" + "-"*35)
 
-def buscar_produtos_mercado(conexao):
-    """Simula a visão de um comprador buscando produtos (lendo do Oracle)."""
-    if not conexao or cx_Oracle is None: registrar_erro("Conexão Oracle inválida."); return
-    print("\n--- Mercado Agrorgânica (Oferta Disponível/Prevista) ---") # Nome atualizado
-    resultados = []
-    plantios_db = database.carregar_plantios_produtos(conexao)
-    produtores_db = database.carregar_produtores_talhoes(conexao)
-    cert_db = database.carregar_status_certificacao(conexao)
-
-    for p in plantios_db:
-        if p.get('status') in ['Disponível', 'Planejado']:
-            id_produtor = p.get('id_produtor')
-            nome_produtor = produtores_db.get(id_produtor, {}).get('nome', 'Desconhecido')
-            certificado = cert_db.get(id_produtor, {}).get('certificado', False)
-            data_ref = p.get('data_colheita_real') if p.get('status') == 'Disponível' else p.get('data_prevista_colheita')
-            data_ref_str = formatar_data_br(data_ref)
-            # Correção Quantidade: Mostrar '---' se Planejado, ou a qtd/N/A se Disponível
-            qtd_val = p.get('quantidade_colhida')
-            qtd_str = '---' if p.get('status') == 'Planejado' else (str(qtd_val) if qtd_val is not None else 'N/A')
-            unid_str = p.get('unidade_medida', '') if p.get('status') == 'Disponível' and qtd_val is not None else ''
+def visualizar_previsao_oferta(conexao):
+    """Mostra, por cultura e semana ISO, a oferta projetada dos plantios planejados contra a demanda registrada."""
+    if not conexao: registrar_erro("Conexão Oracle inválida."); return
+    print("\n--- Previsão Oferta x Demanda por Semana ---")
+    culturas = None
+    cultura = obter_input_validado("Cultura (Enter = todas)", obrigatorio=False)
+    if cultura:
+        canonica = indice_culturas.carregar_indice(conexao).resolver(cultura)
+        if not canonica: print(f"Cultura '{cultura}' não encontrada."); return
+        culturas = [canonica]
+    semanas = obter_input_validado(f"Semanas à frente (Enter = {config.PREVISAO_HORIZONTE_SEMANAS})", tipo_dado=int, obrigatorio=False)
+    somente_deficit = confirmar_acao("Mostrar só as semanas com déficit?")
+    previsao = previsao_oferta.calcular_previsao(conexao, semanas=semanas if semanas and semanas > 0 else None, culturas_filtro=culturas)
+    if previsao is None: print("Não foi possível calcular a previsão. Consulte o log."); return
+    if not previsao.culturas: print("Nenhum plantio planejado ou demanda no período."); return
 
+    print("-" * 80)
+    print(f"{'Cultura':<20} {'Semana':<10} {'Oferta':>12} {'Demanda':>12} {'Saldo':>12}  Unidade")
+    print("-" * 80)
+    for linha in previsao.linhas(somente_deficit):
+        print(f"{linha.cultura[:20]:<20} {linha.semana:<10} {linha.oferta:>12.2f} {linha.demanda:>12.2f} {linha.saldo:>12.2f}  {linha.unidade or ''}")
+    print("-" * 80)
+    print("Total no período:")
+    for cultura, oferta, demanda, saldo, unidade in previsao.totais():
+        print(f"  {cultura[:20]:<20} oferta {oferta:.2f} x demanda {demanda:.2f} = saldo {saldo:+.2f} {unidade or ''}")
+    if previsao.lotes_sem_estimativa: print(f"* {previsao.lotes_sem_estimativa} plantio(s) planejado(s) sem área ou sem histórico de produtividade (fora da oferta).")
+    if previsao.demandas_outra_unidade: print(f"* {previsao.demandas_outra_unidade} demanda(s) em unidade diferente da usada nas colheitas (fora da demanda).")
 
-            resultados.append({
-                "id_plantio": p.get('id_plantio', 'N/A'), "cultura": p.get('cultura', 'N/A'),
-                "status": p.get('status', 'N/A'), "data_ref": data_ref_str, "qtd": qtd_str, "unid": unid_str,
-                "nome_produtor": nome_produtor, "certificado": certificado })
+def _ler_filtros_mercado(conexao):
+    """Pergunta os filtros opcionais da busca no mercado (Enter = sem filtro)."""
+    filtros = {}
+    cultura = obter_input_validado("Cultura (Enter = todas)", obrigatorio=False)
+    if cultura:
+        indice = indice_culturas.carregar_indice(conexao)
+        canonica = indice.resolver(cultura)
+        if canonica:
+            if indice_culturas.normalizar(canonica) != indice_culturas.normalizar(cultura): print(f"Buscando por: {canonica}")
+            cultura = indice.variantes(canonica) # Todas as grafias gravadas desse produto
+    filtros["cultura"] = cultura
+    filtros["associacao"] = obter_input_validado("Associação do produtor (Enter = todas)", obrigatorio=False)
+    filtros["data_inicio"] = obter_input_validado("Colheita a partir de ", tipo_dado=datetime.date, obrigatorio=False)
+    filtros["data_fim"] = obter_input_validado("Colheita até ", tipo_dado=datetime.date, obrigatorio=False)
+    filtros["somente_certificados"] = confirmar_acao("Somente produtores certificados?")
+    return filtros
 
-    if not resultados: print("Nenhum produto disponível ou plantio previsto encontrado."); input("..."); return
+def buscar_produtos_mercado(conexao):
+    """Simula a visão de um comprador buscando produtos (uma página por vez, já ordenada pelo Oracle)."""
+    if not conexao: registrar_erro("Conexão Oracle inválida."); return
+    print("\n--- Mercado Agrorgânica (Oferta Disponível/Prevista) ---") # Nome atualizado
+    filtros = _ler_filtros_mercado(conexao)
 
-    print("Ofertas Disponíveis e Plantios Futuros:")
     id_width = 37 # Largura para UUID
     other_widths = [15, 12, 15, 10, 5, 20, 12]
     header_format = f"{{:<{id_width}}} {{:<{other_widths[0]}}} {{:<{other_widths[1]}}} {{:<{other_widths[2]}}} {{:<{other_widths[3]}}} {{:<{other_widths[4]}}} {{:<{other_widths[5]}}} {{:<{other_widths[6]}}}"
     total_width = id_width + sum(other_widths) + (len(other_widths))
 
-    print("-" * total_width)
-    print(header_format.format('ID Lote/Plantio', 'Cultura', 'Status', 'Prev./Real Colh', 'Qtd.', 'Unid.', 'Produtor', 'Certificado?'))
-    print("-" * total_width)
-
-    resultados.sort(key=lambda x: datetime.datetime.strptime(x["data_ref"], '%d/%m/%Y') if x["data_ref"] != 'N/A' else datetime.datetime.min)
-    for r in resultados:
-        status_cert_str = "Sim" if r["certificado"] else "Não"
-        print(header_format.format(
-            r['id_plantio'], r['cultura'], r['status'], r['data_ref'],
-            r['qtd'], r['unid'], r['nome_produtor'], status_cert_str
-        ))
-    print("-" * total_width); input("\nPressione Enter para voltar...")
+    pagina = 0; chave = None
+    while True:
+        ofertas, chave = database.pesquisar_mercado(conexao, filtros, apos=chave)
+        if not ofertas and pagina == 0: print("Nenhum produto disponível ou plantio previsto encontrado."); input("..."); return
+        pagina += 1
+        print(f"\nOfertas Disponíveis e Plantios Futuros (página {pagina}):")
+        print("-" * total_width)
+        print(header_format.format('ID Lote/Plantio', 'Cultura', 'Status', 'Prev./Real Colh', 'Qtd.', 'Unid.', 'Produtor', 'Certificado?'))
+        print("-" * total_width)
+        for p in ofertas:
+            # Correção Quantidade: Mostrar '---' se Planejado, ou a qtd/N/A se Disponível
+            qtd_val = p.quantidade_colhida
+            qtd_str = '---' if p.status == 'Planejado' else (str(qtd_val) if qtd_val is not None else 'N/A')
+            unid_str = (p.unidade_medida or '') if p.status == 'Disponível' and qtd_val is not None else ''
+            print(header_format.format(
+                p.id_plantio, p.cultura, p.status, formatar_data_br(p.data_referencia),
+                qtd_str, unid_str, p.nome_produtor or 'Desconhecido', "Sim" if p.certificado else "Não"
+            ))
+        print("-" * total_width)
+        if chave is None: input("\nFim da lista. Pressione Enter para voltar..."); return
+        if input("\nEnter para a próxima página ou 0 para voltar: ").strip() == '0': return
 
 def gerar_relatorio_rastreabilidade(conexao):
     """Gera um relatório de rastreabilidade simple (lendo do Oracle)."""
-    if not conexao or cx_Oracle is None: registrar_erro("Conexão Oracle inválida."); return
+    if not conexao: registrar_erro("Conexão Oracle inválida."); return
     print("\n--- Gerar Relatório de Rastreabilidade ---")
 
     # Pede produtor primeiro para filtrar a lista de plantios
@@ -124,78 +179,160 @@ def gerar_relatorio_rastreabilidade(conexao):
     id_plantio_selecionado = selecionar_plantio(conexao, id_produtor_selecionado, status_permitidos=['Planejado', 'Disponível', 'Vendido', 'Cancelado'])
     if not id_plantio_selecionado: print("Nenhum plantio selecionado."); return
 
-    # Carrega dados necessários
-    plantios_db = database.carregar_plantios_produtos(conexao)
-    produtores_db = database.carregar_produtores_talhoes(conexao)
-    insumos_db = database.carregar_registros_insumos(conexao)
-    cert_db = database.carregar_status_certificacao(conexao)
-
-    plantio_encontrado = next((p for p in plantios_db if p.get('id_plantio') == id_plantio_selecionado), None)
-    if not plantio_encontrado: print(f"ID '{id_plantio_selecionado}' não encontrado (erro interno)."); return
-
-    id_produtor = plantio_encontrado.get('id_produtor') # Confirma o ID do produtor do plantio
-    id_talhao_unico = plantio_encontrado.get('id_talhao_unico')
-    dados_produtor = produtores_db.get(id_produtor, {})
-    dados_cert = cert_db.get(id_produtor, {})
-    id_talhao_produtor = 'N/A'; dados_talhao = {}
-    for id_t_prod, dados_t in dados_produtor.get('talhoes', {}).items():
-        if dados_t.get('id_talhao_unico') == id_talhao_unico:
-            dados_talhao = dados_t; id_talhao_produtor = id_t_prod; break
-
-    # Filtra insumos relevantes
-    insumos_relevantes = []
-    data_limite = plantio_encontrado.get('data_colheita_real') or datetime.date.today()
-    insumos_talhao = [i for i in insumos_db if i.get('id_talhao_unico') == id_talhao_unico]
-    for insumo in insumos_talhao:
-        data_app = insumo.get('data_aplicacao')
-        if isinstance(data_app, datetime.date) and data_app <= data_limite:
-            insumo_copy = insumo.copy()
-            insumo_copy['data_aplicacao_br'] = formatar_data_br(data_app)
-            insumos_relevantes.append(insumo_copy)
-    insumos_relevantes.sort(key=lambda x: x.get('data_aplicacao', datetime.date.min), reverse=True)
-
-    # Monta o relatório
-    nome_arquivo_relatorio = f"rastreabilidade_{id_plantio_selecionado[:8]}.txt"
+    # Carrega só as linhas do lote escolhido (filtros aplicados no Oracle)
+    plantios_db = database.carregar_plantios_produtos(conexao, {"ids": [id_plantio_selecionado]})
+    if not plantios_db: print(f"ID '{id_plantio_selecionado}' não encontrado (erro interno)."); return
     try:
-        with open(nome_arquivo_relatorio, 'w', encoding='utf-8') as f:
-            f.write("--- Relatório de Rastreabilidade Simplificado ---\n\n")
-            f.write(f"ID Lote/Plantio: {plantio_encontrado.get('id_plantio')}\n")
-            f.write(f"Cultura: {plantio_encontrado.get('cultura', 'N/A')}\n")
-            f.write(f"Status Atual: {plantio_encontrado.get('status', 'N/A')}\n")
-            if plantio_encontrado.get('status') == 'Disponível':
-                f.write(f"Data da Colheita: {formatar_data_br(plantio_encontrado.get('data_colheita_real'))}\n")
-                f.write(f"Quantidade Colhida: {plantio_encontrado.get('quantidade_colhida', 'N/A')} {plantio_encontrado.get('unidade_medida', '')}\n")
-            else: f.write(f"Data Prev. Colheita: {formatar_data_br(plantio_encontrado.get('data_prevista_colheita'))}\n")
-            f.write(f"Data do Plantio: {formatar_data_br(plantio_encontrado.get('data_plantio'))}\n")
-            f.write("-" * 30 + "\nDados do Produtor:\n")
-            f.write(f"  ID: {id_produtor}\n  Nome: {dados_produtor.get('nome', 'N/A')}\n")
-            f.write(f"  Localização: {dados_produtor.get('localizacao', 'N/A')}\n  Associação: {dados_produtor.get('associacao', 'Nenhuma')}\n")
-            f.write(f"  Certificado Orgânico: {'Sim' if dados_cert.get('certificado', False) else 'Não'}\n")
-            f.write("-" * 30 + "\nDados do Talhão de Origem:\n")
-            f.write(f"  ID Talhão (Produtor): {id_talhao_produtor}\n  ID Único (Sistema): {id_talhao_unico}\n")
-            f.write(f"  Tamanho: {dados_talhao.get('tamanho_ha', 'N/A')} ha\n  Tipo de Solo: {dados_talhao.get('tipo_solo', 'N/A')}\n")
-            f.write("-" * 30 + "\nHistórico Recente de Insumos Orgânicos (Neste Talhão):\n")
-            if insumos_relevantes:
-                for insumo in insumos_relevantes[:5]:
-                    f.write(f"  - {insumo['data_aplicacao_br']}: {insumo.get('tipo_insumo')} ({insumo.get('quantidade', 'N/A')})\n")
-            else: f.write("  Nenhum registro de insumo encontrado.\n")
-            f.write("-" * 30 + "\nObservações do Plantio: {plantio_encontrado.get('observacoes', 'Nenhuma')}\n\n")
-            f.write(f"Relatório gerado em: {datetime.datetime.now().strftime('%d/%m/%Y %H:%M:%S')}\n")
+        nome_arquivo_relatorio = rastreabilidade.gravar_relatorio(rastreabilidade.coletar_dados(conexao, plantios_db)[0])
         print(f"Relatório salvo em '{nome_arquivo_relatorio}'.")
+    except cx_Oracle.DatabaseError: print("Erro ao ler os dados do lote. Consulte o log.")
     except IOError as e: registrar_erro(f"Erro ao gerar relatório: {e}")
     except Exception as e: registrar_erro(f"Erro inesperado no relatório: {e}")
 
+def gerar_relatorios_rastreabilidade_lote(conexao):
+    """Gera fichas de rastreabilidade para vários lotes de uma vez (por produtor, status e janela de colheita)."""
+    if not conexao: registrar_erro("Conexão Oracle inválida."); return
+    print("\n--- Relatórios de Rastreabilidade em Lote ---")
+    filtros = {"id_produtor": obter_input_validado("ID do produtor (Enter = todos)", obrigatorio=False)}
+    status = obter_input_validado("Status, separados por vírgula", valor_padrao="Disponível")
+    filtros["status"] = [s.strip() for s in status.split(',') if s.strip()]
+    filtros["data_inicio"] = obter_input_validado("Colheita a partir de ", tipo_dado=datetime.date, obrigatorio=False)
+    filtros["data_fim"] = obter_input_validado("Colheita até ", tipo_dado=datetime.date, obrigatorio=False)
+    diretorio = obter_input_validado("Pasta de destino", valor_padrao=config.RASTREABILIDADE_DIRETORIO)
+
+    resultado = rastreabilidade.gerar_relatorios_em_lote(conexao, filtros, diretorio)
+    if resultado is None: print("Falha ao gerar os relatórios. Consulte o log."); return
+    if not resultado["lotes"]: print("Nenhum lote atende aos filtros."); return
+    print(f"{resultado['lotes']} relatório(s) gravado(s) em '{diretorio}' em {resultado['duracao_s']:.2f}s "
+          f"({resultado['lotes_por_s']:.0f} lotes/s).")
+
+def verificar_indices_banco(conexao):
+    """Mostra quais índices gerenciados estão faltando, divergentes ou sem uso, e oferece criar os faltantes."""
+    if not conexao: registrar_erro("Conexão Oracle inválida."); return
+    print("\n--- Verificação de Índices do Banco ---")
+    resultado = indices.verificar_indices(conexao)
+    if resultado is None: print("Não foi possível verificar os índices. Consulte o log."); return
+
+    print(f"Índices presentes e corretos: {len(resultado['ok'])} de {len(indices.INDICES_GERENCIADOS)}")
+    for nome, outro in resultado["cobertos"]:
+        print(f"  [OK] {nome}: mesmas colunas já indexadas por {outro}")
+    for nome, atuais, esperadas in resultado["divergentes"]:
+        print(f"  [DIVERGENTE] {nome}: colunas ({', '.join(atuais)}), esperado ({', '.join(esperadas)})")
+    for nome, tabela, colunas, motivo in resultado["faltando"]:
+        print(f"  [FALTANDO] {nome} em {tabela} ({', '.join(colunas)}) - usado por: {motivo}")
+    for nome in resultado["nao_usados"]:
+        print(f"  [SEM USO] {nome}: nenhum uso registrado desde o início do monitoramento")
+    if not (resultado["divergentes"] or resultado["faltando"] or resultado["nao_usados"]):
+        print("Nenhum problema encontrado.")
+
+    if resultado["faltando"] and confirmar_acao(f"Criar {len(resultado['faltando'])} índice(s) faltando agora?"):
+        criados = indices.criar_indices_faltando(conexao, {nome for nome, _, _, _ in resultado["faltando"]})
+        print(f"{criados} índice(s) criado(s).")
+
+def visualizar_estatisticas_consultas(limite=15):
+    """Mostra as consultas que mais consumiram tempo do banco desde o início (ou desde a última limpeza)."""
+    print("\n--- Estatísticas de Consultas (por tempo total) ---")
+    if not config.INSTRUMENTACAO_ATIVA: print("Instrumentação desativada (AGRO_INSTRUMENTACAO=0)."); return
+    estatisticas = instrumentacao.resumo(limite=limite)
+    if not estatisticas: print("Nenhuma consulta registrada ainda."); return
+    print(f"{'#':>3} {'Exec.':>7} {'Linhas':>9} {'Total ms':>10} {'Fetch ms':>9} {'p50':>8} {'p95':>8} {'p99':>8} {'Lentas':>6}")
+    print("-" * 80)
+    for i, e in enumerate(estatisticas, 1):
+        print(f"{i:>3} {e['execucoes']:>7} {e['linhas']:>9} {e['tempo_total_ms']:>10.1f} {e['tempo_fetch_ms']:>9.1f} "
+              f"{e['p50_ms']:>8.2f} {e['p95_ms']:>8.2f} {e['p99_ms']:>8.2f} {e['lentas']:>6}")
+        print(f"    {e['sql'][:150]}{' (...)' if len(e['sql']) > 150 else ''}" + (f" [{e['erros']} erro(s)]" if e['erros'] else ""))
+    print("-" * 80)
+
+def visualizar_consultas_lentas():
+    """Mostra as consultas lentas mais recentes (formato dos binds, sem valores)."""
+    print(f"\n--- Consultas Lentas Recentes (>= {config.CONSULTA_LENTA_MS:.0f} ms) ---")
+    lentas = instrumentacao.consultas_lentas()
+    if not lentas: print("Nenhuma consulta lenta registrada."); return
+    for registro in lentas:
+        print(f"[{registro['em']}] {registro['duracao_ms']:.1f} ms - binds: {registro['binds']}")
+        print(f"    {registro['sql'][:150]}{' (...)' if len(registro['sql']) > 150 else ''}")
+    print(f"Histórico completo em '{config.ARQUIVO_LOG_CONSULTAS_LENTAS}'.")
+
+def zerar_estatisticas_consultas():
+    """Recomeça a contagem (ex: antes de medir uma tela específica)."""
+    if confirmar_acao("Zerar as estatísticas de consultas?"): instrumentacao.zerar(); print("Estatísticas zeradas.")
+
+def visualizar_metricas_pool(conexao):
+    """Mostra a ocupação e os tempos de espera do pool de sessões Oracle."""
+    print("\n--- Pool de Sessões Oracle ---")
+    metricas = database.obter_metricas_pool(conexao)
+    if not metricas: print("Métricas indisponíveis para esta conexão."); return
+    print(f"Sessões abertas: {metricas['sessoes_abertas']} (ocupadas: {metricas['sessoes_ocupadas']})")
+    print(f"Checkouts: {metricas['checkouts']} | espera média {metricas['espera_media_s']*1000:.1f} ms, máx {metricas['espera_max_s']*1000:.1f} ms")
+    print(f"Sessões descartadas: {metricas['sessoes_descartadas']} | leituras repetidas: {metricas['leituras_repetidas']}")
+    acertos, faltas = metricas['cache_sql_acertos_estimados'], metricas['cache_sql_faltas_estimadas']
+    print(f"Cache de comandos SQL ({metricas['cache_sql_tamanho']} por sessão), ESTIMATIVA (o driver não informa os acertos): "
+          f"{acertos} acertos, {faltas} faltas ({acertos / (acertos + faltas) if acertos + faltas else 0:.1%} de acertos)")
+
+def exportar_snapshot(conexao):
+    """Exporta todas as tabelas para um snapshot colunar (leitura offline, sem acessar o Oracle)."""
+    if not conexao: registrar_erro("Conexão Oracle inválida."); return
+    print("\n--- Exportar Snapshot Colunar ---")
+    padrao = f"snapshot_agro_{datetime.date.today():%Y%m%d}{exportacao.EXTENSAO_SNAPSHOT}"
+    caminho = obter_input_validado("Arquivo de destino", valor_padrao=padrao)
+    if not caminho: return
+    linhas = exportacao.exportar_snapshot(conexao, caminho)
+    if linhas is None: print("Falha na exportação. Consulte o log."); return
+    for tabela, total in linhas.items(): print(f"  {tabela:<22} {total:>8} linha(s)")
+    print(f"Snapshot gravado em '{caminho}' ({os.path.getsize(caminho) / 1024:.1f} KB).")
+
+def resumir_snapshot():
+    """Resumo de um snapshot já exportado, lido via mmap (não usa o banco)."""
+    print("\n--- Resumo de Snapshot ---")
+    caminho = obter_input_validado("Arquivo do snapshot")
+    if not caminho: return
+    try: snapshot = exportacao.Snapshot(caminho)
+    except (OSError, ValueError) as e: print(f"Não foi possível abrir o snapshot: {e}"); return
+    with snapshot:
+        print(f"Criado em: {snapshot.metadados['criado_em']}")
+        for tabela in snapshot.tabelas(): print(f"  {tabela:<22} {snapshot.linhas(tabela):>8} linha(s)")
+        if "PLANTIOS_PRODUTOS" in snapshot.tabelas():
+            for nome in ("status", "cultura"):
+                contagem = snapshot.coluna("PLANTIOS_PRODUTOS", nome).contar_valores()
+                mais_comuns = sorted(contagem.items(), key=lambda item: -item[1])[:10]
+                print(f"Plantios por {nome}: " + ", ".join(f"{valor or 'N/A'}={n}" for valor, n in mais_comuns))
+
 # --- NOVA FUNÇÃO ---
 def listar_demandas(conexao):
     """Lista as demandas registradas."""
-    if not conexao or cx_Oracle is None: registrar_erro("Conexão Oracle inválida."); return
+    if not conexao: registrar_erro("Conexão Oracle inválida."); return
     print("\n--- Demandas Registradas ---")
-    demandas = database.carregar_demandas(conexao) # Carrega do Oracle
-    if not demandas: print("Nenhuma demanda registrada."); return
-
+    total = 0
+    for d in database.iterar_demandas(conexao): # Lê do Oracle em lotes, imprimindo conforme chega
+        if total == 0:
+            print("-" * 80)
+            print(f"{'ID Demanda':<12} {'Cultura':<20} {'Qtd.':<10} {'Unid.':<10} {'Necessidade':<15} {'Registrado em':<15}")
+            print("-" * 80)
+        total += 1
+        print(f"{d['id_demanda'][:8]:<12} {d['cultura']:<20} {d['quantidade']:<10} {d['unidade_medida']:<10} {formatar_data_br(d.get('data_necessidade')):<15} {formatar_data_br(d.get('registrado_em')):<15}")
+    if total == 0: print("Nenhuma demanda registrada."); return
     print("-" * 80)
-    print(f"{'ID Demanda':<12} {'Cultura':<20} {'Qtd.':<10} {'Unid.':<10} {'Necessidade':<15} {'Registrado em':<15}")
+
+def visualizar_casamento_demandas(conexao):
+    """Mostra, para cada demanda em aberto, os lotes candidatos e quanto da quantidade pedida já está coberta."""
+    if not conexao: registrar_erro("Conexão Oracle inválida."); return
+    print("\n--- Demandas x Oferta ---")
+    resultados = casamento_demandas.casar_demandas_abertas(conexao)
+    if resultados is None: print("Não foi possível casar demandas e oferta. Consulte o log."); return
+    if not resultados: print("Nenhuma demanda em aberto."); return
+    print(f"(Candidatos: colheita de {config.CASAMENTO_JANELA_DIAS} dias antes a {config.CASAMENTO_TOLERANCIA_DIAS} dias depois da necessidade)")
+    cobertas = 0
+    for r in resultados:
+        d = r.demanda
+        if r.cobertura_pct >= 100: cobertas += 1
+        print("-" * 80)
+        print(f"Demanda {d.id_demanda[:8]}: {d.cultura} - {d.quantidade} {d.unidade_medida or ''} até {formatar_data_br(d.data_necessidade)}"
+              f" | Cobertura: {r.cobertura_pct:.0f}% ({r.quantidade_coberta} {d.unidade_medida or ''})")
+        if not r.candidatos: print("  Nenhum lote candidato."); continue
+        for c in r.candidatos:
+            p = c.plantio
+            quantidade = f"{p.quantidade_colhida} {p.unidade_medida or ''}" if p.quantidade_colhida is not None else "a colher"
+            prazo = "no prazo" if c.dias_diferenca <= 0 else f"{c.dias_diferenca} dia(s) após"
+            print(f"  Lote {p.id_plantio[:8]} | Produtor {p.id_produtor} | {p.status:<10} | {formatar_data_br(c.data_referencia)} ({prazo}) | {quantidade}")
     print("-" * 80)
-    for d in demandas:
-        print(f"{d['id_demanda'][:8]:<12} {d['cultura']:<20} {d['quantidade']:<10} {d['unidade_medida']:<10} {formatar_data_br(d.get('data_necessidade')):<15} {formatar_data_br(d.get('registrado_em')):<15}")
-    print("-" * 80)
\ No newline at end of file
+    print(f"{cobertas} de {len(resultados)} demanda(s) com cobertura total pela oferta disponível.")
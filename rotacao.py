@@ -0,0 +1,167 @@
+import time
+import bisect
+import datetime
+import threading
+from collections import namedtuple
+import config
+import database
+import indice_culturas
+from catalogo_sql import SQL
+
+# Importa cx_Oracle do config
+cx_Oracle = config.cx_Oracle
+
+# --- Índice de Rotação de Culturas ---
+# Para cada talhão (id_talhao_unico), a sequência de plantios ordenada por data de plantio.
+# É montado uma vez com uma leitura em fluxo de PLANTIOS_PRODUTOS e depois mantido incrementalmente
+# pelas operações de plantio em crud_operations (depois do commit); a cada ROTACAO_RECARGA_S é refeito do banco para
+# incorporar alterações feitas fora desta aplicação.
+
+AlertaRotacao = namedtuple("AlertaRotacao", "id_talhao_unico tipo anterior atual dias_pousio")
+
+def _chave_ordem(plantio):
+    return ((plantio.data_plantio or datetime.date.min).toordinal(), plantio.id_plantio)
+
+
+class IndiceRotacao:
+    """Sequência de plantios por talhão, do mais antigo ao mais recente."""
+
+    def __init__(self):
+        self._chaves = {} # id_talhao_unico -> [(ordinal da data de plantio, id_plantio)], paralela a _plantios
+        self._plantios = {} # id_talhao_unico -> [Plantio]
+        self._talhao_do_plantio = {} # id_plantio -> id_talhao_unico
+        self._trava = threading.Lock()
+
+    def registrar(self, plantio):
+        """Insere (ou substitui) um plantio na sequência do seu talhão."""
+        with self._trava:
+            self._remover(plantio.id_plantio)
+            chaves = self._chaves.setdefault(plantio.id_talhao_unico, [])
+            plantios = self._plantios.setdefault(plantio.id_talhao_unico, [])
+            posicao = bisect.bisect(chaves, _chave_ordem(plantio))
+            chaves.insert(posicao, _chave_ordem(plantio)); plantios.insert(posicao, plantio)
+            self._talhao_do_plantio[plantio.id_plantio] = plantio.id_talhao_unico
+
+    def _anexar_ordenado(self, plantio):
+        """Carga inicial: o fluxo já vem ordenado por talhão e data, basta anexar."""
+        self._chaves.setdefault(plantio.id_talhao_unico, []).append(_chave_ordem(plantio))
+        self._plantios.setdefault(plantio.id_talhao_unico, []).append(plantio)
+        self._talhao_do_plantio[plantio.id_plantio] = plantio.id_talhao_unico
+
+    def _remover(self, id_plantio):
+        id_talhao = self._talhao_do_plantio.pop(id_plantio, None)
+        if id_talhao is None: return
+        plantios = self._plantios[id_talhao]
+        for i, plantio in enumerate(plantios):
+            if plantio.id_plantio == id_plantio:
+                del plantios[i]; del self._chaves[id_talhao][i]; break
+
+    def remover(self, id_plantio):
+        with self._trava: self._remover(id_plantio)
+
+    def remover_talhao(self, id_talhao_unico):
+        """Remove um talhão inteiro (exclusão em cascata de talhão/produtor)."""
+        with self._trava:
+            for plantio in self._plantios.pop(id_talhao_unico, []): self._talhao_do_plantio.pop(plantio.id_plantio, None)
+            self._chaves.pop(id_talhao_unico, None)
+
+    def historico(self, id_talhao_unico):
+        """Plantios do talhão, do mais recente ao mais antigo."""
+        with self._trava: return list(reversed(self._plantios.get(id_talhao_unico, [])))
+
+    def cultura_anterior(self, id_talhao_unico):
+        """Cultura do plantio mais recente do talhão, ou None."""
+        with self._trava:
+            plantios = self._plantios.get(id_talhao_unico)
+            return plantios[-1].cultura if plantios else None
+
+    def talhoes(self):
+        with self._trava: return {id_talhao: list(plantios) for id_talhao, plantios in self._plantios.items()}
+
+
+def analisar_rotacao(indice, pousio_minimo_dias=None, chave_cultura=None):
+    """Percorre todos os talhões uma vez e aponta culturas repetidas em sequência e pousios curtos.
+
+    Plantios cancelados são ignorados. O pousio é o intervalo entre a colheita do plantio anterior
+    (real ou prevista) e o plantio seguinte; negativo quando os ciclos se sobrepõem.
+    """
+    pousio_minimo_dias = config.POUSIO_MINIMO_DIAS if pousio_minimo_dias is None else pousio_minimo_dias
+    chave_cultura = chave_cultura or indice_culturas.normalizar
+    alertas = []
+    for id_talhao, plantios in indice.talhoes().items():
+        anterior = None
+        for atual in plantios:
+            if atual.status == 'Cancelado' or atual.data_plantio is None: continue
+            if anterior is not None:
+                fim_anterior = anterior.data_colheita_real or anterior.data_prevista_colheita
+                pousio = (atual.data_plantio - fim_anterior).days if fim_anterior else None
+                if chave_cultura(atual.cultura) == chave_cultura(anterior.cultura):
+                    alertas.append(AlertaRotacao(id_talhao, "Cultura repetida", anterior, atual, pousio))
+                if pousio is not None and pousio < pousio_minimo_dias:
+                    alertas.append(AlertaRotacao(id_talhao, "Pousio curto", anterior, atual, pousio))
+            anterior = atual
+    return alertas
+
+# --- Instância compartilhada ---
+_indice = None
+_carregado_em = 0.0
+_trava_carga = threading.Lock()
+
+def obter_indice(conexao):
+    """Índice de rotação, montado do banco na primeira chamada (ou quando a recarga periódica vence)."""
+    global _indice, _carregado_em
+    with _trava_carga:
+        if _indice is not None and time.monotonic() - _carregado_em < config.ROTACAO_RECARGA_S: return _indice
+        novo = IndiceRotacao()
+        try:
+            for plantio in database.iterar_plantios_produtos(conexao, ordenar_por="talhao_data_plantio", estrito=True):
+                novo._anexar_ordenado(plantio)
+        except cx_Oracle.DatabaseError:
+            if _indice is not None: return _indice # Mantém o índice anterior; o erro já foi registrado
+            raise
+        if getattr(conexao, "em_transacao", False): return novo # Lido com escritas não confirmadas: não é compartilhado
+        _indice, _carregado_em = novo, time.monotonic()
+        return _indice
+
+def invalidar():
+    """Descarta o índice (ex: após importação em lote); a próxima consulta o refaz do banco."""
+    global _indice
+    with _trava_carga: _indice = None
+
+def _indice_carregado():
+    with _trava_carga: return _indice
+
+def registrar_plantio(plantio):
+    """Aplica um plantio novo/editado ao índice, se ele já estiver carregado."""
+    indice = _indice_carregado()
+    if indice is not None: indice.registrar(plantio)
+
+def cultura_anterior(conexao, id_talhao_unico):
+    """Cultura do plantio mais recente do talhão, ou None. Usa o índice se ele já estiver carregado; senão faz uma
+    consulta só desse talhão (um comando avulso não precisa ler todos os plantios para isso). Com escritas não
+    confirmadas na conexão (ex: plantios anteriores do mesmo lote de comandos), consulta sempre o banco: o índice
+    só as recebe depois do commit."""
+    indice = _indice_carregado()
+    if indice is not None and not getattr(conexao, "em_transacao", False): return indice.cultura_anterior(id_talhao_unico)
+    cursor = None
+    try:
+        cursor = conexao.cursor()
+        cursor.execute(SQL["plantio.cultura_anterior"], (id_talhao_unico,))
+        linha = cursor.fetchone()
+    finally:
+        if cursor: cursor.close()
+    return linha[0] if linha else None
+
+def recarregar_plantio(conexao, id_plantio):
+    """Relê um plantio alterado no banco e o aplica ao índice carregado."""
+    if _indice_carregado() is None: return
+    for plantio in database.carregar_plantios_produtos(conexao, {"ids": [id_plantio]}): registrar_plantio(plantio)
+
+def remover_plantio(id_plantio):
+    indice = _indice_carregado()
+    if indice is not None: indice.remover(id_plantio)
+
+def remover_talhoes(ids_talhoes):
+    indice = _indice_carregado()
+    if indice is not None:
+        for id_talhao in ids_talhoes: indice.remover_talhao(id_talhao)
@@ -0,0 +1,308 @@
+import sys
+import json
+import time
+import base64
+import asyncio
+import argparse
+import datetime
+import threading
+from functools import partial
+from itertools import islice
+from urllib.parse import urlsplit, parse_qsl, unquote
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+import config
+import database
+import cache_referencia
+import comandos
+import validacao
+import indice_culturas
+import rastreabilidade
+from utils import registrar_erro
+
+# Importa cx_Oracle do config
+cx_Oracle = config.cx_Oracle
+
+# --- Serviço HTTP/JSON (mercado, demandas, rastreabilidade) ---
+# Uso: python servico_http.py --porta 8080
+# Um único processo asyncio atende as conexões (HTTP/1.1 com keep-alive, só biblioteca padrão). As chamadas ao
+# driver bloqueiam, então rodam num ThreadPoolExecutor de SERVICO_TRABALHADORES threads, cada uma com a sua
+# ConexaoPool derivada (ConexaoPool não é thread-safe) sobre o mesmo pool de sessões. Até SERVICO_FILA_MAX
+# pedidos esperam por uma thread; além disso (ou após ESPERA_FILA_S), a resposta é 503.
+# Páginas do mercado ficam num cache de respostas já serializadas por SERVICO_CACHE_TTL_S, e pedidos iguais que
+# chegam juntos durante uma falta esperam a mesma consulta em vez de repeti-la.
+# Rotas (datas de entrada DD/MM/AAAA, como no restante do sistema; na saída, ISO AAAA-MM-DD):
+#   GET  /mercado?cultura=&associacao=&data_inicio=&data_fim=&certificados=1&limite=&apos=<proxima da página anterior>
+#   GET  /demandas?cultura=&data_inicio=&data_fim=&limite=
+#   POST /demandas                       {"cultura", "quantidade", "unidade_medida", "data_necessidade", "observacoes"}
+#   GET  /rastreabilidade/<id_plantio>   (?formato=texto devolve a ficha em texto)
+#   GET  /saude
+
+LIMITE_MAX = 100 # Itens por resposta em /mercado e /demandas
+CORPO_MAX_BYTES = 64 * 1024
+CABECALHOS_MAX = 100
+TEMPO_OCIOSO_S = 30 # Conexão keep-alive sem novo pedido é fechada
+ESPERA_FILA_S = 5.0
+
+
+class ErroHttp(Exception):
+    def __init__(self, status, mensagem=None):
+        super().__init__(mensagem or HTTPStatus(status).phrase)
+        self.status = status
+
+
+def _para_json(valor):
+    if isinstance(valor, (datetime.date, datetime.datetime)): return valor.isoformat()
+    return str(valor) # Ex: Decimal
+
+def _json(dados):
+    return json.dumps(dados, ensure_ascii=False, default=_para_json).encode("utf-8")
+
+def _limite(parametros, padrao):
+    try: limite = int(parametros.get("limite") or padrao)
+    except ValueError: raise ErroHttp(400, "parâmetro 'limite' deve ser inteiro")
+    return max(1, min(limite, LIMITE_MAX))
+
+def _codificar_chave(chave):
+    """Chave de continuação do mercado (data, id_plantio) -> texto opaco para a URL."""
+    if chave is None: return None
+    data, id_plantio = chave
+    return base64.urlsafe_b64encode(json.dumps([data.isoformat()[:10], id_plantio]).encode("utf-8")).decode("ascii")
+
+def _decodificar_chave(texto):
+    try:
+        data, id_plantio = json.loads(base64.urlsafe_b64decode(texto.encode("ascii")))
+        return datetime.date.fromisoformat(data), id_plantio
+    except (ValueError, TypeError): raise ErroHttp(400, "parâmetro 'apos' inválido")
+
+
+class ServicoHttp:
+    """Rotas do serviço sobre uma conexão lógica (ConexaoPool); `tratar` pode ser chamado sem socket (testes)."""
+
+    def __init__(self, conexao, trabalhadores=None, fila_max=None, cache_ttl_s=None):
+        self.conexao = conexao
+        self.trabalhadores = trabalhadores or config.SERVICO_TRABALHADORES
+        self._executor = ThreadPoolExecutor(max_workers=self.trabalhadores, thread_name_prefix="servico")
+        self._vagas = None # Semáforo criado no laço de eventos (trabalhadores + fila)
+        self._fila_max = config.SERVICO_FILA_MAX if fila_max is None else fila_max
+        self._local = threading.local()
+        self._derivadas = []; self._trava = threading.Lock()
+        self.cache = cache_referencia.CacheTTL(config.CACHE_CAPACIDADE, config.SERVICO_CACHE_TTL_S if cache_ttl_s is None else cache_ttl_s)
+        self._em_andamento = {} # chave do cache -> Future da consulta em curso
+        self._metricas = {"pedidos": 0, "rejeitados_503": 0, "consultas_coalescidas": 0}
+        self._rotas = {("GET", "mercado"): self._mercado, ("GET", "demandas"): self._listar_demandas,
+                       ("POST", "demandas"): self._registrar_demanda, ("GET", "rastreabilidade"): self._rastreabilidade,
+                       ("GET", "saude"): self._saude}
+
+    # --- Execução nas threads ---
+
+    def _conexao_da_thread(self):
+        conexao = getattr(self._local, "conexao", None)
+        if conexao is None:
+            conexao = self._local.conexao = self.conexao.derivar()
+            with self._trava: self._derivadas.append(conexao)
+        return conexao
+
+    def _no_trabalhador(self, funcao, *args):
+        return funcao(self._conexao_da_thread(), *args)
+
+    async def _executar(self, funcao, *args):
+        """Roda `funcao(conexao_da_thread, *args)` no executor, respeitando o limite da fila."""
+        if self._vagas is None: self._vagas = asyncio.Semaphore(self.trabalhadores + self._fila_max)
+        try: await asyncio.wait_for(self._vagas.acquire(), ESPERA_FILA_S)
+        except asyncio.TimeoutError:
+            self._metricas["rejeitados_503"] += 1
+            raise ErroHttp(503, "serviço ocupado; tente novamente")
+        try: return await asyncio.get_running_loop().run_in_executor(self._executor, partial(self._no_trabalhador, funcao, *args))
+        finally: self._vagas.release()
+
+    async def _com_cache(self, chave, produzir):
+        """Corpo em cache para `chave`, ou o de `produzir()` (uma só execução para pedidos simultâneos iguais)."""
+        achou, corpo = self.cache.obter(chave)
+        if achou: return corpo, True
+        pendente = self._em_andamento.get(chave)
+        if pendente is not None:
+            self._metricas["consultas_coalescidas"] += 1
+            return await asyncio.shield(pendente), True
+        pendente = self._em_andamento[chave] = asyncio.get_running_loop().create_future()
+        try:
+            corpo = await produzir()
+            self.cache.guardar(chave, corpo); pendente.set_result(corpo)
+            return corpo, False
+        except BaseException as e:
+            pendente.set_exception(e); pendente.exception() # Marca como lida se ninguém mais esperava
+            raise
+        finally: del self._em_andamento[chave]
+
+    # --- Rotas (devolvem (status, corpo, tipo, cabeçalhos extras)) ---
+
+    async def _mercado(self, parametros, _corpo, _resto):
+        chave = ("mercado", tuple(sorted((k, v) for k, v in parametros.items() if v)))
+        corpo, do_cache = await self._com_cache(chave, partial(self._executar, _pesquisar_mercado, parametros))
+        return 200, corpo, "application/json", {"Cache-Control": f"max-age={int(self.cache.ttl_s)}", "X-Cache": "HIT" if do_cache else "MISS"}
+
+    async def _listar_demandas(self, parametros, _corpo, _resto):
+        return 200, _json(await self._executar(_listar_demandas, parametros)), "application/json", {}
+
+    async def _registrar_demanda(self, _parametros, corpo, _resto):
+        try: dados = json.loads(corpo or b"{}")
+        except ValueError as e: raise ErroHttp(400, f"JSON inválido: {e}")
+        if not isinstance(dados, dict): raise ErroHttp(400, "o corpo deve ser um objeto JSON")
+        resultado = await self._executar(_registrar_demanda, dados)
+        return 201, _json(resultado), "application/json", {}
+
+    async def _rastreabilidade(self, parametros, _corpo, resto):
+        if len(resto) != 1: raise ErroHttp(404)
+        dados = await self._executar(_ficha_rastreabilidade, unquote(resto[0]))
+        if parametros.get("formato") == "texto": return 200, rastreabilidade.renderizar_relatorio(dados).encode("utf-8"), "text/plain; charset=utf-8", {}
+        return 200, _json(_ficha_em_json(dados)), "application/json", {}
+
+    async def _saude(self, _parametros, _corpo, _resto):
+        return 200, _json({"pool": database.obter_metricas_pool(self.conexao), "cache": self.cache.obter_estatisticas(),
+                           "trabalhadores": self.trabalhadores, **self._metricas}), "application/json", {}
+
+    async def tratar(self, metodo, alvo, corpo=b""):
+        """Atende um pedido; retorna (status, corpo, tipo, cabeçalhos extras)."""
+        self._metricas["pedidos"] += 1
+        url = urlsplit(alvo)
+        partes = [p for p in url.path.split("/") if p]
+        rota = self._rotas.get((metodo, partes[0] if partes else ""))
+        try:
+            if rota is None:
+                if any(chave[1] == (partes[0] if partes else "") for chave in self._rotas): raise ErroHttp(405)
+                raise ErroHttp(404)
+            return await rota(dict(parse_qsl(url.query)), corpo, partes[1:])
+        except ErroHttp as e: return e.status, _json({"erro": str(e)}), "application/json", {}
+        except ValueError as e: return 400, _json({"erro": str(e)}), "application/json", {} # ErroComando/ErroValidacao
+        except cx_Oracle.DatabaseError as e:
+            registrar_erro(f"Erro Oracle no serviço HTTP ({metodo} {url.path}): {e}", erro=e, operacao="servico_http")
+            return 500, _json({"erro": "erro no banco de dados"}), "application/json", {}
+        except Exception as e:
+            registrar_erro(f"Erro inesperado no serviço HTTP ({metodo} {url.path}): {e}", operacao="servico_http")
+            return 500, _json({"erro": "erro interno"}), "application/json", {}
+
+    # --- Conexões HTTP ---
+
+    async def atender(self, leitor, escritor):
+        """Laço de uma conexão TCP: vários pedidos em sequência enquanto o cliente mantiver keep-alive."""
+        try:
+            while True:
+                try: pedido = await asyncio.wait_for(_ler_pedido(leitor), TEMPO_OCIOSO_S)
+                except asyncio.TimeoutError: break
+                except ErroHttp as e:
+                    escritor.write(_montar_resposta(e.status, _json({"erro": str(e)}), "application/json", {}, False)); break
+                if pedido is None: break
+                metodo, alvo, versao, cabecalhos, corpo = pedido
+                manter = (versao == "HTTP/1.1" and cabecalhos.get("connection", "").lower() != "close") or \
+                         cabecalhos.get("connection", "").lower() == "keep-alive"
+                status, resposta, tipo, extras = await self.tratar(metodo, alvo, corpo)
+                escritor.write(_montar_resposta(status, resposta, tipo, extras, manter))
+                await escritor.drain()
+                if not manter: break
+        except (ConnectionError, asyncio.IncompleteReadError): pass
+        finally:
+            escritor.close()
+            try: await escritor.wait_closed()
+            except ConnectionError: pass
+
+    def fechar(self):
+        """Para as threads e devolve as sessões das conexões derivadas."""
+        self._executor.shutdown(wait=True)
+        for conexao in self._derivadas:
+            try: conexao.rollback()
+            except cx_Oracle.DatabaseError: pass
+
+
+async def _ler_pedido(leitor):
+    """(método, alvo, versão, cabeçalhos, corpo) do próximo pedido, ou None se o cliente fechou a conexão."""
+    linha = await leitor.readline()
+    if not linha.strip(): return None
+    try: metodo, alvo, versao = linha.decode("latin-1").split()
+    except ValueError: raise ErroHttp(400, "linha de pedido inválida")
+    cabecalhos = {}
+    while True:
+        linha = await leitor.readline()
+        if linha in (b"\r\n", b"\n", b""): break
+        nome, _, valor = linha.decode("latin-1").partition(":")
+        cabecalhos[nome.strip().lower()] = valor.strip()
+        if len(cabecalhos) > CABECALHOS_MAX: raise ErroHttp(431)
+    try: tamanho = int(cabecalhos.get("content-length") or 0)
+    except ValueError: raise ErroHttp(400, "Content-Length inválido")
+    if tamanho > CORPO_MAX_BYTES: raise ErroHttp(413)
+    corpo = await leitor.readexactly(tamanho) if tamanho else b""
+    return metodo.upper(), alvo, versao.upper(), cabecalhos, corpo
+
+def _montar_resposta(status, corpo, tipo, extras, manter):
+    linhas = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}", f"Content-Type: {tipo}", f"Content-Length: {len(corpo)}",
+              f"Connection: {'keep-alive' if manter else 'close'}"]
+    linhas += [f"{nome}: {valor}" for nome, valor in extras.items()]
+    return ("\r\n".join(linhas) + "\r\n\r\n").encode("latin-1") + corpo
+
+# --- Consultas (rodam nas threads do executor, cada uma com sua conexão) ---
+
+def _pesquisar_mercado(conexao, parametros):
+    filtros = {"associacao": validacao.campo_texto(parametros, "associacao", False),
+               "data_inicio": validacao.campo_data(parametros, "data_inicio"), "data_fim": validacao.campo_data(parametros, "data_fim"),
+               "somente_certificados": parametros.get("certificados") in ("1", "sim", "true")}
+    cultura = validacao.campo_texto(parametros, "cultura", False)
+    if cultura:
+        indice = indice_culturas.carregar_indice(conexao)
+        canonica = indice.resolver(cultura)
+        filtros["cultura"] = indice.variantes(canonica) if canonica else cultura # Todas as grafias gravadas do produto
+    apos = _decodificar_chave(parametros["apos"]) if parametros.get("apos") else None
+    ofertas, chave = database.pesquisar_mercado(conexao, filtros, apos, _limite(parametros, config.MERCADO_TAMANHO_PAGINA))
+    return _json({"ofertas": [oferta._replace(certificado=bool(oferta.certificado))._asdict() for oferta in ofertas], "proxima": _codificar_chave(chave)})
+
+def _listar_demandas(conexao, parametros):
+    filtros = {"cultura": validacao.campo_texto(parametros, "cultura", False),
+               "data_inicio": validacao.campo_data(parametros, "data_inicio"), "data_fim": validacao.campo_data(parametros, "data_fim")}
+    demandas = database.iterar_demandas(conexao, {k: v for k, v in filtros.items() if v is not None}, estrito=True)
+    try: return {"demandas": [demanda._asdict() for demanda in islice(demandas, _limite(parametros, LIMITE_MAX))]}
+    finally: demandas.close() # Fecha o cursor já, sem esperar o coletor de lixo (a sessão volta ao pool)
+
+def _registrar_demanda(conexao, dados):
+    return comandos.executar_operacao(conexao, dict(dados, comando="demanda-registrar"))
+
+def _ficha_rastreabilidade(conexao, id_plantio):
+    plantios = list(database.iterar_plantios_produtos(conexao, {"ids": [id_plantio]}, estrito=True))
+    if not plantios: raise ErroHttp(404, f"plantio '{id_plantio}' não encontrado")
+    return rastreabilidade.coletar_dados(conexao, plantios)[0]
+
+def _ficha_em_json(dados):
+    talhao = dados["talhao"]; produtor = dados["produtor"]
+    return {"plantio": dados["plantio"]._asdict(), "certificado": bool(dados["certificado"]),
+            "produtor": {k: v for k, v in produtor._asdict().items() if k != "talhoes"} if produtor else None,
+            "id_talhao_produtor": dados["id_talhao_produtor"], "talhao": talhao._asdict() if talhao else None,
+            "insumos": [insumo._asdict() for insumo in dados["insumos"]]}
+
+# --- Execução ---
+
+async def servir(servico, host, porta):
+    servidor = await asyncio.start_server(servico.atender, host, porta, backlog=1024)
+    enderecos = ", ".join(str(s.getsockname()) for s in servidor.sockets)
+    print(f"[INFO] Serviço HTTP em {enderecos} ({servico.trabalhadores} threads de banco). Ctrl+C para parar.")
+    async with servidor: await servidor.serve_forever()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serviço HTTP/JSON do mercado, demandas e rastreabilidade.")
+    parser.add_argument("--host", default=config.SERVICO_HOST)
+    parser.add_argument("--porta", type=int, default=config.SERVICO_PORTA)
+    parser.add_argument("--trabalhadores", type=int, default=config.SERVICO_TRABALHADORES, help="Threads com chamadas ao banco")
+    args = parser.parse_args(argv)
+    if args.trabalhadores > config.POOL_MAX:
+        print(f"[AVISO] {args.trabalhadores} threads para um pool de {config.POOL_MAX} sessões: as excedentes vão esperar por sessão (ORACLE_POOL_MAX).")
+
+    conexao = database.conectar_banco()
+    if not conexao: return 1
+    servico = ServicoHttp(conexao, args.trabalhadores)
+    inicio = time.perf_counter()
+    try: asyncio.run(servir(servico, args.host, args.porta))
+    except KeyboardInterrupt: pass
+    finally:
+        servico.fechar()
+        print(f"[INFO] Serviço encerrado após {time.perf_counter() - inicio:.0f} s ({servico._metricas['pedidos']} pedidos).")
+        database.desconectar_banco(conexao)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,49 @@
+import os
+import sys
+import datetime
+import pytest
+
+# Os testes rodam sobre o substituto SQLite, com um banco em memória novo por teste (cada pool ":memory:" é um banco)
+os.environ["AGRO_DRIVER"] = "sqlite"
+os.environ["AGRO_SQLITE_ARQUIVO"] = ":memory:"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+import database
+import dados_sinteticos
+import crud_operations as crud
+
+DATA_BASE = datetime.date(2025, 1, 1)
+
+@pytest.fixture(scope="session", autouse=True)
+def _diretorio_de_execucao(tmp_path_factory):
+    """Logs e arquivos gerados vão para um diretório temporário, não para o repositório."""
+    anterior = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp("execucao"))
+    yield
+    os.chdir(anterior)
+
+@pytest.fixture
+def conexao():
+    conexao = database.conectar_banco()
+    assert conexao, "falha ao abrir o banco SQLite em memória"
+    yield conexao
+    database.desconectar_banco(conexao)
+    crud.descartar_caches() # Caches e índices são globais do processo; o próximo teste tem outro banco
+
+@pytest.fixture
+def conexao_populada(conexao):
+    """Banco com uma base sintética determinística: 3 produtores, 12 talhões, 120 plantios e 6 demandas."""
+    assert dados_sinteticos.popular_banco(conexao, dados_sinteticos.BaseSintetica(3, demandas=6, data_base=DATA_BASE))
+    return conexao
+
+@pytest.fixture
+def conexao_arquivo(tmp_path, monkeypatch):
+    """Como conexao_populada, mas num arquivo SQLite (WAL): outra sessão pode ler enquanto esta tem escritas pendentes
+    (no banco em memória compartilhado, o SQLite bloqueia a tabela alterada até o commit)."""
+    monkeypatch.setattr(config, "SQLITE_ARQUIVO", str(tmp_path / "agro.sqlite3"))
+    conexao = database.conectar_banco()
+    assert conexao and dados_sinteticos.popular_banco(conexao, dados_sinteticos.BaseSintetica(3, demandas=6, data_base=DATA_BASE))
+    yield conexao
+    database.desconectar_banco(conexao)
+    crud.descartar_caches()
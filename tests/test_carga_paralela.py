@@ -0,0 +1,61 @@
+import time
+import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+import config
+import carga_paralela
+import importacao
+
+# Consulta que só termina se for interrompida (conta até 10^10)
+SQL_LENTO = "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 10000000000) SELECT COUNT(*) FROM n"
+
+@pytest.fixture
+def executor_de_dois(monkeypatch):
+    """Duas threads: a terceira tarefa fica na fila enquanto as duas primeiras rodam."""
+    executor = ThreadPoolExecutor(max_workers=2)
+    monkeypatch.setattr(carga_paralela, "_executor", executor)
+    monkeypatch.setattr(config, "CARGA_PARALELA_TRABALHADORES", 2)
+    yield
+    executor.shutdown(wait=True)
+
+def test_falha_cancela_as_outras_leituras(conexao, executor_de_dois):
+    no_banco = threading.Event(); ocorrido = {}
+    def falha(c):
+        no_banco.wait(5); time.sleep(0.1) # Deixa a leitura lenta chegar ao banco
+        raise config.cx_Oracle.DatabaseError("falha simulada")
+    def lenta(c):
+        cursor = c.cursor()
+        try:
+            no_banco.set(); cursor.execute(SQL_LENTO); ocorrido["lenta"] = "terminou"
+        except config.cx_Oracle.DatabaseError as e: ocorrido["lenta"] = e; raise
+        finally: cursor.close()
+    def na_fila(c):
+        ocorrido["na_fila"] = "executou"
+
+    inicio = time.perf_counter()
+    with pytest.raises(config.cx_Oracle.DatabaseError, match="falha simulada"):
+        carga_paralela.carregar_em_paralelo(conexao, {"falha": falha, "lenta": lenta, "na_fila": na_fila})
+    assert time.perf_counter() - inicio < 5
+    assert isinstance(ocorrido["lenta"], config.cx_Oracle.DatabaseError) # Interrompida no banco
+    assert "na_fila" not in ocorrido # Cancelada antes de começar
+    assert conexao.obter_metricas()["sessoes_ocupadas"] == 0
+
+def test_sem_falha_retorna_todos_os_resultados(conexao, executor_de_dois):
+    tarefas = {nome: (lambda c, nome=nome: nome.upper()) for nome in ("a", "b", "c")}
+    assert carga_paralela.carregar_em_paralelo(conexao, tarefas) == {"a": "A", "b": "B", "c": "C"}
+
+def _contar_demandas(conexao):
+    cursor = conexao.cursor()
+    try:
+        cursor.execute("SELECT COUNT(*) FROM DEMANDAS")
+        return cursor.fetchone()[0]
+    finally: cursor.close()
+
+def test_transacao_pendente_roda_em_sequencia(conexao, executor_de_dois):
+    cursor = conexao.cursor()
+    cursor.execute(importacao.SQL_INSERT["demandas"], ("D1", "Milho", 1, "kg", datetime.date(2025, 1, 1), None))
+    cursor.close()
+    try: # Na própria sessão: as duas leituras enxergam a escrita ainda não confirmada
+        assert carga_paralela.carregar_em_paralelo(conexao, {"a": _contar_demandas, "b": _contar_demandas}) == {"a": 1, "b": 1}
+    finally: conexao.rollback()
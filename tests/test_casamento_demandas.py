@@ -0,0 +1,71 @@
+import datetime
+import casamento_demandas
+import database
+import crud_operations as crud
+from casamento_demandas import IndiceOferta, casar_demandas
+from indice_culturas import IndiceCulturas
+from registros import Plantio, Demanda
+
+NECESSIDADE = datetime.date(2025, 6, 15)
+
+def _lote(id_plantio, cultura, dias, status="Disponível", quantidade=100, unidade="kg"):
+    data = NECESSIDADE + datetime.timedelta(days=dias)
+    colhido = status == "Disponível"
+    return Plantio(id_plantio, "P1", "T1", cultura, data - datetime.timedelta(days=90), data, data if colhido else None,
+                   quantidade if colhido else None, unidade if colhido else None, status, None, None)
+
+def _demanda(cultura="Milho", quantidade=250, unidade="kg"):
+    return Demanda("D1", cultura, quantidade, unidade, NECESSIDADE, None, None)
+
+# --- Índice de Oferta ---
+
+def test_buscar_pela_faixa_de_datas():
+    lotes = [_lote(f"L{dias}", "Milho", dias) for dias in (-40, -30, -1, 0, 7, 8)] + [_lote("T0", "Tomate", 0)]
+    indice = IndiceOferta(reversed(lotes))
+    assert indice.total_lotes == 7
+    encontrados = indice.buscar(" MILHO", NECESSIDADE - datetime.timedelta(days=30), NECESSIDADE + datetime.timedelta(days=7))
+    assert [p.id_plantio for p in encontrados] == ["L-30", "L-1", "L0", "L7"] # Ordenados pela data, limites inclusive
+    assert indice.buscar("Soja", NECESSIDADE, NECESSIDADE) == []
+
+def test_chave_de_cultura_pelo_indice_de_culturas():
+    indice = IndiceOferta([_lote("L1", "aipim", 0), _lote("L2", "Mandióca", 1)], IndiceCulturas().chave)
+    assert [p.id_plantio for p in indice.buscar("macaxeira", NECESSIDADE, NECESSIDADE + datetime.timedelta(days=1))] == ["L1", "L2"]
+
+def test_lote_sem_data_fica_fora():
+    sem_data = _lote("L1", "Milho", 0, status="Planejado")._replace(data_prevista_colheita=None)
+    assert IndiceOferta([sem_data]).total_lotes == 0
+
+# --- Ranking e Cobertura ---
+
+def test_ranking_e_cobertura():
+    indice = IndiceOferta([_lote("PLAN", "Milho", 0, status="Planejado"), _lote("ATRASADO", "Milho", 3),
+                           _lote("SACAS", "Milho", -1, unidade="sc"), _lote("LONGE", "Milho", -20),
+                           _lote("PERTO", "Milho", -2, quantidade=200)])
+    [resultado] = casar_demandas([_demanda()], indice, janela_dias=30, tolerancia_dias=7, max_candidatos=10)
+    assert [c.plantio.id_plantio for c in resultado.candidatos] == ["PERTO", "LONGE", "ATRASADO", "SACAS", "PLAN"]
+    assert [c.quantidade_util for c in resultado.candidatos] == [200, 100, 100, None, None] # Outra unidade não conta
+    assert resultado.quantidade_coberta == 250 and resultado.cobertura_pct == 100.0
+    [parcial] = casar_demandas([_demanda(quantidade=1000)], indice, janela_dias=30, tolerancia_dias=7, max_candidatos=2)
+    assert len(parcial.candidatos) == 2 and parcial.quantidade_coberta == 400 and parcial.cobertura_pct == 40.0
+
+def test_demanda_sem_data_e_ignorada():
+    sem_data = _demanda()._replace(data_necessidade=None)
+    [resultado] = casar_demandas([sem_data, _demanda()], IndiceOferta([]))
+    assert resultado.candidatos == [] and resultado.cobertura_pct == 0.0
+
+# --- Do Banco ---
+
+def test_casar_demandas_abertas(conexao_populada):
+    lote = max(database.carregar_plantios_produtos(conexao_populada, {"status": ["Disponível"]}), key=lambda p: p.data_colheita_real)
+    id_demanda = crud.gravar_demanda(conexao_populada, None, lote.cultura.upper(), 1, lote.unidade_medida,
+                                     lote.data_colheita_real + datetime.timedelta(days=1))
+    conexao_populada.commit()
+    resultados = casamento_demandas.casar_demandas_abertas(conexao_populada, lote.data_colheita_real)
+    demandas = [d for d in database.carregar_demandas(conexao_populada) if d.data_necessidade >= lote.data_colheita_real]
+    assert sorted(r.demanda.id_demanda for r in resultados) == sorted(d.id_demanda for d in demandas)
+    for resultado in resultados:
+        assert all(c.plantio.status in casamento_demandas.STATUS_OFERTA for c in resultado.candidatos)
+        assert 0 <= resultado.cobertura_pct <= 100
+    [resultado] = [r for r in resultados if r.demanda.id_demanda == id_demanda]
+    assert lote.id_plantio in {c.plantio.id_plantio for c in resultado.candidatos} and resultado.cobertura_pct == 100.0
+    assert casamento_demandas.casar_demandas_abertas(None) is None
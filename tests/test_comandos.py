@@ -0,0 +1,47 @@
+import io
+import json
+import comandos
+import database
+import crud_operations as crud
+
+def _executar(conexao, operacoes, **opcoes):
+    saida = io.StringIO()
+    resumo = comandos.executar(conexao, enumerate(operacoes, start=1), saida=saida, **opcoes)
+    return resumo, [json.loads(linha) for linha in saida.getvalue().splitlines()]
+
+def _produtor(id_produtor, nome="Produtor"):
+    return {"comando": "produtor-cadastrar", "id_produtor": id_produtor, "nome": nome}
+
+def test_operacao_rejeitada_e_desfeita_sozinha(conexao, monkeypatch):
+    executar_original = crud._executar
+    def executar_com_falha(conexao, comando, binds):
+        if comando == "certificacao.inserir" and binds[0] == "PFALHA": raise comandos.cx_Oracle.DatabaseError("falha simulada")
+        return executar_original(conexao, comando, binds)
+    monkeypatch.setattr(crud, "_executar", executar_com_falha)
+
+    resumo, resultados = _executar(conexao, [_produtor("P1"), _produtor("PFALHA"), _produtor("P1"), _produtor("P2")], commit_a_cada=10)
+    assert (resumo["ok"], resumo["erros"], resumo["commits"]) == (2, 2, 1)
+    assert [r["ok"] for r in resultados] == [True, False, False, True]
+    assert "já existe" in resultados[2]["erro"]
+    # O produtor PFALHA chegou a ser inserido antes da falha: o ROLLBACK TO SAVEPOINT o desfez, sem perder P1 e P2
+    assert set(database.carregar_produtores_talhoes(conexao)) == {"P1", "P2"}
+    assert set(database.carregar_status_certificacao(conexao)) == {"P1", "P2"}
+
+def test_commit_a_cada_n_escritas(conexao):
+    resumo, resultados = _executar(conexao, [_produtor(f"P{i}") for i in range(5)] + [{"comando": "mercado"}], commit_a_cada=2)
+    assert resumo["commits"] == 3 and resumo["ok"] == 6
+    assert resultados[-1]["resultado"]["ofertas"] == []
+
+def test_parar_no_erro(conexao):
+    operacoes = [_produtor("P1"), {"comando": "desconhecido"}, _produtor("P2")]
+    resumo, resultados = _executar(conexao, operacoes, parar_no_erro=True)
+    assert resumo["operacoes"] == 2 and [r["ok"] for r in resultados] == [True, False]
+    assert set(database.carregar_produtores_talhoes(conexao)) == {"P1"} # As escritas anteriores ao erro são gravadas
+
+def test_plantio_registrado_por_comando(conexao_populada):
+    resultado = comandos.executar_operacao(conexao_populada, {
+        "comando": "plantio-registrar", "id_produtor": "SP0000001", "id_talhao_produtor": "T01", "cultura": "Milho",
+        "data_plantio": "01/03/2026", "data_prevista_colheita": "01/07/2026"})
+    plantio = database.carregar_plantios_produtos(conexao_populada, {"ids": [resultado["id_plantio"]]})[0]
+    assert plantio.id_talhao_unico == "ST0000001001" and plantio.status == "Planejado"
+    assert resultado["cultura_anterior"] is not None
@@ -0,0 +1,78 @@
+import io
+import json
+import datetime
+import comandos
+import database
+import indice_culturas
+import rotacao
+import crud_operations as crud
+from registros import Plantio
+
+def _nome(conexao, id_produtor="SP0000001"):
+    return database.carregar_produtores_talhoes(conexao, {"id_produtor": id_produtor})[id_produtor].nome
+
+# --- Caches depois do commit ---
+
+def test_cache_invalidado_so_depois_do_commit(conexao_arquivo):
+    outra = conexao_arquivo.derivar() # Outra sessão, como uma thread do serviço HTTP
+    crud.atualizar_produtor(conexao_arquivo, "SP0000001", {"nome": "Nome Novo"})
+    assert _nome(conexao_arquivo) == "Nome Novo" # Com escrita pendente, a própria sessão lê do banco
+    assert _nome(outra) == "Produtor Sintético 1" # Lê o que está confirmado e o guarda no cache
+    conexao_arquivo.commit()
+    assert _nome(outra) == "Nome Novo" # O commit invalidou a entrada guardada durante a transação
+
+def test_rollback_descarta_as_atualizacoes(conexao_populada):
+    _nome(conexao_populada) # Em cache
+    indice = indice_culturas.carregar_indice(conexao_populada)
+    crud.atualizar_produtor(conexao_populada, "SP0000001", {"nome": "Nome Novo"})
+    crud.gravar_demanda(conexao_populada, None, "Quinoa", 5, "kg", datetime.date(2025, 3, 1))
+    conexao_populada.rollback()
+    assert _nome(conexao_populada) == "Produtor Sintético 1"
+    assert indice.canonica("Quinoa") is None
+
+def test_indices_recebem_o_plantio_depois_do_commit(conexao_populada):
+    indice = rotacao.obter_indice(conexao_populada)
+    antes = len(indice.historico("ST0000001001"))
+    plantio = crud.gravar_plantio(conexao_populada, Plantio(None, "SP0000001", "ST0000001001", "Quinoa", datetime.date(2026, 1, 5),
+                                                            datetime.date(2026, 4, 5), None, None, None, "Planejado", None, None))
+    assert len(indice.historico("ST0000001001")) == antes
+    conexao_populada.commit()
+    assert indice.historico("ST0000001001")[0].id_plantio == plantio.id_plantio
+    assert indice_culturas.carregar_indice(conexao_populada).canonica("quinoa") == "Quinoa"
+
+# --- Savepoints do lote de comandos ---
+
+def _executar(conexao, operacoes):
+    saida = io.StringIO()
+    comandos.executar(conexao, enumerate(operacoes, start=1), commit_a_cada=100, saida=saida)
+    return [json.loads(linha) for linha in saida.getvalue().splitlines()]
+
+def test_operacao_desfeita_nao_chega_aos_indices(conexao_populada, monkeypatch):
+    indice = indice_culturas.carregar_indice(conexao_populada)
+    gravar_demanda = crud.gravar_demanda
+    def gravar_e_falhar(conexao, *args):
+        gravar_demanda(conexao, *args)
+        if args[1] == "Amaranto": raise crud.ErroValidacao("rejeitada depois de gravar")
+        return args[0]
+    monkeypatch.setattr(crud, "gravar_demanda", gravar_e_falhar)
+    demanda = {"comando": "demanda-registrar", "quantidade": 1, "unidade_medida": "kg", "data_necessidade": "01/03/2025"}
+    resultados = _executar(conexao_populada, [dict(demanda, cultura="Amaranto"), dict(demanda, cultura="Quinoa")])
+    assert [r["ok"] for r in resultados] == [False, True]
+    assert indice.canonica("Quinoa") == "Quinoa" and indice.canonica("Amaranto") is None
+    culturas = {d.cultura for d in database.carregar_demandas(conexao_populada)}
+    assert "Quinoa" in culturas and "Amaranto" not in culturas
+
+def test_cultura_anterior_dentro_do_mesmo_grupo(conexao_populada):
+    rotacao.obter_indice(conexao_populada) # Índice carregado: as escritas do grupo só chegam a ele no commit
+    plantio = {"comando": "plantio-registrar", "id_produtor": "SP0000001", "id_talhao_produtor": "T01"}
+    resultados = _executar(conexao_populada, [
+        dict(plantio, cultura="Quinoa", data_plantio="01/01/2027", data_prevista_colheita="01/04/2027"),
+        dict(plantio, cultura="Milho", data_plantio="01/05/2027", data_prevista_colheita="01/09/2027")])
+    assert resultados[1]["resultado"]["cultura_anterior"] == "Quinoa"
+    assert rotacao.obter_indice(conexao_populada).cultura_anterior("ST0000001001") == "Milho"
+
+def test_gravar_da_tela_confirma_e_atualiza(conexao_populada):
+    _nome(conexao_populada)
+    assert crud._gravar(conexao_populada, "teste", "no teste", crud.atualizar_produtor, "SP0000001", {"nome": "Tela"}) == "SP0000001"
+    assert not conexao_populada.em_transacao and _nome(conexao_populada) == "Tela"
+    assert crud._gravar(conexao_populada, "teste", "no teste", crud.atualizar_produtor, "NAO-EXISTE", {"nome": "X"}) is None
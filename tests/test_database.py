@@ -0,0 +1,108 @@
+import datetime
+import pytest
+import database
+import crud_operations as crud
+from registros import Plantio
+
+COLUNAS = {"ids": "id_plantio", "status": "status", "cultura": "cultura", "data": "data_plantio"}
+
+# --- Filtros dos Carregadores ---
+
+def test_lista_vazia_nao_casa_com_nada():
+    where, binds = database._montar_filtros({"ids": []}, COLUNAS)
+    assert where == " WHERE 1 = 0" and binds == {}
+
+def test_lista_acima_do_limite_do_in_e_dividida():
+    ids = [f"P{i:05d}" for i in range(2500)]
+    where, binds = database._montar_filtros({"ids": ids}, COLUNAS)
+    grupos = where[len(" WHERE ("):-1].split(" OR ")
+    assert len(grupos) == 3
+    assert all(grupo.count(":f_ids_") <= database.LIMITE_ITENS_IN for grupo in grupos)
+    assert [v for v in binds.values() if v is not None] == ids # Binds extras (aridade da última lista) são NULL
+
+def test_filtros_sem_valor_sao_ignorados():
+    assert database._montar_filtros({"ids": None, "cultura": None}, COLUNAS) == ("", {})
+
+def test_filtro_nao_suportado():
+    with pytest.raises(ValueError): database._montar_filtros({"associacao": "X"}, COLUNAS)
+
+def test_carregador_com_mais_de_mil_ids(conexao_populada):
+    todos = database.carregar_plantios_produtos(conexao_populada)
+    escolhidos = [p.id_plantio for p in todos[::3]]
+    ids = escolhidos + [f"INEXISTENTE{i}" for i in range(1500)]
+    filtrados = database.carregar_plantios_produtos(conexao_populada, {"ids": ids})
+    assert sorted(p.id_plantio for p in filtrados) == sorted(escolhidos)
+    assert database.carregar_plantios_produtos(conexao_populada, {"ids": []}) == []
+
+def test_filtro_de_cultura_com_lista(conexao_populada):
+    where, binds = database._montar_filtros({"cultura": ["Alface", "alface"]}, COLUNAS)
+    assert where == " WHERE cultura IN (:f_cultura_0, :f_cultura_1)" and binds == {"f_cultura_0": "Alface", "f_cultura_1": "alface"}
+    with pytest.raises(ValueError, match="cultura"): database._montar_filtros({"cultura": 3}, COLUNAS)
+    culturas = sorted({p.cultura for p in database.carregar_plantios_produtos(conexao_populada)})[:2]
+    por_lista = database.carregar_plantios_produtos(conexao_populada, {"cultura": set(culturas)})
+    por_nome = [p for c in culturas for p in database.carregar_plantios_produtos(conexao_populada, {"cultura": f" {c.upper()} "})]
+    assert por_lista and sorted(p.id_plantio for p in por_lista) == sorted(p.id_plantio for p in por_nome)
+
+# --- Paginação por chave ---
+
+def _todas_as_paginas(buscar, limite):
+    itens = []; apos = None; paginas = 0
+    while True:
+        pagina, apos = buscar(apos, limite)
+        itens.extend(pagina); paginas += 1
+        assert len(pagina) <= limite
+        if apos is None: return itens, paginas
+
+def test_mercado_paginado_ve_cada_oferta_uma_vez(conexao_populada):
+    completo, chave = database.pesquisar_mercado(conexao_populada, limite=1000)
+    assert chave is None and completo
+    paginado, paginas = _todas_as_paginas(lambda apos, limite: database.pesquisar_mercado(conexao_populada, None, apos, limite), 7)
+    assert [o.id_plantio for o in paginado] == [o.id_plantio for o in completo]
+    assert paginas == -(-len(completo) // 7)
+
+def test_mercado_somente_certificados(conexao_populada):
+    ofertas, _ = database.pesquisar_mercado(conexao_populada, {"somente_certificados": True}, limite=1000)
+    assert all(o.certificado for o in ofertas)
+
+def test_seletor_paginado(conexao_populada):
+    completo, chave = database.pagina_selecao(conexao_populada, "talhao.pagina", {"id_produtor": "SP0000001"}, limite=100)
+    assert chave is None and len(completo) == 4
+    paginado, _ = _todas_as_paginas(lambda apos, limite: database.pagina_selecao(
+        conexao_populada, "talhao.pagina", {"id_produtor": "SP0000001"}, apos=apos, limite=limite), 3)
+    assert paginado == completo
+
+# --- Cache de referência ---
+
+def test_cache_entrega_o_mesmo_objeto_somente_leitura(conexao_populada):
+    produtores = database.carregar_produtores_talhoes(conexao_populada)
+    assert database.carregar_produtores_talhoes(conexao_populada) is produtores # Acerto sem cópia
+    with pytest.raises(TypeError): produtores["SP0000001"].talhoes["T99"] = None
+    with pytest.raises(TypeError): produtores["X"] = None
+    status = database.carregar_status_certificacao(conexao_populada)
+    assert database.carregar_status_certificacao(conexao_populada) is status
+    with pytest.raises(TypeError): status["SP0000001"]["etapas"]["Inspeção"] = True
+
+# --- Calendário de colheitas ---
+
+def _plantio(id_plantio, id_talhao, cultura, colheita, quantidade=None, unidade=None):
+    status = "Disponível" if quantidade else "Planejado"
+    return Plantio(id_plantio, "P1", id_talhao, cultura, colheita - datetime.timedelta(days=90), colheita,
+                   colheita if quantidade else None, quantidade, unidade, status, None, None)
+
+def test_calendario_com_quantidade_prevista(conexao):
+    proximo_mes = database._somar_meses(datetime.date.today().replace(day=1), 1)
+    crud.gravar_produtor(conexao, "P1", "Produtor", "Vale do Ribeira")
+    for id_talhao, area in (("T1", 2.0), ("T2", 3.0)): crud.gravar_talhao(conexao, id_talhao, "P1", id_talhao, area)
+    for plantio in (_plantio("H1", "T1", "Milho", datetime.date(2024, 5, 1), 8000, "kg"), # 4000 kg/ha
+                    _plantio("H2", "T2", "milho ", datetime.date(2024, 6, 1), 12000, "kg"),
+                    _plantio("H3", "T1", "Milho", datetime.date(2024, 7, 1), 50, "sc"), # Unidade com menos área: ignorada
+                    _plantio("F1", "T2", "Milho", proximo_mes + datetime.timedelta(days=3)),
+                    _plantio("F2", "T1", "Milho", proximo_mes + datetime.timedelta(days=5)),
+                    _plantio("F3", "T1", "Quinoa", proximo_mes + datetime.timedelta(days=9))):
+        crud.gravar_plantio(conexao, plantio)
+    conexao.commit()
+    milho, quinoa = database.carregar_calendario_colheitas(conexao, {"regiao": "ribeira"})
+    assert (milho.mes, milho.cultura, milho.lotes, milho.area_ha) == (proximo_mes, "Milho", 2, 5.0)
+    assert milho.quantidade_prevista == pytest.approx(20000) and milho.unidade_medida == "kg"
+    assert quinoa.quantidade_prevista is None and quinoa.unidade_medida is None # Sem histórico de colheita
+    assert database.carregar_calendario_colheitas(conexao, {"regiao": "outra"}) == []
@@ -0,0 +1,46 @@
+import pytest
+import config
+import database
+import dados_sinteticos
+import exportacao
+import crud_operations as crud
+
+def _exportar(conexao, tmp_path):
+    caminho = str(tmp_path / ("base" + exportacao.EXTENSAO_SNAPSHOT))
+    contagem = exportacao.exportar_snapshot(conexao, caminho, tamanho_lote=7)
+    assert contagem is not None
+    return caminho, contagem
+
+def test_snapshot_ida_e_volta(conexao_populada, tmp_path):
+    caminho, contagem = _exportar(conexao_populada, tmp_path)
+    plantios = sorted(database.carregar_plantios_produtos(conexao_populada), key=lambda p: p.id_plantio)
+    assert contagem["PLANTIOS_PRODUTOS"] == len(plantios)
+    colunas = [nome for nome, _ in exportacao.ESQUEMA_SNAPSHOT["PLANTIOS_PRODUTOS"]]
+    with exportacao.Snapshot(caminho) as snapshot:
+        assert snapshot.tabelas() == list(exportacao.ESQUEMA_SNAPSHOT)
+        lidos = sorted(snapshot.iterar("PLANTIOS_PRODUTOS", colunas))
+        assert lidos == [tuple(getattr(p, nome) for nome in colunas) for p in plantios]
+        status = snapshot.coluna("PLANTIOS_PRODUTOS", "status").contar_valores()
+        assert sum(status.values()) == len(plantios)
+        demandas = list(snapshot.iterar("DEMANDAS", ["id_demanda", "quantidade"]))
+        assert sorted(demandas) == sorted((d.id_demanda, d.quantidade) for d in database.carregar_demandas(conexao_populada))
+
+def test_snapshot_nao_inclui_escritas_pendentes(tmp_path, monkeypatch):
+    # Banco em arquivo (WAL): no banco em memória compartilhado, o SQLite bloqueia a tabela que outra sessão alterou
+    monkeypatch.setattr(config, "SQLITE_ARQUIVO", str(tmp_path / "agro.sqlite3"))
+    conexao = database.conectar_banco()
+    try:
+        dados_sinteticos.popular_banco(conexao, dados_sinteticos.BaseSintetica(3))
+        crud.gravar_produtor(conexao, "PX", "Não confirmado") # Sem commit
+        caminho, contagem = _exportar(conexao, tmp_path)
+        with exportacao.Snapshot(caminho) as snapshot:
+            assert "PX" not in snapshot.coluna("PRODUTORES", "id_produtor")
+        assert contagem["PRODUTORES"] == 3
+        conexao.rollback()
+    finally:
+        database.desconectar_banco(conexao); crud.descartar_caches()
+
+def test_arquivo_que_nao_e_snapshot(tmp_path):
+    caminho = tmp_path / "outro.agrosnp"
+    caminho.write_bytes(b"x" * 64)
+    with pytest.raises(ValueError): exportacao.Snapshot(str(caminho))
@@ -0,0 +1,48 @@
+import json
+import database
+import importacao
+
+def _importar(conexao, tmp_path, dados, tamanho_lote=2):
+    caminho = tmp_path / "importacao.json"
+    caminho.write_text(json.dumps(dados, ensure_ascii=False), encoding="utf-8")
+    resumo = importacao.importar_arquivo(conexao, str(caminho), tamanho_lote=tamanho_lote)
+    assert set(resumo) == {"entidades", "duracao_s"} and resumo["duracao_s"] >= 0
+    return resumo["entidades"]
+
+def test_erros_por_linha_nao_derrubam_o_lote(conexao, tmp_path):
+    resumo = _importar(conexao, tmp_path, {
+        "produtores": [{"id_produtor": "P1", "nome": "Um", "certificado": 1}, {"id_produtor": "P2"},
+                       {"id_produtor": "P1", "nome": "Repetido"}, {"id_produtor": "P3", "nome": "Três"}],
+        "talhoes": [{"id_talhao_unico": "T1", "id_produtor": "P1", "id_talhao_produtor": "A", "tamanho_ha": 2},
+                    {"id_produtor": "P9", "id_talhao_produtor": "A", "tamanho_ha": 1},
+                    {"id_talhao_unico": "T1", "id_produtor": "P3", "id_talhao_produtor": "A", "tamanho_ha": 1}, # Chave repetida: rejeitada pelo banco
+                    {"id_talhao_unico": "T3", "id_produtor": "P3", "id_talhao_produtor": "B", "tamanho_ha": -1}],
+    })
+    produtores, talhoes = resumo["produtores"], resumo["talhoes"]
+    assert (produtores["lidas"], produtores["inseridas"], produtores["ignoradas"]) == (4, 2, 1)
+    assert [numero for numero, _ in produtores["erros"]] == [2]
+    assert (talhoes["lidas"], talhoes["inseridas"]) == (4, 1)
+    assert [numero for numero, _ in talhoes["erros"]] == [2, 3, 4]
+    assert talhoes["erros"][1][1].startswith("Oracle: ")
+    assert set(database.carregar_produtores_talhoes(conexao)) == {"P1", "P3"}
+    assert database.carregar_status_certificacao(conexao)["P1"]["certificado"]
+
+def test_plantio_sem_cultura_anterior_recebe_a_do_talhao(conexao, tmp_path):
+    plantio = {"id_produtor": "P1", "id_talhao_produtor": "A", "unidade_medida": "kg"}
+    resumo = _importar(conexao, tmp_path, {
+        "produtores": [{"id_produtor": "P1", "nome": "Um"}],
+        "talhoes": [{"id_talhao_unico": "T1", "id_produtor": "P1", "id_talhao_produtor": "A", "tamanho_ha": 2}],
+        "plantios": [dict(plantio, id_plantio="L1", cultura="Milho", data_plantio="01/02/2025", data_prevista_colheita="01/06/2025"),
+                     dict(plantio, id_plantio="L2", cultura="Feijão", data_plantio="01/07/2025", data_prevista_colheita="01/10/2025"),
+                     dict(plantio, id_plantio="L3", cultura="Soja", data_plantio="01/07/2025", data_prevista_colheita="01/06/2025")],
+    })
+    assert resumo["plantios"]["inseridas"] == 2
+    assert [numero for numero, _ in resumo["plantios"]["erros"]] == [3] # Colheita antes do plantio
+    plantios = {p.id_plantio: p for p in database.carregar_plantios_produtos(conexao)}
+    assert plantios["L1"].cultura_anterior is None and plantios["L2"].cultura_anterior == "Milho"
+    assert plantios["L2"].id_talhao_unico == "T1"
+
+def test_arquivo_em_formato_desconhecido(conexao, tmp_path):
+    caminho = tmp_path / "dados.txt"
+    caminho.write_text("", encoding="utf-8")
+    assert importacao.importar_arquivo(conexao, str(caminho)) is None
@@ -0,0 +1,67 @@
+import datetime
+import migracoes
+import indice_culturas
+import crud_operations as crud
+from indice_culturas import IndiceCulturas, normalizar
+from registros import Plantio
+
+# --- Equivalência e Sugestões ---
+
+def test_normalizar():
+    assert normalizar(" Batata-Doce ") == normalizar("batata  doce") == "batata doce"
+    assert normalizar("Feijão") == "feijao" and normalizar(None) == ""
+
+def test_grafias_e_apelidos_levam_ao_nome_canonico():
+    indice = IndiceCulturas(["mandioca ", "MILHO"])
+    assert indice.canonica("Mandióca") == indice.canonica("aipim") == "Mandioca"
+    assert indice.chave("macaxeira") == indice.chave("MANDIOCA") == "mandioca"
+    assert indice.variantes("Milho") == ["MILHO", "Milho"]
+
+def test_resolver_corrige_erro_de_digitacao():
+    indice = IndiceCulturas()
+    assert indice.resolver("Tomatte") == "Tomate"
+    [(sugestao, nota)] = indice.sugerir("Cenora", limite=1)
+    assert sugestao == "Cenoura" and 0.5 < nota < 1
+    assert indice.resolver("Quinoa") is None
+
+def test_nome_novo_vira_canonico_so_se_nao_parecer_um_conhecido():
+    indice = IndiceCulturas(["Quinoa", "Tomatte"])
+    assert indice.canonica("quinoa") == "Quinoa" and indice.resolver("Quinua") == "Quinoa"
+    assert indice.registrar("Tomatte") is None and indice.canonica("Tomatte") is None
+    assert indice.resolver("Tomatte") == "Tomate" # O erro de digitação não se fixou como cultura
+    assert indice.chave("Tomatte") == "tomatte" # Agrupado à parte, sem juntar com "Tomate" por aproximação
+
+# --- Carga do Banco ---
+
+def test_carregar_indice_do_banco_e_cache(conexao_populada):
+    crud.gravar_demanda(conexao_populada, None, "Quinoa", 5, "kg", datetime.date(2025, 3, 1)); conexao_populada.commit()
+    indice = indice_culturas.carregar_indice(conexao_populada)
+    assert indice.canonica("QUINOA") == "Quinoa" and indice.canonica("milho") == "Milho"
+    assert indice_culturas.carregar_indice(conexao_populada) is indice
+    indice_culturas.registrar_uso("Amaranto")
+    assert indice.canonica("amaranto") == "Amaranto"
+    assert indice_culturas.mesma_cultura(conexao_populada, "aipim", "Mandioca")
+    assert not indice_culturas.mesma_cultura(conexao_populada, "Milho", None)
+
+def test_sem_conexao_so_as_canonicas():
+    indice = indice_culturas.carregar_indice(None)
+    assert indice.canonica("Milho") == "Milho" and indice.canonica("Quinoa") is None
+
+def test_talhao_sem_plantio_nao_tem_cultura_anterior(conexao_populada):
+    crud.gravar_talhao(conexao_populada, "STNOVO", "SP0000001", "T99", 1.5); conexao_populada.commit()
+    assert crud.obter_cultura_anterior(conexao_populada, "STNOVO") is None
+    assert crud.obter_cultura_anterior(None, "STNOVO") is None
+
+def test_migracao_limpa_avisos_gravados_como_cultura(conexao_populada):
+    cursor = conexao_populada.cursor()
+    for i, aviso in enumerate(("Nenhuma registrada", "Erro de conexão")):
+        crud.gravar_plantio(conexao_populada, Plantio(f"PAVISO{i}", "SP0000001", "ST0000001001", "Milho", datetime.date(2026, 1, 5),
+                                                      datetime.date(2026, 4, 5), None, None, None, "Planejado", None, aviso))
+    cursor.execute("DELETE FROM SCHEMA_VERSAO WHERE versao = 4")
+    conexao_populada.commit()
+    assert migracoes.aplicar_migracoes(conexao_populada)
+    cursor.execute("SELECT COUNT(*) FROM PLANTIOS_PRODUTOS WHERE cultura_anterior IN ('Nenhuma registrada', 'Erro de conexão')")
+    assert cursor.fetchone()[0] == 0
+    cursor.close()
+    crud.descartar_caches()
+    assert indice_culturas.carregar_indice(conexao_populada).canonica("Nenhuma registrada") is None
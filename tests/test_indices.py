@@ -0,0 +1,30 @@
+import indices
+
+NOMES = [nome for nome, _, _, _ in indices.INDICES_GERENCIADOS]
+
+def _executar(conexao, *comandos):
+    cursor = conexao.cursor()
+    for sql in comandos: cursor.execute(sql)
+    cursor.close()
+    conexao.commit()
+
+def test_banco_novo_tem_os_indices_gerenciados(conexao):
+    resultado = indices.verificar_indices(conexao)
+    assert resultado["ok"] == NOMES
+    assert not (resultado["faltando"] or resultado["divergentes"] or resultado["cobertos"] or resultado["nao_usados"])
+
+def test_indice_faltando_e_criado(conexao):
+    _executar(conexao, "DROP INDEX IX_DEMANDAS_NECESSIDADE", "DROP INDEX IX_PRODUTORES_NOME")
+    resultado = indices.verificar_indices(conexao)
+    assert [nome for nome, _, _, _ in resultado["faltando"]] == ["IX_DEMANDAS_NECESSIDADE", "IX_PRODUTORES_NOME"]
+    assert indices.criar_indices_faltando(conexao, {"IX_DEMANDAS_NECESSIDADE", "IX_PRODUTORES_NOME"}) == 2
+    assert indices.verificar_indices(conexao)["ok"] == NOMES
+    assert indices.criar_indices_faltando(conexao, {"IX_DEMANDAS_NECESSIDADE"}) == 0 # Já existe: nada a fazer
+
+def test_divergente_e_coberto(conexao):
+    _executar(conexao, "DROP INDEX IX_DEMANDAS_NECESSIDADE", "CREATE INDEX IX_DEMANDAS_NECESSIDADE ON DEMANDAS (cultura)",
+              "DROP INDEX IX_PRODUTORES_NOME", "CREATE INDEX IX_OUTRO_NOME ON PRODUTORES (nome, id_produtor)")
+    resultado = indices.verificar_indices(conexao)
+    assert resultado["divergentes"] == [("IX_DEMANDAS_NECESSIDADE", ("CULTURA",), ("DATA_NECESSIDADE",))]
+    assert resultado["cobertos"] == [("IX_PRODUTORES_NOME", "IX_OUTRO_NOME")]
+    assert not resultado["faltando"]
@@ -0,0 +1,58 @@
+import datetime
+import pytest
+import config
+import instrumentacao
+import log_estruturado
+
+@pytest.fixture(autouse=True)
+def estatisticas_limpas():
+    instrumentacao.zerar()
+    yield
+    instrumentacao.zerar()
+
+def test_impressao_digital():
+    a = instrumentacao.impressao_digital("SELECT *  FROM T\n WHERE a = 'x''y' AND b = 10 AND c IN (:f_ids_0, :f_ids_1)")
+    b = instrumentacao.impressao_digital("SELECT * FROM T WHERE a = 'z' AND b = 2.5 AND c IN (:f_ids_0)")
+    assert a == b == "SELECT * FROM T WHERE a = ? AND b = ? AND c IN (:f_ids_*)"
+    assert instrumentacao.impressao_digital("SELECT :1 FROM T2") == "SELECT :1 FROM T2" # Binds e nomes ficam
+
+def test_formato_binds_sem_valores():
+    assert instrumentacao.formato_binds({"f_status": "Planejado", "f_data": datetime.date(2025, 1, 1)}) == {"f_status": "str", "f_data": "date"}
+    assert instrumentacao.formato_binds(("P1", 3)) == ["str", "int"] and instrumentacao.formato_binds(None) is None
+
+def test_percentis():
+    estatistica = instrumentacao.EstatisticaConsulta("SELECT 1")
+    assert estatistica.percentis(50, 99) == (0.0, 0.0)
+    estatistica.amostras.extend(i / 1000 for i in range(1, 101)) # 1..100 ms
+    assert estatistica.percentis(50, 95, 99) == pytest.approx((51, 96, 100))
+    estatistica.amostras.extend([1.0] * instrumentacao.AMOSTRAS_POR_CONSULTA) # Janela: só as mais recentes
+    assert estatistica.percentis(50) == pytest.approx((1000,))
+
+def test_consulta_lenta_vai_para_o_log(monkeypatch):
+    registros = []
+    monkeypatch.setattr(config, "CONSULTA_LENTA_MS", 100)
+    monkeypatch.setattr(log_estruturado, "registrar", lambda *args, **kwargs: registros.append((args, kwargs)))
+    instrumentacao.registrar_execucao("SELECT * FROM T WHERE id = :1", 0.05, ("P1",))
+    chave = instrumentacao.registrar_execucao("SELECT * FROM T WHERE id = :1", 0.25, ("P2",))
+    instrumentacao.registrar_execucao("INSERT INTO T VALUES (:1)", 0.3, (1,), lote=500)
+    [insercao, selecao] = instrumentacao.consultas_lentas() # Mais recente primeiro
+    assert selecao == {"sql": chave, "duracao_ms": 250.0, "binds": ["str"], "em": selecao["em"]}
+    assert insercao["binds"] == {"linhas": 500, "formato": ["int"]}
+    assert len(registros) == 2 and all(kwargs["destino"] == log_estruturado.LOG_CONSULTAS for _, kwargs in registros)
+    assert "P2" not in str(registros) # Nunca os valores dos binds
+    [resumo] = [r for r in instrumentacao.resumo() if r["sql"] == chave]
+    assert (resumo["execucoes"], resumo["lentas"]) == (2, 1)
+
+def test_cursor_instrumentado(conexao_populada, monkeypatch):
+    monkeypatch.setattr(config, "INSTRUMENTACAO_ATIVA", True)
+    cursor = conexao_populada.cursor()
+    for id_produtor in ("SP0000001", "SP0000002"):
+        cursor.execute("SELECT id_talhao_unico FROM TALHOES WHERE id_produtor = :1", (id_produtor,))
+        cursor.fetchall()
+    with pytest.raises(config.cx_Oracle.DatabaseError): cursor.execute("SELECT * FROM NAO_EXISTE")
+    cursor.close()
+    por_sql = {r["sql"]: r for r in instrumentacao.resumo()}
+    talhoes = por_sql["SELECT id_talhao_unico FROM TALHOES WHERE id_produtor = :1"]
+    assert (talhoes["execucoes"], talhoes["linhas"], talhoes["erros"]) == (2, 8, 0)
+    assert talhoes["p50_ms"] <= talhoes["p99_ms"] and talhoes["tempo_total_ms"] > 0
+    assert por_sql["SELECT * FROM NAO_EXISTE"]["erros"] == 1
@@ -0,0 +1,72 @@
+import sys
+import json
+import queue
+import logging
+import pytest
+import config
+import driver_sqlite
+import log_estruturado
+import utils
+
+@pytest.fixture
+def arquivos_de_log(tmp_path, monkeypatch):
+    """Log do teste em arquivos próprios; encerrar() esvazia a fila antes da leitura."""
+    log_estruturado.encerrar()
+    monkeypatch.setattr(config, "ARQUIVO_LOG_ERROS", str(tmp_path / "erros.log"))
+    monkeypatch.setattr(config, "ARQUIVO_LOG_CONSULTAS_LENTAS", str(tmp_path / "consultas.log"))
+    yield tmp_path
+    log_estruturado.encerrar() # O próximo registro monta a fila de novo, com os arquivos originais
+
+def _linhas(caminho):
+    if not caminho.exists(): return []
+    return [json.loads(linha) for linha in caminho.read_text(encoding="utf-8").splitlines()]
+
+def test_registro_em_json_com_contexto(arquivos_de_log):
+    erro = config.cx_Oracle.DatabaseError(driver_sqlite._Erro(942, "table or view does not exist"))
+    log_estruturado.registrar(logging.ERROR, "Falha ao ler", erro=erro, operacao="carregar", tabela="TALHOES", ignorado="x")
+    log_estruturado.registrar(logging.DEBUG, "Abaixo do nível configurado")
+    log_estruturado.encerrar()
+    [registro] = _linhas(arquivos_de_log / "erros.log")
+    assert registro["nivel"] == "ERROR" and registro["mensagem"] == "Falha ao ler"
+    assert (registro["operacao"], registro["tabela"], registro["codigo_oracle"]) == ("carregar", "TALHOES", 942)
+    assert "ignorado" not in registro and "sql" not in registro # Só os campos de contexto presentes
+    assert {"ts", "processo", "thread"} <= set(registro)
+
+def test_consultas_lentas_em_arquivo_proprio(arquivos_de_log):
+    log_estruturado.registrar(logging.WARNING, "Consulta lenta", destino=log_estruturado.LOG_CONSULTAS, sql="SELECT 1", duracao_ms=900)
+    log_estruturado.registrar(logging.ERROR, "Outro erro")
+    log_estruturado.encerrar()
+    [lenta] = _linhas(arquivos_de_log / "consultas.log")
+    assert lenta["sql"] == "SELECT 1" and lenta["duracao_ms"] == 900
+    assert [r["mensagem"] for r in _linhas(arquivos_de_log / "erros.log")] == ["Outro erro"]
+
+def test_rotacao_por_tamanho(arquivos_de_log, monkeypatch):
+    monkeypatch.setattr(config, "LOG_TAMANHO_MAX_BYTES", 500)
+    monkeypatch.setattr(config, "LOG_ARQUIVOS_ANTIGOS", 2)
+    for i in range(30): log_estruturado.registrar(logging.ERROR, f"Erro {i:02d} " + "x" * 50)
+    log_estruturado.encerrar()
+    assert sorted(p.name for p in arquivos_de_log.iterdir()) == ["erros.log", "erros.log.1", "erros.log.2"]
+    assert _linhas(arquivos_de_log / "erros.log")[-1]["mensagem"].startswith("Erro 29")
+
+def test_fila_cheia_descarta_sem_bloquear():
+    handler = log_estruturado._HandlerFila(queue.Queue(maxsize=1))
+    registro = logging.LogRecord("agrorganica", logging.ERROR, __file__, 1, "erro", None, None)
+    handler.enqueue(registro); handler.enqueue(registro)
+    assert handler.descartados == 1 and handler.queue.qsize() == 1
+
+def test_formatador_inclui_a_excecao():
+    try: raise ValueError("quebrou")
+    except ValueError: registro = logging.LogRecord("agrorganica", logging.ERROR, __file__, 1, "erro %s", ("x",), sys.exc_info())
+    dados = json.loads(log_estruturado.FormatadorJson().format(registro))
+    assert dados["mensagem"] == "erro x" and "ValueError: quebrou" in dados["excecao"]
+
+def test_registrar_erro_nunca_falha(arquivos_de_log, monkeypatch, capsys):
+    def quebrar(*args, **kwargs): raise OSError("disco cheio")
+    monkeypatch.setattr(log_estruturado, "registrar", quebrar)
+    utils.registrar_erro("Erro original", operacao="teste")
+    saida = capsys.readouterr().out
+    assert "Erro original" in saida and "ERRO CRÍTICO" in saida and "disco cheio" in saida
+
+def test_codigo_oracle():
+    assert log_estruturado.codigo_oracle(config.cx_Oracle.DatabaseError(driver_sqlite._Erro(1, "unique"))) == 1
+    assert log_estruturado.codigo_oracle(ValueError("sem código")) is None and log_estruturado.codigo_oracle(None) is None
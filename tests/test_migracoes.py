@@ -0,0 +1,51 @@
+import pytest
+import config
+import driver_sqlite
+import migracoes
+
+def _versoes(conexao):
+    cursor = conexao.cursor()
+    cursor.execute("SELECT versao FROM SCHEMA_VERSAO ORDER BY versao")
+    versoes = [linha[0] for linha in cursor.fetchall()]
+    cursor.close()
+    return versoes
+
+@pytest.fixture
+def comandos_executados(monkeypatch):
+    """Lista dos comandos que chegam ao driver a partir daqui."""
+    comandos = []
+    executar = driver_sqlite.Cursor._executar
+    def executar_registrando(cursor, sql, parametros):
+        comandos.append(sql); return executar(cursor, sql, parametros)
+    monkeypatch.setattr(driver_sqlite.Cursor, "_executar", executar_registrando)
+    return comandos
+
+def test_banco_novo_recebe_todas_as_migracoes(conexao):
+    assert _versoes(conexao) == [numero for numero, _, _ in migracoes.MIGRACOES]
+
+def test_esquema_atualizado_so_le_a_versao(conexao, comandos_executados):
+    assert migracoes.aplicar_migracoes(conexao)
+    assert [sql.strip() for sql in comandos_executados] == ["SELECT MAX(versao) FROM SCHEMA_VERSAO"]
+
+def test_migracao_nova_aplicada_uma_vez(conexao, monkeypatch):
+    proxima = migracoes.MIGRACOES[-1][0] + 1
+    passos = ["CREATE INDEX IX_TESTE_DEMANDAS ON DEMANDAS (cultura)",
+              "CREATE INDEX IX_TESTE_DEMANDAS ON DEMANDAS (cultura)"] # Reexecutado após falha: "já existe" é ignorado
+    monkeypatch.setattr(migracoes, "MIGRACOES", migracoes.MIGRACOES + [(proxima, "Teste", passos)])
+    assert migracoes.aplicar_migracoes(conexao) and migracoes.aplicar_migracoes(conexao)
+    assert _versoes(conexao)[-1] == proxima and _versoes(conexao).count(proxima) == 1
+
+def test_falha_para_na_migracao_que_falhou(conexao, monkeypatch):
+    ultima = migracoes.MIGRACOES[-1][0]
+    def falhar(cursor): cursor.execute("SELECT * FROM TABELA_INEXISTENTE")
+    monkeypatch.setattr(migracoes, "MIGRACOES", migracoes.MIGRACOES + [
+        (ultima + 1, "Passa", ["CREATE INDEX IX_TESTE_PASSA ON DEMANDAS (cultura)"]), (ultima + 2, "Falha", falhar),
+        (ultima + 3, "Depois da falha", ["CREATE INDEX IX_TESTE_DEPOIS ON DEMANDAS (unidade_medida)"])])
+    assert not migracoes.aplicar_migracoes(conexao)
+    assert _versoes(conexao)[-1] == ultima + 1 # As anteriores à falha ficam confirmadas
+
+def test_ddl_idempotente(conexao):
+    cursor = conexao.cursor()
+    assert not migracoes.executar_ddl_idempotente(cursor, "CREATE INDEX IX_PRODUTORES_NOME ON PRODUTORES (nome, id_produtor)")
+    with pytest.raises(config.cx_Oracle.DatabaseError): migracoes.executar_ddl_idempotente(cursor, "CREATE INDEX IX_X ON NAO_EXISTE (a)")
+    cursor.close()
@@ -0,0 +1,64 @@
+import pytest
+import config
+import driver_sqlite
+import pool_conexoes
+
+DatabaseError = config.cx_Oracle.DatabaseError
+
+@pytest.fixture
+def derrubar(monkeypatch):
+    """derrubar(sessao): daí em diante a sessão responde como uma conexão caída (ORA-03113)."""
+    mortas = set()
+    def falhar_se_morta(sessao):
+        if sessao in mortas: raise DatabaseError(driver_sqlite._Erro(3113, "end-of-file on communication channel"))
+    executar, rollback = driver_sqlite.Cursor._executar, driver_sqlite.Connection.rollback
+    monkeypatch.setattr(driver_sqlite.Cursor, "_executar", lambda cursor, *args: falhar_se_morta(cursor.connection) or executar(cursor, *args))
+    monkeypatch.setattr(driver_sqlite.Connection, "rollback", lambda sessao: falhar_se_morta(sessao) or rollback(sessao))
+    return mortas.add
+
+def _contar(cursor):
+    cursor.execute("SELECT COUNT(*) FROM PRODUTORES")
+    return cursor.fetchone()[0]
+
+def test_sessao_perdida():
+    assert pool_conexoes.sessao_perdida(DatabaseError(driver_sqlite._Erro(3113, "end-of-file")))
+    assert pool_conexoes.sessao_perdida(DatabaseError("DPI-1080: connection was closed by ORA-3113"))
+    assert not pool_conexoes.sessao_perdida(DatabaseError(driver_sqlite._Erro(942, "no such table")))
+
+def test_leitura_repetida_em_nova_sessao(conexao_populada, derrubar):
+    cursor = conexao_populada.cursor()
+    derrubar(conexao_populada._sessao)
+    assert _contar(cursor) == 3
+    cursor.close()
+    metricas = conexao_populada.obter_metricas()
+    assert (metricas["leituras_repetidas"], metricas["sessoes_descartadas"], metricas["sessoes_ocupadas"]) == (1, 1, 0)
+
+def test_leitura_nao_repetida_com_transacao_pendente(conexao_populada, derrubar):
+    cursor = conexao_populada.cursor()
+    cursor.execute("UPDATE PRODUTORES SET nome = 'X' WHERE id_produtor = 'SP0000001'")
+    derrubar(conexao_populada._sessao)
+    with pytest.raises(DatabaseError): _contar(cursor) # Repetir em outra sessão perderia a escrita sem avisar
+    cursor.close()
+    conexao_populada.rollback()
+    assert conexao_populada.obter_metricas()["leituras_repetidas"] == 0
+
+def test_escrita_nao_e_repetida(conexao_populada, derrubar):
+    cursor = conexao_populada.cursor()
+    derrubar(conexao_populada._sessao)
+    with pytest.raises(DatabaseError): cursor.execute("DELETE FROM DEMANDAS")
+    cursor.close()
+    conexao_populada.rollback() # Sessão caída: descartada, sem erro
+    assert conexao_populada.obter_metricas()["sessoes_descartadas"] == 1
+    cursor = conexao_populada.cursor()
+    assert _contar(cursor) == 3
+    cursor.close()
+
+def test_cache_de_comandos_estimado(conexao_populada):
+    antes = conexao_populada.obter_metricas()
+    cursor = conexao_populada.cursor()
+    sql = "SELECT COUNT(*) FROM TALHOES WHERE tamanho_ha > 0"
+    for _ in range(3): cursor.execute(sql); cursor.fetchone()
+    cursor.close()
+    depois = conexao_populada.obter_metricas()
+    assert depois["cache_sql_faltas_estimadas"] - antes["cache_sql_faltas_estimadas"] == 1
+    assert depois["cache_sql_acertos_estimados"] - antes["cache_sql_acertos_estimados"] == 2
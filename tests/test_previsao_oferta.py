@@ -0,0 +1,61 @@
+import datetime
+import pytest
+import crud_operations as crud
+from registros import Plantio
+
+pytest.importorskip("numpy") # A previsão depende do NumPy (opcional)
+import previsao_oferta
+
+SEGUNDA = datetime.date(2025, 6, 2) # Segunda-feira da semana 2025-W23
+
+def _plantio(id_plantio, id_talhao, cultura, colheita, quantidade=None, unidade=None):
+    status = "Disponível" if quantidade else "Planejado"
+    return Plantio(id_plantio, "P1", id_talhao, cultura, colheita - datetime.timedelta(days=90), colheita,
+                   colheita if quantidade else None, quantidade, unidade, status, None, None)
+
+@pytest.fixture
+def conexao_previsao(conexao):
+    """Milho: 4000 kg/ha colhidos (em kg, a unidade com mais área); planejados 3 ha na 1ª semana e 2 ha na 2ª."""
+    crud.gravar_produtor(conexao, "P1", "Produtor")
+    for id_talhao, area in (("T1", 2.0), ("T2", 3.0)): crud.gravar_talhao(conexao, id_talhao, "P1", id_talhao, area)
+    for plantio in (_plantio("H1", "T1", "Milho", datetime.date(2024, 5, 1), 8000, "kg"),
+                    _plantio("H2", "T2", "milho", datetime.date(2024, 6, 1), 12000, "KG"),
+                    _plantio("H3", "T1", "Milho", datetime.date(2024, 7, 1), 50, "sc"),
+                    _plantio("F1", "T2", "Milho", SEGUNDA + datetime.timedelta(days=4)),
+                    _plantio("F2", "T1", "MILHO", SEGUNDA + datetime.timedelta(days=7)),
+                    _plantio("F3", "T1", "Quinoa", SEGUNDA + datetime.timedelta(days=1)), # Sem histórico: sem estimativa
+                    _plantio("F4", "T1", "Milho", SEGUNDA + datetime.timedelta(weeks=8))): # Fora do horizonte
+        crud.gravar_plantio(conexao, plantio)
+    for cultura, quantidade, unidade, dias in (("Milho", 5000, "kg", 2), ("Milho", 10, "sc", 3), ("Feijão", 100, "kg", 15)):
+        crud.gravar_demanda(conexao, None, cultura, quantidade, unidade, SEGUNDA + datetime.timedelta(days=dias))
+    conexao.commit()
+    return conexao
+
+def test_inicio_semana():
+    assert previsao_oferta.inicio_semana(datetime.date(2025, 6, 8)) == SEGUNDA == previsao_oferta.inicio_semana(SEGUNDA)
+
+def test_grade_cultura_por_semana(conexao_previsao):
+    previsao = previsao_oferta.calcular_previsao(conexao_previsao, SEGUNDA + datetime.timedelta(days=3), semanas=4)
+    assert previsao.inicio == SEGUNDA and previsao.semana(1) == "2025-W24"
+    assert dict(zip(previsao.culturas, previsao.unidades)) == {"Milho": "kg", "Quinoa": None, "Feijão": "kg"}
+    milho = previsao.culturas.index("Milho")
+    assert previsao.oferta[milho].tolist() == pytest.approx([12000, 8000, 0, 0])
+    assert previsao.demanda[milho].tolist() == pytest.approx([5000, 0, 0, 0])
+    assert (previsao.lotes_sem_estimativa, previsao.demandas_outra_unidade) == (1, 1)
+    feijao = previsao.culturas.index("Feijão")
+    assert previsao.saldo[feijao].tolist() == pytest.approx([0, 0, -100, 0])
+
+def test_linhas_e_totais(conexao_previsao):
+    previsao = previsao_oferta.calcular_previsao(conexao_previsao, SEGUNDA, semanas=4)
+    deficit = list(previsao.linhas(somente_deficit=True))
+    assert [(l.cultura, l.semana, l.saldo) for l in deficit] == [("Feijão", "2025-W25", -100.0)]
+    assert len(list(previsao.linhas())) == 3 # Milho nas semanas 23 e 24, Feijão na 25
+    totais = previsao.totais()
+    assert totais[0][0] == "Feijão" and totais[-1] == ("Milho", 20000.0, 5000.0, 15000.0, "kg")
+
+def test_filtro_de_culturas(conexao_previsao):
+    previsao = previsao_oferta.calcular_previsao(conexao_previsao, SEGUNDA, semanas=4, culturas_filtro=["Feijão"])
+    assert previsao.culturas == ["Feijão"] and previsao.oferta.shape == (1, 4)
+
+def test_sem_conexao():
+    assert previsao_oferta.calcular_previsao(None) is None
@@ -0,0 +1,35 @@
+import os
+import pytest
+import config
+import database
+import rastreabilidade
+
+def test_falha_na_certificacao_interrompe_o_lote(conexao_populada, tmp_path):
+    cursor = conexao_populada.cursor()
+    cursor.execute("DROP TABLE STATUS_CERTIFICACAO") # A leitura da certificação passa a falhar no banco
+    cursor.close()
+    plantios = database.carregar_plantios_produtos(conexao_populada)
+    with pytest.raises(config.cx_Oracle.DatabaseError): rastreabilidade.coletar_dados(conexao_populada, plantios)
+    assert rastreabilidade.gerar_relatorios_em_lote(conexao_populada, {}, str(tmp_path / "fichas"), processos=1) is None
+    assert not os.path.exists(tmp_path / "fichas") or not os.listdir(tmp_path / "fichas")
+
+def _fichas(diretorio):
+    """{arquivo: texto sem a última linha (hora da geração)}."""
+    return {nome: (diretorio / nome).read_text(encoding="utf-8").rstrip("\n").rsplit("\n", 1)[0] for nome in os.listdir(diretorio)}
+
+def test_lote_em_processos_igual_ao_sequencial(conexao_populada, tmp_path, monkeypatch):
+    monkeypatch.setattr(rastreabilidade, "registrar_erro", pytest.fail) # Sem cair para a geração em sequência
+    plantios = database.carregar_plantios_produtos(conexao_populada)
+    assert len(plantios) >= rastreabilidade.MINIMO_LOTES_PARALELO
+    sequencial = rastreabilidade.gerar_relatorios_em_lote(conexao_populada, {}, str(tmp_path / "sequencial"), processos=1)
+    paralelo = rastreabilidade.gerar_relatorios_em_lote(conexao_populada, {}, str(tmp_path / "paralelo"), processos=2)
+    assert sequencial["lotes"] == paralelo["lotes"] == len(plantios) == len(set(paralelo["arquivos"]))
+    assert _fichas(tmp_path / "sequencial") == _fichas(tmp_path / "paralelo")
+
+def test_ficha_do_plantio(conexao_populada):
+    plantio = next(p for p in database.carregar_plantios_produtos(conexao_populada) if p.status == "Disponível")
+    [dados] = rastreabilidade.coletar_dados(conexao_populada, [plantio])
+    assert dados["plantio"] is plantio and dados["produtor"].id_produtor == plantio.id_produtor
+    assert len(dados["insumos"]) <= rastreabilidade.MAX_INSUMOS_RELATORIO
+    assert all(i.data_aplicacao <= plantio.data_colheita_real for i in dados["insumos"])
+    assert plantio.id_plantio in rastreabilidade.renderizar_relatorio(dados)
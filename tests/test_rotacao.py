@@ -0,0 +1,70 @@
+import datetime
+import database
+import rotacao
+import crud_operations as crud
+from indice_culturas import IndiceCulturas
+from registros import Plantio
+
+def _plantio(id_plantio, cultura, plantio, colheita, talhao="T1", status="Disponível"):
+    return Plantio(id_plantio, "P1", talhao, cultura, plantio, plantio + datetime.timedelta(days=90), colheita,
+                   None, None, status, None, None)
+
+D = datetime.date
+
+# --- Índice em Memória ---
+
+def test_sequencia_por_talhao():
+    indice = rotacao.IndiceRotacao()
+    for p in (_plantio("B", "Milho", D(2024, 5, 1), None), _plantio("A", "Soja", D(2024, 1, 1), None),
+              _plantio("C", "Feijão", D(2024, 9, 1), None), _plantio("X", "Alface", D(2024, 2, 1), None, talhao="T2")):
+        indice.registrar(p)
+    assert [p.id_plantio for p in indice.historico("T1")] == ["C", "B", "A"] # Mais recente primeiro
+    assert indice.cultura_anterior("T1") == "Feijão" and indice.cultura_anterior("T9") is None
+    indice.registrar(_plantio("C", "Feijão", D(2023, 1, 1), None)) # Editado: muda de posição, sem duplicar
+    assert [p.id_plantio for p in indice.historico("T1")] == ["B", "A", "C"]
+    indice.remover("B")
+    assert [p.id_plantio for p in indice.historico("T1")] == ["A", "C"]
+    indice.remover_talhao("T1")
+    assert indice.historico("T1") == [] and set(indice.talhoes()) == {"T2"}
+    indice.registrar(_plantio("A", "Soja", D(2024, 1, 1), None, talhao="T3")) # Sem rastro no talhão removido
+    assert [p.id_plantio for p in indice.historico("T3")] == ["A"]
+
+def test_alertas_de_rotacao():
+    indice = rotacao.IndiceRotacao()
+    for p in (_plantio("P1", "Milho", D(2024, 1, 1), D(2024, 4, 1)),
+              _plantio("P2", "milho", D(2024, 6, 1), D(2024, 9, 1)), # Repetida, 61 dias de pousio
+              _plantio("P3", "Soja", D(2024, 9, 10), None, status="Cancelado"), # Ignorado
+              _plantio("P4", "aipim", D(2024, 9, 20), D(2025, 6, 1)), # Pousio de 19 dias
+              _plantio("P5", "Mandioca", D(2025, 9, 1), None)):
+        indice.registrar(p)
+    alertas = {(a.atual.id_plantio, a.tipo): a for a in rotacao.analisar_rotacao(indice, pousio_minimo_dias=30)}
+    assert set(alertas) == {("P2", "Cultura repetida"), ("P4", "Pousio curto")}
+    assert alertas[("P4", "Pousio curto")].anterior.id_plantio == "P2" and alertas[("P4", "Pousio curto")].dias_pousio == 19
+    # Com o índice de culturas, aipim e Mandioca são a mesma cultura
+    com_apelidos = rotacao.analisar_rotacao(indice, pousio_minimo_dias=30, chave_cultura=IndiceCulturas().chave)
+    assert ("P5", "Cultura repetida") in {(a.atual.id_plantio, a.tipo) for a in com_apelidos}
+
+# --- Índice Compartilhado ---
+
+def test_indice_do_banco(conexao_populada):
+    indice = rotacao.obter_indice(conexao_populada)
+    assert rotacao.obter_indice(conexao_populada) is indice
+    plantios = database.carregar_plantios_produtos(conexao_populada, {"id_produtor": "SP0000001"})
+    historico = indice.historico("ST0000001001")
+    esperado = sorted((p for p in plantios if p.id_talhao_unico == "ST0000001001"), key=rotacao._chave_ordem, reverse=True)
+    assert [p.id_plantio for p in historico] == [p.id_plantio for p in esperado]
+    rotacao.invalidar()
+    assert rotacao.obter_indice(conexao_populada) is not indice
+
+def test_cultura_anterior_com_e_sem_indice(conexao_populada):
+    sem_indice = rotacao.cultura_anterior(conexao_populada, "ST0000001001") # Consulta só do talhão
+    assert sem_indice == rotacao.obter_indice(conexao_populada).cultura_anterior("ST0000001001")
+    assert rotacao.cultura_anterior(conexao_populada, "NAO-EXISTE") is None
+
+def test_indice_segue_as_escritas(conexao_populada):
+    indice = rotacao.obter_indice(conexao_populada)
+    id_plantio = indice.historico("ST0000001001")[0].id_plantio
+    crud.atualizar_plantio(conexao_populada, id_plantio, {"cultura": "Quinoa"}); conexao_populada.commit()
+    assert indice.cultura_anterior("ST0000001001") == "Quinoa"
+    crud.apagar_talhao(conexao_populada, "SP0000001", "ST0000001001"); conexao_populada.commit()
+    assert indice.historico("ST0000001001") == []
@@ -0,0 +1,79 @@
+import json
+import asyncio
+import pytest
+import database
+import servico_http
+
+@pytest.fixture
+def servico(conexao_populada):
+    servico = servico_http.ServicoHttp(conexao_populada, trabalhadores=2)
+    yield servico
+    servico.fechar()
+
+def _pedir(servico, *pedidos):
+    """Atende os pedidos (método, alvo[, corpo]) em sequência, num só laço de eventos; retorna (status, corpo, cabeçalhos)."""
+    async def atender():
+        respostas = []
+        for metodo, alvo, *corpo in pedidos:
+            status, resposta, tipo, extras = await servico.tratar(metodo, alvo, *corpo)
+            respostas.append((status, json.loads(resposta) if tipo == "application/json" else resposta.decode("utf-8"), extras))
+        return respostas
+    return asyncio.run(atender())
+
+def test_mercado_paginado_e_em_cache(servico):
+    (status, pagina, extras), (_, repetida, extras_repetida) = _pedir(servico, ("GET", "/mercado?limite=5"), ("GET", "/mercado?limite=5"))
+    assert status == 200 and len(pagina["ofertas"]) == 5 and pagina["proxima"]
+    assert all(isinstance(oferta["certificado"], bool) for oferta in pagina["ofertas"])
+    assert (extras["X-Cache"], extras_repetida["X-Cache"]) == ("MISS", "HIT") and repetida == pagina
+    [(_, seguinte, _)] = _pedir(servico, ("GET", f"/mercado?limite=5&apos={pagina['proxima']}"))
+    assert not {o["id_plantio"] for o in pagina["ofertas"]} & {o["id_plantio"] for o in seguinte["ofertas"]}
+
+def test_mercado_somente_certificados(servico):
+    [(status, pagina, _)] = _pedir(servico, ("GET", "/mercado?certificados=1&limite=100"))
+    assert status == 200 and all(oferta["certificado"] is True for oferta in pagina["ofertas"])
+
+def test_registrar_e_listar_demandas(servico):
+    corpo = json.dumps({"cultura": "Milho", "quantidade": 10, "unidade_medida": "kg", "data_necessidade": "15/03/2025"}).encode()
+    (status, criada, _), (_, lista, _) = _pedir(servico, ("POST", "/demandas", corpo), ("GET", "/demandas?cultura=milho&limite=100"))
+    assert status == 201 and criada["cultura"] == "Milho"
+    assert criada["id_demanda"] in {d["id_demanda"] for d in lista["demandas"]}
+    assert all(d["data_necessidade"][4] == "-" for d in lista["demandas"]) # Datas em ISO
+
+def test_demanda_invalida(servico):
+    (status_json, _, _), (status_campo, erro, _) = _pedir(servico, ("POST", "/demandas", b"{"),
+                                                          ("POST", "/demandas", json.dumps({"cultura": "Milho"}).encode()))
+    assert status_json == 400 and status_campo == 400 and "quantidade" in erro["erro"]
+
+def test_rastreabilidade(servico, conexao_populada):
+    id_plantio = database.carregar_plantios_produtos(conexao_populada)[0].id_plantio
+    (status, ficha, _), (status_texto, texto, _), (status_ausente, _, _) = _pedir(
+        servico, ("GET", f"/rastreabilidade/{id_plantio}"), ("GET", f"/rastreabilidade/{id_plantio}?formato=texto"),
+        ("GET", "/rastreabilidade/NAO-EXISTE"))
+    assert status == 200 and ficha["plantio"]["id_plantio"] == id_plantio and isinstance(ficha["certificado"], bool)
+    assert status_texto == 200 and id_plantio in texto
+    assert status_ausente == 404
+
+def test_rotas_desconhecidas_e_saude(servico):
+    (status_rota, _, _), (status_metodo, _, _), (status_saude, saude, _) = _pedir(
+        servico, ("GET", "/nada"), ("DELETE", "/demandas"), ("GET", "/saude"))
+    assert (status_rota, status_metodo, status_saude) == (404, 405, 200)
+    assert saude["pedidos"] == 3 and saude["trabalhadores"] == 2
+
+def test_conexao_http_com_keep_alive(servico):
+    async def conversar():
+        servidor = await asyncio.start_server(servico.atender, "127.0.0.1", 0)
+        async with servidor:
+            leitor, escritor = await asyncio.open_connection(*servidor.sockets[0].getsockname()[:2])
+            respostas = []
+            for alvo, conexao in (("/saude", "keep-alive"), ("/mercado?limite=1", "close")):
+                escritor.write(f"GET {alvo} HTTP/1.1\r\nHost: teste\r\nConnection: {conexao}\r\n\r\n".encode())
+                status = (await leitor.readline()).split()[1]
+                cabecalhos = {}
+                while (linha := await leitor.readline()) != b"\r\n":
+                    nome, _, valor = linha.decode().partition(":"); cabecalhos[nome.lower()] = valor.strip()
+                respostas.append((int(status), json.loads(await leitor.readexactly(int(cabecalhos["content-length"])))))
+            assert await leitor.read() == b"" # "Connection: close" encerra a conexão
+            escritor.close()
+            return respostas
+    (status_saude, _), (status_mercado, mercado) = asyncio.run(conversar())
+    assert (status_saude, status_mercado) == (200, 200) and len(mercado["ofertas"]) == 1
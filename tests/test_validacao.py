@@ -0,0 +1,23 @@
+import datetime
+import pytest
+import crud_operations as crud
+from validacao import ErroValidacao, campo_texto, campo_numero, campo_data, validar_datas_plantio
+
+def test_campos():
+    linha = {"nome": "  Sítio  ", "vazio": " ", "area": "2,5", "inteiro": 3, "data": "01/02/2025", "errada": "2025-02-01"}
+    assert campo_texto(linha, "nome") == "Sítio" and campo_texto(linha, "vazio", False) is None
+    assert campo_numero(linha, "area") == 2.5 and campo_numero(linha, "inteiro") == 3 and campo_numero(linha, "falta") is None
+    assert campo_data(linha, "data") == datetime.date(2025, 2, 1)
+    with pytest.raises(ErroValidacao, match="obrigatório"): campo_texto(linha, "vazio")
+    with pytest.raises(ErroValidacao, match="excede 3"): campo_texto(linha, "nome", tamanho_max=3)
+    with pytest.raises(ErroValidacao, match="numérico"): campo_numero(linha, "nome")
+    with pytest.raises(ErroValidacao, match="DD/MM/AAAA"): campo_data(linha, "errada")
+
+def test_datas_do_plantio():
+    plantio = datetime.date(2025, 3, 1)
+    validar_datas_plantio(plantio, plantio + datetime.timedelta(days=1), plantio)
+    with pytest.raises(ErroValidacao): validar_datas_plantio(plantio, data_prevista=plantio)
+    with pytest.raises(ErroValidacao): validar_datas_plantio(plantio, data_real=plantio - datetime.timedelta(days=1))
+
+def test_mesma_excecao_nas_gravacoes():
+    assert crud.ErroValidacao is ErroValidacao
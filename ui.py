@@ -1,7 +1,9 @@
 # Importa as funções de operações e relatórios
 import crud_operations as crud
 import reports
-from utils import registrar_erro 
+import importacao
+from utils import registrar_erro, obter_input_validado
+
 def menu_principal():
     """Exibe o menu principal e retorna a escolha do usuário."""
     print("\n--- Agrorgânica Soluções Sustentáveis ---") 
@@ -12,6 +14,8 @@ def menu_principal():
     print("5. Gestão de Demandas")
     print("6. Mercado") 
     print("7. Outras Consultas e Relatórios") 
+    print("8. Importação/Exportação de Dados")
+    print("9. Diagnóstico do Banco")
     print("0. Sair")
     print("-" * 40) 
     return input("Escolha uma opção: ").strip()
@@ -114,6 +118,7 @@ def menu_gestao_demandas(conexao):
         print("1. Registrar Nova Demanda")
         print("2. Listar Demandas") # Adicionado para visualização
         print("3. Excluir Demanda")
+        print("4. Casar Demandas com a Oferta")
         print("0. Voltar ao Menu Principal")
         print("-" * 28)
         opcao = input("Escolha: ").strip()
@@ -121,6 +126,7 @@ def menu_gestao_demandas(conexao):
             if opcao == '1': crud.registrar_demanda(conexao)
             elif opcao == '2': reports.listar_demandas(conexao) # Chama a nova função de listagem
             elif opcao == '3': crud.excluir_demanda(conexao)
+            elif opcao == '4': reports.visualizar_casamento_demandas(conexao)
             elif opcao == '0': break
             else: print("Opção inválida.")
             if opcao != '0': input("\nPressione Enter para continuar...")
@@ -134,15 +140,97 @@ def menu_consultas_relatorios(conexao):
         print("\n--- Outras Consultas e Relatórios ---")
         print("1. Gerar Relatório de Rastreabilidade")
         print("2. Calendário de Colheitas Previstas")
+        print("3. Verificar Índices do Banco")
+        print("4. Relatórios de Rastreabilidade em Lote")
+        print("5. Análise de Rotação (Todos os Talhões)")
+        print("6. Previsão Oferta x Demanda por Semana")
         print("0. Voltar ao Menu Principal")
         print("-" * 38)
         opcao = input("Escolha: ").strip()
         try:
             if opcao == '1': reports.gerar_relatorio_rastreabilidade(conexao)
             elif opcao == '2': reports.visualizar_calendario_colheitas(conexao)
+            elif opcao == '3': reports.verificar_indices_banco(conexao)
+            elif opcao == '4': reports.gerar_relatorios_rastreabilidade_lote(conexao)
+            elif opcao == '5': reports.visualizar_analise_rotacao(conexao)
+            elif opcao == '6': reports.visualizar_previsao_oferta(conexao)
             elif opcao == '0': break
             else: print("Opção inválida.")
-            if opcao in ['1', '2']: input("\nPressione Enter para continuar...")
+            if opcao in ['1', '2', '3', '4', '5', '6']: input("\nPressione Enter para continuar...")
         except Exception as e:
             registrar_erro(f"Erro inesperado no menu de consultas (opção {opcao}): {e}")
-            input("Ocorreu um erro inesperado. Pressione Enter para continuar...")
\ No newline at end of file
+            input("Ocorreu um erro inesperado. Pressione Enter para continuar...")
+
+def menu_diagnostico(conexao):
+    """Menu de diagnóstico: custo das consultas, consultas lentas e pool de sessões."""
+    while True:
+        print("\n--- Diagnóstico do Banco ---")
+        print("1. Estatísticas de Consultas")
+        print("2. Consultas Lentas Recentes")
+        print("3. Pool de Sessões")
+        print("4. Zerar Estatísticas")
+        print("0. Voltar ao Menu Principal")
+        print("-" * 38)
+        opcao = input("Escolha: ").strip()
+        try:
+            if opcao == '1': reports.visualizar_estatisticas_consultas()
+            elif opcao == '2': reports.visualizar_consultas_lentas()
+            elif opcao == '3': reports.visualizar_metricas_pool(conexao)
+            elif opcao == '4': reports.zerar_estatisticas_consultas()
+            elif opcao == '0': break
+            else: print("Opção inválida.")
+            if opcao != '0': input("\nPressione Enter para continuar...")
+        except Exception as e:
+            registrar_erro(f"Erro inesperado no menu de diagnóstico (opção {opcao}): {e}")
+            input("Ocorreu um erro inesperado. Pressione Enter para continuar...")
+
+def importar_dados_lote(conexao):
+    """Importa produtores, talhões, plantios e insumos de um arquivo JSON ou CSV."""
+    if not conexao: registrar_erro("Conexão Oracle inválida."); return False
+    print("\n--- Importação em Lote (JSON/CSV) ---")
+    caminho = obter_input_validado("Caminho do arquivo (.json ou .csv)")
+    if not caminho: return False
+    entidade = None
+    if caminho.lower().endswith('.csv') and importacao.entidade_pelo_nome(caminho) is None:
+        def tipo_valido(x):
+            if x.lower() in importacao.ENTIDADES: return True
+            print("Erro: Tipo inválido."); return False
+        entidade = obter_input_validado(f"Tipo de registro do CSV ({', '.join(importacao.ENTIDADES)})", validacao_extra=tipo_valido)
+        if not entidade: return False
+        entidade = entidade.lower()
+    resumo = importacao.importar_arquivo(conexao, caminho, entidade)
+    if resumo is None: print("Importação não realizada. Verifique o log."); return False
+
+    entidades, duracao = resumo["entidades"], resumo["duracao_s"]
+    total_lidas = 0
+    print(f"\n{'Tipo':<12} {'Lidas':>8} {'Inseridas':>10} {'Ignoradas':>10} {'Rejeitadas':>11}")
+    for entidade, dados in entidades.items():
+        if not dados["lidas"]: continue
+        total_lidas += dados["lidas"]
+        print(f"{entidade:<12} {dados['lidas']:>8} {dados['inseridas']:>10} {dados['ignoradas']:>10} {len(dados['erros']):>11}")
+    print(f"Tempo: {duracao:.1f}s ({total_lidas / duracao if duracao else 0:.0f} linhas/s). Ignoradas = já cadastradas.")
+    for entidade, dados in entidades.items():
+        for numero, mensagem in dados["erros"][:10]: print(f"  [{entidade} linha {numero}] {mensagem}")
+        if len(dados["erros"]) > 10: print(f"  [{entidade}] ... e mais {len(dados['erros']) - 10} rejeitadas.")
+    return True
+
+def menu_importacao_exportacao(conexao):
+    """Menu para carga e extração de dados em lote."""
+    while True:
+        print("\n--- Importação/Exportação de Dados ---")
+        print("1. Importar Arquivo (JSON/CSV)")
+        print("2. Exportar Snapshot Colunar")
+        print("3. Resumo de Snapshot Exportado")
+        print("0. Voltar ao Menu Principal")
+        print("-" * 38)
+        opcao = input("Escolha: ").strip()
+        try:
+            if opcao == '1': importar_dados_lote(conexao)
+            elif opcao == '2': reports.exportar_snapshot(conexao)
+            elif opcao == '3': reports.resumir_snapshot()
+            elif opcao == '0': break
+            else: print("Opção inválida.")
+            if opcao != '0': input("\nPressione Enter para continuar...")
+        except Exception as e:
+            registrar_erro(f"Erro inesperado no menu de importação/exportação (opção {opcao}): {e}")
+            input("Ocorreu um erro inesperado. Pressione Enter para continuar...")
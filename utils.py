@@ -1,25 +1,22 @@
 import datetime
 import os
+import logging
 import config # Garante que config seja importado aqui para acessar ARQUIVO_LOG_ERROS
+import log_estruturado
 
 # --- Funções de Log e Validação ---
 
-def registrar_erro(mensagem):
-    """Registra uma mensagem de erro no arquivo de log."""
-    agora = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    log_mensagem = f"[{agora}] ERRO: {mensagem}\n"
+def registrar_erro(mensagem, erro=None, **contexto):
+    """Mostra o erro na tela e o enfileira no log estruturado (a escrita no arquivo é feita em segundo plano).
+
+    `erro` (a exceção Oracle, se houver) preenche o código ORA; `contexto` aceita operacao, tabela e duracao_ms.
+    """
     print("\n" + "="*10 + " ERRO " + "="*10)
     print(mensagem)
     print("="*26 + "\n")
-    try:
-        with open(config.ARQUIVO_LOG_ERROS, 'a', encoding='utf-8') as f:
-            f.write(log_mensagem)
-    except NameError:
-         print(f"[{agora}] ERRO CRÍTICO: Falha ao acessar config.ARQUIVO_LOG_ERROS para logar.")
-    except IOError as e:
-        print(f"[{agora}] ERRO CRÍTICO: Não foi possível escrever no log {config.ARQUIVO_LOG_ERROS}: {e}")
-    except Exception as e:
-         print(f"[{agora}] ERRO CRÍTICO INESPERADO ao tentar logar: {e}")
+    try: log_estruturado.registrar(logging.ERROR, mensagem, erro=erro, **contexto)
+    except Exception as e: # O log nunca pode derrubar a operação que está reportando um erro
+        print(f"[{datetime.datetime.now():%Y-%m-%d %H:%M:%S}] ERRO CRÍTICO ao registrar no log {config.ARQUIVO_LOG_ERROS}: {e}")
 
 
 def validar_data_br(data_str):
@@ -90,4 +87,4 @@ def formatar_data_br(data_obj):
     """Formata um objeto date ou datetime para DD/MM/YYYY ou retorna 'N/A'."""
     if isinstance(data_obj, (datetime.date, datetime.datetime)):
         return data_obj.strftime('%d/%m/%Y')
-    return 'N/A'
\ No newline at end of file
+    return 'N/A'
@@ -0,0 +1,42 @@
+import datetime
+from utils import validar_data_br
+
+# --- Validação de Campos ---
+# Regras comuns à importação em lote, às gravações de crud_operations, aos comandos sem interface e ao serviço HTTP:
+# cada campo vem de um dict (linha de arquivo, operação JSON ou parâmetros da URL) e é convertido ou rejeitado
+# com ErroValidacao, cuja mensagem vai para o usuário.
+
+STATUS_VALIDOS = ('Planejado', 'Disponível', 'Vendido', 'Cancelado')
+
+class ErroValidacao(ValueError):
+    """Dado rejeitado na validação (a mensagem vai para o resumo da importação ou para quem chamou)."""
+
+def campo_texto(linha, campo, obrigatorio=True, tamanho_max=None):
+    valor = linha.get(campo)
+    valor = str(valor).strip() if valor is not None else ''
+    if not valor:
+        if obrigatorio: raise ErroValidacao(f"campo '{campo}' é obrigatório")
+        return None
+    if tamanho_max and len(valor) > tamanho_max: raise ErroValidacao(f"campo '{campo}' excede {tamanho_max} caracteres")
+    return valor
+
+def campo_numero(linha, campo, obrigatorio=False):
+    valor = linha.get(campo)
+    if valor is None or (isinstance(valor, str) and not valor.strip()):
+        if obrigatorio: raise ErroValidacao(f"campo '{campo}' é obrigatório")
+        return None
+    if isinstance(valor, (int, float)): return valor
+    try: return float(str(valor).strip().replace(',', '.')) # Aceita vírgula decimal
+    except ValueError: raise ErroValidacao(f"campo '{campo}' não é numérico: {valor!r}")
+
+def campo_data(linha, campo, obrigatorio=False):
+    valor = campo_texto(linha, campo, obrigatorio)
+    if valor is None: return None
+    if not validar_data_br(valor): raise ErroValidacao(f"campo '{campo}' deve estar no formato DD/MM/AAAA: {valor!r}")
+    return datetime.datetime.strptime(valor, '%d/%m/%Y').date()
+
+def validar_datas_plantio(data_plantio, data_prevista=None, data_real=None):
+    """Coerência das datas de um plantio (importação e gravações de crud_operations)."""
+    if not data_plantio: return
+    if data_prevista and data_prevista <= data_plantio: raise ErroValidacao("data prevista da colheita deve ser posterior ao plantio")
+    if data_real and data_real < data_plantio: raise ErroValidacao("data real da colheita não pode ser anterior ao plantio")